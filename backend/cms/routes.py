@@ -3,19 +3,21 @@ from fastapi import APIRouter, HTTPException, Request, Depends, Query, Backgroun
 from fastapi.responses import StreamingResponse
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
-import bcrypt
 import jwt
 import uuid
 import csv
 import io
 import stripe
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import asyncio
 import pyotp
 import secrets
 from concurrent.futures import ThreadPoolExecutor
+from mail_transport import mail_transport
+from principal_cache import MISSING, principal_cache
+from password_hasher import password_hasher
+from dashboard_stats import dashboard_stats
 from .models import (
     AdminRole, AdminUserCreate, AdminUserUpdate, AdminLogin, AdminUserResponse,
     UserFilter, UserUpdate, PassFilter, PassUpdate, PassExtend,
@@ -33,18 +35,22 @@ db = None
 JWT_SECRET = None
 JWT_ALGORITHM = "HS256"
 STRIPE_API_KEY = None
+job_queue = None
 
 # CMS Admin notification email
 CMS_NOTIFICATION_EMAIL = "administration@freestays.eu"
 
-def init_cms(database, jwt_secret, stripe_key):
-    """Initialize CMS with database and config"""
-    global db, JWT_SECRET, STRIPE_API_KEY
+def init_cms(database, jwt_secret, stripe_key, jobs=None):
+    """Initialize CMS with database and config (and the server's background job queue)"""
+    global db, JWT_SECRET, STRIPE_API_KEY, job_queue
     db = database
     JWT_SECRET = jwt_secret
     STRIPE_API_KEY = stripe_key
     if stripe_key:
         stripe.api_key = stripe_key
+    job_queue = jobs
+    if job_queue is not None:
+        job_queue.register("cms.notification", run_cms_notification_job, concurrency=2)
 
 
 # ==================== EMAIL NOTIFICATIONS ====================
@@ -79,6 +85,39 @@ async def send_cms_notification(
         print(f"[CMS] SMTP not enabled, skipping notification for: {action}")
         return {"success": False, "message": "SMTP not enabled"}
     
+    # Send from the durable job queue to not block the response (retried on SMTP errors)
+    if background_tasks is not None and job_queue is not None:
+        await job_queue.enqueue("cms.notification", {
+            "subject": subject,
+            "action": action,
+            "admin_email": admin_email,
+            "details": {key: str(value) for key, value in details.items()},
+            "performed_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        })
+        return {"success": True, "message": f"Notification queued for {CMS_NOTIFICATION_EMAIL}"}
+    
+    return await deliver_cms_notification(smtp_settings, subject, action, admin_email, details)
+
+
+async def run_cms_notification_job(payload: dict):
+    """Job queue handler for send_cms_notification"""
+    smtp_settings = await get_smtp_settings()
+    if not smtp_settings or not smtp_settings.get("enabled"):
+        print(f"[CMS] SMTP not enabled, skipping notification for: {payload['action']}")
+        return
+    result = await deliver_cms_notification(
+        smtp_settings, payload["subject"], payload["action"], payload["admin_email"], payload["details"],
+        payload.get("performed_at")
+    )
+    if not result.get("success"):
+        raise RuntimeError(result.get("error", "CMS notification not sent"))
+
+
+async def deliver_cms_notification(smtp_settings: dict, subject: str, action: str, admin_email: str,
+                                   details: dict, performed_at: str = None):
+    """Render and send a CMS admin notification"""
+    performed_at = performed_at or datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+    
     # Build HTML email
     details_html = ""
     for key, value in details.items():
@@ -128,7 +167,7 @@ async def send_cms_notification(
                             <strong style="color: #1e3a5f;">Performed by:</strong> {admin_email}
                         </p>
                         <p style="margin: 10px 0 0 0; color: #666; font-size: 14px;">
-                            <strong style="color: #1e3a5f;">Time:</strong> {datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")}
+                            <strong style="color: #1e3a5f;">Time:</strong> {performed_at}
                         </p>
                     </div>
                     
@@ -155,34 +194,22 @@ async def send_cms_notification(
     </html>
     """
     
-    def send_email_sync():
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = f"[FreeStays CMS] {subject}"
-            msg["From"] = f"{smtp_settings['from_name']} <{smtp_settings['from_email']}>"
-            msg["To"] = CMS_NOTIFICATION_EMAIL
-            
-            msg.attach(MIMEText(html_content, "html"))
-            
-            with smtplib.SMTP(smtp_settings["host"], smtp_settings["port"]) as server:
-                server.starttls()
-                server.login(smtp_settings["username"], smtp_settings["password"])
-                server.sendmail(smtp_settings["from_email"], CMS_NOTIFICATION_EMAIL, msg.as_string())
-            
-            print(f"[CMS] Notification sent to {CMS_NOTIFICATION_EMAIL}: {subject}")
-            return {"success": True}
-        except Exception as e:
-            print(f"[CMS] Failed to send notification: {e}")
-            return {"success": False, "error": str(e)}
-    
-    # Send in background to not block the response
-    if background_tasks:
-        background_tasks.add_task(asyncio.get_event_loop().run_in_executor, None, send_email_sync)
-    else:
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, send_email_sync)
-    
-    return {"success": True, "message": f"Notification queued for {CMS_NOTIFICATION_EMAIL}"}
+    try:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = f"[FreeStays CMS] {subject}"
+        msg["From"] = f"{smtp_settings['from_name']} <{smtp_settings['from_email']}>"
+        msg["To"] = CMS_NOTIFICATION_EMAIL
+        
+        msg.attach(MIMEText(html_content, "html"))
+        
+        await mail_transport.send(smtp_settings, msg, from_addr=smtp_settings["from_email"],
+                                  to_addrs=[CMS_NOTIFICATION_EMAIL])
+        
+        print(f"[CMS] Notification sent to {CMS_NOTIFICATION_EMAIL}: {subject}")
+        return {"success": True}
+    except Exception as e:
+        print(f"[CMS] Failed to send notification: {e}")
+        return {"success": False, "error": str(e)}
 
 
 # ==================== AUTHENTICATION ====================
@@ -194,6 +221,10 @@ async def get_current_admin(request: Request) -> dict:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = auth_header.split(" ")[1]
+    cached = principal_cache.get("cms_admin", token)
+    if cached is not MISSING:
+        return dict(cached)
+    generation = principal_cache.generation
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         if payload.get("type") != "cms_admin":
@@ -203,6 +234,8 @@ async def get_current_admin(request: Request) -> dict:
         if not admin or not admin.get("is_active"):
             raise HTTPException(status_code=401, detail="Admin account disabled")
         
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc) if payload.get("exp") else None
+        principal_cache.set("cms_admin", token, dict(admin), [f"admin:{admin['admin_id']}"], generation, expires_at)
         return admin
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -249,9 +282,17 @@ async def cms_login(credentials: AdminLogin, request: Request):
     if not admin.get("is_active"):
         raise HTTPException(status_code=401, detail="Account disabled")
     
-    if not bcrypt.checkpw(credentials.password.encode(), admin["password_hash"].encode()):
+    if not await password_hasher.verify(credentials.password, admin.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    # Upgrade the stored hash when BCRYPT_ROUNDS changed since it was made
+    new_hash = await password_hasher.rehash_if_needed(credentials.password, admin["password_hash"])
+    if new_hash:
+        await db.admin_users.update_one(
+            {"admin_id": admin["admin_id"], "password_hash": admin["password_hash"]},
+            {"$set": {"password_hash": new_hash}}
+        )
+    
     # Generate JWT token
     token_payload = {
         "admin_id": admin["admin_id"],
@@ -328,7 +369,7 @@ async def create_admin_user(
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    password_hash = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt()).decode()
+    password_hash = await password_hasher.hash(user_data.password)
     
     new_admin = {
         "admin_id": str(uuid.uuid4()),
@@ -386,6 +427,8 @@ async def update_admin_user(
     
     if updates:
         await db.admin_users.update_one({"admin_id": admin_id}, {"$set": updates})
+        # Role changes and deactivation take effect on the admin's next request
+        await principal_cache.invalidate(f"admin:{admin_id}", reason="admin update")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "update_admin", "admin",
@@ -426,6 +469,7 @@ async def delete_admin_user(
     result = await db.admin_users.delete_one({"admin_id": admin_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Admin not found")
+    await principal_cache.invalidate(f"admin:{admin_id}", reason="admin deleted")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "delete_admin", "admin",
@@ -454,52 +498,19 @@ async def delete_admin_user(
 @cms_router.get("/dashboard/stats")
 async def get_dashboard_stats(admin: dict = Depends(get_current_admin)):
     """Get dashboard statistics"""
-    now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # User stats
-    total_users = await db.users.count_documents({})
-    active_users = await db.users.count_documents({"is_suspended": {"$ne": True}})
-    
-    # Pass stats
-    total_passes = await db.users.count_documents({"pass_type": {"$exists": True, "$ne": None}})
-    active_passes = await db.users.count_documents({
-        "pass_type": {"$exists": True, "$ne": None},
-        "pass_expiry": {"$gt": now}
-    })
-    
-    # Payment stats
-    pipeline = [
-        {"$match": {"status": "paid"}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    total_revenue_result = await db.payments.aggregate(pipeline).to_list(1)
-    total_revenue = total_revenue_result[0]["total"] if total_revenue_result else 0
-    
-    pipeline_monthly = [
-        {"$match": {"status": "paid", "created_at": {"$gte": month_start}}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    monthly_revenue_result = await db.payments.aggregate(pipeline_monthly).to_list(1)
-    monthly_revenue = monthly_revenue_result[0]["total"] if monthly_revenue_result else 0
-    
-    # Booking stats
-    total_bookings = await db.bookings.count_documents({})
-    monthly_bookings = await db.bookings.count_documents({"created_at": {"$gte": month_start}})
-    
-    # Pending refunds
-    pending_refunds = await db.payments.count_documents({"status": "refund_pending"})
+    # Materialized counters, kept current on user/booking/payment writes (see dashboard_stats.py)
+    stats = await dashboard_stats.read()
     
     return {
-        "total_users": total_users,
-        "active_users": active_users,
-        "total_passes": total_passes,
-        "active_passes": active_passes,
-        "total_revenue": round(total_revenue, 2),
-        "monthly_revenue": round(monthly_revenue, 2),
-        "total_bookings": total_bookings,
-        "monthly_bookings": monthly_bookings,
-        "pending_refunds": pending_refunds
+        "total_users": stats["total_users"],
+        "active_users": stats["active_users"],
+        "total_passes": stats["total_passes"],
+        "active_passes": stats["active_passes"],
+        "total_revenue": round(stats["total_revenue"], 2),
+        "monthly_revenue": round(stats["monthly_revenue"], 2),
+        "total_bookings": stats["total_bookings"],
+        "monthly_bookings": stats["monthly_bookings"],
+        "pending_refunds": stats["pending_refunds"]
     }
 
 
@@ -643,6 +654,8 @@ async def update_user(
     updates["updated_at"] = datetime.now(timezone.utc)
     
     await db.users.update_one({"user_id": user_id}, {"$set": updates})
+    await principal_cache.invalidate(f"user:{user_id}", reason="admin user update")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "update_user", "user",
@@ -673,6 +686,8 @@ async def suspend_user(
             "suspended_by": admin["admin_id"]
         }}
     )
+    await principal_cache.invalidate(f"user:{user_id}", reason="suspension")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "suspend_user", "user",
@@ -713,6 +728,8 @@ async def reactivate_user(
         {"$set": {"is_suspended": False},
          "$unset": {"suspension_reason": "", "suspended_at": "", "suspended_by": ""}}
     )
+    await principal_cache.invalidate(f"user:{user_id}", reason="reactivation")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "reactivate_user", "user",
@@ -880,6 +897,8 @@ async def activate_pass(
             "pass_activated_by": admin["admin_id"]
         }}
     )
+    await principal_cache.invalidate(f"user:{user_id}", reason="pass activated")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "activate_pass", "pass",
@@ -930,6 +949,8 @@ async def deactivate_pass(
         },
          "$unset": {"pass_type": "", "pass_expiry": ""}}
     )
+    await principal_cache.invalidate(f"user:{user_id}", reason="pass deactivated")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "deactivate_pass", "pass",
@@ -989,6 +1010,8 @@ async def extend_pass(
              "new_expiry": new_expiry
          }}}
     )
+    await principal_cache.invalidate(f"user:{user_id}", reason="pass extended")
+    await dashboard_stats.mark_stale("users")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "extend_pass", "pass",
@@ -1124,6 +1147,9 @@ async def refund_payment(
                 "refunded_by": admin["admin_id"]
             }}
         )
+        await dashboard_stats.record_change(
+            "payments", payment, {**payment, "status": "refunded" if not refund_amount else "partially_refunded"}
+        )
         
         # If full refund, deactivate pass
         if not refund_amount and payment.get("user_id"):
@@ -1131,6 +1157,8 @@ async def refund_payment(
                 {"user_id": payment["user_id"]},
                 {"$unset": {"pass_type": "", "pass_expiry": ""}}
             )
+            await principal_cache.invalidate(f"user:{payment['user_id']}", reason="refund")
+            await dashboard_stats.mark_stale("users")
         
         client_ip = request.client.host if request.client else None
         await log_audit(admin["admin_id"], admin["email"], "refund_payment", "payment",
@@ -1480,7 +1508,7 @@ async def verify_2fa_setup(
     
     # Generate backup codes
     backup_codes = [secrets.token_hex(4).upper() for _ in range(8)]
-    hashed_backups = [bcrypt.hashpw(c.encode(), bcrypt.gensalt()).decode() for c in backup_codes]
+    hashed_backups = await asyncio.gather(*[password_hasher.hash(c) for c in backup_codes])
     
     # Enable 2FA
     await db.admin_users.update_one(
@@ -1493,6 +1521,7 @@ async def verify_2fa_setup(
         },
         "$unset": {"two_factor_temp_secret": "", "two_factor_setup_at": ""}}
     )
+    await principal_cache.invalidate(f"admin:{admin['admin_id']}", reason="two-factor change")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "enable_2fa", "admin",
@@ -1525,7 +1554,7 @@ async def validate_2fa_code(
     # Try backup codes
     backup_codes = admin_user.get("two_factor_backup_codes", [])
     for i, hashed_code in enumerate(backup_codes):
-        if bcrypt.checkpw(verify_data.code.upper().encode(), hashed_code.encode()):
+        if await password_hasher.verify(verify_data.code.upper(), hashed_code):
             # Remove used backup code
             backup_codes.pop(i)
             await db.admin_users.update_one(
@@ -1547,7 +1576,7 @@ async def disable_2fa(
     admin_user = await db.admin_users.find_one({"admin_id": admin["admin_id"]})
     
     # Verify password
-    if not bcrypt.checkpw(password.encode(), admin_user["password_hash"].encode()):
+    if not await password_hasher.verify(password, admin_user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid password")
     
     await db.admin_users.update_one(
@@ -1559,6 +1588,7 @@ async def disable_2fa(
             "two_factor_enabled_at": ""
         }}
     )
+    await principal_cache.invalidate(f"admin:{admin['admin_id']}", reason="two-factor change")
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "disable_2fa", "admin",
@@ -1868,6 +1898,8 @@ async def check_fraud_rules(user_id: str, action_type: str, metadata: dict = Non
                         "suspended_at": now
                     }}
                 )
+                await principal_cache.invalidate(f"user:{user_id}", reason="fraud auto-suspension")
+                await dashboard_stats.mark_stale("users")
 
 
 @cms_router.post("/pass/validate-enhanced")
@@ -2523,29 +2555,22 @@ async def send_daily_summary_email():
     </html>
     """
     
-    def send_email_sync():
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = f"📊 FreeStays Daily Summary - {data['date']}"
-            msg["From"] = f"{smtp_settings['from_name']} <{smtp_settings['from_email']}>"
-            msg["To"] = CMS_NOTIFICATION_EMAIL
-            
-            msg.attach(MIMEText(html_content, "html"))
-            
-            with smtplib.SMTP(smtp_settings["host"], smtp_settings["port"]) as server:
-                server.starttls()
-                server.login(smtp_settings["username"], smtp_settings["password"])
-                server.sendmail(smtp_settings["from_email"], CMS_NOTIFICATION_EMAIL, msg.as_string())
-            
-            print(f"[CMS] Daily summary report sent to {CMS_NOTIFICATION_EMAIL}")
-            return {"success": True}
-        except Exception as e:
-            print(f"[CMS] Failed to send daily summary: {e}")
-            return {"success": False, "error": str(e)}
-    
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(None, send_email_sync)
-    return result
+    try:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = f"📊 FreeStays Daily Summary - {data['date']}"
+        msg["From"] = f"{smtp_settings['from_name']} <{smtp_settings['from_email']}>"
+        msg["To"] = CMS_NOTIFICATION_EMAIL
+        
+        msg.attach(MIMEText(html_content, "html"))
+        
+        await mail_transport.send(smtp_settings, msg, from_addr=smtp_settings["from_email"],
+                                  to_addrs=[CMS_NOTIFICATION_EMAIL])
+        
+        print(f"[CMS] Daily summary report sent to {CMS_NOTIFICATION_EMAIL}")
+        return {"success": True}
+    except Exception as e:
+        print(f"[CMS] Failed to send daily summary: {e}")
+        return {"success": False, "error": str(e)}
 
 
 @cms_router.get("/reports/daily-summary")
@@ -2661,6 +2686,7 @@ async def sync_stripe_data(
                             {"stripe_payment_intent": pi.id},
                             {"$set": update_data}
                         )
+                        await dashboard_stats.record_change("payments", existing, {**existing, **update_data})
                         updated_count += 1
                 else:
                     # Create new payment record
@@ -2678,6 +2704,7 @@ async def sync_stripe_data(
                         "source": "stripe_sync"
                     }
                     await db.payments.insert_one(payment)
+                    await dashboard_stats.record("payments", payment)
                     synced_count += 1
                     if user_email:
                         enriched_count += 1
@@ -2979,6 +3006,7 @@ async def mark_b2b_order_paid(
         "created_at": datetime.now(timezone.utc)
     }
     await db.payments.insert_one(payment)
+    await dashboard_stats.record("payments", payment)
     
     client_ip = request.client.host if request.client else None
     await log_audit(admin["admin_id"], admin["email"], "mark_b2b_paid", "b2b",
@@ -0,0 +1,274 @@
+"""Materialized admin dashboard counters over users, bookings and payments"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_MATERIALIZED = os.environ.get('DASHBOARD_STATS_MATERIALIZED', 'true').lower() == 'true'
+DASHBOARD_STATS_RECONCILE_MINUTES = int(os.environ.get('DASHBOARD_STATS_RECONCILE_MINUTES', '10'))
+
+# Section (one stats document each) -> source collection
+SECTIONS = {"users": "users", "bookings": "bookings", "payments": "payments"}
+
+PASS_HOLDER_TYPES = ("one_time", "annual")
+
+
+def month_start(now: datetime) -> datetime:
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month_start(now: datetime) -> datetime:
+    start = month_start(now)
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def as_utc(value):
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _count(match: Dict) -> list:
+    return [{"$match": match}, {"$count": "n"}] if match else [{"$count": "n"}]
+
+
+def _sum(match: Dict, field: str) -> list:
+    return [{"$match": match}, {"$group": {"_id": None, "n": {"$sum": f"${field}"}}}]
+
+
+def facet_pipeline(section: str, now: datetime) -> list:
+    """
+    One $facet over the section's collection with the same filters the dashboards
+    used to run as separate queries (datetime comparisons only match BSON dates,
+    exactly as before).
+    """
+    since = month_start(now)
+    if section == "users":
+        has_pass = {"pass_type": {"$exists": True, "$ne": None}}
+        facets = {
+            "total_users": _count({}),
+            "active_users": _count({"is_suspended": {"$ne": True}}),
+            "total_passes": _count(has_pass),
+            "active_passes": [{"$match": {**has_pass, "pass_expiry": {"$gt": now}}},
+                              {"$group": {"_id": None, "n": {"$sum": 1}, "next_expiry": {"$min": "$pass_expiry"}}}],
+            "pass_holders": _count({"pass_type": {"$in": list(PASS_HOLDER_TYPES)}}),
+            "annual_pass_holders": _count({"pass_type": "annual"})
+        }
+    elif section == "bookings":
+        facets = {
+            "total_bookings": _count({}),
+            "monthly_bookings": _count({"created_at": {"$gte": since}}),
+            "confirmed_bookings": [{"$match": {"status": "confirmed"}},
+                                   {"$group": {"_id": None, "n": {"$sum": 1}, "revenue": {"$sum": "$final_price"}}}],
+            "pending_bookings": _count({"status": "pending_payment"})
+        }
+    else:
+        facets = {
+            "total_revenue": _sum({"status": "paid"}, "amount"),
+            "monthly_revenue": _sum({"status": "paid", "created_at": {"$gte": since}}, "amount"),
+            "pending_refunds": _count({"status": "refund_pending"})
+        }
+    return [{"$facet": facets}]
+
+
+def facet_values(section: str, result: Dict, now: datetime) -> Tuple[Dict, Optional[datetime]]:
+    """Flatten a $facet result into counters plus the moment they go stale on their own"""
+    values = {name: (rows[0]["n"] if rows else 0) for name, rows in result.items()}
+    # Monthly counters reset at the next month; never left open-ended so $min can bring it forward
+    valid_until = next_month_start(now)
+    if section == "users":
+        rows = result.get("active_passes") or []
+        next_expiry = as_utc(rows[0].get("next_expiry")) if rows else None
+        if isinstance(next_expiry, datetime):
+            valid_until = min(valid_until, next_expiry)
+    elif section == "bookings":
+        rows = result.get("confirmed_bookings") or []
+        values["confirmed_revenue"] = (rows[0].get("revenue") or 0) if rows else 0
+    return values, valid_until
+
+
+def document_deltas(section: str, doc: Dict, now: datetime) -> Dict[str, float]:
+    """What one document contributes to the section's counters (mirrors facet_pipeline)"""
+    if not doc:
+        return {}
+    since = month_start(now)
+    deltas: Dict[str, float] = {}
+    if section == "users":
+        deltas["total_users"] = 1
+        deltas["active_users"] = int(doc.get("is_suspended") is not True)
+        has_pass = doc.get("pass_type") is not None
+        deltas["total_passes"] = int(has_pass)
+        expiry = as_utc(doc.get("pass_expiry"))
+        deltas["active_passes"] = int(has_pass and isinstance(expiry, datetime) and expiry > now)
+        deltas["pass_holders"] = int(doc.get("pass_type") in PASS_HOLDER_TYPES)
+        deltas["annual_pass_holders"] = int(doc.get("pass_type") == "annual")
+    elif section == "bookings":
+        created_at = as_utc(doc.get("created_at"))
+        confirmed = doc.get("status") == "confirmed"
+        deltas["total_bookings"] = 1
+        deltas["monthly_bookings"] = int(isinstance(created_at, datetime) and created_at >= since)
+        deltas["confirmed_bookings"] = int(confirmed)
+        deltas["confirmed_revenue"] = (doc.get("final_price") or 0) if confirmed else 0
+        deltas["pending_bookings"] = int(doc.get("status") == "pending_payment")
+    else:
+        created_at = as_utc(doc.get("created_at"))
+        paid = doc.get("status") == "paid"
+        deltas["total_revenue"] = (doc.get("amount") or 0) if paid else 0
+        deltas["monthly_revenue"] = deltas["total_revenue"] if isinstance(created_at, datetime) and created_at >= since else 0
+        deltas["pending_refunds"] = int(doc.get("status") == "refund_pending")
+    return deltas
+
+
+class DashboardStats:
+    """
+    Dashboard counters kept in one small document per section (`dashboard_stats`
+    collection, _id "users" / "bookings" / "payments"). Writers report inserts and
+    changes with record()/record_change(), which apply a $inc; writes that are
+    awkward to express as a delta call mark_stale() instead. A section is
+    recomputed with a single $facet when it is stale, past its valid_until (month
+    rollover, next pass expiry) or on the periodic reconcile(), which also repairs
+    any drift from missed or racing increments. With DASHBOARD_STATS_MATERIALIZED
+    off, or if the stats collection cannot be read, read() runs the three $facet
+    queries concurrently instead.
+    """
+
+    def __init__(self, materialized: bool = DASHBOARD_STATS_MATERIALIZED):
+        self.materialized = materialized
+        self.db = None
+        self.metrics = {"reads": 0, "recomputed": 0, "increments": 0, "marked_stale": 0,
+                        "reconciliations": 0, "fallbacks": 0}
+
+    @property
+    def collection(self):
+        return self.db.dashboard_stats
+
+    def start(self, db):
+        self.db = db
+
+    async def compute(self, section: str, now: Optional[datetime] = None) -> Tuple[Dict, Optional[datetime]]:
+        now = now or datetime.now(timezone.utc)
+        rows = await self.db[SECTIONS[section]].aggregate(facet_pipeline(section, now)).to_list(1)
+        return facet_values(section, rows[0] if rows else {}, now)
+
+    async def compute_all(self) -> Dict:
+        """Fallback: every section straight from its collection, concurrently"""
+        now = datetime.now(timezone.utc)
+        results = await asyncio.gather(*[self.compute(section, now) for section in SECTIONS])
+        values = {}
+        for section_values, _ in results:
+            values.update(section_values)
+        return values
+
+    async def refresh(self, section: str, seq: Optional[int]) -> Dict:
+        """
+        Recompute a section and store it, unless an increment landed while the
+        aggregation ran (seq moved): then that result is returned but not stored and
+        the next read recomputes.
+        """
+        values, valid_until = await self.compute(section)
+        update = {"$set": {"values": values, "valid_until": valid_until, "dirty": False,
+                           "computed_at": datetime.now(timezone.utc)}}
+        query = {"_id": section, "seq": seq if seq is not None else {"$exists": False}}
+        if seq is None:
+            update["$setOnInsert"] = {"seq": 0}
+        try:
+            await self.collection.update_one(query, update, upsert=seq is None)
+        except DuplicateKeyError:
+            pass
+        self.metrics["recomputed"] += 1
+        return values
+
+    async def read(self) -> Dict:
+        """All counters, recomputing only the sections that are missing or stale"""
+        self.metrics["reads"] += 1
+        if not self.materialized:
+            return await self.compute_all()
+        try:
+            docs = {doc["_id"]: doc async for doc in self.collection.find({"_id": {"$in": list(SECTIONS)}})}
+            now = datetime.now(timezone.utc)
+
+            async def section_values(section: str) -> Dict:
+                doc = docs.get(section)
+                valid_until = as_utc(doc.get("valid_until")) if doc else None
+                if doc is None or doc.get("dirty") or (valid_until is not None and valid_until <= now):
+                    return await self.refresh(section, doc.get("seq") if doc else None)
+                return doc["values"]
+
+            values = {}
+            for section_result in await asyncio.gather(*[section_values(section) for section in SECTIONS]):
+                values.update(section_result)
+            return values
+        except Exception as e:
+            logger.warning(f"Materialized dashboard stats unavailable, computing directly: {e}")
+            self.metrics["fallbacks"] += 1
+            return await self.compute_all()
+
+    async def _apply(self, section: str, deltas: Dict[str, float], expiry: Optional[datetime] = None):
+        deltas = {f"values.{name}": value for name, value in deltas.items() if value}
+        if not self.materialized or self.db is None or not deltas:
+            return
+        update = {"$inc": {**deltas, "seq": 1}}
+        if isinstance(expiry, datetime):
+            update["$min"] = {"valid_until": expiry}
+        try:
+            # No upsert: a section that was never computed is built by the next read
+            await self.collection.update_one({"_id": section}, update)
+            self.metrics["increments"] += 1
+        except Exception as e:
+            logger.warning(f"Dashboard stats increment failed ({section}): {e}")
+            await self.mark_stale(section)
+
+    async def record(self, section: str, doc: Dict):
+        """Count a newly inserted document"""
+        now = datetime.now(timezone.utc)
+        await self._apply(section, document_deltas(section, doc, now), self._expiry(section, doc, now))
+
+    async def record_change(self, section: str, before: Dict, after: Optional[Dict]):
+        """Move a document's contribution from its old to its new state (after=None for a delete)"""
+        now = datetime.now(timezone.utc)
+        old = document_deltas(section, before, now)
+        new = document_deltas(section, after, now) if after is not None else {}
+        deltas = {name: new.get(name, 0) - old.get(name, 0) for name in set(old) | set(new)}
+        await self._apply(section, deltas, self._expiry(section, after, now))
+
+    @staticmethod
+    def _expiry(section: str, doc: Optional[Dict], now: datetime) -> Optional[datetime]:
+        """A new active pass that expires before the section's valid_until brings it forward"""
+        if section != "users" or not doc:
+            return None
+        expiry = as_utc(doc.get("pass_expiry"))
+        return expiry if isinstance(expiry, datetime) and expiry > now and doc.get("pass_type") is not None else None
+
+    async def mark_stale(self, *sections: str):
+        """Have the next read recompute these sections"""
+        if not self.materialized or self.db is None:
+            return
+        try:
+            await self.collection.update_many({"_id": {"$in": list(sections)}}, {"$set": {"dirty": True}, "$inc": {"seq": 1}})
+            self.metrics["marked_stale"] += 1
+        except Exception as e:
+            logger.warning(f"Could not mark dashboard stats stale ({', '.join(sections)}): {e}")
+
+    async def reconcile(self) -> Dict:
+        """Recompute every section from its collection, repairing any drift"""
+        docs = {doc["_id"]: doc async for doc in self.collection.find({"_id": {"$in": list(SECTIONS)}}, {"seq": 1})}
+        values = {}
+        for section in SECTIONS:
+            values.update(await self.refresh(section, docs.get(section, {}).get("seq")))
+        self.metrics["reconciliations"] += 1
+        return values
+
+    async def status(self) -> Dict:
+        sections = {}
+        if self.db is not None:
+            async for doc in self.collection.find({"_id": {"$in": list(SECTIONS)}}, {"values": 0}):
+                sections[doc.pop("_id")] = doc
+        return {**self.metrics, "materialized": self.materialized, "sections": sections}
+
+
+dashboard_stats = DashboardStats()
@@ -1,7 +1,10 @@
 """PostgreSQL database configuration and queries"""
+import asyncio
 import asyncpg
 import logging
 import os
+from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -11,52 +14,168 @@ PG_PORT = int(os.environ.get('PG_PORT', '5432'))
 PG_USER = os.environ.get('PG_USER', '')
 PG_PASSWORD = os.environ.get('PG_PASSWORD', '')
 PG_DATABASE = os.environ.get('PG_DATABASE', '')
+PG_POOL_MIN_SIZE = int(os.environ.get('PG_POOL_MIN_SIZE', '1'))
+PG_POOL_MAX_SIZE = int(os.environ.get('PG_POOL_MAX_SIZE', '10'))
+PG_COMMAND_TIMEOUT = float(os.environ.get('PG_COMMAND_TIMEOUT', '2'))
+
+# Creates pg_trgm and the trigram indexes used by search_destinations_postgres
+DESTINATION_SEARCH_MIGRATION = Path(__file__).parent / "scripts" / "pg_destinations_trgm.sql"
+DESTINATION_SEARCH_MIGRATION_NAME = "pg_destinations_trgm"
+
+# Applied migrations are recorded here (the .sql files insert their own row) so a boot
+# only checks one row; the advisory lock keeps concurrent workers from racing the DDL.
+SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS freestays_schema_migrations (
+        name TEXT PRIMARY KEY,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+SCHEMA_MIGRATIONS_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('freestays_schema_migrations'))"
+
+# Trigram-indexed search: substring match (GIN gin_trgm_ops index), prefix matches first,
+# then by similarity. asyncpg prepares each statement once per pooled connection.
+DESTINATION_SEARCH_TRGM_SQL = """
+    SELECT
+        "DestinationId" as destination_id,
+        "Name" as name,
+        "Country" as country,
+        "CountryId" as country_id,
+        "CountryCode" as country_code,
+        "DestinationCode" as destination_code
+    FROM sunhotels_destinations_cache
+    WHERE LOWER("Name") LIKE $1
+       OR LOWER("Country") LIKE $1
+    ORDER BY LOWER("Name") LIKE $2 DESC,
+             GREATEST(similarity(LOWER("Name"), $3), similarity(LOWER("Country"), $3)) DESC
+    LIMIT 10
+"""
+
+# Used when pg_trgm is not installed (sequential scan)
+DESTINATION_SEARCH_LIKE_SQL = """
+    SELECT
+        "DestinationId" as destination_id,
+        "Name" as name,
+        "Country" as country,
+        "CountryId" as country_id,
+        "CountryCode" as country_code,
+        "DestinationCode" as destination_code
+    FROM sunhotels_destinations_cache
+    WHERE LOWER("Name") LIKE $1
+       OR LOWER("Country") LIKE $1
+    LIMIT 10
+"""
+
+pg_pool: Optional[asyncpg.Pool] = None
+pg_pool_lock = asyncio.Lock()
+pg_trgm_available = False
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def get_pg_pool() -> Optional[asyncpg.Pool]:
+    """Get or create the PostgreSQL connection pool (None when PostgreSQL is not configured)"""
+    global pg_pool, pg_trgm_available
+    if pg_pool is not None or not PG_HOST:
+        return pg_pool
+    # Concurrent first requests wait for the one pool instead of each creating their own
+    async with pg_pool_lock:
+        if pg_pool is not None:
+            return pg_pool
+        try:
+            pg_pool = await asyncpg.create_pool(
+                host=PG_HOST,
+                port=PG_PORT,
+                user=PG_USER,
+                password=PG_PASSWORD,
+                database=PG_DATABASE,
+                min_size=PG_POOL_MIN_SIZE,
+                max_size=PG_POOL_MAX_SIZE,
+                command_timeout=PG_COMMAND_TIMEOUT,
+                max_inactive_connection_lifetime=300
+            )
+            async with pg_pool.acquire() as conn:
+                pg_trgm_available = bool(await conn.fetchval(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                ))
+            logger.info(f"✓ PostgreSQL connection pool created (pg_trgm={pg_trgm_available})")
+        except Exception as e:
+            logger.error(f"Failed to create PostgreSQL pool: {e}")
+            pg_pool = None
+    return pg_pool
+
+
+async def close_pg_pool():
+    """Close PostgreSQL connection pool on shutdown"""
+    global pg_pool
+    if pg_pool:
+        await pg_pool.close()
+        pg_pool = None
+        logger.info("PostgreSQL connection pool closed")
+
+
+async def migrate_destination_search() -> bool:
+    """
+    Apply scripts/pg_destinations_trgm.sql (pg_trgm extension + trigram indexes) once,
+    recorded in freestays_schema_migrations; later boots only check that row. Returns
+    False when the database user lacks the required privileges.
+    """
+    global pg_trgm_available
+    pool = await get_pg_pool()
+    if not pool:
+        return False
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(SCHEMA_MIGRATIONS_LOCK_SQL)
+                await conn.execute(SCHEMA_MIGRATIONS_SQL)
+                applied = await conn.fetchval(
+                    "SELECT 1 FROM freestays_schema_migrations WHERE name = $1", DESTINATION_SEARCH_MIGRATION_NAME
+                )
+                if not applied:
+                    await conn.execute(DESTINATION_SEARCH_MIGRATION.read_text())
+            pg_trgm_available = bool(await conn.fetchval("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if not applied:
+            logger.info("✓ PostgreSQL destination search indexes created")
+        logger.info(f"✓ PostgreSQL destination search indexes ready (pg_trgm={pg_trgm_available})")
+        return pg_trgm_available
+    except Exception as e:
+        logger.warning(f"PostgreSQL destination search migration skipped: {e}")
+        return False
+
 
 async def search_destinations_postgres(query: str):
     """Search destinations from PostgreSQL sunhotels_destinations_cache"""
+    pool = await get_pg_pool()
+    if not pool:
+        return []
+
     try:
-        conn = await asyncpg.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            user=PG_USER,
-            password=PG_PASSWORD,
-            database=PG_DATABASE
-        )
-        
-        try:
-            results = await conn.fetch("""
-                SELECT 
-                    "DestinationId" as destination_id,
-                    "Name" as name,
-                    "Country" as country,
-                    "CountryId" as country_id,
-                    "CountryCode" as country_code,
-                    "DestinationCode" as destination_code
-                FROM sunhotels_destinations_cache
-                WHERE LOWER("Name") LIKE $1 
-                   OR LOWER("Country") LIKE $1
-                LIMIT 10
-            """, f"%{query.lower()}%")
-            
-            destinations = []
-            for row in results:
-                destinations.append({
-                    "id": str(row["destination_id"]),
-                    "name": row["name"],
-                    "country": row["country"],
-                    "country_id": str(row["country_id"] or ""),
-                    "city_id": str(row["destination_id"]),  # Use destination_id as city_id
-                    "resort_id": "",  # Optional
-                    "type": "city",
-                    "display": f"{row['name']}, {row['country']}"
-                })
-            
-            logger.info(f"✅ PostgreSQL: Found {len(destinations)} destinations for '{query}'")
-            return destinations
-            
-        finally:
-            await conn.close()
-            
+        term = escape_like(query.lower().strip())
+        async with pool.acquire() as conn:
+            if pg_trgm_available:
+                results = await conn.fetch(DESTINATION_SEARCH_TRGM_SQL, f"%{term}%", f"{term}%", query.lower().strip())
+            else:
+                results = await conn.fetch(DESTINATION_SEARCH_LIKE_SQL, f"%{term}%")
+
+        destinations = []
+        for row in results:
+            destinations.append({
+                "id": str(row["destination_id"]),
+                "name": row["name"],
+                "country": row["country"],
+                "country_id": str(row["country_id"] or ""),
+                "city_id": str(row["destination_id"]),  # Use destination_id as city_id
+                "resort_id": "",  # Optional
+                "type": "city",
+                "display": f"{row['name']}, {row['country']}"
+            })
+
+        logger.info(f"✅ PostgreSQL: Found {len(destinations)} destinations for '{query}'")
+        return destinations
+
     except Exception as e:
         logger.error(f"PostgreSQL error: {str(e)}")
         return []
@@ -0,0 +1,231 @@
+"""Persistent IMAP session with an async interface"""
+import asyncio
+import contextlib
+import imaplib
+import logging
+import os
+import re
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+IMAP_TIMEOUT = float(os.environ.get('IMAP_TIMEOUT', '30'))
+IMAP_FETCH_BATCH = int(os.environ.get('IMAP_FETCH_BATCH', '20'))  # message bodies per FETCH
+IMAP_IDLE_TIMEOUT = float(os.environ.get('IMAP_IDLE_TIMEOUT', '300'))  # re-issue IDLE (servers drop it after ~30 min)
+
+FETCH_UID = re.compile(rb'UID (\d+)')
+
+# Errors after which the session is reopened and the command retried once
+RECONNECT_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+
+def uid_set(uids: Iterable[int]) -> str:
+    return ",".join(str(uid) for uid in uids)
+
+
+def parse_fetch(data: List) -> Dict[int, bytes]:
+    """Map UID -> literal from an imaplib FETCH response"""
+    messages = {}
+    for item in data:
+        if isinstance(item, tuple) and len(item) == 2:
+            match = FETCH_UID.search(item[0])
+            if match:
+                messages[int(match.group(1))] = item[1]
+    return messages
+
+
+class IMAPMailbox:
+    """
+    One logged-in IMAP session on one mailbox, kept open across checks. imaplib is
+    blocking, so every command runs on the mailbox's own single thread; the event
+    loop only awaits. Commands are addressed by UID, so callers can remember the
+    last UID they processed and scan only newer mail. A dropped connection is
+    reopened (and the command retried once) transparently.
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str, mailbox: str = "INBOX",
+                 use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.mailbox = mailbox
+        self.use_ssl = use_ssl
+        self.uidvalidity: Optional[int] = None
+        self.capabilities: set = set()
+        self._imap: Optional[imaplib.IMAP4] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="imap")
+        self._wake = threading.Event()
+        self._holders = 0
+        self.metrics = {"connects": 0, "commands": 0, "idle_wakeups": 0}
+
+    @property
+    def supports_idle(self) -> bool:
+        return "IDLE" in self.capabilities
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect_sync(self):
+        self._close_sync()
+        if self.use_ssl:
+            imap = imaplib.IMAP4_SSL(self.host, self.port, timeout=IMAP_TIMEOUT)
+        else:
+            imap = imaplib.IMAP4(self.host, self.port, timeout=IMAP_TIMEOUT)
+        imap.login(self.username, self.password)
+        typ, data = imap.capability()
+        self.capabilities = set(data[0].decode().upper().split()) if typ == "OK" and data and data[0] else set()
+        typ, _ = imap.select(self.mailbox)
+        if typ != "OK":
+            raise imaplib.IMAP4.error(f"Cannot select {self.mailbox}")
+        _, validity = imap.response("UIDVALIDITY")
+        self.uidvalidity = int(validity[0]) if validity and validity[0] else None
+        self._imap = imap
+        self.metrics["connects"] += 1
+
+    def _close_sync(self):
+        imap, self._imap = self._imap, None
+        if imap is not None:
+            try:
+                imap.logout()
+            except Exception:
+                pass
+
+    def _command_sync(self, command: str, *args):
+        """UID command on the open session (reconnecting once if it dropped)"""
+        for attempt in (0, 1):
+            if self._imap is None:
+                self._connect_sync()
+            try:
+                self.metrics["commands"] += 1
+                typ, data = self._imap.uid(command, *args)
+            except RECONNECT_ERRORS:
+                self._imap = None
+                if attempt:
+                    raise
+                continue
+            if typ != "OK":
+                raise imaplib.IMAP4.error(f"UID {command} failed: {data}")
+            return data
+
+    async def connect(self):
+        """Open the session now (commands otherwise connect on first use)"""
+        if self._imap is None:
+            await self._run(self._connect_sync)
+
+    async def search(self, after_uid: int = 0, criteria: str = "ALL") -> List[int]:
+        """UIDs above after_uid matching the IMAP search criteria, ascending"""
+        data = await self._run(self._command_sync, "SEARCH", f"UID {after_uid + 1}:*", criteria)
+        # "n:*" always includes the highest UID, even when it is below n
+        return sorted(uid for uid in map(int, (data[0] or b"").split()) if uid > after_uid)
+
+    async def fetch_headers(self, uids: List[int], fields: str = "SUBJECT FROM DATE MESSAGE-ID") -> Dict[int, bytes]:
+        """Raw header blocks by UID, without setting \\Seen"""
+        if not uids:
+            return {}
+        data = await self._run(self._command_sync, "FETCH", uid_set(uids), f"(UID BODY.PEEK[HEADER.FIELDS ({fields})])")
+        return parse_fetch(data)
+
+    async def fetch_messages(self, uids: List[int], batch_size: int = IMAP_FETCH_BATCH) -> Dict[int, bytes]:
+        """Full RFC822 messages by UID, fetched batch_size per command, without setting \\Seen"""
+        messages = {}
+        for i in range(0, len(uids), batch_size):
+            data = await self._run(self._command_sync, "FETCH", uid_set(uids[i:i + batch_size]), "(UID BODY.PEEK[])")
+            messages.update(parse_fetch(data))
+        return messages
+
+    async def mark_seen(self, uids: List[int]):
+        if uids:
+            await self._run(self._command_sync, "STORE", uid_set(uids), "+FLAGS.SILENT", "(\\Seen)")
+
+    def wake(self):
+        """Interrupt a running idle() so a waiting command can use the session"""
+        self._wake.set()
+
+    @contextlib.asynccontextmanager
+    async def hold(self):
+        """
+        Claim the session for a run of commands: interrupts a running idle(), and an
+        idle() started before the block ends returns at once instead of sending IDLE.
+        """
+        self._holders += 1
+        self._wake.set()
+        try:
+            yield self
+        finally:
+            self._holders -= 1
+            if not self._holders:
+                self._wake.clear()
+
+    def _idle_sync(self, timeout: float) -> Optional[bool]:
+        """IDLE until new mail, wake() or timeout; None when the server has no IDLE"""
+        if self._imap is None:
+            self._connect_sync()
+        if not self.supports_idle:
+            return None
+        if self._wake.is_set():
+            return False
+        imap = self._imap
+        tag = imap._new_tag()
+        imap.send(tag + b" IDLE\r\n")
+        line = imap._get_line()
+        if not line.startswith(b"+"):
+            imap.tagged_commands.pop(tag, None)
+            raise imaplib.IMAP4.error(f"IDLE refused: {line!r}")
+
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        while not self._wake.is_set() and time.monotonic() < deadline:
+            pending = getattr(imap.sock, "pending", None)
+            if not (pending and pending()) and not select.select([imap.sock], [], [], 1.0)[0]:
+                continue
+            line = imap._get_line()
+            if line.endswith(b"EXISTS") or line.endswith(b"RECENT"):
+                new_mail = True
+                break
+            if line.startswith(b"* BYE"):
+                raise imaplib.IMAP4.abort(line.decode(errors="replace"))
+
+        imap.send(b"DONE\r\n")
+        while not imap._get_line().startswith(tag):
+            pass
+        imap.tagged_commands.pop(tag, None)
+        return new_mail
+
+    async def idle(self, timeout: float = IMAP_IDLE_TIMEOUT) -> bool:
+        """
+        Wait for new mail with IMAP IDLE, up to timeout seconds or until wake() or
+        hold(). Returns True when the server announced new messages. The session is opened
+        first so its capabilities are known; without IDLE support this simply
+        sleeps for the timeout (polling).
+        """
+        try:
+            new_mail = await self._run(self._idle_sync, timeout)
+            if new_mail is None:
+                deadline = time.monotonic() + timeout
+                while not self._wake.is_set() and time.monotonic() < deadline:
+                    await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+                return False
+        except RECONNECT_ERRORS:
+            await self._run(self._close_sync)
+            raise
+        if new_mail:
+            self.metrics["idle_wakeups"] += 1
+        return new_mail
+
+    async def close(self):
+        self.wake()
+        await self._run(self._close_sync)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        return {
+            **self.metrics,
+            "connected": self._imap is not None,
+            "idle_supported": self.supports_idle,
+            "uidvalidity": self.uidvalidity
+        }
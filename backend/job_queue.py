@@ -0,0 +1,346 @@
+"""MongoDB-backed durable background job queue"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_POLL_INTERVAL = float(os.environ.get('JOB_QUEUE_POLL_INTERVAL', '2'))
+JOB_QUEUE_LEASE_SECONDS = int(os.environ.get('JOB_QUEUE_LEASE_SECONDS', '60'))
+JOB_QUEUE_RETENTION_HOURS = int(os.environ.get('JOB_QUEUE_RETENTION_HOURS', '24'))
+# Per-type worker overrides, e.g. "email=8,cache.warm=1"
+JOB_QUEUE_CONCURRENCY = os.environ.get('JOB_QUEUE_CONCURRENCY', '')
+
+JobHandler = Callable[[Dict], Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job is dead-lettered at once"""
+
+
+def parse_concurrency_overrides(value: str) -> Dict[str, int]:
+    """Parse "type=n,type=n" into {type: n}"""
+    overrides = {}
+    for item in value.split(","):
+        job_type, _, count = item.strip().partition("=")
+        if job_type and count.strip().isdigit():
+            overrides[job_type.strip()] = max(1, int(count))
+    return overrides
+
+
+class JobQueue:
+    """
+    Durable job queue stored in one MongoDB collection.
+
+    Jobs are leased with find_one_and_update (status queued -> leased) so any number
+    of API workers can consume the same queue. A running job's lease is extended by
+    a heartbeat; a lease that expires (crashed or restarted worker) makes the job
+    available again. Failures are retried with exponential backoff and jitter until
+    max_attempts, then the job stays in the collection with status "dead".
+    Completed jobs are removed by a TTL index after JOB_QUEUE_RETENTION_HOURS.
+    """
+
+    def __init__(self, collection, poll_interval: float = JOB_QUEUE_POLL_INTERVAL,
+                 lease_seconds: int = JOB_QUEUE_LEASE_SECONDS):
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers: Dict[str, Dict] = {}
+        self._overrides = parse_concurrency_overrides(JOB_QUEUE_CONCURRENCY)
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._running: Dict[str, Dict[str, asyncio.Task]] = {}
+        self._metrics: Dict[str, Dict] = {}
+        self._stopping = False
+
+    def register(self, job_type: str, handler: JobHandler, concurrency: int = 1, max_attempts: int = 5,
+                 backoff_base: float = 30.0, backoff_max: float = 3600.0, timeout: Optional[float] = None):
+        """Register the async handler and worker pool size of a job type"""
+        self.handlers[job_type] = {
+            "handler": handler,
+            "concurrency": self._overrides.get(job_type, concurrency),
+            "max_attempts": max_attempts,
+            "backoff_base": backoff_base,
+            "backoff_max": backoff_max,
+            "timeout": timeout
+        }
+        self._metrics.setdefault(job_type, {
+            "completed": 0, "retried": 0, "dead": 0,
+            "run_ms": deque(maxlen=200), "wait_ms": deque(maxlen=200)
+        })
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("type", 1), ("status", 1), ("run_at", 1)])
+        await self.collection.create_index([("status", 1), ("finished_at", 1)])
+        await self.collection.create_index("dedupe_key", unique=True, sparse=True)
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def enqueue(self, job_type: str, payload: Optional[Dict] = None, delay: float = 0,
+                      dedupe_key: Optional[str] = None, max_attempts: Optional[int] = None) -> Optional[str]:
+        """
+        Store a job and return its id. With a dedupe_key, nothing is enqueued while a
+        job with the same key is still queued or running (returns that job's id).
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = datetime.now(timezone.utc)
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload or {},
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or self.handlers[job_type]["max_attempts"],
+            "created_at": now,
+            "run_at": now + timedelta(seconds=delay),
+            "last_error": None
+        }
+        if dedupe_key:
+            job["dedupe_key"] = dedupe_key
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"dedupe_key": dedupe_key}, {"job_id": 1})
+            return existing["job_id"] if existing else None
+        if delay <= 0 and job_type in self._wakeups:
+            self._wakeups[job_type].set()
+        return job["job_id"]
+
+    async def start(self):
+        """Start one poller per registered job type"""
+        await self.ensure_indexes()
+        self._stopping = False
+        for job_type in self.handlers:
+            if job_type not in self._pollers:
+                self._wakeups[job_type] = asyncio.Event()
+                self._running[job_type] = {}
+                self._pollers[job_type] = asyncio.create_task(self._poll_loop(job_type))
+        logger.info(f"✓ Job queue started ({len(self.handlers)} job types, worker {self.worker_id})")
+
+    async def stop(self):
+        """Stop polling and hand running jobs back to the queue without using an attempt"""
+        # wait_for() can swallow a cancellation that races a wakeup, so pollers also check the flag
+        self._stopping = True
+        pollers = list(self._pollers.values())
+        for task in pollers:
+            task.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self._pollers.clear()
+
+        running = [task for tasks in self._running.values() for task in tasks.values()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        self._running.clear()
+
+    async def _poll_loop(self, job_type: str):
+        config = self.handlers[job_type]
+        slots = asyncio.Semaphore(config["concurrency"])
+        wakeup = self._wakeups[job_type]
+        while not self._stopping:
+            await slots.acquire()
+            try:
+                job = await self._lease(job_type)
+            except asyncio.CancelledError:
+                slots.release()
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue lease failed for {job_type}: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._run(job, config))
+            self._running[job_type][job["job_id"]] = task
+
+            def finished(_task, job_id=job["job_id"]):
+                self._running.get(job_type, {}).pop(job_id, None)
+                slots.release()
+
+            task.add_done_callback(finished)
+
+    async def _lease(self, job_type: str) -> Optional[Dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"type": job_type, "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {"status": "leased", "lease_expires_at": {"$lt": now}}
+            ]},
+            {"$set": {
+                "status": "leased",
+                "lease_owner": self.worker_id,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "started_at": now
+            }, "$inc": {"attempts": 1}},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            result = await self.collection.update_one(
+                {"job_id": job_id, "status": "leased", "lease_owner": self.worker_id},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)}}
+            )
+            if result.matched_count == 0:
+                logger.warning(f"Job {job_id[:8]} lost its lease")
+                return
+
+    async def _run(self, job: Dict, config: Dict):
+        job_id = job["job_id"]
+        job_type = job["type"]
+        metrics = self._metrics[job_type]
+        owned = {"job_id": job_id, "lease_owner": self.worker_id, "status": "leased"}
+
+        if job["attempts"] > job["max_attempts"]:
+            # Lease expired on the last attempt (worker crashed mid-job)
+            await self._dead_letter(owned, job, "Lease expired on final attempt")
+            return
+
+        created_at = job["created_at"].replace(tzinfo=timezone.utc) if job["created_at"].tzinfo is None else job["created_at"]
+        wait_ms = (datetime.now(timezone.utc) - created_at).total_seconds() * 1000
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        start = time.perf_counter()
+        try:
+            if config["timeout"]:
+                await asyncio.wait_for(config["handler"](job["payload"]), timeout=config["timeout"])
+            else:
+                await config["handler"](job["payload"])
+        except asyncio.CancelledError:
+            await asyncio.shield(self.collection.update_one(owned, {
+                "$set": {"status": "queued", "run_at": datetime.now(timezone.utc), "lease_owner": None},
+                "$inc": {"attempts": -1}
+            }))
+            raise
+        except PermanentJobError as e:
+            await self._dead_letter(owned, job, str(e))
+            return
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:1000]
+            if job["attempts"] >= job["max_attempts"]:
+                await self._dead_letter(owned, job, error)
+                return
+            delay = min(config["backoff_max"], config["backoff_base"] * 2 ** (job["attempts"] - 1))
+            delay *= random.uniform(0.8, 1.2)
+            await self.collection.update_one(owned, {"$set": {
+                "status": "queued",
+                "run_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+                "lease_owner": None,
+                "last_error": error
+            }})
+            metrics["retried"] += 1
+            logger.warning(f"🔁 Job {job_type} {job_id[:8]} failed (attempt {job['attempts']}/{job['max_attempts']}), "
+                           f"retry in {delay:.0f}s: {error}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        run_ms = (time.perf_counter() - start) * 1000
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(owned, {
+            "$set": {
+                "status": "done",
+                "finished_at": now,
+                "expires_at": now + timedelta(hours=JOB_QUEUE_RETENTION_HOURS),
+                "run_ms": round(run_ms, 1),
+                "wait_ms": round(wait_ms, 1),
+                "lease_owner": None
+            },
+            "$unset": {"dedupe_key": ""}
+        })
+        metrics["completed"] += 1
+        metrics["run_ms"].append(run_ms)
+        metrics["wait_ms"].append(wait_ms)
+
+    async def _dead_letter(self, owned: Dict, job: Dict, error: str):
+        await self.collection.update_one(owned, {
+            "$set": {"status": "dead", "finished_at": datetime.now(timezone.utc), "last_error": error,
+                     "lease_owner": None},
+            "$unset": {"dedupe_key": ""}
+        })
+        self._metrics[job["type"]]["dead"] += 1
+        logger.error(f"☠️ Job {job['type']} {job['job_id'][:8]} dead-lettered after {job['attempts']} attempts: {error}")
+
+    async def retry(self, job_id: str) -> bool:
+        """Move a dead-lettered job back to the queue with a fresh attempt budget"""
+        job = await self.collection.find_one_and_update(
+            {"job_id": job_id, "status": "dead"},
+            {"$set": {"status": "queued", "attempts": 0, "run_at": datetime.now(timezone.utc), "finished_at": None}}
+        )
+        if job and job["type"] in self._wakeups:
+            self._wakeups[job["type"]].set()
+        return job is not None
+
+    async def stats(self) -> Dict:
+        """Queue depth per status, last-hour throughput and latency per job type"""
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        depth = {}
+        async for row in self.collection.aggregate([
+            {"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}
+        ]):
+            depth.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        recent = {}
+        async for row in self.collection.aggregate([
+            {"$match": {"status": {"$in": ["done", "dead"]}, "finished_at": {"$gte": since}}},
+            {"$group": {
+                "_id": {"type": "$type", "status": "$status"},
+                "count": {"$sum": 1},
+                "avg_wait_ms": {"$avg": "$wait_ms"},
+                "avg_run_ms": {"$avg": "$run_ms"},
+                "max_run_ms": {"$max": "$run_ms"}
+            }}
+        ]):
+            entry = recent.setdefault(row["_id"]["type"], {"completed": 0, "dead": 0})
+            if row["_id"]["status"] == "done":
+                entry.update({
+                    "completed": row["count"],
+                    "avg_wait_ms": round(row["avg_wait_ms"] or 0, 1),
+                    "avg_run_ms": round(row["avg_run_ms"] or 0, 1),
+                    "max_run_ms": round(row["max_run_ms"] or 0, 1)
+                })
+            else:
+                entry["dead"] = row["count"]
+
+        types = {}
+        for job_type in sorted(set(self.handlers) | set(depth)):
+            config = self.handlers.get(job_type, {})
+            metrics = self._metrics.get(job_type)
+            local = {}
+            if metrics:
+                run_ms = sorted(metrics["run_ms"])
+                wait_ms = sorted(metrics["wait_ms"])
+                local = {
+                    "completed": metrics["completed"],
+                    "retried": metrics["retried"],
+                    "dead": metrics["dead"],
+                    "running": len(self._running.get(job_type, {})),
+                    "p50_run_ms": round(run_ms[len(run_ms) // 2], 1) if run_ms else None,
+                    "p95_run_ms": round(run_ms[min(len(run_ms) - 1, int(len(run_ms) * 0.95))], 1) if run_ms else None,
+                    "p95_wait_ms": round(wait_ms[min(len(wait_ms) - 1, int(len(wait_ms) * 0.95))], 1) if wait_ms else None
+                }
+            types[job_type] = {
+                "concurrency": config.get("concurrency"),
+                "max_attempts": config.get("max_attempts"),
+                "depth": depth.get(job_type, {}),
+                "last_hour": recent.get(job_type, {"completed": 0, "dead": 0}),
+                "this_worker": local
+            }
+        return {"worker_id": self.worker_id, "running": bool(self._pollers), "types": types}
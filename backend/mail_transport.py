@@ -0,0 +1,216 @@
+"""Pooled SMTP transport shared by all email senders"""
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', '4'))  # sessions (and concurrent sends) per account
+SMTP_SESSION_MAX_IDLE = float(os.environ.get('SMTP_SESSION_MAX_IDLE', '60'))  # seconds before an idle session is closed
+SMTP_SESSION_MAX_MESSAGES = int(os.environ.get('SMTP_SESSION_MAX_MESSAGES', '100'))  # messages before reconnecting
+SMTP_SEND_RETRIES = int(os.environ.get('SMTP_SEND_RETRIES', '2'))
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '30'))
+SMTP_QUEUE_WORKERS = int(os.environ.get('SMTP_QUEUE_WORKERS', '4'))
+
+# Errors where a fresh session may succeed; anything else (auth, 5xx) fails at once
+RETRYABLE_SMTP_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError, OSError)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    return isinstance(error, RETRYABLE_SMTP_ERRORS)
+
+
+class SMTPSession:
+    """One connected, authenticated smtplib session (used from the transport's threads only)"""
+
+    def __init__(self, settings: Dict):
+        host, port = settings["host"], int(settings["port"])
+        if settings.get("use_ssl") or port == 465:
+            self.smtp = smtplib.SMTP_SSL(host, port, timeout=SMTP_TIMEOUT)
+        else:
+            self.smtp = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+            if settings.get("starttls", True):
+                self.smtp.starttls()
+        if settings.get("username"):
+            self.smtp.login(settings["username"], settings["password"])
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+    def send(self, msg: Message, from_addr: Optional[str], to_addrs: Optional[List[str]]):
+        self.smtp.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+        self.messages += 1
+        self.last_used = time.monotonic()
+
+    def expired(self) -> bool:
+        return (self.messages >= SMTP_SESSION_MAX_MESSAGES
+                or time.monotonic() - self.last_used > SMTP_SESSION_MAX_IDLE)
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPPool:
+    """Idle sessions and a concurrency bound for one SMTP account"""
+
+    def __init__(self, size: int):
+        self.semaphore = asyncio.Semaphore(size)
+        self.idle: List[SMTPSession] = []
+
+
+class MailTransport:
+    """
+    Async facade over smtplib: sessions are opened (connect, STARTTLS, login) once
+    and reused across messages, per account (host, port, username). All blocking
+    smtplib calls run on the transport's own thread pool, never on the event loop.
+    send() awaits delivery with per-message retry on a fresh session; submit() puts
+    the message on an in-process send queue and returns a future.
+    """
+
+    def __init__(self, pool_size: int = SMTP_POOL_SIZE, retries: int = SMTP_SEND_RETRIES,
+                 queue_workers: int = SMTP_QUEUE_WORKERS):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.queue_workers = queue_workers
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="smtp")
+        self._pools: Dict[Tuple, SMTPPool] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.metrics = {
+            "sent": 0, "failed": 0, "retries": 0,
+            "sessions_opened": 0, "sessions_reused": 0, "send_ms_total": 0.0
+        }
+
+    @staticmethod
+    def account_key(settings: Dict) -> Tuple:
+        return (settings["host"], int(settings["port"]), settings.get("username") or "",
+                settings.get("password") or "", bool(settings.get("use_ssl")), settings.get("starttls", True))
+
+    def _pool(self, settings: Dict) -> SMTPPool:
+        key = self.account_key(settings)
+        pool = self._pools.get(key)
+        if pool is None:
+            # Same account with changed password or TLS mode: its old sessions are not reused
+            for old_key in [k for k in self._pools if k[:3] == key[:3]]:
+                self._close_idle(self._pools.pop(old_key))
+            pool = self._pools[key] = SMTPPool(self.pool_size)
+        return pool
+
+    def _close_idle(self, pool: SMTPPool):
+        sessions, pool.idle = pool.idle, []
+        for session in sessions:
+            self._executor.submit(session.close)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _checkout(self, settings: Dict, pool: SMTPPool) -> SMTPSession:
+        while pool.idle:
+            session = pool.idle.pop()
+            if not session.expired():
+                self.metrics["sessions_reused"] += 1
+                return session
+            self._executor.submit(session.close)
+        session = await self._run(SMTPSession, settings)
+        self.metrics["sessions_opened"] += 1
+        return session
+
+    async def send(self, settings: Dict, msg: Message, from_addr: Optional[str] = None,
+                   to_addrs: Optional[List[str]] = None):
+        """Send one message; raises the smtplib error after the last failed attempt"""
+        pool = self._pool(settings)
+        start = time.perf_counter()
+        async with pool.semaphore:
+            attempt = 0
+            while True:
+                session = None
+                try:
+                    session = await self._checkout(settings, pool)
+                    await self._run(session.send, msg, from_addr, to_addrs)
+                except Exception as e:
+                    if session is not None:
+                        self._executor.submit(session.close)
+                    if attempt >= self.retries or not is_retryable(e):
+                        self.metrics["failed"] += 1
+                        raise
+                    attempt += 1
+                    self.metrics["retries"] += 1
+                    logger.warning(f"SMTP send failed ({e}), retrying ({attempt}/{self.retries})")
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+                    continue
+                pool.idle.append(session)
+                break
+        self.metrics["sent"] += 1
+        self.metrics["send_ms_total"] += (time.perf_counter() - start) * 1000
+
+    def submit(self, settings: Dict, msg: Message, from_addr: Optional[str] = None,
+               to_addrs: Optional[List[str]] = None) -> asyncio.Future:
+        """Queue a message for the send workers; the future resolves when it is sent (or failed)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._send_worker()) for _ in range(self.queue_workers)]
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((settings, msg, from_addr, to_addrs, future))
+        return future
+
+    async def _send_worker(self):
+        while True:
+            settings, msg, from_addr, to_addrs, future = await self._queue.get()
+            try:
+                await self.send(settings, msg, from_addr, to_addrs)
+                if not future.done():
+                    future.set_result(True)
+            except Exception as e:
+                logger.error(f"Queued email to {msg.get('To')} failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def close(self):
+        """Flush the send queue and close all sessions"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning(f"SMTP send queue closed with {self._queue.qsize()} unsent messages")
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._queue, self._workers = None, []
+        sessions = [session for pool in self._pools.values() for session in pool.idle]
+        self._pools.clear()
+        if sessions:
+            await asyncio.gather(*[self._run(session.close) for session in sessions], return_exceptions=True)
+            logger.info(f"SMTP transport closed ({len(sessions)} sessions)")
+
+    def stats(self) -> Dict:
+        sent = self.metrics["sent"]
+        return {
+            "sent": sent,
+            "failed": self.metrics["failed"],
+            "retries": self.metrics["retries"],
+            "sessions_opened": self.metrics["sessions_opened"],
+            "sessions_reused": self.metrics["sessions_reused"],
+            "idle_sessions": sum(len(pool.idle) for pool in self._pools.values()),
+            "avg_send_ms": round(self.metrics["send_ms_total"] / sent, 1) if sent else None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pool_size": self.pool_size
+        }
+
+
+mail_transport = MailTransport()
@@ -0,0 +1,105 @@
+"""bcrypt password hashing off the event loop"""
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))  # cost factor: each +1 doubles the work
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+BCRYPT_COST = re.compile(r'^\$2[aby]?\$(\d{2})\$')
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash, or None when it is not one"""
+    match = BCRYPT_COST.match(hashed or "")
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords on a small dedicated thread pool (bcrypt releases
+    the GIL while it works), so a login costs the event loop an await instead of
+    ~0.25 s of blocked requests. At most `workers` hashes run at once; further
+    logins wait their turn without blocking anything else. Hashes made with a
+    different cost than `rounds` are reported by needs_rehash() so callers can
+    upgrade them on the next successful login.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = PASSWORD_HASH_WORKERS):
+        self.rounds = rounds
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.metrics = {"hashed": 0, "verified": 0, "rejected": 0, "rehashed": 0}
+        self._duration_ms = deque(maxlen=1000)
+
+    async def _run(self, fn, *args):
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._duration_ms.append((time.perf_counter() - start) * 1000)
+
+    def _hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _verify_sync(password: str, hashed: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        except ValueError:
+            # Empty or malformed stored hash (e.g. OAuth-only accounts)
+            return False
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(self._hash_sync, password)
+        self.metrics["hashed"] += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        if not hashed:
+            self.metrics["rejected"] += 1
+            return False
+        ok = await self._run(self._verify_sync, password, hashed)
+        self.metrics["verified" if ok else "rejected"] += 1
+        return ok
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True for a bcrypt hash made with a different cost factor than configured"""
+        rounds = hash_rounds(hashed)
+        return rounds is not None and rounds != self.rounds
+
+    async def rehash_if_needed(self, password: str, hashed: str) -> Optional[str]:
+        """New hash at the configured cost for a just-verified password, or None if current"""
+        if not self.needs_rehash(hashed):
+            return None
+        self.metrics["rehashed"] += 1
+        return await self.hash(password)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    def stats(self) -> Dict:
+        durations = sorted(self._duration_ms)
+        return {
+            **self.metrics,
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "pending": self._pending,
+            "avg_ms": round(sum(durations) / len(durations), 1) if durations else None,
+            "p95_ms": round(durations[max(0, int(len(durations) * 0.95) - 1)], 1) if durations else None
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,215 @@
+"""Short-lived cache of authenticated principals (users and admins) by credential"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL', '30'))  # seconds a resolved credential is trusted
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', '20000'))
+PRINCIPAL_CACHE_SYNC_INTERVAL = float(os.environ.get('PRINCIPAL_CACHE_SYNC_INTERVAL', '2'))  # cross-worker invalidation poll
+PRINCIPAL_CACHE_ENABLED = os.environ.get('PRINCIPAL_CACHE_ENABLED', 'true').lower() == 'true'
+
+MISSING = object()
+
+
+def credential_hash(token: str) -> str:
+    """Credentials are never kept in memory or MongoDB in clear text"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def user_subjects(user: Dict) -> list:
+    """Invalidation subjects of a users document"""
+    subjects = []
+    if user.get("user_id"):
+        subjects.append(f"user:{user['user_id']}")
+    if user.get("email"):
+        subjects.append(f"email:{user['email'].lower()}")
+    return subjects
+
+
+class PrincipalCache:
+    """
+    Maps a credential (session token, bearer JWT, CMS admin token) to what it
+    resolved to, for at most `ttl` seconds and never past the credential's own
+    expiry, evicting the least recently used entry beyond `max_entries`. Entries
+    are tagged with subjects ("user:<id>", "email:<addr>",
+    "admin:<id>", "credential:<hash>"); invalidate() drops every entry of a
+    subject in this process at once and, through a small capped MongoDB
+    collection polled every PRINCIPAL_CACHE_SYNC_INTERVAL seconds, in all other
+    workers. Only successful lookups are cached.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+                 enabled: bool = PRINCIPAL_CACHE_ENABLED):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled and ttl > 0
+        self.collection = None
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._subjects: Dict[str, Set[str]] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self._synced_until: Optional[datetime] = None
+        self._applied: Dict[Any, datetime] = {}  # invalidations already seen in the overlap window
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evicted": 0,
+                        "invalidations": 0, "remote_invalidations": 0}
+
+    @staticmethod
+    def _key(kind: str, token: str) -> str:
+        return f"{kind}:{credential_hash(token)}"
+
+    def get(self, kind: str, token: str) -> Any:
+        """Cached principal for the credential, or MISSING"""
+        if not self.enabled:
+            return MISSING
+        key = self._key(kind, token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return MISSING
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            self.metrics["expired"] += 1
+            self.metrics["misses"] += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.metrics["hits"] += 1
+        return entry[1]
+
+    def set(self, kind: str, token: str, value: Any, subjects: Iterable[str], generation: int,
+            expires_at: Optional[datetime] = None):
+        """
+        Cache a principal resolved from the database. `generation` is the value read
+        before the lookup: if anything was invalidated meanwhile the result may be
+        stale and is not stored.
+        """
+        if not self.enabled or generation != self.generation:
+            return
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+        key = self._key(kind, token)
+        self._drop(key)
+        tags = tuple(subjects) + (f"credential:{credential_hash(token)}",)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for subject in tags:
+            self._subjects.setdefault(subject, set()).add(key)
+        self.metrics["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.metrics["evicted"] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for subject in entry[2]:
+            keys = self._subjects.get(subject)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._subjects[subject]
+
+    def _evict(self, subjects: Iterable[str], bump: bool = True) -> int:
+        """
+        Drop every entry tagged with the subjects. A local invalidation always bumps
+        the generation (a lookup in flight may already have read the old state); a
+        replayed remote one only does so when it actually dropped something.
+        """
+        dropped = 0
+        for subject in subjects:
+            for key in list(self._subjects.get(subject, ())):
+                self._drop(key)
+                dropped += 1
+        if bump or dropped:
+            self.generation += 1
+        return dropped
+
+    async def invalidate(self, *subjects: str, reason: str = ""):
+        """Forget every cached credential of the subjects, in this and all other workers"""
+        subjects = [s for s in subjects if s and not s.endswith(":None")]
+        if not subjects:
+            return
+        self._evict(subjects)
+        self.metrics["invalidations"] += 1
+        if self.collection is not None:
+            now = datetime.now(timezone.utc)
+            try:
+                await self.collection.insert_one({
+                    "subjects": subjects,
+                    "reason": reason,
+                    "created_at": now,
+                    # Other workers' entries are gone by then anyway
+                    "expires_at": now + timedelta(seconds=max(self.ttl, PRINCIPAL_CACHE_SYNC_INTERVAL) * 4)
+                })
+            except Exception as e:
+                logger.warning(f"Principal cache invalidation not shared ({reason}): {e}")
+
+    async def invalidate_credential(self, token: str, reason: str = ""):
+        await self.invalidate(f"credential:{credential_hash(token)}", reason=reason)
+
+    async def start(self, collection):
+        """Share invalidations with other workers through `collection`"""
+        self.collection = collection
+        if not self.enabled:
+            return
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+        await collection.create_index("created_at")
+        self._synced_until = datetime.now(timezone.utc)
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(PRINCIPAL_CACHE_SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Principal cache sync failed: {str(e)[:100]}")
+
+    async def sync(self):
+        """Apply invalidations written by other workers (re-applying our own is harmless)"""
+        # Overlap a little so inserts from workers with a slightly slower clock are not missed;
+        # documents already applied within the overlap are skipped
+        since = self._synced_until - timedelta(seconds=2)
+        latest = self._synced_until
+        async for doc in self.collection.find({"created_at": {"$gt": since}}, {"subjects": 1, "created_at": 1}):
+            created_at = doc["created_at"]
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            latest = max(latest, created_at)
+            if doc["_id"] in self._applied:
+                continue
+            self._applied[doc["_id"]] = created_at
+            if self._evict(doc["subjects"], bump=False):
+                self.metrics["remote_invalidations"] += 1
+        self._synced_until = latest
+        horizon = latest - timedelta(seconds=2)
+        self._applied = {doc_id: at for doc_id, at in self._applied.items() if at > horizon}
+
+    async def stop(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+
+    def stats(self) -> Dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "hit_rate": f"{self.metrics['hits'] / lookups * 100:.1f}%" if lookups else None
+        }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,188 @@
+"""Concurrent web-push delivery for PWA subscriptions"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+PUSH_CONCURRENCY = int(os.environ.get('PUSH_CONCURRENCY', '16'))  # pushes encrypted/in flight at once
+PUSH_TIMEOUT = float(os.environ.get('PUSH_TIMEOUT', '10'))  # seconds per push service request
+PUSH_TTL = int(os.environ.get('PUSH_TTL', '86400'))  # seconds the push service keeps an undelivered message
+PUSH_PAGE_SIZE = int(os.environ.get('PUSH_PAGE_SIZE', '500'))  # subscriptions per cursor batch
+VAPID_TOKEN_LIFETIME = 12 * 3600  # the maximum push services accept
+VAPID_TOKEN_REFRESH = 3600  # re-sign when less than this is left
+
+# Push service answers meaning the subscription no longer exists
+GONE_STATUS_CODES = (404, 410)
+
+
+def push_origin(endpoint: str) -> str:
+    url = urlparse(endpoint)
+    return f"{url.scheme}://{url.netloc}"
+
+
+def p95(values: List[float]) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 1)
+
+
+class PushDispatcher:
+    """
+    Sends one notification to many subscriptions. Subscriptions are streamed from
+    a MongoDB cursor; payload encryption (ECDH per subscription) and the HTTP POST
+    run on the dispatcher's thread pool with keep-alive sessions per thread, at
+    most `concurrency` at a time. VAPID Authorization headers are signed once per
+    push-service origin and reused until shortly before they expire. Subscriptions
+    the push service reports gone (404/410) are deactivated in one write per
+    broadcast.
+    """
+
+    def __init__(self, vapid_private_key: str, claims_email: str, concurrency: int = PUSH_CONCURRENCY):
+        self.vapid_private_key = vapid_private_key
+        self.claims_email = claims_email
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="webpush")
+        self._local = threading.local()
+        self._vapid = None
+        self._vapid_headers: Dict[str, Tuple[Dict, float]] = {}
+        self.metrics = {"broadcasts": 0, "sent": 0, "failed": 0, "deactivated": 0, "vapid_signed": 0}
+        self._latency_ms = deque(maxlen=1000)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.vapid_private_key)
+
+    def vapid_headers(self, endpoint: str) -> Dict:
+        """Signed VAPID headers for the endpoint's push service origin (cached)"""
+        origin = push_origin(endpoint)
+        now = time.time()
+        cached = self._vapid_headers.get(origin)
+        if cached and cached[1] - now > VAPID_TOKEN_REFRESH:
+            return cached[0]
+        if self._vapid is None:
+            from py_vapid import Vapid
+            self._vapid = Vapid.from_string(private_key=self.vapid_private_key)
+        expires = int(now) + VAPID_TOKEN_LIFETIME
+        headers = self._vapid.sign({"sub": f"mailto:{self.claims_email}", "aud": origin, "exp": expires})
+        self._vapid_headers[origin] = (headers, expires)
+        self.metrics["vapid_signed"] += 1
+        return headers
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+
+    def _send_sync(self, subscription_info: Dict, data: str, headers: Dict) -> int:
+        """Encrypt and POST one message (runs on the dispatcher's threads)"""
+        from pywebpush import WebPusher
+        response = WebPusher(subscription_info, requests_session=self._session()).send(
+            data, dict(headers), ttl=PUSH_TTL, content_encoding="aes128gcm", timeout=PUSH_TIMEOUT
+        )
+        return response.status_code
+
+    async def send(self, subscription_info: Dict, data: str) -> Tuple[bool, Optional[int]]:
+        """Deliver to one subscription; returns (delivered, HTTP status or None on a transport error)"""
+        headers = self.vapid_headers(subscription_info["endpoint"])
+        start = time.perf_counter()
+        try:
+            status = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._send_sync, subscription_info, data, headers
+            )
+        except Exception as e:
+            logger.debug(f"Push to {subscription_info.get('endpoint', '')[:60]} failed: {e}")
+            return False, None
+        finally:
+            self._latency_ms.append((time.perf_counter() - start) * 1000)
+        if status in (401, 403):
+            # Rejected token: sign a fresh one for this origin next time
+            self._vapid_headers.pop(push_origin(subscription_info["endpoint"]), None)
+        return status <= 202, status
+
+    async def broadcast(self, collection, query: Dict, notification: Dict, subscription_field: str = "subscription",
+                        gone_update: Optional[Dict] = None) -> Dict:
+        """
+        Send `notification` to every document of `collection` matching `query`, reading
+        the subscription from `subscription_field`. Documents whose subscription is
+        gone get `gone_update` applied. Returns sent/failed/deactivated and latency.
+        """
+        if not self.configured:
+            logger.warning("VAPID keys not configured, skipping push notification")
+            return {"sent": 0, "failed": 0, "deactivated": 0, "total": 0, "error": "VAPID not configured"}
+
+        data = json.dumps(notification)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+        gone: List = []
+        latencies: List[float] = []
+        counts = {"sent": 0, "failed": 0}
+        start = time.perf_counter()
+
+        async def deliver(doc_id, subscription_info: Dict):
+            try:
+                sent_at = time.perf_counter()
+                delivered, status = await self.send(subscription_info, data)
+                latencies.append((time.perf_counter() - sent_at) * 1000)
+                counts["sent" if delivered else "failed"] += 1
+                if status in GONE_STATUS_CODES:
+                    gone.append(doc_id)
+            finally:
+                slots.release()
+
+        cursor = collection.find(query, {"_id": 1, subscription_field: 1}).sort("_id", 1).batch_size(PUSH_PAGE_SIZE)
+        async for doc in cursor:
+            subscription_info = doc.get(subscription_field)
+            if not isinstance(subscription_info, dict) or not subscription_info.get("endpoint"):
+                counts["failed"] += 1
+                continue
+            # Backpressure: never more than `concurrency` pushes (and tasks) outstanding
+            await slots.acquire()
+            tasks.append(asyncio.create_task(deliver(doc["_id"], subscription_info)))
+            if len(tasks) >= PUSH_PAGE_SIZE:
+                tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+
+        if gone and gone_update:
+            await collection.update_many({"_id": {"$in": gone}}, gone_update)
+
+        elapsed = time.perf_counter() - start
+        self.metrics["broadcasts"] += 1
+        self.metrics["sent"] += counts["sent"]
+        self.metrics["failed"] += counts["failed"]
+        self.metrics["deactivated"] += len(gone)
+        result = {
+            "sent": counts["sent"],
+            "failed": counts["failed"],
+            "deactivated": len(gone),
+            "total": counts["sent"] + counts["failed"],
+            "seconds": round(elapsed, 2),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "p95_latency_ms": p95(latencies)
+        }
+        logger.info(f"🔔 Push broadcast: {result['sent']} sent, {result['failed']} failed, "
+                    f"{result['deactivated']} deactivated in {result['seconds']}s")
+        return result
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    def stats(self) -> Dict:
+        latencies = list(self._latency_ms)
+        return {
+            **self.metrics,
+            "concurrency": self.concurrency,
+            "vapid_origins_cached": len(self._vapid_headers),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "p95_latency_ms": p95(latencies)
+        }
@@ -0,0 +1,22 @@
+"""Request pacing shared by background senders (last-minute harvest, newsletters)"""
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across concurrent workers (rate <= 0: unlimited)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
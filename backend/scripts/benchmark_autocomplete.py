@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+FreeStays Autocomplete Benchmark
+================================
+Compares the in-memory autocomplete index (AutocompleteIndex) against the
+ghwk_autocomplete_lookup LIKE '%query%' query it replaces.
+
+Against the static MySQL database (same rows the server loads):
+    python3 scripts/benchmark_autocomplete.py --host db.example.com --user freestays \
+        --password secret --database static_db
+
+Without database arguments a synthetic lookup table is generated and the index
+is compared against a linear substring scan (what LIKE '%query%' does server side):
+    python3 scripts/benchmark_autocomplete.py --synthetic 200000
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_QUERIES = [
+    "am", "par", "lond", "barc", "malaga", "málaga", "new york", "tenerife",
+    "costa del", "hilton", "marriot", "ibiza", "amsterdm", "barcelna", "rome", "zzzz"
+]
+
+LIKE_SQL_LONG = """
+    (SELECT a.search_term, a.display_name, a.type, a.destination_id, a.country_name,
+            a.hotel_count, a.priority, a.hotel_id, NULL as images_json
+     FROM ghwk_autocomplete_lookup a
+     WHERE (a.search_term_lower LIKE %s OR a.display_name LIKE %s)
+       AND a.type IN ('city', 'country', 'region')
+     ORDER BY a.priority DESC, a.hotel_count DESC
+     LIMIT 8)
+    UNION ALL
+    (SELECT a.search_term, a.display_name, a.type, a.destination_id, a.country_name,
+            a.hotel_count, a.priority, a.hotel_id, b.images_json
+     FROM ghwk_autocomplete_lookup a
+     LEFT JOIN ghwk_bravo_hotels b ON a.hotel_id = b.hotel_id
+     WHERE a.search_term_lower LIKE %s
+       AND a.type = 'hotel'
+     ORDER BY a.priority DESC, a.display_name
+     LIMIT 7)
+"""
+
+LIKE_SQL_SHORT = """
+    SELECT search_term, display_name, type, destination_id, country_name,
+           hotel_count, priority, NULL as hotel_id, NULL as images_json
+    FROM ghwk_autocomplete_lookup
+    WHERE (search_term_lower LIKE %s OR display_name LIKE %s)
+      AND type IN ('city', 'country', 'region')
+    ORDER BY priority DESC, hotel_count DESC, display_name
+    LIMIT 15
+"""
+
+
+def load_server():
+    """Import server.py without needing a running database"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "freestays_benchmark")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50": samples[len(samples) // 2] * 1000,
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "mean": statistics.mean(samples) * 1000
+    }
+
+
+def generate_rows(count: int):
+    rng = random.Random(7)
+    cities = ["Amsterdam", "Barcelona", "Málaga", "London", "Paris", "Rome", "New York", "Tenerife",
+              "Ibiza", "Zürich", "São Paulo", "Kraków", "Costa del Sol", "Lisbon", "Athens", "Dubai"]
+    countries = ["Netherlands", "Spain", "United Kingdom", "France", "Italy", "USA", "Portugal", "Greece"]
+    brands = ["Hilton", "Marriott", "NH", "Ibis", "Meliá", "Radisson", "Holiday Inn", "Novotel", "Riu"]
+    words = ["Grand", "Plaza", "Beach", "Central", "Park", "Royal", "Boutique", "Palace", "Suites", "Resort"]
+    rows = []
+    for i in range(count):
+        if i % 20 == 0:
+            name = f"{rng.choice(cities)} {rng.choice(['', 'Centre', 'Old Town', 'Airport', 'Beach'])}".strip()
+            row_type = rng.choice(["city", "city", "region", "country"])
+            hotel_id = None
+        else:
+            name = f"{rng.choice(brands)} {rng.choice(words)} {rng.choice(cities)} {i}"
+            row_type = "hotel"
+            hotel_id = 100000 + i
+        rows.append({
+            "search_term": name, "search_term_lower": name.lower(), "display_name": name,
+            "type": row_type, "destination_id": rng.randint(1, 5000), "country_name": rng.choice(countries),
+            "hotel_count": rng.randint(0, 2000), "priority": rng.randint(0, 10), "hotel_id": hotel_id,
+            "images_json": f'[{{"id": {rng.randint(1, 10**7)}}}]' if hotel_id else None
+        })
+    return rows
+
+
+def like_scan(rows, query: str):
+    """Python stand-in for the LIKE '%query%' query (full scan, then sort)"""
+    q = query.lower()
+    destinations = [r for r in rows if r["type"] in ("city", "country", "region")
+                    and (q in r["search_term_lower"] or q in r["display_name"].lower())]
+    if len(query) >= 3:
+        destinations.sort(key=lambda r: (-r["priority"], -r["hotel_count"]))
+        hotels = [r for r in rows if r["type"] == "hotel" and q in r["search_term_lower"]]
+        hotels.sort(key=lambda r: (-r["priority"], r["display_name"]))
+        return destinations[:8] + hotels[:7]
+    destinations.sort(key=lambda r: (-r["priority"], -r["hotel_count"], r["display_name"]))
+    return destinations[:15]
+
+
+async def load_mysql_rows(args):
+    import aiomysql
+    conn = await aiomysql.connect(host=args.host, port=args.port, user=args.user,
+                                  password=args.password, db=args.database, charset="utf8mb4")
+    async with conn.cursor(aiomysql.DictCursor) as cursor:
+        await cursor.execute("""
+            SELECT a.search_term, a.search_term_lower, a.display_name, a.type, a.destination_id,
+                   a.country_name, a.hotel_count, a.priority, a.hotel_id, b.images_json
+            FROM ghwk_autocomplete_lookup a
+            LEFT JOIN ghwk_bravo_hotels b ON a.type = 'hotel' AND a.hotel_id = b.hotel_id
+        """)
+        rows = list(await cursor.fetchall())
+    return conn, rows
+
+
+async def time_mysql(conn, query: str, repeat: int):
+    import aiomysql
+    samples = []
+    results = []
+    term = f"%{query.lower()}%"
+    for _ in range(repeat):
+        start = time.perf_counter()
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            if len(query) >= 3:
+                await cursor.execute(LIKE_SQL_LONG, (term, term, term))
+            else:
+                await cursor.execute(LIKE_SQL_SHORT, (term, term))
+            results = await cursor.fetchall()
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark autocomplete index vs LIKE query")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="")
+    parser.add_argument("--synthetic", type=int, default=100000, help="Rows to generate without --host")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--queries", nargs="*", default=DEFAULT_QUERIES)
+    args = parser.parse_args()
+
+    server = load_server()
+    conn = None
+    if args.host:
+        conn, rows = await load_mysql_rows(args)
+        baseline_name = "MySQL LIKE"
+    else:
+        rows = generate_rows(args.synthetic)
+        baseline_name = "linear scan"
+
+    start = time.perf_counter()
+    index = server.AutocompleteIndex()
+    index.destinations, index.hotels, index.hotels_by_id = index.build(rows)
+    print(f"Index build: {len(rows)} rows in {time.perf_counter() - start:.2f}s "
+          f"({len(index.destinations)} destinations, {len(index.hotels)} hotels)\n")
+
+    print(f"{'query':<14} {baseline_name + ' p50 ms':>18} {'index p50 ms':>13} {'index p95 ms':>13} {'base/idx':>9} {'idx hits':>9}")
+    for query in args.queries:
+        if conn is not None:
+            base_samples, base_results = await time_mysql(conn, query, args.repeat)
+        else:
+            base_samples = []
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                base_results = like_scan(rows, query)
+                base_samples.append(time.perf_counter() - t)
+
+        index_samples = []
+        index_results = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            index_results = index.search(query)
+            index_samples.append(time.perf_counter() - t)
+
+        base = percentiles(base_samples)
+        idx = percentiles(index_samples)
+        ratio = base["p50"] / idx["p50"] if idx["p50"] else float("inf")
+        print(f"{query:<14} {base['p50']:>18.3f} {idx['p50']:>13.3f} {idx['p95']:>13.3f} {ratio:>8.0f}x "
+              f"{len(index_results):>4}/{len(base_results):<4}")
+
+    if conn is not None:
+        conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
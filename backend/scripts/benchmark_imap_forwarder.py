@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+FreeStays Voucher Mailbox Benchmark
+===================================
+Runs a local IMAP stand-in holding N Sunhotels voucher emails and reads them
+twice: the old forwarder pattern (connect and login per check, then one RFC822
+FETCH and one STORE per message) and IMAPMailbox (persistent session, UID
+SEARCH, header FETCH, bodies in batches, one STORE). Reports seconds and IMAP
+round trips, then measures how quickly an IDLE session notices a new voucher
+(the old forwarder polled every 5 minutes).
+
+--rtt-ms adds server latency per command and --login-ms the cost of
+connect + TLS + LOGIN (typical for a hosted mailbox: 30-80 ms and 300-800 ms).
+
+Usage:
+    python3 scripts/benchmark_imap_forwarder.py
+    python3 scripts/benchmark_imap_forwarder.py --messages 300 --rtt-ms 60 --login-ms 500
+"""
+
+import re
+import sys
+import time
+import asyncio
+import imaplib
+import argparse
+from pathlib import Path
+from email.mime.text import MIMEText
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from imap_mailbox import IMAPMailbox  # noqa: E402
+
+UIDVALIDITY = 1700000000
+
+
+def build_voucher(i: int) -> bytes:
+    body = (f"CLIENT'S NAME: Guest {i}\nPROPERTY: Hotel {i}\nARRIVAL DATE: 2026-06-01\n"
+            f"DEPARTURE DATE: 2026-06-04\nhttps://voucher.travel/?id={i}&s=1.2\n" + "Terms and conditions apply. " * 150)
+    msg = MIMEText(body)
+    msg["Subject"] = f"Voucher SH{27800000 + i} / Lead Name: GUEST {i}"
+    msg["From"] = "noreply@sunhotels.net"
+    msg["To"] = "info@freestays.test"
+    return msg.as_bytes()
+
+
+class IMAPStandIn:
+    """
+    Minimal IMAP4rev1 server over one mailbox: CAPABILITY, LOGIN, SELECT, (UID)
+    SEARCH with UID ranges / UNSEEN / SUBJECT, (UID) FETCH of RFC822, BODY[] and
+    header fields, (UID) STORE \\Seen, IDLE/DONE, NOOP, LOGOUT. Sequence numbers
+    equal UIDs (nothing is expunged).
+    """
+
+    def __init__(self, rtt: float, login_delay: float, idle: bool = True):
+        self.rtt = rtt
+        self.login_delay = login_delay
+        self.idle_supported = idle
+        self.messages = {}  # uid -> [raw, seen]
+        self.commands = 0
+        self.logins = 0
+        self._arrival = asyncio.Event()
+
+    async def add_message(self, raw: bytes) -> int:
+        uid = max(self.messages, default=0) + 1
+        self.messages[uid] = [raw, False]
+        self._arrival.set()
+        self._arrival = asyncio.Event()
+        return uid
+
+    @staticmethod
+    def _uids(spec: str, available) -> list:
+        uids = []
+        for part in spec.split(","):
+            if ":" in part:
+                low, high = part.split(":")
+                high = max(available, default=0) if high == "*" else int(high)
+                uids.extend(u for u in available if int(low) <= u <= high)
+            else:
+                uids.append(int(part))
+        return [u for u in uids if u in available]
+
+    def _search(self, criteria: str) -> list:
+        uids = sorted(self.messages)
+        match = re.search(r"UID (\d+):\*", criteria)
+        if match:
+            # RFC 3501: "n:*" includes the highest UID even when it is below n
+            low = min(int(match.group(1)), max(uids, default=0))
+            uids = [u for u in uids if u >= low]
+        if "UNSEEN" in criteria.upper():
+            uids = [u for u in uids if not self.messages[u][1]]
+        match = re.search(r'SUBJECT "([^"]*)"', criteria, re.IGNORECASE)
+        if match:
+            uids = [u for u in uids if match.group(1).encode() in self.messages[u][0].split(b"\n\n", 1)[0]]
+        return uids
+
+    def _fetch(self, uid: int, items: str) -> bytes:
+        raw = self.messages[uid][0]
+        upper = items.upper()
+        if "HEADER.FIELDS" in upper:
+            fields = re.search(r"HEADER\.FIELDS \(([^)]*)\)", upper).group(1).split()
+            headers = [line for line in raw.split(b"\n\n", 1)[0].split(b"\n")
+                       if line.split(b":", 1)[0].decode().upper() in fields]
+            literal, name = b"\r\n".join(headers) + b"\r\n\r\n", f"BODY[HEADER.FIELDS ({' '.join(fields)})]"
+        elif "RFC822" in upper:
+            literal, name = raw, "RFC822"
+            self.messages[uid][1] = True
+        else:
+            literal, name = raw, "BODY[]"
+        return f"* {uid} FETCH (UID {uid} {name} {{{len(literal)}}}\r\n".encode() + literal + b")\r\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        capabilities = "IMAP4rev1 IDLE" if self.idle_supported else "IMAP4rev1"
+        writer.write(b"* OK IMAP stand-in ready\r\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                tag, _, rest = line.decode(errors="replace").strip().partition(" ")
+                command, _, args = rest.partition(" ")
+                command = command.upper()
+                is_uid = command == "UID"
+                if is_uid:
+                    command, _, args = args.partition(" ")
+                    command = command.upper()
+                self.commands += 1
+                await asyncio.sleep(self.rtt)
+                out = b""
+                if command == "CAPABILITY":
+                    out = f"* CAPABILITY {capabilities}\r\n".encode()
+                elif command == "LOGIN":
+                    self.logins += 1
+                    await asyncio.sleep(self.login_delay)
+                elif command == "SELECT":
+                    out = (f"* {len(self.messages)} EXISTS\r\n* OK [UIDVALIDITY {UIDVALIDITY}]\r\n"
+                           f"* OK [UIDNEXT {max(self.messages, default=0) + 1}]\r\n").encode()
+                elif command == "SEARCH":
+                    out = ("* SEARCH " + " ".join(map(str, self._search(args))) + "\r\n").encode()
+                elif command == "FETCH":
+                    spec, _, items = args.partition(" ")
+                    for uid in self._uids(spec, self.messages):
+                        out += self._fetch(uid, items)
+                elif command == "STORE":
+                    spec = args.split(" ", 1)[0]
+                    for uid in self._uids(spec, self.messages):
+                        self.messages[uid][1] = True
+                elif command == "IDLE":
+                    writer.write(b"+ idling\r\n")
+                    await writer.drain()
+                    known = len(self.messages)
+                    done = asyncio.create_task(reader.readline())
+                    while not done.done():
+                        arrival = asyncio.create_task(self._arrival.wait())
+                        await asyncio.wait({done, arrival}, return_when=asyncio.FIRST_COMPLETED)
+                        arrival.cancel()
+                        if len(self.messages) > known:
+                            known = len(self.messages)
+                            writer.write(f"* {known} EXISTS\r\n".encode())
+                            await writer.drain()
+                    writer.write(f"{tag} OK IDLE terminated\r\n".encode())
+                    await writer.drain()
+                    continue
+                elif command == "LOGOUT":
+                    writer.write(f"* BYE\r\n{tag} OK LOGOUT completed\r\n".encode())
+                    await writer.drain()
+                    break
+                elif command != "NOOP":
+                    writer.write(f"{tag} BAD unsupported\r\n".encode())
+                    await writer.drain()
+                    continue
+                writer.write(out + f"{tag} OK {command} completed\r\n".encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+def per_message_check(port: int) -> int:
+    """The old forwarder: login per check, one RFC822 FETCH and one STORE per message"""
+    mail = imaplib.IMAP4("127.0.0.1", port)
+    mail.login("bench", "bench")
+    mail.select("INBOX")
+    _, messages = mail.search(None, '(UNSEEN SUBJECT "Voucher SH")')
+    count = 0
+    for email_id in messages[0].split():
+        _, msg_data = mail.fetch(email_id, "(RFC822)")
+        count += bool(msg_data[0][1])
+        mail.store(email_id, "+FLAGS", "\\Seen")
+    mail.logout()
+    return count
+
+
+async def mailbox_check(mailbox: IMAPMailbox, last_uid: int) -> list:
+    uids = await mailbox.search(last_uid, '(UNSEEN SUBJECT "Voucher SH")')
+    headers = await mailbox.fetch_headers(uids, "SUBJECT")
+    bodies = await mailbox.fetch_messages([uid for uid in uids if b"Voucher SH" in headers[uid]])
+    await mailbox.mark_seen(uids)
+    assert len(bodies) == len(uids)
+    return uids
+
+
+async def run(args):
+    standin = IMAPStandIn(args.rtt_ms / 1000, args.login_ms / 1000)
+    server = await asyncio.start_server(standin.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    for i in range(args.messages):
+        await standin.add_message(build_voucher(i))
+
+    print(f"{args.messages} voucher emails, rtt {args.rtt_ms} ms, login {args.login_ms} ms\n")
+    print(f"{'pattern':<32} {'seconds':>8} {'commands':>9} {'logins':>7}")
+
+    start = time.perf_counter()
+    count = await asyncio.to_thread(per_message_check, port)
+    elapsed = time.perf_counter() - start
+    print(f"{'login + FETCH per message':<32} {elapsed:>8.2f} {standin.commands:>9} {standin.logins:>7}")
+    assert count == args.messages
+    baseline = elapsed
+
+    for entry in standin.messages.values():
+        entry[1] = False
+    standin.commands = standin.logins = 0
+    mailbox = IMAPMailbox("127.0.0.1", port, "bench", "bench", use_ssl=False)
+    start = time.perf_counter()
+    uids = await mailbox_check(mailbox, 0)
+    elapsed = time.perf_counter() - start
+    print(f"{'IMAPMailbox (headers + batches)':<32} {elapsed:>8.2f} {standin.commands:>9} {standin.logins:>7}"
+          f"   ({baseline / elapsed:.1f}x)")
+
+    standin.commands = standin.logins = 0
+    start = time.perf_counter()
+    await mailbox_check(mailbox, uids[-1])
+    elapsed = time.perf_counter() - start
+    print(f"{'IMAPMailbox (no new mail)':<32} {elapsed:>8.2f} {standin.commands:>9} {standin.logins:>7}")
+
+    if mailbox.supports_idle:
+        idle = asyncio.create_task(mailbox.idle(timeout=30))
+        await asyncio.sleep(0.5)
+        arrived = time.perf_counter()
+        await standin.add_message(build_voucher(args.messages))
+        assert await idle
+        print(f"\nIDLE noticed a new voucher after {(time.perf_counter() - arrived) * 1000:.0f} ms "
+              f"(old forwarder: up to 300 s)")
+        assert await mailbox_check(mailbox, uids[-1]) == [uids[-1] + 1]
+
+    print(f"\n{mailbox.stats()}")
+    await mailbox.close()
+    server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voucher mailbox reader against a local IMAP stand-in")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=30, help="Server latency per command")
+    parser.add_argument("--login-ms", type=float, default=300, help="Connect + TLS + LOGIN latency")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
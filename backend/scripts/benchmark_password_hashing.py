@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+FreeStays Login Throughput Benchmark
+====================================
+Runs a stand-in FastAPI app in-process with a /auth/login endpoint (bcrypt check
+of a stored hash) and a /hotels/search endpoint answering from cache, and drives
+both at once through httpx: a burst of concurrent logins plus a steady stream of
+searches. Run twice, with bcrypt called inline in the async endpoint (the old
+verify_password) and through PasswordHasher's thread pool, and reports logins
+per second and the search latency seen while the logins were running.
+
+bcrypt releases the GIL, so the pooled run scales with cores up to
+PASSWORD_HASH_WORKERS; the search latency improves even on one core because
+the event loop is no longer held for a whole hash.
+
+Usage:
+    python3 scripts/benchmark_password_hashing.py
+    python3 scripts/benchmark_password_hashing.py --logins 64 --rounds 12 --workers 4
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import bcrypt
+import httpx
+from fastapi import FastAPI, HTTPException
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from password_hasher import PasswordHasher  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)] if ordered else 0.0
+
+
+def build_app(stored_hash: str, hasher: PasswordHasher = None) -> FastAPI:
+    app = FastAPI()
+    cached_results = {"hotels": [{"hotel_id": i, "name": f"Hotel {i}", "min_price": 80 + i} for i in range(50)]}
+
+    @app.post("/auth/login")
+    async def login(body: dict):
+        if hasher is None:
+            ok = bcrypt.checkpw(body["password"].encode(), stored_hash.encode())
+        else:
+            ok = await hasher.verify(body["password"], stored_hash)
+        if not ok:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        return {"token": "t"}
+
+    @app.get("/hotels/search")
+    async def search():
+        await asyncio.sleep(0)
+        return cached_results
+
+    return app
+
+
+async def measure(app: FastAPI, logins: int, search_interval: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        search_latencies = []
+        done = asyncio.Event()
+
+        async def searches():
+            while not done.is_set():
+                # Latency counts from when the request was due, so time spent waiting
+                # for a blocked event loop to even send it is included
+                due = time.perf_counter() + search_interval
+                await asyncio.sleep(search_interval)
+                response = await client.get("/hotels/search")
+                assert response.status_code == 200
+                search_latencies.append((time.perf_counter() - due) * 1000)
+
+        async def login():
+            response = await client.post("/auth/login", json={"email": "guest@example.test", "password": PASSWORD})
+            assert response.status_code == 200
+
+        prober = asyncio.create_task(searches())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*[login() for _ in range(logins)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return elapsed, search_latencies
+
+
+async def run(args):
+    stored_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(args.rounds)).decode()
+    print(f"{args.logins} concurrent logins, bcrypt cost {args.rounds}, {args.workers} hash workers, "
+          f"search every {args.search_interval_ms} ms\n")
+    print(f"{'login path':<26} {'seconds':>8} {'logins/s':>9} {'searches':>9} {'search p50':>11} {'search p95':>11} {'max':>8}")
+
+    baseline = None
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers)
+    for label, app in (("bcrypt inline", build_app(stored_hash)),
+                       ("PasswordHasher pool", build_app(stored_hash, hasher))):
+        elapsed, latencies = await measure(app, args.logins, args.search_interval_ms / 1000)
+        speedup = f"   ({baseline / elapsed:.1f}x)" if baseline else ""
+        baseline = baseline or elapsed
+        print(f"{label:<26} {elapsed:>8.2f} {args.logins / elapsed:>9.1f} {len(latencies):>9} "
+              f"{percentile(latencies, 0.5):>9.1f}ms {percentile(latencies, 0.95):>9.1f}ms "
+              f"{max(latencies):>6.0f}ms{speedup}")
+
+    # Rehash-on-login after lowering/raising the configured cost
+    upgraded = PasswordHasher(rounds=args.rounds + 1, workers=args.workers)
+    start = time.perf_counter()
+    new_hash = await upgraded.rehash_if_needed(PASSWORD, stored_hash)
+    print(f"\nRehash {args.rounds} -> {args.rounds + 1} on login: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"needs_rehash afterwards: {upgraded.needs_rehash(new_hash)}")
+
+    print(f"\n{hasher.stats()}")
+    await hasher.close()
+    await upgraded.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and search latency during logins")
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=4, help="PasswordHasher threads")
+    parser.add_argument("--search-interval-ms", type=float, default=10, help="Pause between search requests")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+FreeStays Shared Search Cache Benchmark
+=======================================
+Simulates several uvicorn workers, each with its own SearchCache, behind a
+local Redis stand-in. One worker warms a set of searches (as
+scheduled_cache_warming does), then every worker serves a stream of those
+searches through get_or_load(). Run twice, with local L1 caches only and with
+the shared RedisSearchCacheBackend as L2, and reports upstream (Sunhotels)
+calls, request latency and L1/L2 hits.
+
+The stand-in speaks enough RESP for the backend (PING, GET, SET EX, EXISTS,
+INCRBY); --redis-url runs against a real Redis-protocol server instead.
+--upstream-ms is the latency of the search the cache saves.
+
+Usage:
+    python3 scripts/benchmark_search_cache.py
+    python3 scripts/benchmark_search_cache.py --workers 4 --searches 50 --requests 2000 --hotels 300
+    python3 scripts/benchmark_search_cache.py --redis-url redis://localhost:6379/15
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_server():
+    """Import server.py without needing a running database"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "freestays_benchmark")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+class RedisStandIn:
+    """Minimal in-memory Redis: PING, GET, SET [EX], EXISTS, INCR/INCRBY, CLIENT"""
+
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at or None)
+        self.commands = 0
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    @staticmethod
+    def bulk(value) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def execute(self, args) -> bytes:
+        self.commands += 1
+        command = args[0].upper()
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command == b"GET":
+            return self.bulk(self._get(args[1]))
+        if command == b"SET":
+            expires_at = None
+            if len(args) >= 5 and args[3].upper() == b"EX":
+                expires_at = time.monotonic() + int(args[4])
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command == b"EXISTS":
+            return b":%d\r\n" % sum(self._get(key) is not None for key in args[1:])
+        if command in (b"INCR", b"INCRBY"):
+            value = int(self._get(args[1]) or 0) + (int(args[2]) if len(args) > 2 else 1)
+            self.data[args[1]] = (str(value).encode(), None)
+            return b":%d\r\n" % value
+        if command == b"CLIENT":
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % command
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.execute(args))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def build_result(search: int, hotels: int) -> dict:
+    """A cached /hotels/search result with enriched hotels"""
+    return {
+        "hotels": [{
+            "hotel_id": f"{search}-{i}",
+            "name": f"Hotel {i}",
+            "min_price": 80 + i,
+            "description": "Comfortable hotel close to the city centre. " * 8,
+            "images": [f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={search}{i}{n}" for n in range(8)],
+            "rooms": [{"room_id": f"{i}-{r}", "price": 80 + i + r, "meal": "Breakfast"} for r in range(3)]
+        } for i in range(hotels)],
+        "total": hotels,
+        "is_last_minute": False
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)] if ordered else 0.0
+
+
+async def measure(server, args, redis_url):
+    caches = [server.SearchCache(max_size=100, ttl_seconds=180, max_bytes=256 * 1024 * 1024, name="bench_search")
+              for _ in range(args.workers)]
+    backends = []
+    if redis_url:
+        for cache in caches:
+            backend = server.RedisSearchCacheBackend(redis_url)
+            await backend.start()
+            cache.backend = backend
+            backends.append(backend)
+        # Each run starts from an empty shared namespace
+        await caches[0].aclear()
+        for cache in caches:
+            await cache.sync_generation()
+
+    upstream_calls = 0
+
+    def loader(search):
+        async def load():
+            nonlocal upstream_calls
+            upstream_calls += 1
+            await asyncio.sleep(args.upstream_ms / 1000)
+            return build_result(search, args.hotels)
+        return load
+
+    # Worker 0 warms every search, the others have not seen any of them
+    for search in range(args.searches):
+        await caches[0].get_or_load(f"search:{search}", loader(search))
+    warm_calls = upstream_calls
+
+    rng = random.Random(7)
+    latencies = []
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def request():
+        cache = rng.choice(caches)
+        search = rng.randrange(args.searches)
+        async with limit:
+            start = time.perf_counter()
+            await cache.get_or_load(f"search:{search}", loader(search))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[request() for _ in range(args.requests)])
+    elapsed = time.perf_counter() - start
+
+    stats = [cache.stats() for cache in caches]
+    for backend in backends:
+        await backend.close()
+    return {
+        "elapsed": elapsed,
+        "upstream": upstream_calls - warm_calls,
+        "l1_hits": sum(s["hits"] for s in stats),
+        "l2_hits": sum(s["l2"]["hits"] for s in stats),
+        "latencies": latencies
+    }
+
+
+async def run(args):
+    server = load_server()
+    standin = None
+    redis_url = args.redis_url
+    if not redis_url:
+        standin = RedisStandIn()
+        listener = await asyncio.start_server(standin.handle, "127.0.0.1", 0)
+        redis_url = f"redis://127.0.0.1:{listener.sockets[0].getsockname()[1]}/0"
+
+    print(f"{args.workers} workers, {args.searches} warmed searches x {args.hotels} hotels, "
+          f"{args.requests} requests (concurrency {args.concurrency}), upstream {args.upstream_ms} ms\n")
+    print(f"{'cache':<22} {'seconds':>8} {'req/s':>8} {'upstream':>9} {'L1 hits':>8} {'L2 hits':>8} {'p50':>8} {'p95':>8}")
+    for label, url in (("L1 only (per worker)", None), ("L1 + Redis L2", redis_url)):
+        result = await measure(server, args, url)
+        latencies = result["latencies"]
+        print(f"{label:<22} {result['elapsed']:>8.2f} {args.requests / result['elapsed']:>8.0f} "
+              f"{result['upstream']:>9} {result['l1_hits']:>8} {result['l2_hits']:>8} "
+              f"{percentile(latencies, 0.5):>6.1f}ms {percentile(latencies, 0.95):>6.1f}ms")
+
+    if standin is not None:
+        listener.close()
+        await listener.wait_closed()
+        print(f"\nRedis stand-in: {standin.commands} commands, {len(standin.data)} keys")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared L2 search cache across simulated workers")
+    parser.add_argument("--workers", type=int, default=4, help="SearchCache instances (one per simulated worker)")
+    parser.add_argument("--searches", type=int, default=40, help="Distinct searches warmed by one worker")
+    parser.add_argument("--hotels", type=int, default=200, help="Hotels per cached search result")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upstream-ms", type=float, default=800, help="Latency of an uncached Sunhotels search")
+    parser.add_argument("--redis-url", default="", help="Use a real Redis-protocol server instead of the stand-in")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+FreeStays SearchV3 Parser Benchmark
+===================================
+Compares the streaming SearchV3 parser (SearchV3StreamParser) against the
+previous whole-document ElementTree parser on recorded SearchV3 responses.
+
+For every fixture each parser runs in its own subprocess so peak RSS is
+measured independently, and the outputs are checked to be identical.
+
+Usage:
+    python3 scripts/benchmark_search_parser.py fixtures/searchv3/*.xml
+
+Without fixture arguments, every *.xml file in scripts/fixtures/searchv3 is used.
+A synthetic fixture (e.g. to simulate a large destination like London) can be
+generated with:
+    python3 scripts/benchmark_search_parser.py --generate 3000 --output /tmp/london.xml
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "searchv3"
+CHUNK_SIZE = 64 * 1024  # Simulates the response body arriving from the network
+
+NS_URI = "http://xml.sunhotels.net/15/"
+
+
+def load_server():
+    """Import server.py without needing a running database"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "freestays_benchmark")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def legacy_parse_search_response(xml_text: str, is_last_minute: bool = False):
+    """Previous SunhotelsClient._parse_search_response (full tree + findtext per field)"""
+    hotels = []
+    meal_types = {
+        "1": "Room Only", "2": "Bed & Breakfast", "3": "Breakfast Included",
+        "4": "Half Board", "5": "Full Board", "6": "All Inclusive"
+    }
+    try:
+        root = ET.fromstring(xml_text)
+        ns = {'ns': NS_URI}
+        for hotel_elem in root.findall('.//ns:hotel', ns):
+            hotel_id = hotel_elem.findtext('ns:hotel.id', '', ns)
+            if not hotel_id:
+                continue
+            hotel_name = (
+                hotel_elem.findtext('ns:hotel.name', '', ns) or
+                hotel_elem.findtext('ns:name', '', ns) or
+                hotel_elem.findtext('ns:hotelName', '', ns) or
+                hotel_elem.get('name', '') or
+                f"Hotel {hotel_id}"
+            )
+            star_rating_text = hotel_elem.findtext('ns:hotel.stars', '', ns) or hotel_elem.findtext('ns:stars', '0', ns)
+            try:
+                star_rating = int(float(star_rating_text)) if star_rating_text else 0
+            except:
+                star_rating = 0
+            city = hotel_elem.findtext('ns:city', '', ns) or hotel_elem.findtext('ns:hotel.city', '', ns) or ''
+            country = hotel_elem.findtext('ns:country', '', ns) or hotel_elem.findtext('ns:hotel.country', '', ns) or ''
+            address = hotel_elem.findtext('ns:address', '', ns) or hotel_elem.findtext('ns:hotel.address', '', ns) or ''
+            latitude = 0.0
+            longitude = 0.0
+            try:
+                lat_text = hotel_elem.findtext('ns:latitude', '', ns) or hotel_elem.findtext('ns:hotel.latitude', '0', ns)
+                lon_text = hotel_elem.findtext('ns:longitude', '', ns) or hotel_elem.findtext('ns:hotel.longitude', '0', ns)
+                latitude = float(lat_text) if lat_text else 0.0
+                longitude = float(lon_text) if lon_text else 0.0
+            except:
+                pass
+            image_url = "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800"
+            image_elem = hotel_elem.find('.//ns:image', ns)
+            if image_elem is not None:
+                img_id = image_elem.get('id', '') or image_elem.text
+                if img_id:
+                    image_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}"
+            dest_id = hotel_elem.findtext('ns:destination_id', '', ns)
+            resort_id = hotel_elem.findtext('ns:resort_id', '', ns)
+            review_elem = hotel_elem.find('ns:review', ns)
+            review_score = 0.0
+            review_count = 0
+            if review_elem is not None:
+                try:
+                    review_score = float(review_elem.findtext('ns:rating', '0', ns) or 0)
+                    review_count = int(review_elem.findtext('ns:count', '0', ns) or 0)
+                except:
+                    pass
+            rooms = []
+            min_price = float('inf')
+            for roomtype_elem in hotel_elem.findall('.//ns:roomtype', ns):
+                roomtype_id = roomtype_elem.findtext('ns:roomtype.ID', '', ns)
+                roomtype_name = roomtype_elem.findtext('ns:roomtype.Name', 'Standard Room', ns)
+                room_images = []
+                room_image_url = ""
+                for img in roomtype_elem.findall('.//ns:image', ns):
+                    img_id = img.get('id', '')
+                    if img_id:
+                        img_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}"
+                        room_images.append(img_url)
+                        if not room_image_url:
+                            room_image_url = img_url
+                room_amenities = []
+                for feature in roomtype_elem.findall('.//ns:feature', ns):
+                    feature_name = feature.findtext('ns:name', '', ns)
+                    if feature_name:
+                        room_amenities.append(feature_name)
+                if not room_amenities:
+                    room_amenities = ["Air Conditioning", "Private Bathroom", "TV", "Safe"]
+                for room_elem in roomtype_elem.findall('.//ns:room', ns):
+                    room_id = room_elem.findtext('ns:id', '', ns)
+                    beds = int(room_elem.findtext('ns:beds', '2', ns) or 2)
+                    is_superdeal = room_elem.findtext('ns:isSuperDeal', 'false', ns).lower() == 'true'
+                    for meal_elem in room_elem.findall('.//ns:meal', ns):
+                        meal_id = meal_elem.findtext('ns:id', '1', ns)
+                        board_type = meal_types.get(meal_id, "Room Only")
+                        price_elem = meal_elem.find('.//ns:price', ns)
+                        price = 0.0
+                        currency = "EUR"
+                        if price_elem is not None:
+                            try:
+                                price = float(price_elem.text or 0)
+                                currency = price_elem.get('currency', 'EUR')
+                            except:
+                                pass
+                        if price > 0 and price < min_price:
+                            min_price = price
+                        cancel_policy = "Non-refundable"
+                        cancel_deadline_hours = None
+                        cancel_deadline_display = None
+                        is_refundable = False
+                        cancel_elem = room_elem.find('.//ns:cancellation_policy', ns)
+                        if cancel_elem is not None:
+                            deadline_text = cancel_elem.findtext('ns:deadline', '', ns)
+                            percentage = cancel_elem.findtext('ns:percentage', '', ns)
+                            if deadline_text and deadline_text.strip():
+                                freestays_deadline_hours = int(deadline_text) + (22 * 24)
+                                cancel_deadline_hours = freestays_deadline_hours
+                                days_before = freestays_deadline_hours // 24
+                                cancel_deadline_display = f"{days_before} days before check-in"
+                                cancel_policy = f"Free cancellation until {days_before} days before check-in"
+                                is_refundable = True
+                            elif percentage == "100":
+                                cancel_policy = "Non-refundable. If cancelled, no refund will be given."
+                                is_refundable = False
+                        room_notes_elem = room_elem.find('ns:notes', ns)
+                        room_notes = ""
+                        if room_notes_elem is not None and room_notes_elem.text:
+                            room_notes = room_notes_elem.text.strip()
+                        room_fees = []
+                        for fee_elem in room_elem.findall('.//ns:fee', ns):
+                            fee_name = fee_elem.findtext('ns:name', '', ns)
+                            fee_amount_elem = fee_elem.find('.//ns:amount', ns)
+                            fee_amount = 0
+                            fee_currency = "EUR"
+                            if fee_amount_elem is not None and fee_amount_elem.text:
+                                try:
+                                    fee_amount = float(fee_amount_elem.text)
+                                    fee_currency = fee_amount_elem.get('currency', 'EUR')
+                                except:
+                                    pass
+                            included = fee_elem.findtext('ns:includedInPrice', 'false', ns).lower() == 'true'
+                            if fee_name:
+                                room_fees.append({
+                                    "name": fee_name, "amount": fee_amount,
+                                    "currency": fee_currency, "included_in_price": included
+                                })
+                        rooms.append({
+                            "room_id": room_id, "room_type": roomtype_name, "board_type": board_type,
+                            "price": price, "currency": currency,
+                            "cancellation_policy": cancel_policy,
+                            "cancellation_deadline_hours": cancel_deadline_hours,
+                            "cancellation_deadline_display": cancel_deadline_display,
+                            "is_refundable": is_refundable, "room_notes": room_notes, "fees": room_fees,
+                            "max_occupancy": beds, "sunhotels_room_type_id": roomtype_id,
+                            "sunhotels_block_id": room_id, "is_superdeal": is_superdeal,
+                            "image_url": room_image_url, "images": room_images[:5],
+                            "amenities": room_amenities[:10]
+                        })
+            hotel_notes_elem = hotel_elem.find('ns:notes', ns)
+            hotel_notes = ""
+            if hotel_notes_elem is not None and hotel_notes_elem.text:
+                hotel_notes = hotel_notes_elem.text.strip()
+            if min_price == float('inf'):
+                min_price = 0
+            hotels.append({
+                "hotel_id": hotel_id, "name": hotel_name, "star_rating": star_rating,
+                "address": address, "city": city, "country": country,
+                "destination_id": dest_id, "resort_id": resort_id,
+                "latitude": latitude, "longitude": longitude, "description": "",
+                "hotel_notes": hotel_notes, "image_url": image_url,
+                "review_score": review_score, "review_count": review_count, "rooms": rooms,
+                "amenities": ["WiFi", "Air Conditioning", "Restaurant", "Bar", "24h Reception"],
+                "min_price": min_price, "currency": "EUR", "is_last_minute": is_last_minute
+            })
+    except ET.ParseError:
+        return []
+    return hotels
+
+
+def streaming_parse(server, path: Path):
+    """Feed the fixture in network-sized chunks, as SunhotelsClient._stream_search_v3 does"""
+    parser = server.SearchV3StreamParser(False)
+    hotels = []
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hotels.extend(parser.feed(chunk))
+    hotels.extend(parser.close())
+    return hotels
+
+
+def run_single(parser_name: str, path: Path, repeat: int) -> dict:
+    """Run one parser on one fixture (called in a child process)"""
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    hotels = []
+    if parser_name == "streaming":
+        server = load_server()
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hotels = streaming_parse(server, path)
+            timings.append(time.perf_counter() - start)
+    else:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # The legacy flow held the whole decoded body (response.text) in memory
+            xml_text = path.read_text(encoding="utf-8")
+            hotels = legacy_parse_search_response(xml_text)
+            del xml_text
+            timings.append(time.perf_counter() - start)
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings.sort()
+    return {
+        "parser": parser_name,
+        "hotels": len(hotels),
+        "rooms": sum(len(h["rooms"]) for h in hotels),
+        "median_ms": round(timings[len(timings) // 2] * 1000, 2),
+        "best_ms": round(timings[0] * 1000, 2),
+        "peak_rss_delta_mb": round((peak_rss - baseline_rss) / 1024, 2),  # ru_maxrss is KB on Linux
+        "checksum": hash(json.dumps(hotels, sort_keys=True, default=str))
+    }
+
+
+def benchmark_fixture(path: Path, repeat: int) -> None:
+    results = []
+    for parser_name in ("legacy", "streaming"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--run", parser_name, "--repeat", str(repeat), str(path)],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONHASHSEED": "0"}
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    legacy, streaming = results
+    size_mb = path.stat().st_size / (1024 * 1024)
+    print(f"\n{path.name} ({size_mb:.1f} MB, {legacy['hotels']} hotels, {legacy['rooms']} rooms)")
+    print(f"  {'parser':<10} {'median ms':>10} {'best ms':>10} {'peak RSS +MB':>13}")
+    for r in results:
+        print(f"  {r['parser']:<10} {r['median_ms']:>10} {r['best_ms']:>10} {r['peak_rss_delta_mb']:>13}")
+    if streaming["median_ms"]:
+        print(f"  speedup: {legacy['median_ms'] / streaming['median_ms']:.2f}x")
+    print(f"  identical output: {'yes' if legacy['checksum'] == streaming['checksum'] else 'NO'}")
+
+
+def generate_fixture(hotel_count: int, output: Path) -> None:
+    """Write a synthetic SearchV3 response shaped like the live API"""
+    rng = random.Random(42)
+    parts = [f'<?xml version="1.0" encoding="utf-8"?>\n<searchresult xmlns="{NS_URI}"><hotels>']
+    for i in range(hotel_count):
+        hotel_id = 100000 + i
+        parts.append(
+            f"<hotel><hotel.id>{hotel_id}</hotel.id><destination_id>1234</destination_id>"
+            f"<resort_id>{rng.randint(1, 40)}</resort_id><hotel.stars>{rng.randint(1, 5)}</hotel.stars>"
+            f"<latitude>{51.5 + rng.random() / 10:.6f}</latitude><longitude>{-0.1 + rng.random() / 10:.6f}</longitude>"
+            f'<images><image id="{rng.randint(1, 10**7)}"/></images>'
+            f"<review><rating>{rng.uniform(6, 10):.1f}</rating><count>{rng.randint(0, 900)}</count></review>"
+            f"<notes>Check-in from 15:00</notes><roomtypes>"
+        )
+        for rt in range(rng.randint(1, 4)):
+            parts.append(
+                f"<roomtype><roomtype.ID>{rt + 1}</roomtype.ID><roomtype.Name>Room type {rt + 1}</roomtype.Name>"
+                f'<images><image id="{rng.randint(1, 10**7)}"/></images>'
+                f"<features><feature><name>Air Conditioning</name></feature><feature><name>Minibar</name></feature></features>"
+                f"<rooms>"
+            )
+            for r in range(rng.randint(1, 3)):
+                parts.append(f"<room><id>{hotel_id}{rt}{r}</id><beds>{rng.randint(1, 4)}</beds>"
+                             f"<isSuperDeal>{'true' if rng.random() < 0.1 else 'false'}</isSuperDeal><meals>")
+                for meal_id in rng.sample(range(1, 7), rng.randint(1, 3)):
+                    parts.append(f'<meal><id>{meal_id}</id><prices><price currency="EUR">{rng.uniform(40, 900):.2f}</price></prices></meal>')
+                parts.append(
+                    f"</meals><cancellation_policies><cancellation_policy><deadline>{rng.choice(['', '24', '48', '72'])}</deadline>"
+                    f"<percentage>100</percentage></cancellation_policy></cancellation_policies>"
+                    f'<fees><fee><name>City Tax</name><amount currency="EUR">{rng.uniform(1, 10):.2f}</amount>'
+                    f"<includedInPrice>false</includedInPrice></fee></fees></room>"
+                )
+            parts.append("</rooms></roomtype>")
+        parts.append("</roomtypes></hotel>")
+    parts.append("</hotels></searchresult>")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text("".join(parts), encoding="utf-8")
+    print(f"Wrote {hotel_count} hotels to {output} ({output.stat().st_size / (1024 * 1024):.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SearchV3 XML parsers")
+    parser.add_argument("fixtures", nargs="*", help="Recorded SearchV3 XML responses")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parser per fixture")
+    parser.add_argument("--generate", type=int, metavar="HOTELS", help="Generate a synthetic fixture")
+    parser.add_argument("--output", default=str(DEFAULT_FIXTURE_DIR / "synthetic.xml"))
+    parser.add_argument("--run", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_fixture(args.generate, Path(args.output))
+        return
+
+    if args.run:
+        print(json.dumps(run_single(args.run, Path(args.fixtures[0]), args.repeat)))
+        return
+
+    fixtures = [Path(f) for f in args.fixtures] or sorted(DEFAULT_FIXTURE_DIR.glob("*.xml"))
+    if not fixtures:
+        print(f"No fixtures found. Record SearchV3 responses into {DEFAULT_FIXTURE_DIR} or use --generate.")
+        sys.exit(1)
+
+    for path in fixtures:
+        benchmark_fixture(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+FreeStays Search Response Benchmark
+===================================
+Measures the /hotels/search response body: serialization time with FastAPI's
+default path (jsonable_encoder + JSONResponse) against FastJSONResponse, and the
+payload size uncompressed, gzip and brotli compressed (as CompressionMiddleware
+sends it), plus the slim card page (fields=["card"], page_size=30).
+
+Usage:
+    python3 scripts/benchmark_search_response.py fixtures/searchv3/london.xml
+
+Without a fixture a synthetic SearchV3 response is generated (see
+benchmark_search_parser.py --generate):
+    python3 scripts/benchmark_search_response.py --generate 3000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_search_parser import generate_fixture  # noqa: E402
+
+
+def load_server():
+    """Import server.py without needing a running database"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "freestays_benchmark")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def build_result(server, xml_path: Path) -> dict:
+    """Shape a parsed SearchV3 response like the cached /hotels/search result"""
+    hotels = server.SunhotelsClient()._parse_search_response(xml_path.read_text(encoding="utf-8"))
+    for hotel in hotels:
+        # Static enrichment adds descriptions and image galleries to every hotel
+        hotel["description"] = "Comfortable hotel close to the city centre. " * 12
+        hotel["images"] = [f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={hotel['hotel_id']}{i}"
+                           for i in range(10)]
+        hotel["themes"] = ["City", "Family"]
+    return {"hotels": hotels, "total": len(hotels), "facets": server.search_result_facets(hotels),
+            "is_last_minute": False}
+
+
+def timed(fn, repeat: int):
+    samples = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /hotels/search serialization and compression")
+    parser.add_argument("fixture", nargs="?", help="Recorded SearchV3 XML response")
+    parser.add_argument("--generate", type=int, default=2000, metavar="HOTELS",
+                        help="Hotels in the synthetic fixture when no fixture is given")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = load_server()
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    if args.fixture:
+        xml_path = Path(args.fixture)
+    else:
+        xml_path = Path(tempfile.gettempdir()) / f"freestays_search_{args.generate}.xml"
+        generate_fixture(args.generate, xml_path)
+
+    result = build_result(server, xml_path)
+    print(f"{len(result['hotels'])} hotels, orjson={'yes' if server.orjson else 'no'}, "
+          f"brotli={'yes' if server.brotli else 'no'}\n")
+
+    default_ms, default_body = timed(lambda: JSONResponse(jsonable_encoder(result)).body, args.repeat)
+    fast_ms, fast_body = timed(lambda: server.FastJSONResponse(result).body, args.repeat)
+    print(f"{'serialization':<34} {'ms':>9}")
+    print(f"{'jsonable_encoder + JSONResponse':<34} {default_ms:>9.1f}")
+    print(f"{'FastJSONResponse':<34} {fast_ms:>9.1f}   ({default_ms / fast_ms:.1f}x)\n")
+
+    params = server.HotelSearchParams(destination="", check_in="2026-01-01", check_out="2026-01-03",
+                                      fields=["card"], page=1, page_size=30)
+    view_ms, card_body = timed(lambda: server.FastJSONResponse(server.apply_search_view(result, params)).body,
+                               args.repeat)
+
+    print(f"{'payload':<34} {'bytes':>12} {'encode ms':>10}")
+    for label, body in (("full result", fast_body), ("card page (30)", card_body)):
+        print(f"{label + ' (identity)':<34} {len(body):>12,}")
+        gzip_ms, gzipped = timed(lambda: server.compress_body(body, "gzip"), args.repeat)
+        print(f"{label + ' (gzip)':<34} {len(gzipped):>12,} {gzip_ms:>10.1f}")
+        if server.brotli is not None:
+            br_ms, compressed = timed(lambda: server.compress_body(body, "br"), args.repeat)
+            print(f"{label + ' (br)':<34} {len(compressed):>12,} {br_ms:>10.1f}")
+    print(f"\ncard page filter/sort/project: {view_ms:.1f} ms")
+    assert len(default_body) > 0 and fast_body.startswith(b"{")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+FreeStays SMTP Transport Benchmark
+==================================
+Sends the same batch of messages through a local SMTP stand-in twice: the old
+per-message pattern (connect, STARTTLS, login, send, quit in a thread) and the
+pooled MailTransport, and reports messages/second and SMTP sessions opened.
+
+The stand-in accepts any AUTH and discards mail; --connect-ms adds the latency
+of the connect/TLS/login handshake that pooling avoids (typical for a hosted
+SMTP relay: 150-400 ms).
+
+Usage:
+    python3 scripts/benchmark_smtp_transport.py
+    python3 scripts/benchmark_smtp_transport.py --messages 500 --concurrency 8 --connect-ms 250
+"""
+
+import sys
+import time
+import asyncio
+import smtplib
+import argparse
+from pathlib import Path
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from mail_transport import MailTransport  # noqa: E402
+
+
+class SMTPStandIn:
+    """Minimal SMTP server: EHLO, AUTH, MAIL/RCPT/DATA, RSET, NOOP, QUIT"""
+
+    def __init__(self, connect_delay: float, message_delay: float):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.sessions += 1
+        await asyncio.sleep(self.connect_delay)
+        writer.write(b"220 standin ESMTP\r\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith("EHLO"):
+                    writer.write(b"250-standin\r\n250-AUTH PLAIN LOGIN\r\n250 SIZE 10485760\r\n")
+                elif command.startswith("HELO"):
+                    writer.write(b"250 standin\r\n")
+                elif command.startswith("AUTH"):
+                    writer.write(b"235 2.7.0 Authentication successful\r\n")
+                elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                    writer.write(b"250 OK\r\n")
+                elif command == "DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    await asyncio.sleep(self.message_delay)
+                    self.messages += 1
+                    writer.write(b"250 OK queued\r\n")
+                elif command == "QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"502 Command not implemented\r\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+def build_message(i: int) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = f"Booking confirmation {i}"
+    msg["From"] = "FreeStays <booking@freestays.test>"
+    msg["To"] = f"guest{i}@example.test"
+    msg.attach(MIMEText("<p>Thank you for booking with FreeStays.</p>" * 40, "html"))
+    return msg
+
+
+def send_per_message(settings, msg):
+    """The pattern the senders used before: one session per message"""
+    with smtplib.SMTP(settings["host"], settings["port"]) as server:
+        server.login(settings["username"], settings["password"])
+        server.send_message(msg)
+
+
+async def run(args):
+    standin = SMTPStandIn(args.connect_ms / 1000, args.message_ms / 1000)
+    server = await asyncio.start_server(standin.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    settings = {"host": "127.0.0.1", "port": port, "username": "bench", "password": "bench", "starttls": False}
+    messages = [build_message(i) for i in range(args.messages)]
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def per_message(msg):
+        async with limit:
+            await loop.run_in_executor(None, send_per_message, settings, msg)
+
+    print(f"{args.messages} messages, concurrency {args.concurrency}, "
+          f"handshake {args.connect_ms} ms, per-message {args.message_ms} ms\n")
+    print(f"{'transport':<28} {'seconds':>8} {'msg/s':>8} {'sessions':>9}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[per_message(msg) for msg in messages])
+    elapsed = time.perf_counter() - start
+    print(f"{'connect per message':<28} {elapsed:>8.2f} {args.messages / elapsed:>8.1f} {standin.sessions:>9}")
+    baseline = elapsed
+
+    standin.sessions = 0
+    transport = MailTransport(pool_size=args.concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*[transport.send(settings, msg) for msg in messages])
+    elapsed = time.perf_counter() - start
+    print(f"{'MailTransport (pooled)':<28} {elapsed:>8.2f} {args.messages / elapsed:>8.1f} {standin.sessions:>9}"
+          f"   ({baseline / elapsed:.1f}x)")
+
+    standin.sessions = 0
+    start = time.perf_counter()
+    await asyncio.gather(*[transport.submit(settings, msg) for msg in messages])
+    elapsed = time.perf_counter() - start
+    print(f"{'MailTransport send queue':<28} {elapsed:>8.2f} {args.messages / elapsed:>8.1f} {standin.sessions:>9}")
+
+    await transport.close()
+    server.close()
+    await server.wait_closed()
+    print(f"\n{transport.stats()}")
+    assert standin.messages == args.messages * 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled SMTP transport against a local stand-in")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--connect-ms", type=float, default=150, help="Handshake latency per new session")
+    parser.add_argument("--message-ms", type=float, default=5, help="Server latency per accepted message")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
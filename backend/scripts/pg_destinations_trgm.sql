@@ -0,0 +1,25 @@
+-- FreeStays PostgreSQL destination search migration
+-- ================================================
+-- Trigram indexes so search_destinations_postgres (LOWER(...) LIKE '%q%')
+-- uses an index instead of scanning sunhotels_destinations_cache.
+-- Idempotent; applied once by db_config.migrate_destination_search() (which
+-- skips it when freestays_schema_migrations already lists it) or manually:
+--   psql -U freestays -d freestays -f scripts/pg_destinations_trgm.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_destinations_cache_name_trgm
+    ON sunhotels_destinations_cache USING gin (LOWER("Name") gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_destinations_cache_country_trgm
+    ON sunhotels_destinations_cache USING gin (LOWER("Country") gin_trgm_ops);
+
+ANALYZE sunhotels_destinations_cache;
+
+CREATE TABLE IF NOT EXISTS freestays_schema_migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO freestays_schema_migrations (name) VALUES ('pg_destinations_trgm')
+    ON CONFLICT (name) DO NOTHING;
@@ -9,14 +9,23 @@ import logging
 import secrets
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from abc import ABC, abstractmethod
 import uuid
+import copy
+import time
 from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import httpx
 import xml.etree.ElementTree as ET
-import bcrypt
 import jwt
 import json
+import zlib
+import gzip
+from decimal import Decimal
+from bson import ObjectId
+import hashlib
 import asyncpg
 import smtplib
 from email.mime.text import MIMEText
@@ -27,13 +36,27 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import shutil
-import imaplib
+from urllib.parse import quote
 
 # Import seed data
 from seed_data import seed_email_templates, seed_all_defaults
+from db_config import PG_HOST, get_pg_pool, close_pg_pool, migrate_destination_search, search_destinations_postgres
+from job_queue import JobQueue, PermanentJobError
+from mail_transport import mail_transport
+from push_dispatcher import PushDispatcher
+from imap_mailbox import IMAPMailbox, IMAP_FETCH_BATCH
+from principal_cache import MISSING, principal_cache, user_subjects
+from password_hasher import password_hasher
+from dashboard_stats import dashboard_stats, DASHBOARD_STATS_RECONCILE_MINUTES
+from rate_limiter import RateLimiter
 import email
 from email.header import decode_header
 import re
+import unicodedata
+import bisect
+import heapq
+import math
+from array import array
 
 ROOT_DIR = Path(__file__).parent
 UPLOAD_DIR = ROOT_DIR / "static" / "uploads"
@@ -58,42 +81,294 @@ client = AsyncIOMotorClient(
 db = client[os.environ['DB_NAME']]
 
 # MySQL Connection Pool (for static hotel data)
-mysql_pool = None
+MYSQL_POOL_MIN_SIZE = int(os.environ.get('MYSQL_POOL_MIN_SIZE', '2'))
+MYSQL_POOL_MAX_SIZE = int(os.environ.get('MYSQL_POOL_MAX_SIZE', '10'))
+MYSQL_ACQUIRE_TIMEOUT = float(os.environ.get('MYSQL_ACQUIRE_TIMEOUT', '5'))  # seconds to wait for a free connection
+MYSQL_RETRY_AFTER = 30  # seconds before retrying after a failed pool creation
 
-async def get_mysql_pool():
-    """Get or create MySQL connection pool"""
-    global mysql_pool
-    if mysql_pool is None:
-        settings = await get_settings()
-        host = settings.get("static_db_host", "")
-        if host:
+class StaticDBUnavailable(Exception):
+    """Static MySQL database is not configured, unreachable or the pool is exhausted"""
+
+class MySQLPoolManager:
+    """
+    Owns the single aiomysql pool for the static database. The pool is rebuilt when the
+    static_db_* settings change; connections are handed out via connection() so they are
+    always released, and acquire wait/saturation is tracked for the admin metrics endpoint.
+    """
+    def __init__(self):
+        self.pool = None
+        self._config: Optional[tuple] = None
+        self._lock = asyncio.Lock()
+        self._failed_config: Optional[tuple] = None
+        self._failed_at = 0.0
+        self.created_at: Optional[datetime] = None
+        self.rebuilds = 0
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.last_error: Optional[str] = None
+    
+    @staticmethod
+    def config_from_settings(settings: Dict) -> tuple:
+        return (
+            settings.get("static_db_host", ""),
+            int(settings.get("static_db_port", 3306) or 3306),
+            settings.get("static_db_user", ""),
+            settings.get("static_db_password", ""),
+            settings.get("static_db_name", "")
+        )
+    
+    async def get_pool(self):
+        """Current pool for the configured static DB (None when not configured/unreachable)"""
+        config = self.config_from_settings(await get_settings())
+        if self.pool is not None and config == self._config:
+            return self.pool
+        if not config[0]:
+            if self.pool is not None:
+                await self._replace_pool(None, None)
+            return None
+        if config == self._failed_config and time.monotonic() - self._failed_at < MYSQL_RETRY_AFTER:
+            return None
+        
+        async with self._lock:
+            if self.pool is not None and config == self._config:
+                return self.pool
+            host, port, user, password, database = config
             try:
-                mysql_pool = await aiomysql.create_pool(
+                pool = await aiomysql.create_pool(
                     host=host,
-                    port=int(settings.get("static_db_port", 3306)),
-                    user=settings.get("static_db_user", ""),
-                    password=settings.get("static_db_password", ""),
-                    db=settings.get("static_db_name", ""),
+                    port=port,
+                    user=user,
+                    password=password,
+                    db=database,
                     charset='utf8mb4',
-                    minsize=2,
-                    maxsize=10,
+                    minsize=MYSQL_POOL_MIN_SIZE,
+                    maxsize=MYSQL_POOL_MAX_SIZE,
                     connect_timeout=5,
+                    autocommit=True,  # Read-only SELECTs must not leave a transaction open on release
                     pool_recycle=300  # Recycle connections every 5 min
                 )
-                logger.info("✓ MySQL connection pool created")
             except Exception as e:
+                self._failed_config = config
+                self._failed_at = time.monotonic()
+                self.last_error = str(e)[:200]
                 logger.error(f"Failed to create MySQL pool: {e}")
                 return None
-    return mysql_pool
+            
+            rebuilt = self.pool is not None
+            await self._replace_pool(pool, config)
+            self._failed_config = None
+            if rebuilt:
+                self.rebuilds += 1
+                logger.info("✓ MySQL connection pool rebuilt after static DB settings change")
+            else:
+                logger.info("✓ MySQL connection pool created")
+            return pool
+    
+    async def _replace_pool(self, pool, config: Optional[tuple]) -> None:
+        old_pool = self.pool
+        self.pool = pool
+        self._config = config
+        self.created_at = datetime.now(timezone.utc) if pool is not None else None
+        if old_pool is not None:
+            # Connections still in use are closed once released
+            old_pool.close()
+            asyncio.ensure_future(old_pool.wait_closed())
+    
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None):
+        """
+        async with mysql_connection() as conn: ...
+        Raises StaticDBUnavailable when no connection can be obtained; always releases the connection.
+        """
+        pool = await self.get_pool()
+        if pool is None:
+            raise StaticDBUnavailable("Static database not configured or unreachable")
+        start = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), timeout=timeout or MYSQL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise StaticDBUnavailable("Timed out waiting for a static database connection")
+        except Exception as e:
+            self.last_error = str(e)[:200]
+            raise StaticDBUnavailable(f"Static database connection failed: {e}")
+        wait = time.perf_counter() - start
+        self.acquires += 1
+        self.acquire_wait_total += wait
+        self.acquire_wait_max = max(self.acquire_wait_max, wait)
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+    
+    async def close(self) -> None:
+        if self.pool is not None:
+            pool = self.pool
+            self.pool = None
+            self._config = None
+            pool.close()
+            await pool.wait_closed()
+            logger.info("MySQL connection pool closed")
+    
+    def stats(self) -> Dict:
+        pool = self.pool
+        size = pool.size if pool is not None else 0
+        idle = pool.freesize if pool is not None else 0
+        return {
+            "configured": bool(self._config and self._config[0]),
+            "connected": pool is not None,
+            "host": self._config[0] if self._config else None,
+            "database": self._config[4] if self._config else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "min_size": MYSQL_POOL_MIN_SIZE,
+            "max_size": MYSQL_POOL_MAX_SIZE,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "saturation": round((size - idle) / MYSQL_POOL_MAX_SIZE * 100, 1) if MYSQL_POOL_MAX_SIZE else 0,
+            "acquires": self.acquires,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_wait_avg_ms": round(self.acquire_wait_total / self.acquires * 1000, 2) if self.acquires else 0,
+            "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 2),
+            "rebuilds": self.rebuilds,
+            "last_error": self.last_error
+        }
+
+mysql_pool_manager = MySQLPoolManager()
+
+async def get_mysql_pool():
+    """Get or create MySQL connection pool (rebuilt when static_db_* settings change)"""
+    return await mysql_pool_manager.get_pool()
+
+def mysql_connection(timeout: Optional[float] = None):
+    """Pooled static DB connection as an async context manager"""
+    return mysql_pool_manager.connection(timeout)
 
 async def close_mysql_pool():
     """Close MySQL connection pool on shutdown"""
-    global mysql_pool
-    if mysql_pool:
-        mysql_pool.close()
-        await mysql_pool.wait_closed()
-        mysql_pool = None
-        logger.info("MySQL connection pool closed")
+    await mysql_pool_manager.close()
+
+# Shared HTTP client for Sunhotels XML API (keep-alive, HTTP/2 when h2 is installed)
+SUNHOTELS_HTTP_MAX_CONNECTIONS = int(os.environ.get('SUNHOTELS_HTTP_MAX_CONNECTIONS', '50'))
+SUNHOTELS_HTTP_MAX_KEEPALIVE = int(os.environ.get('SUNHOTELS_HTTP_MAX_KEEPALIVE', '20'))
+SUNHOTELS_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('SUNHOTELS_HTTP_KEEPALIVE_EXPIRY', '60'))
+SUNHOTELS_HTTP_CONNECT_TIMEOUT = float(os.environ.get('SUNHOTELS_HTTP_CONNECT_TIMEOUT', '5'))
+SUNHOTELS_HTTP2_ENABLED = os.environ.get('SUNHOTELS_HTTP2_ENABLED', 'true').lower() == 'true'
+
+# Read timeout (seconds) per Sunhotels operation
+SUNHOTELS_OPERATION_TIMEOUTS = {
+    "SearchV3": 60.0,
+    "SearchV2": 60.0,
+    "GetStaticHotelsAndRooms": 30.0,
+    "GetDestinations": 30.0,
+    "GetResorts": 30.0,
+    "PreBookV3": 30.0,
+    "BookV3": 60.0,
+    "GetBookingInformationV3": 30.0,
+    "SearchTransfers": 30.0,
+    "AddTransfer": 30.0,
+}
+SUNHOTELS_DEFAULT_TIMEOUT = 30.0
+
+# GetStaticHotelsAndRooms enrichment: hotel IDs per request and concurrent requests per search
+STATIC_ENRICHMENT_BATCH_SIZE = int(os.environ.get('STATIC_ENRICHMENT_BATCH_SIZE', '50'))
+STATIC_ENRICHMENT_CONCURRENCY = int(os.environ.get('STATIC_ENRICHMENT_CONCURRENCY', '4'))
+
+sunhotels_http_client: Optional[httpx.AsyncClient] = None
+sunhotels_http_stats: Dict[str, Dict] = {}
+
+def get_sunhotels_http_client() -> httpx.AsyncClient:
+    """Get or create the application-wide Sunhotels HTTP client"""
+    global sunhotels_http_client
+    if sunhotels_http_client is None or sunhotels_http_client.is_closed:
+        http2 = SUNHOTELS_HTTP2_ENABLED
+        if http2:
+            import importlib.util
+            http2 = importlib.util.find_spec("h2") is not None
+        sunhotels_http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=SUNHOTELS_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=SUNHOTELS_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=SUNHOTELS_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(SUNHOTELS_DEFAULT_TIMEOUT, connect=SUNHOTELS_HTTP_CONNECT_TIMEOUT)
+        )
+        logger.info(f"✓ Sunhotels HTTP client created (http2={http2}, max_connections={SUNHOTELS_HTTP_MAX_CONNECTIONS})")
+    return sunhotels_http_client
+
+async def close_sunhotels_http_client():
+    """Close the shared Sunhotels HTTP client on shutdown"""
+    global sunhotels_http_client
+    if sunhotels_http_client and not sunhotels_http_client.is_closed:
+        await sunhotels_http_client.aclose()
+        logger.info("Sunhotels HTTP client closed")
+    sunhotels_http_client = None
+
+def sunhotels_operation_timeout(operation: str) -> httpx.Timeout:
+    """Timeout for a Sunhotels operation (connect timeout is shared)"""
+    read_timeout = SUNHOTELS_OPERATION_TIMEOUTS.get(operation, SUNHOTELS_DEFAULT_TIMEOUT)
+    return httpx.Timeout(read_timeout, connect=SUNHOTELS_HTTP_CONNECT_TIMEOUT)
+
+def record_sunhotels_request(operation: str, elapsed: float, error: bool = False) -> None:
+    """Record per-operation request count, error count and latency"""
+    stats = sunhotels_http_stats.setdefault(operation, {
+        "requests": 0,
+        "errors": 0,
+        "total_time": 0.0,
+        "max_time": 0.0
+    })
+    stats["requests"] += 1
+    if error:
+        stats["errors"] += 1
+    stats["total_time"] += elapsed
+    stats["max_time"] = max(stats["max_time"], elapsed)
+
+def record_stage_timing(timings: Optional[Dict], stage: str, start_time: float) -> None:
+    """Store elapsed milliseconds for a search stage when a debug timing dict is being collected"""
+    if timings is not None:
+        timings[f"{stage}_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+
+def get_sunhotels_http_stats() -> Dict:
+    """Connection pool and per-operation statistics for the Sunhotels HTTP client"""
+    pool_info = {"created": False}
+    http_client = sunhotels_http_client
+    if http_client is not None and not http_client.is_closed:
+        pool_info = {"created": True, "http2": False, "connections": 0, "idle": 0, "active": 0, "http2_connections": 0}
+        try:
+            # httpcore does not expose a public stats API - inspect the pool defensively
+            connections = list(http_client._transport._pool.connections)
+            pool_info["connections"] = len(connections)
+            pool_info["idle"] = sum(1 for c in connections if c.is_idle())
+            pool_info["active"] = sum(1 for c in connections if not c.is_idle() and not c.is_closed())
+            pool_info["http2_connections"] = sum(1 for c in connections if c.info().startswith("HTTP/2"))
+            pool_info["http2"] = bool(getattr(http_client._transport._pool, "_http2", False))
+        except Exception as e:
+            pool_info["error"] = str(e)
+
+    operations = {}
+    for operation, stats in sunhotels_http_stats.items():
+        avg_time = stats["total_time"] / stats["requests"] if stats["requests"] else 0
+        operations[operation] = {
+            "requests": stats["requests"],
+            "errors": stats["errors"],
+            "avg_ms": round(avg_time * 1000, 1),
+            "max_ms": round(stats["max_time"] * 1000, 1),
+            "timeout_seconds": SUNHOTELS_OPERATION_TIMEOUTS.get(operation, SUNHOTELS_DEFAULT_TIMEOUT)
+        }
+
+    return {
+        "limits": {
+            "max_connections": SUNHOTELS_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": SUNHOTELS_HTTP_MAX_KEEPALIVE,
+            "keepalive_expiry": SUNHOTELS_HTTP_KEEPALIVE_EXPIRY,
+            "connect_timeout": SUNHOTELS_HTTP_CONNECT_TIMEOUT
+        },
+        "pool": pool_info,
+        "operations": operations
+    }
 
 # Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'freestays-secret-key-2024')
@@ -111,6 +386,8 @@ IMAP_SERVER = os.environ.get('IMAP_SERVER', 'imap.strato.com')
 IMAP_EMAIL = os.environ.get('IMAP_EMAIL', 'info@freestays.eu')
 IMAP_PASSWORD = os.environ.get('IMAP_PASSWORD', '')
 IMAP_PORT = int(os.environ.get('IMAP_PORT', '993'))
+IMAP_USE_SSL = os.environ.get('IMAP_USE_SSL', 'true').lower() == 'true'
+IMAP_WATCH_ENABLED = os.environ.get('IMAP_WATCH_ENABLED', 'true').lower() == 'true'  # persistent session + IDLE
 
 # Stripe Configuration - can be updated via admin
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY', 'sk_test_emergent')
@@ -122,6 +399,9 @@ BOOKING_FEE = 15.00          # €15 booking fee (waived with pass purchase)
 
 # Initialize scheduler for background jobs
 scheduler = AsyncIOScheduler()
+
+# Durable queue for work triggered by requests (worker pool per job type)
+job_queue = JobQueue(db.background_jobs)
 MARKUP_RATE = 0.16           # 16% markup
 VAT_RATE = 0.21              # 21% VAT on markup
 FREESTAYS_DISCOUNT = 0.15    # 15% discount for pass holders
@@ -129,6 +409,130 @@ FREESTAYS_DISCOUNT = 0.15    # 15% discount for pass holders
 # Create the main app
 app = FastAPI(title="FreeStays API", description="Commission-free hotel booking platform")
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def json_default(value: Any) -> Any:
+    """Types the JSON encoders don't handle natively (MongoDB documents, Decimals, sets, models)"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson (stdlib json fallback). Serializes datetimes and ObjectIds.
+    Return it directly from a route to also skip FastAPI's jsonable_encoder pass.
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Response compression (gzip, brotli when installed)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '5'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_THREAD_SIZE = 256 * 1024  # compress bodies above this off the event loop
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json", "text/", "application/javascript", "application/xml", "image/svg+xml"
+)
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+class CompressionMiddleware:
+    """
+    Compresses complete (non-streaming) responses of an allowed content type above
+    COMPRESSION_MIN_SIZE with brotli or gzip, following the client's Accept-Encoding.
+    Streaming and already-encoded responses pass through untouched.
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    @staticmethod
+    def choose_encoding(accept_encoding: str) -> Optional[str]:
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope.get("headers") or []:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = self.choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        passthrough = False
+        
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough or start_message is None:
+                await send(message)
+                return
+            
+            headers = {name.lower(): value for name, value in start_message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            body = message.get("body", b"")
+            if (message.get("more_body") or b"content-encoding" in headers or len(body) < COMPRESSION_MIN_SIZE
+                    or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            
+            if len(body) > COMPRESSION_THREAD_SIZE:
+                compressed = await asyncio.to_thread(compress_body, body, encoding)
+            else:
+                compressed = compress_body(body, encoding)
+            new_headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() not in (b"content-length", b"vary")
+            ]
+            vary = headers.get(b"vary")
+            new_headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            new_headers.append((b"content-encoding", encoding.encode()))
+            new_headers.append((b"content-length", str(len(compressed)).encode()))
+            passthrough = True
+            await send({**start_message, "headers": new_headers})
+            await send({"type": "http.response.body", "body": compressed})
+        
+        await self.app(scope, receive, send_wrapper)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -137,44 +541,337 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 # ==================== SEARCH CACHE ====================
+PAYLOAD_SIZE_SAMPLE = 8  # list items sized per list; the rest are assumed alike
+
+def estimate_payload_size(value: Any) -> int:
+    """
+    Approximate in-memory footprint of a cached payload (roughly its JSON size in bytes).
+    Long lists (hotels, rooms, destinations) are sized from evenly spaced samples times
+    their length, so set() does not serialize a whole search result to account for it.
+    """
+    if isinstance(value, dict):
+        return 2 + sum(len(str(k)) + 4 + estimate_payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        count = len(value)
+        if count > PAYLOAD_SIZE_SAMPLE:
+            step = count / PAYLOAD_SIZE_SAMPLE
+            sampled = sum(estimate_payload_size(value[int(i * step)]) for i in range(PAYLOAD_SIZE_SAMPLE))
+            return 2 + count + sampled * count // PAYLOAD_SIZE_SAMPLE
+        return 2 + count + sum(estimate_payload_size(item) for item in value)
+    if isinstance(value, str):
+        return len(value) + 2
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    return len(str(value)) + 2
+
+# Shared second-tier (L2) cache so all workers/containers see warmed results
+SEARCH_CACHE_BACKEND = os.environ.get('SEARCH_CACHE_BACKEND', 'auto').lower()  # auto, redis, mongo, none
+SEARCH_CACHE_REDIS_URL = os.environ.get('REDIS_URL', '')
+SEARCH_CACHE_SYNC_INTERVAL = int(os.environ.get('SEARCH_CACHE_SYNC_INTERVAL', '5'))  # seconds between invalidation checks
+SEARCH_CACHE_MAX_L2_BYTES = 15 * 1024 * 1024  # stay below MongoDB's 16MB document limit
+
+def serialize_cache_payload(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+def compress_cache_payload(raw: bytes) -> bytes:
+    return zlib.compress(raw, 6)
+
+def decompress_cache_payload(data: bytes) -> Tuple[Any, int]:
+    """Decoded payload plus its serialized size, which is what L1 accounts for"""
+    raw = zlib.decompress(data)
+    return json.loads(raw), len(raw)
+
+class SearchCacheBackend(ABC):
+    """Shared store for compressed SearchCache payloads"""
+    name = "none"
+    
+    async def start(self) -> None:
+        pass
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+    
+    @abstractmethod
+    async def set(self, key: str, data: bytes, ttl_seconds: int) -> None:
+        ...
+    
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+    
+    @abstractmethod
+    async def get_generation(self, namespace: str) -> int:
+        """Current invalidation generation of a cache namespace"""
+    
+    @abstractmethod
+    async def bump_generation(self, namespace: str) -> int:
+        """Invalidate every entry of a namespace for all workers"""
+    
+    async def close(self) -> None:
+        pass
+
+class RedisSearchCacheBackend(SearchCacheBackend):
+    """Redis (or any Redis-protocol server) backend"""
+    name = "redis"
+    
+    def __init__(self, url: str):
+        import redis.asyncio as redis_asyncio
+        self._redis = redis_asyncio.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+    
+    async def start(self) -> None:
+        await self._redis.ping()
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+    
+    async def set(self, key: str, data: bytes, ttl_seconds: int) -> None:
+        await self._redis.set(key, data, ex=ttl_seconds)
+    
+    async def exists(self, key: str) -> bool:
+        return bool(await self._redis.exists(key))
+    
+    async def get_generation(self, namespace: str) -> int:
+        value = await self._redis.get(f"{namespace}:generation")
+        return int(value) if value else 0
+    
+    async def bump_generation(self, namespace: str) -> int:
+        return int(await self._redis.incr(f"{namespace}:generation"))
+    
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+class MongoSearchCacheBackend(SearchCacheBackend):
+    """MongoDB backend using a TTL-indexed collection"""
+    name = "mongo"
+    
+    def __init__(self, collection):
+        self._collection = collection
+    
+    async def start(self) -> None:
+        await self._collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        # The TTL monitor only runs once a minute, so filter on expiry as well
+        doc = await self._collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"data": 1}
+        )
+        return bytes(doc["data"]) if doc else None
+    
+    async def set(self, key: str, data: bytes, ttl_seconds: int) -> None:
+        await self._collection.update_one(
+            {"_id": key},
+            {"$set": {"data": data, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)}},
+            upsert=True
+        )
+    
+    async def exists(self, key: str) -> bool:
+        doc = await self._collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"_id": 1}
+        )
+        return doc is not None
+    
+    async def get_generation(self, namespace: str) -> int:
+        doc = await self._collection.find_one({"_id": f"{namespace}:generation"})
+        return int(doc.get("generation", 0)) if doc else 0
+    
+    async def bump_generation(self, namespace: str) -> int:
+        # Generation documents have no expires_at, so the TTL index never removes them
+        from pymongo import ReturnDocument
+        doc = await self._collection.find_one_and_update(
+            {"_id": f"{namespace}:generation"},
+            {"$inc": {"generation": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return int(doc["generation"])
+
 class SearchCache:
-    """Simple in-memory cache for autocomplete search results with TTL"""
-    def __init__(self, max_size: int = 500, ttl_seconds: int = 300):
-        self._cache: Dict[str, tuple] = {}  # key -> (result, timestamp)
+    """
+    In-memory LRU cache with TTL, byte budget and request coalescing (all operations O(1)).
+    With a shared backend attached it acts as L1 in front of a cross-worker L2.
+    """
+    def __init__(self, max_size: int = 500, ttl_seconds: int = 300, max_bytes: int = 64 * 1024 * 1024, name: str = "search"):
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, expires_at, size)
+        self._inflight: Dict[str, asyncio.Future] = {}  # key -> loader task shared by concurrent misses
         self._max_size = max_size
+        self._max_bytes = max_bytes
         self._ttl = ttl_seconds
+        self._bytes = 0
+        self.name = name
+        self.backend: Optional[SearchCacheBackend] = None
+        self._generation = 0
+        self._reset_counters()
+    
+    def _reset_counters(self) -> None:
         self._hits = 0
         self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._coalesced = 0
+        self._rejected = 0
+        self._l2_hits = 0
+        self._l2_misses = 0
+        self._l2_writes = 0
+        self._l2_errors = 0
+    
+    def _remove(self, key: str) -> None:
+        _, _, size = self._cache.pop(key)
+        self._bytes -= size
     
     def get(self, key: str) -> Optional[Any]:
         """Get cached result if exists and not expired"""
-        if key in self._cache:
-            result, timestamp = self._cache[key]
-            if datetime.now().timestamp() - timestamp < self._ttl:
+        entry = self._cache.get(key)
+        if entry is not None:
+            result, expires_at, _ = entry
+            if time.monotonic() < expires_at:
+                self._cache.move_to_end(key)
                 self._hits += 1
                 return result
-            else:
-                # Expired, remove it
-                del self._cache[key]
+            # Expired, remove it
+            self._remove(key)
+            self._expirations += 1
         self._misses += 1
         return None
     
-    def set(self, key: str, value: Any) -> None:
-        """Cache a result with current timestamp"""
-        # Evict oldest entries if cache is full
-        if len(self._cache) >= self._max_size:
-            # Remove 20% of oldest entries
-            items = sorted(self._cache.items(), key=lambda x: x[1][1])
-            for k, _ in items[:int(self._max_size * 0.2)]:
-                del self._cache[k]
+    def contains(self, key: str) -> bool:
+        """Check for a fresh entry without touching LRU order or hit/miss counters"""
+        entry = self._cache.get(key)
+        return entry is not None and time.monotonic() < entry[1]
+    
+    def set(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        """Cache a result, evicting least recently used entries to stay within count and byte budgets"""
+        if size is None:
+            size = estimate_payload_size(value)
+        if key in self._cache:
+            self._remove(key)
+        if size > self._max_bytes:
+            self._rejected += 1
+            return
         
-        self._cache[key] = (value, datetime.now().timestamp())
+        self._cache[key] = (value, time.monotonic() + self._ttl, size)
+        self._bytes += size
+        while len(self._cache) > self._max_size or self._bytes > self._max_bytes:
+            _, (_, _, evicted_size) = self._cache.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+    
+    def _l2_key(self, key: str) -> str:
+        return f"freestays:{self.name}:{self._generation}:{key}"
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Two-tier lookup: local L1 first, then the shared L2 (which repopulates L1)"""
+        value = self.get(key)
+        if value is not None or self.backend is None:
+            return value
+        try:
+            data = await self.backend.get(self._l2_key(key))
+        except Exception as e:
+            self._l2_errors += 1
+            logger.warning(f"Search cache L2 read failed ({self.name}): {str(e)[:100]}")
+            return None
+        if data is None:
+            self._l2_misses += 1
+            return None
+        value, size = await asyncio.to_thread(decompress_cache_payload, data)
+        self._l2_hits += 1
+        self.set(key, value, size=size)
+        return value
+    
+    async def aset(self, key: str, value: Any) -> None:
+        """Store in L1 and write the compressed payload through to L2"""
+        if self.backend is None:
+            self.set(key, value)
+            return
+        raw = await asyncio.to_thread(serialize_cache_payload, value)
+        self.set(key, value, size=len(raw))
+        try:
+            data = await asyncio.to_thread(compress_cache_payload, raw)
+            if len(data) > SEARCH_CACHE_MAX_L2_BYTES:
+                self._rejected += 1
+                return
+            await self.backend.set(self._l2_key(key), data, self._ttl)
+            self._l2_writes += 1
+        except Exception as e:
+            self._l2_errors += 1
+            logger.warning(f"Search cache L2 write failed ({self.name}): {str(e)[:100]}")
+    
+    async def acontains(self, key: str) -> bool:
+        """Fresh entry in L1 or L2 (does not touch hit/miss counters)"""
+        if self.contains(key):
+            return True
+        if self.backend is None:
+            return False
+        try:
+            return await self.backend.exists(self._l2_key(key))
+        except Exception as e:
+            self._l2_errors += 1
+            logger.warning(f"Search cache L2 lookup failed ({self.name}): {str(e)[:100]}")
+            return False
+    
+    async def get_or_load(self, key: str, loader) -> Any:
+        """
+        Return the cached value or run loader() once for all concurrent callers of the same key.
+        The loader result is cached unless it is None.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        else:
+            self._coalesced += 1
+        # Shield so a cancelled caller does not cancel the load shared by the others
+        return await asyncio.shield(task)
+    
+    async def _load(self, key: str, loader) -> Any:
+        try:
+            if self.backend is not None:
+                value = await self.aget(key)
+                if value is not None:
+                    return value
+            value = await loader()
+            if value is not None:
+                await self.aset(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
     
     def clear(self) -> None:
         """Clear all cached entries"""
         self._cache.clear()
-        self._hits = 0
-        self._misses = 0
+        self._bytes = 0
+        self._reset_counters()
+    
+    async def aclear(self) -> None:
+        """Clear L1 and invalidate L2 for every worker (L1 of other workers follows on their next sync)"""
+        self.clear()
+        if self.backend is not None:
+            try:
+                self._generation = await self.backend.bump_generation(f"freestays:{self.name}")
+            except Exception as e:
+                self._l2_errors += 1
+                logger.warning(f"Search cache L2 invalidation failed ({self.name}): {str(e)[:100]}")
+    
+    async def sync_generation(self) -> None:
+        """Drop local entries when another worker invalidated the shared cache"""
+        if self.backend is None:
+            return
+        try:
+            generation = await self.backend.get_generation(f"freestays:{self.name}")
+        except Exception as e:
+            self._l2_errors += 1
+            logger.warning(f"Search cache generation check failed ({self.name}): {str(e)[:100]}")
+            return
+        if generation != self._generation:
+            self._generation = generation
+            self._cache.clear()
+            self._bytes = 0
     
     def stats(self) -> Dict:
         """Get cache statistics"""
@@ -183,17 +880,624 @@ class SearchCache:
         return {
             "size": len(self._cache),
             "max_size": self._max_size,
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
             "ttl_seconds": self._ttl,
             "hits": self._hits,
             "misses": self._misses,
-            "hit_rate": f"{hit_rate:.1f}%"
+            "hit_rate": f"{hit_rate:.1f}%",
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "coalesced": self._coalesced,
+            "rejected": self._rejected,
+            "inflight": len(self._inflight),
+            "l2": {
+                "backend": self.backend.name if self.backend else "none",
+                "generation": self._generation,
+                "hits": self._l2_hits,
+                "misses": self._l2_misses,
+                "writes": self._l2_writes,
+                "errors": self._l2_errors
+            }
         }
 
 # Initialize search cache (500 entries, 5 min TTL)
-autocomplete_cache = SearchCache(max_size=500, ttl_seconds=300)
+autocomplete_cache = SearchCache(
+    max_size=500,
+    ttl_seconds=300,
+    max_bytes=int(os.environ.get('AUTOCOMPLETE_CACHE_MAX_MB', '16')) * 1024 * 1024,
+    name="autocomplete"
+)
 
 # Hotel search cache (shorter TTL as prices change)
-hotel_search_cache = SearchCache(max_size=100, ttl_seconds=180)  # 3 min TTL
+hotel_search_cache = SearchCache(
+    max_size=100,
+    ttl_seconds=180,  # 3 min TTL
+    max_bytes=int(os.environ.get('HOTEL_SEARCH_CACHE_MAX_MB', '256')) * 1024 * 1024,
+    name="hotel_search"
+)
+
+# Per (hotel, dates, occupancy) availability probes for next-availability, sold-out results included
+AVAILABILITY_PROBE_TTL = int(os.environ.get('AVAILABILITY_PROBE_TTL', '600'))
+AVAILABILITY_PROBE_CONCURRENCY = int(os.environ.get('AVAILABILITY_PROBE_CONCURRENCY', '6'))
+availability_probe_cache = SearchCache(
+    max_size=20000,
+    ttl_seconds=AVAILABILITY_PROBE_TTL,
+    max_bytes=16 * 1024 * 1024,
+    name="availability_probe"
+)
+
+HOTEL_AVAILABILITY_MAX_AGE = int(os.environ.get('HOTEL_AVAILABILITY_MAX_AGE', '300'))  # seconds a search result may serve hotel pages
+HOTEL_AVAILABILITY_MAX_SEARCHES = int(os.environ.get('HOTEL_AVAILABILITY_MAX_SEARCHES', '300'))
+HOTEL_AVAILABILITY_SOLD_OUT_TTL = int(os.environ.get('HOTEL_AVAILABILITY_SOLD_OUT_TTL', '60'))  # seconds a live "no rooms" answer is reused
+HOTEL_AVAILABILITY_MAX_SOLD_OUT = 5000
+
+class HotelAvailabilityStore:
+    """
+    Room lists from recent SearchV3 destination searches, keyed by hotel_id, so a hotel page
+    opened from /hotels/search reuses the rooms that search already fetched.
+    Entries are per (destination scope, dates, occupancy, b2c); oldest searches are evicted first.
+    Hotels a live search found sold out are remembered for a shorter sold_out_ttl.
+    """
+    def __init__(self, max_searches: int = 300, max_age: int = 300, sold_out_ttl: int = 60,
+                 max_sold_out: int = 5000):
+        self._searches: "OrderedDict[tuple, tuple]" = OrderedDict()  # (scope, occupancy) -> (stored_at, {hotel_id: rooms})
+        self._hotel_index: Dict[tuple, tuple] = {}  # (hotel_id, occupancy) -> latest (scope, occupancy) containing it
+        self._sold_out_at: "OrderedDict[tuple, float]" = OrderedDict()  # (hotel_id, occupancy) -> when found sold out
+        self._max_searches = max_searches
+        self._max_age = max_age
+        self._sold_out_ttl = sold_out_ttl
+        self._max_sold_out = max_sold_out
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._sold_out = 0
+        self._stores = 0
+    
+    @staticmethod
+    def occupancy_key(check_in: str, check_out: str, adults: int, children: int, children_ages: Optional[List[int]],
+                      b2c: int, rooms: int = 1, currency: str = "EUR") -> tuple:
+        ages = tuple(int(age) for age in children_ages) if children_ages else ()
+        return (check_in, check_out, int(adults), int(children), ages, int(b2c), int(rooms), (currency or "EUR").upper())
+    
+    def store(self, scope: str, occupancy: tuple, hotels: List[Dict]) -> None:
+        """Record the rooms of every hotel in a successful search"""
+        key = (scope, occupancy)
+        if key in self._searches:
+            self._drop(key)
+        rooms_by_hotel = {str(h.get("hotel_id")): h.get("rooms", []) for h in hotels}
+        self._searches[key] = (time.monotonic(), rooms_by_hotel)
+        for hotel_id in rooms_by_hotel:
+            self._hotel_index[(hotel_id, occupancy)] = key
+        self._stores += 1
+        while len(self._searches) > self._max_searches:
+            self._drop(next(iter(self._searches)))
+    
+    def mark_sold_out(self, hotel_id: str, occupancy: tuple) -> None:
+        """Remember that a live search returned no rooms for this hotel"""
+        key = (str(hotel_id), occupancy)
+        self._sold_out_at.pop(key, None)
+        self._sold_out_at[key] = time.monotonic()
+        while len(self._sold_out_at) > self._max_sold_out:
+            self._sold_out_at.popitem(last=False)
+    
+    def _drop(self, key: tuple) -> None:
+        _, rooms_by_hotel = self._searches.pop(key)
+        occupancy = key[1]
+        for hotel_id in rooms_by_hotel:
+            if self._hotel_index.get((hotel_id, occupancy)) == key:
+                del self._hotel_index[(hotel_id, occupancy)]
+    
+    def lookup(self, hotel_id: str, occupancy: tuple, scopes: List[str]) -> Optional[List[Dict]]:
+        """
+        Rooms for a hotel from a fresh search (empty list when that destination search did not
+        return the hotel), or None when no fresh search covers it.
+        """
+        hotel_id = str(hotel_id)
+        now = time.monotonic()
+        keys = [(scope, occupancy) for scope in scopes]
+        indexed = self._hotel_index.get((hotel_id, occupancy))
+        if indexed is not None and indexed not in keys:
+            keys.append(indexed)
+        
+        for key in keys:
+            entry = self._searches.get(key)
+            if entry is None:
+                continue
+            stored_at, rooms_by_hotel = entry
+            if now - stored_at > self._max_age:
+                self._drop(key)
+                self._stale += 1
+                continue
+            if hotel_id in rooms_by_hotel:
+                self._hits += 1
+                return rooms_by_hotel[hotel_id]
+            if key[0] in scopes:
+                # The destination was searched for these dates and this hotel had nothing available
+                self._sold_out += 1
+                return []
+        sold_out_at = self._sold_out_at.get((hotel_id, occupancy))
+        if sold_out_at is not None:
+            if now - sold_out_at <= self._sold_out_ttl:
+                self._sold_out += 1
+                return []
+            del self._sold_out_at[(hotel_id, occupancy)]
+        self._misses += 1
+        return None
+    
+    def peek(self, hotel_id: str, occupancy: tuple) -> Optional[List[Dict]]:
+        """Rooms from the latest fresh search containing the hotel, without touching the counters"""
+        key = self._hotel_index.get((str(hotel_id), occupancy))
+        entry = self._searches.get(key) if key is not None else None
+        if entry is None or time.monotonic() - entry[0] > self._max_age:
+            return None
+        return entry[1].get(str(hotel_id))
+    
+    def clear(self) -> None:
+        self._searches.clear()
+        self._hotel_index.clear()
+        self._sold_out_at.clear()
+    
+    def stats(self) -> Dict:
+        total = self._hits + self._sold_out + self._misses
+        return {
+            "searches": len(self._searches),
+            "hotels_indexed": len(self._hotel_index),
+            "hotels_sold_out": len(self._sold_out_at),
+            "max_searches": self._max_searches,
+            "max_age_seconds": self._max_age,
+            "sold_out_ttl_seconds": self._sold_out_ttl,
+            "hits": self._hits,
+            "sold_out_hits": self._sold_out,
+            "misses": self._misses,
+            "stale": self._stale,
+            "stores": self._stores,
+            "hit_rate": f"{((self._hits + self._sold_out) / total * 100) if total else 0:.1f}%"
+        }
+
+hotel_availability_store = HotelAvailabilityStore(HOTEL_AVAILABILITY_MAX_SEARCHES, HOTEL_AVAILABILITY_MAX_AGE,
+                                                  HOTEL_AVAILABILITY_SOLD_OUT_TTL, HOTEL_AVAILABILITY_MAX_SOLD_OUT)
+
+search_cache_backend: Optional[SearchCacheBackend] = None
+search_cache_sync_task: Optional[asyncio.Task] = None
+
+async def start_search_cache_backend(backend_name: str) -> SearchCacheBackend:
+    if backend_name == "redis":
+        backend = RedisSearchCacheBackend(SEARCH_CACHE_REDIS_URL or "redis://localhost:6379/0")
+    else:
+        backend = MongoSearchCacheBackend(db.search_cache)
+    try:
+        await backend.start()
+    except Exception:
+        await backend.close()
+        raise
+    return backend
+
+async def setup_search_cache_backend() -> None:
+    """
+    Attach the shared L2 backend. "auto" uses Redis and only falls back to the MongoDB TTL
+    collection when Redis cannot be reached, since with Mongo every L1 miss costs a round trip.
+    """
+    global search_cache_backend, search_cache_sync_task
+    backend_name = SEARCH_CACHE_BACKEND
+    if backend_name == "none":
+        logger.info("Search cache running without shared L2 backend")
+        return
+    
+    try:
+        backend = await start_search_cache_backend("redis" if backend_name == "auto" else backend_name)
+    except Exception as e:
+        if backend_name != "auto":
+            logger.warning(f"Search cache L2 backend '{backend_name}' unavailable, using local cache only: {e}")
+            return
+        logger.warning(f"Search cache Redis unavailable, falling back to MongoDB L2: {e}")
+        try:
+            backend = await start_search_cache_backend("mongo")
+        except Exception as e:
+            logger.warning(f"Search cache L2 backend 'mongo' unavailable, using local cache only: {e}")
+            return
+    
+    search_cache_backend = backend
+    for cache in (autocomplete_cache, hotel_search_cache, availability_probe_cache):
+        cache.backend = backend
+        await cache.sync_generation()
+    search_cache_sync_task = asyncio.create_task(search_cache_sync_loop())
+    logger.info(f"✓ Search cache L2 backend: {backend.name}")
+
+async def search_cache_sync_loop() -> None:
+    """Pick up cross-worker invalidations from /admin/cache/clear"""
+    while True:
+        await asyncio.sleep(SEARCH_CACHE_SYNC_INTERVAL)
+        for cache in (autocomplete_cache, hotel_search_cache, availability_probe_cache):
+            await cache.sync_generation()
+
+async def close_search_cache_backend() -> None:
+    global search_cache_backend, search_cache_sync_task
+    if search_cache_sync_task:
+        search_cache_sync_task.cancel()
+        search_cache_sync_task = None
+    if search_cache_backend:
+        for cache in (autocomplete_cache, hotel_search_cache, availability_probe_cache):
+            cache.backend = None
+        await search_cache_backend.close()
+        search_cache_backend = None
+
+# ==================== AUTOCOMPLETE INDEX ====================
+
+# In-memory index over ghwk_autocomplete_lookup so /destinations/search never hits MySQL
+AUTOCOMPLETE_INDEX_ENABLED = os.environ.get('AUTOCOMPLETE_INDEX_ENABLED', 'true').lower() == 'true'
+AUTOCOMPLETE_INDEX_CHECK_MINUTES = int(os.environ.get('AUTOCOMPLETE_INDEX_CHECK_MINUTES', '10'))  # change detection
+AUTOCOMPLETE_INDEX_MAX_AGE_HOURS = int(os.environ.get('AUTOCOMPLETE_INDEX_MAX_AGE_HOURS', '6'))  # forced reload
+
+_SEARCH_TEXT_SEPARATORS = re.compile(r"[\W_]+")
+
+def normalize_search_text(text: Any) -> str:
+    """Accent/case-insensitive form used for matching ("Málaga" -> "malaga", "St.-Tropez" -> "st tropez")"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return " ".join(_SEARCH_TEXT_SEPARATORS.sub(" ", text).split())
+
+def autocomplete_thumbnail(images_json: Any) -> Optional[str]:
+    """Small thumbnail URL from the first entry of a ghwk_bravo_hotels images_json value"""
+    if not images_json:
+        return None
+    try:
+        images = json.loads(images_json) if isinstance(images_json, str) else images_json
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not images or not isinstance(images, list):
+        return None
+    
+    first_img = images[0]
+    if isinstance(first_img, dict):
+        # Get image ID or URL from dict
+        img_val = first_img.get("id") or first_img.get("url") or first_img.get("image_url")
+        if not img_val:
+            return None
+        if str(img_val).startswith("http"):
+            # Already a full URL - just use it (add resize params if possible)
+            base_url = str(img_val).split("&w=")[0].split("&h=")[0]
+            return f"{base_url}&w=100&h=75" if "?" in base_url else base_url
+        return f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_val}&w=100&h=75"
+    if isinstance(first_img, str):
+        if first_img.startswith("http"):
+            base_url = first_img.split("&w=")[0].split("&h=")[0]
+            return f"{base_url}&w=100&h=75" if "?" in base_url else first_img
+        return f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={first_img}&w=100&h=75"
+    if isinstance(first_img, int):
+        return f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={first_img}&w=100&h=75"
+    return None
+
+def autocomplete_item(row: Dict) -> Dict:
+    """Convert a ghwk_autocomplete_lookup row to the /destinations/search item format"""
+    item = {
+        "id": str(row["destination_id"]) if row["destination_id"] else "",
+        "name": row["display_name"] or row["search_term"],
+        "country": row["country_name"] or "",
+        "type": row["type"],
+        "hotel_count": row["hotel_count"] or 0,
+        "display": f"{row['display_name']}, {row['country_name']}" if row["country_name"] else row["display_name"],
+        "resort_id": ""  # Will be filled if needed
+    }
+    # Add hotel_id and thumbnail for hotel type results
+    if row["type"] == "hotel" and row.get("hotel_id"):
+        item["hotel_id"] = str(row["hotel_id"])
+        item["display"] = f"🏨 {row['display_name']}" + (f", {row['country_name']}" if row["country_name"] else "")
+        thumbnail_url = row["thumbnail"] if "thumbnail" in row else autocomplete_thumbnail(row.get("images_json"))
+        if thumbnail_url:
+            item["thumbnail"] = thumbnail_url
+    return item
+
+def prefix_edit_distance(query: str, text: str, max_distance: int) -> int:
+    """Smallest edit distance between query and any prefix of text (max_distance + 1 if larger)"""
+    previous = list(range(len(query) + 1))
+    best = previous[-1]
+    for i, ch in enumerate(text[:len(query) + max_distance], 1):
+        current = [i]
+        for j, q_ch in enumerate(query, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (q_ch != ch)))
+        best = min(best, current[-1])
+        if min(current) > max_distance:
+            break
+        previous = current
+    return best if best <= max_distance else max_distance + 1
+
+class AutocompleteSection:
+    """
+    Rank-ordered entries with an n-gram posting index for substring matches and a word
+    vocabulary for typo-tolerant matches. Entries are stored in ranking order, so scanning
+    a posting list front to back yields matches already sorted.
+    """
+    __slots__ = ("items", "keys", "grams", "gram_sizes", "vocab", "word_postings", "vocab_grams")
+    
+    def __init__(self, entries: List[tuple], gram_sizes: tuple):
+        # entries: (normalized_key, item) in ranking order
+        self.items = [item for _, item in entries]
+        self.keys = [key for key, _ in entries]
+        self.gram_sizes = gram_sizes
+        postings: Dict[str, List[int]] = {}
+        word_postings: Dict[str, List[int]] = {}
+        for idx, key in enumerate(self.keys):
+            seen = set()
+            for n in gram_sizes:
+                for i in range(len(key) - n + 1):
+                    gram = key[i:i + n]
+                    if gram not in seen:
+                        seen.add(gram)
+                        postings.setdefault(gram, []).append(idx)
+            for word in set(key.split()):
+                word_postings.setdefault(word, []).append(idx)
+        self.grams = {gram: array("I", ids) for gram, ids in postings.items()}
+        
+        # Distinct words (sorted for prefix ranges) with their own trigram index
+        self.vocab = sorted(word_postings)
+        self.word_postings = [array("I", word_postings[word]) for word in self.vocab]
+        vocab_grams: Dict[str, List[int]] = {}
+        for word_idx, word in enumerate(self.vocab):
+            for gram in {word[i:i + 3] for i in range(len(word) - 2)}:
+                vocab_grams.setdefault(gram, []).append(word_idx)
+        self.vocab_grams = {gram: array("I", ids) for gram, ids in vocab_grams.items()}
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def search(self, query: str, limit: int) -> List[int]:
+        """Substring matches (same semantics as LIKE '%query%'), best ranked first"""
+        if len(query) in self.gram_sizes:
+            return list(self.grams.get(query, ())[:limit])
+        if len(query) < min(self.gram_sizes):
+            return []
+        # Scan the rarest gram's postings and verify the full substring
+        n = max(self.gram_sizes)
+        postings = min((self.grams.get(query[i:i + n], ()) for i in range(len(query) - n + 1)), key=len)
+        keys = self.keys
+        matches = []
+        for idx in postings:
+            if query in keys[idx]:
+                matches.append(idx)
+                if len(matches) >= limit:
+                    break
+        return matches
+    
+    def _similar_words(self, token: str) -> Dict[int, int]:
+        """Vocabulary words starting with token within 1-2 edits -> edit distance"""
+        if len(token) < 4:
+            # Too short to guess typos - plain prefix match
+            start = bisect.bisect_left(self.vocab, token)
+            end = bisect.bisect_left(self.vocab, token + "\uffff")
+            return {word_idx: 0 for word_idx in range(start, end)}
+        
+        max_distance = 1 if len(token) <= 6 else 2
+        candidates = set()
+        for gram in {token[i:i + 3] for i in range(len(token) - 2)}:
+            candidates.update(self.vocab_grams.get(gram, ()))
+        # Typos in the first characters break the leading trigrams - also try same-first-letter words
+        start = bisect.bisect_left(self.vocab, token[0])
+        end = bisect.bisect_left(self.vocab, token[0] + "\uffff")
+        if end - start <= 2000:
+            candidates.update(range(start, end))
+        
+        matches = {}
+        for word_idx in candidates:
+            distance = prefix_edit_distance(token, self.vocab[word_idx], max_distance)
+            if distance <= max_distance:
+                matches[word_idx] = distance
+        return matches
+    
+    def fuzzy_search(self, query: str, limit: int, exclude: set) -> List[int]:
+        """Typo-tolerant matches: every query word is (nearly) a prefix of a word in the entry"""
+        token_matches = [self._similar_words(token) for token in query.split()]
+        if not token_matches or not all(token_matches):
+            return []
+        # Walk the token with the fewest entries; check the other tokens against each entry's words
+        token_matches.sort(key=lambda m: sum(len(self.word_postings[w]) for w in m))
+        primary = token_matches[0]
+        others = [{self.vocab[w]: d for w, d in matches.items()} for matches in token_matches[1:]]
+        
+        results = []
+        seen = set(exclude)
+        for distance in sorted(set(primary.values())):
+            postings = [self.word_postings[w] for w, d in primary.items() if d == distance]
+            for idx in heapq.merge(*postings):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                total = distance
+                words = self.keys[idx].split()
+                for other in others:
+                    best = min((other[w] for w in words if w in other), default=None)
+                    if best is None:
+                        break
+                    total += best
+                else:
+                    results.append((total, idx))
+                    if len(results) >= limit:
+                        break
+            if len(results) >= limit:
+                break
+        results.sort()
+        return [idx for _, idx in results]
+
+class AutocompleteIndex:
+    """
+    Destinations and hotels from ghwk_autocomplete_lookup (with precomputed thumbnails), loaded
+    at startup and rebuilt off the event loop when the table changes. Queries never touch MySQL.
+    """
+    def __init__(self):
+        self.destinations: Optional[AutocompleteSection] = None
+        self.hotels: Optional[AutocompleteSection] = None
+        self.hotels_by_id: Dict[str, Dict] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.load_seconds = 0.0
+        self._signature: Optional[tuple] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_event: Optional[asyncio.Event] = None
+        self.queries = 0
+        self.fuzzy_queries = 0
+        self.query_time = 0.0
+    
+    @property
+    def ready(self) -> bool:
+        return self.destinations is not None
+    
+    @staticmethod
+    def build(rows: List[Dict]) -> tuple:
+        """Build (destinations, hotels, hotels_by_id) from lookup rows - CPU bound, run in a thread"""
+        destination_entries = []
+        hotel_entries = []
+        hotels_by_id = {}
+        for row in rows:
+            item = autocomplete_item(row)
+            search_key = normalize_search_text(row.get("search_term_lower") or row.get("search_term"))
+            if row["type"] == "hotel":
+                sort_key = (-(row["priority"] or 0), row["display_name"] or "")
+                hotel_entries.append((sort_key, search_key, item))
+                if item.get("hotel_id"):
+                    hotels_by_id[item["hotel_id"]] = item
+            elif row["type"] in ("city", "country", "region"):
+                # Destinations also match on display_name
+                key = search_key + "\n" + normalize_search_text(row["display_name"])
+                sort_key = (-(row["priority"] or 0), -(row["hotel_count"] or 0), row["display_name"] or "")
+                destination_entries.append((sort_key, key, item))
+        
+        destination_entries.sort(key=lambda e: e[0])
+        hotel_entries.sort(key=lambda e: e[0])
+        destinations = AutocompleteSection([(k, i) for _, k, i in destination_entries], (1, 2, 3))
+        # Hotels are only searched for queries of 3+ characters
+        hotels = AutocompleteSection([(k, i) for _, k, i in hotel_entries], (3,))
+        return destinations, hotels, hotels_by_id
+    
+    def _search_section(self, section: AutocompleteSection, query: str, limit: int) -> List[Dict]:
+        ids = section.search(query, limit)
+        if len(ids) < limit and len(query) >= 4:
+            self.fuzzy_queries += 1
+            ids += section.fuzzy_search(query, limit - len(ids), set(ids))
+        return [dict(section.items[idx]) for idx in ids]
+    
+    def search(self, query: str) -> List[Dict]:
+        """Same result shape and limits as the ghwk_autocomplete_lookup query"""
+        start = time.perf_counter()
+        normalized = normalize_search_text(query)
+        results = []
+        if normalized:
+            if len(query) >= 3:
+                results = self._search_section(self.destinations, normalized, 8)
+                results += self._search_section(self.hotels, normalized, 7)
+            else:
+                # For short queries, only search destinations
+                results = self._search_section(self.destinations, normalized, 15)
+        self.queries += 1
+        self.query_time += time.perf_counter() - start
+        return results
+    
+    async def _table_signature(self, conn) -> tuple:
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT COUNT(*), MAX(id) FROM ghwk_autocomplete_lookup")
+            return tuple(await cursor.fetchone())
+    
+    async def load(self, force: bool = False) -> bool:
+        """(Re)load the lookup table if it changed; returns True when a new index was swapped in"""
+        start = time.perf_counter()
+        try:
+            signature, rows = await self._fetch_rows(force)
+        except StaticDBUnavailable:
+            return False
+        if rows is None:
+            return False
+        
+        destinations, hotels, hotels_by_id = await asyncio.to_thread(self.build, rows)
+        self.destinations, self.hotels, self.hotels_by_id = destinations, hotels, hotels_by_id
+        self._signature = signature
+        self.loaded_at = datetime.now(timezone.utc)
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"⚡ Autocomplete index loaded: {len(destinations)} destinations, {len(hotels)} hotels in {self.load_seconds:.1f}s")
+        return True
+    
+    async def _fetch_rows(self, force: bool) -> tuple:
+        """(table signature, lookup rows with thumbnails); rows is None when the table is unchanged"""
+        async with mysql_connection() as conn:
+            signature = await self._table_signature(conn)
+            if not force and signature == self._signature:
+                return signature, None
+            rows = []
+            # Unbuffered cursor: stream rows and reduce images_json to a thumbnail straight away
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute("""
+                    SELECT a.search_term, a.search_term_lower, a.display_name, a.type, a.destination_id,
+                           a.country_name, a.hotel_count, a.priority, a.hotel_id, b.images_json
+                    FROM ghwk_autocomplete_lookup a
+                    LEFT JOIN ghwk_bravo_hotels b ON a.type = 'hotel' AND a.hotel_id = b.hotel_id
+                """)
+                while True:
+                    batch = await cursor.fetchmany(5000)
+                    if not batch:
+                        break
+                    for row in batch:
+                        row["thumbnail"] = autocomplete_thumbnail(row.pop("images_json", None))
+                    rows.extend(batch)
+        return signature, rows
+    
+    def request_refresh(self) -> None:
+        """Ask the background task to reload now (e.g. after hotel images were synced)"""
+        if self._refresh_event is not None:
+            self._refresh_event.set()
+    
+    def set_hotel_images(self, hotel_id: str, images: Any) -> None:
+        """Update one hotel's thumbnail in place without a reload"""
+        item = self.hotels_by_id.get(str(hotel_id))
+        thumbnail_url = autocomplete_thumbnail(images)
+        if item is not None and thumbnail_url:
+            item["thumbnail"] = thumbnail_url
+    
+    async def start(self) -> None:
+        if not AUTOCOMPLETE_INDEX_ENABLED or self._refresh_task:
+            return
+        self._refresh_event = asyncio.Event()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            force = self._refresh_event.is_set() or (
+                self.loaded_at is not None and
+                datetime.now(timezone.utc) - self.loaded_at > timedelta(hours=AUTOCOMPLETE_INDEX_MAX_AGE_HOURS)
+            )
+            self._refresh_event.clear()
+            try:
+                await self.load(force=force)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Autocomplete index refresh failed: {str(e)[:150]}")
+            # Retry quickly until the first load succeeds
+            interval = AUTOCOMPLETE_INDEX_CHECK_MINUTES * 60 if self.ready else 60
+            try:
+                await asyncio.wait_for(self._refresh_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+    
+    def stats(self) -> Dict:
+        return {
+            "enabled": AUTOCOMPLETE_INDEX_ENABLED,
+            "ready": self.ready,
+            "destinations": len(self.destinations) if self.destinations else 0,
+            "hotels": len(self.hotels) if self.hotels else 0,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_seconds": round(self.load_seconds, 2),
+            "queries": self.queries,
+            "fuzzy_queries": self.fuzzy_queries,
+            "avg_query_ms": round(self.query_time / self.queries * 1000, 3) if self.queries else 0
+        }
+
+autocomplete_index = AutocompleteIndex()
+
+async def search_destinations_postgres_or_none(query: str) -> Optional[List[Dict]]:
+    """PostgreSQL destination search for the autocomplete cache (None = nothing to cache)"""
+    return await search_destinations_postgres(query) or None
 
 # ==================== MODELS ====================
 
@@ -202,6 +1506,7 @@ class UserCreate(BaseModel):
     password: str
     name: str
     referral_code: Optional[str] = None
+    language: Optional[str] = None  # newsletter language; Accept-Language is used when missing
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -246,6 +1551,21 @@ class HotelSearchParams(BaseModel):
     rooms: int = 1
     currency: str = "EUR"
     b2c: int = 0  # 0 = normal, 1 = last minute
+    debug: bool = False  # Bypass cache and include per-stage timings in the response (admins only, ignored otherwise)
+    # Evaluated server-side against the cached result set (no new upstream search)
+    stars: Optional[List[int]] = None  # Any of these star ratings
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    board_types: Optional[List[str]] = None  # Any room with one of these board types
+    themes: Optional[List[str]] = None  # Any of these themes
+    amenities: Optional[List[str]] = None  # All of these amenities
+    near_latitude: Optional[float] = None  # Reference point for max_distance_km / sort_by=distance
+    near_longitude: Optional[float] = None
+    max_distance_km: Optional[float] = None
+    sort_by: Optional[str] = None  # price_asc, price_desc, stars_desc, stars_asc, rating_desc, savings_desc, distance
+    page: Optional[int] = None  # 1-based; omit for all results
+    page_size: int = 30
+    fields: Optional[List[str]] = None  # Hotel fields to return, or ["card"] for the slim list-page card
 
 class BookingCreate(BaseModel):
     hotel_id: str
@@ -578,128 +1898,222 @@ class TransferSettingsUpdate(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
-async def get_settings() -> Dict:
-    """Get current settings from database, merged with defaults"""
-    defaults = {
-        "stripe_mode": "test",  # Default to test mode
-        "stripe_test_secret_key": STRIPE_API_KEY,  # Use env var as default test key
-        "stripe_test_publishable_key": "",
-        "stripe_live_secret_key": "",
-        "stripe_live_publishable_key": "",
-        # Legacy fields (for backwards compatibility)
-        "stripe_live_key": "",
-        "stripe_test_key": STRIPE_API_KEY,
-        "stripe_api_key": STRIPE_API_KEY,
-        "sunhotels_username": SUNHOTELS_USERNAME,
-        "sunhotels_password": SUNHOTELS_PASSWORD,
-        "sunhotels_mode": "live",  # "live" or "test"
-        "sunhotels_api_type": "nonstatic",  # "static" or "nonstatic"
-        "static_db_host": "",
-        "static_db_port": "3306",
-        "static_db_name": "",
-        "static_db_user": "",
-        "static_db_password": "",
-        "pass_one_time_price": PASS_ONE_TIME_PRICE,
-        "pass_annual_price": PASS_ANNUAL_PRICE,
-        "booking_fee": BOOKING_FEE,
-        "markup_rate": MARKUP_RATE,
-        "vat_rate": VAT_RATE,
-        "discount_rate": FREESTAYS_DISCOUNT,
-        "admin_email": "admin@freestays.eu",  # Default admin email
-        "admin_password": ADMIN_PASSWORD,
-        # SMTP Email Settings
-        "smtp_host": "smtp.strato.de",
-        "smtp_port": 587,
-        "smtp_username": "",
-        "smtp_password": "",
-        "smtp_from_email": "booking@freestays.eu",
-        "smtp_from_name": "FreeStays",
-        "smtp_enabled": False,
-        # Company Branding
-        "company_name": "FreeStays",
-        "company_logo_url": "https://customer-assets.emergentagent.com/job_94e1e280-97df-4548-a733-4d7da4555d27/artifacts/63lj7fq5_kogo_blauw.png",
-        "company_website": "https://freestays.eu",
-        "company_support_email": "info@freestays.eu",
-        # Last Minute Configuration
-        "last_minute_count": 6,
-        "last_minute_check_in": "",  # Empty = use dynamic dates (tomorrow)
-        "last_minute_check_out": "",  # Empty = use dynamic dates (day after tomorrow)
-        "last_minute_title": "Last Minute Offers",
-        "last_minute_subtitle": "Book now and save up to 30% on selected hotels",
-        "last_minute_badge_text": "Hot Deals",
-        # Price Comparison Settings
-        "price_comparison_enabled": True,
-        "ota_markup_percentage": 20,  # Other platforms markup (20% default)
-        "comparison_min_savings_percent": 10,  # Only show if we're 10%+ cheaper
-        "comparison_email_frequency": "search",  # "search", "daily", "weekly", "disabled"
-        "comparison_email_address": "campain@freestays.eu",
-        # Referral Program Settings
-        "referral_enabled": True,
-        "referral_discount_amount": 15.00,  # €15 discount (representing booking costs)
-        "referral_min_booking_value": 0,  # Minimum booking value to use referral
-        "referral_max_uses_per_code": 0,  # 0 = unlimited
-        # Price Drop Notification Settings
-        "price_drop_enabled": True,
-        "price_drop_check_frequency": "daily",  # "daily", "6hours", "12hours"
-        "price_drop_min_percent": 5,  # Minimum % drop to notify
-        # Dark Mode Settings
-        "darkMode_enabled": True,  # Allow users to toggle dark mode
-        # Nearby Hotels Settings
-        "nearby_hotels_count": 4,  # Number of nearby hotels to show on hotel detail page
-        "nearby_hotels_title": "Hotels nearby:",  # Title for nearby hotels section
-        # Transfer Settings
-        "transfers_enabled": True,  # Enable/disable transfer feature
-        "transfers_markup_percentage": 5.0,  # Default 5% markup on transfer prices
-        "transfers_show_on_hotel_page": True,  # Show transfer options on hotel detail
-        "transfers_show_in_checkout": True,  # Show transfer option during checkout
-        # Partner Affiliates Settings
-        "partners_section_enabled": True,
-        "partners_section_title": "Explore More Travel Experiences",
-        "partners_section_subtitle": "Complete your perfect vacation with our trusted partners",
-        # Viator (Tours & Activities)
-        "viator_enabled": True,
-        "viator_partner_id": "U00202819",
-        "viator_widget_ref": "W-46e0b4fc-2d24-4a08-8178-2464b72e88a1",
-        "viator_page_title": "Tours & Activities",
-        "viator_page_subtitle": "Discover unforgettable experiences and local tours at your destination",
-        # DiscoverCars (Rent a Car)
-        "discovercars_enabled": True,
-        "discovercars_aff_code": "a_aid",
-        "discovercars_utm_source": "Travelar",
-        "discovercars_utm_medium": "widget",
-        "discovercars_page_title": "Rent a Car",
-        "discovercars_page_subtitle": "Explore freely with convenient and affordable car rental options",
-        # Kiwi.com (Flights)
-        "kiwi_enabled": True,
-        "kiwi_affilid": "travelargroupbvmynetwork2023",
-        "kiwi_default_from": "amsterdam_nl",
-        "kiwi_default_to": "london_gb",
-        "kiwi_currency": "EUR",
-        "kiwi_page_title": "Book a Flight",
-        "kiwi_page_subtitle": "Find the best flight deals to your dream destination"
-    }
+# Defaults merged under the app_settings document (database values take precedence)
+DEFAULT_SETTINGS = {
+    "stripe_mode": "test",  # Default to test mode
+    "stripe_test_secret_key": STRIPE_API_KEY,  # Use env var as default test key
+    "stripe_test_publishable_key": "",
+    "stripe_live_secret_key": "",
+    "stripe_live_publishable_key": "",
+    # Legacy fields (for backwards compatibility)
+    "stripe_live_key": "",
+    "stripe_test_key": STRIPE_API_KEY,
+    "stripe_api_key": STRIPE_API_KEY,
+    "sunhotels_username": SUNHOTELS_USERNAME,
+    "sunhotels_password": SUNHOTELS_PASSWORD,
+    "sunhotels_mode": "live",  # "live" or "test"
+    "sunhotels_api_type": "nonstatic",  # "static" or "nonstatic"
+    "static_db_host": "",
+    "static_db_port": "3306",
+    "static_db_name": "",
+    "static_db_user": "",
+    "static_db_password": "",
+    "pass_one_time_price": PASS_ONE_TIME_PRICE,
+    "pass_annual_price": PASS_ANNUAL_PRICE,
+    "booking_fee": BOOKING_FEE,
+    "markup_rate": MARKUP_RATE,
+    "vat_rate": VAT_RATE,
+    "discount_rate": FREESTAYS_DISCOUNT,
+    "admin_email": "admin@freestays.eu",  # Default admin email
+    "admin_password": ADMIN_PASSWORD,
+    # SMTP Email Settings
+    "smtp_host": "smtp.strato.de",
+    "smtp_port": 587,
+    "smtp_username": "",
+    "smtp_password": "",
+    "smtp_from_email": "booking@freestays.eu",
+    "smtp_from_name": "FreeStays",
+    "smtp_enabled": False,
+    # Company Branding
+    "company_name": "FreeStays",
+    "company_logo_url": "https://customer-assets.emergentagent.com/job_94e1e280-97df-4548-a733-4d7da4555d27/artifacts/63lj7fq5_kogo_blauw.png",
+    "company_website": "https://freestays.eu",
+    "company_support_email": "info@freestays.eu",
+    # Last Minute Configuration
+    "last_minute_count": 6,
+    "last_minute_check_in": "",  # Empty = use dynamic dates (tomorrow)
+    "last_minute_check_out": "",  # Empty = use dynamic dates (day after tomorrow)
+    "last_minute_title": "Last Minute Offers",
+    "last_minute_subtitle": "Book now and save up to 30% on selected hotels",
+    "last_minute_badge_text": "Hot Deals",
+    # Price Comparison Settings
+    "price_comparison_enabled": True,
+    "ota_markup_percentage": 20,  # Other platforms markup (20% default)
+    "comparison_min_savings_percent": 10,  # Only show if we're 10%+ cheaper
+    "comparison_email_frequency": "search",  # "search", "daily", "weekly", "disabled"
+    "comparison_email_address": "campain@freestays.eu",
+    # Referral Program Settings
+    "referral_enabled": True,
+    "referral_discount_amount": 15.00,  # €15 discount (representing booking costs)
+    "referral_min_booking_value": 0,  # Minimum booking value to use referral
+    "referral_max_uses_per_code": 0,  # 0 = unlimited
+    # Price Drop Notification Settings
+    "price_drop_enabled": True,
+    "price_drop_check_frequency": "daily",  # "daily", "6hours", "12hours"
+    "price_drop_min_percent": 5,  # Minimum % drop to notify
+    # Dark Mode Settings
+    "darkMode_enabled": True,  # Allow users to toggle dark mode
+    # Nearby Hotels Settings
+    "nearby_hotels_count": 4,  # Number of nearby hotels to show on hotel detail page
+    "nearby_hotels_title": "Hotels nearby:",  # Title for nearby hotels section
+    # Transfer Settings
+    "transfers_enabled": True,  # Enable/disable transfer feature
+    "transfers_markup_percentage": 5.0,  # Default 5% markup on transfer prices
+    "transfers_show_on_hotel_page": True,  # Show transfer options on hotel detail
+    "transfers_show_in_checkout": True,  # Show transfer option during checkout
+    # Partner Affiliates Settings
+    "partners_section_enabled": True,
+    "partners_section_title": "Explore More Travel Experiences",
+    "partners_section_subtitle": "Complete your perfect vacation with our trusted partners",
+    # Viator (Tours & Activities)
+    "viator_enabled": True,
+    "viator_partner_id": "U00202819",
+    "viator_widget_ref": "W-46e0b4fc-2d24-4a08-8178-2464b72e88a1",
+    "viator_page_title": "Tours & Activities",
+    "viator_page_subtitle": "Discover unforgettable experiences and local tours at your destination",
+    # DiscoverCars (Rent a Car)
+    "discovercars_enabled": True,
+    "discovercars_aff_code": "a_aid",
+    "discovercars_utm_source": "Travelar",
+    "discovercars_utm_medium": "widget",
+    "discovercars_page_title": "Rent a Car",
+    "discovercars_page_subtitle": "Explore freely with convenient and affordable car rental options",
+    # Kiwi.com (Flights)
+    "kiwi_enabled": True,
+    "kiwi_affilid": "travelargroupbvmynetwork2023",
+    "kiwi_default_from": "amsterdam_nl",
+    "kiwi_default_to": "london_gb",
+    "kiwi_currency": "EUR",
+    "kiwi_page_title": "Book a Flight",
+    "kiwi_page_subtitle": "Find the best flight deals to your dream destination"
+}
+
+SETTINGS_POLL_INTERVAL = int(os.environ.get('SETTINGS_POLL_INTERVAL', '15'))  # seconds, used when change streams are unavailable
+
+class SettingsCache:
+    """In-memory snapshot of app settings, kept fresh by a MongoDB change stream (or polling)"""
+    def __init__(self, poll_interval: int = SETTINGS_POLL_INTERVAL):
+        self._settings: Optional[Dict] = None
+        self._poll_interval = poll_interval
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self.version = 0
+        self.loaded_at: Optional[str] = None
+        self.refresh_mode = "none"
+        self.memory_reads = 0
+        self.db_reads = 0
+    
+    async def get(self) -> Dict:
+        """Return a deep copy of the current settings snapshot, loading it on first use"""
+        if self._settings is None:
+            async with self._lock:
+                if self._settings is None:
+                    await self.refresh()
+            if self._settings is None:
+                # Database unavailable - serve defaults without caching them
+                return copy.deepcopy(DEFAULT_SETTINGS)
+        else:
+            self.memory_reads += 1
+        # Callers mutate nested values (lists, dicts) in place; keep the shared snapshot intact
+        return copy.deepcopy(self._settings)
+    
+    async def refresh(self) -> bool:
+        """Reload settings from the database; bumps the version when content changed"""
+        self.db_reads += 1
+        # Try to get settings from database with retry logic for Atlas
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                db_settings = await db.settings.find_one({"type": "app_settings"}, {"_id": 0})
+                break  # Success, exit retry loop
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    logger.warning(f"MongoDB settings fetch attempt {attempt + 1} failed: {str(e)[:50]}, retrying...")
+                    await asyncio.sleep(1)  # Wait before retry
+                else:
+                    logger.error(f"Failed to fetch settings after {max_retries} attempts: {str(e)[:100]}")
+                    return False
+        
+        settings = {**DEFAULT_SETTINGS, **(db_settings or {})}
+        if settings != self._settings:
+            self._settings = settings
+            self.version += 1
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        return True
     
-    # Try to get settings from database with retry logic for Atlas
-    db_settings = None
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            db_settings = await db.settings.find_one({"type": "app_settings"}, {"_id": 0})
-            break  # Success, exit retry loop
-        except Exception as e:
-            if attempt < max_retries - 1:
-                logger.warning(f"MongoDB settings fetch attempt {attempt + 1} failed: {str(e)[:50]}, retrying...")
-                await asyncio.sleep(1)  # Wait before retry
-            else:
-                logger.error(f"Failed to fetch settings after {max_retries} attempts: {str(e)[:100]}")
-                # Return defaults if all retries fail
+    async def start(self) -> None:
+        """Load the initial snapshot and start watching for changes"""
+        await self.refresh()
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
     
-    if db_settings:
-        # Merge defaults with database settings (database values take precedence)
-        settings = {**defaults, **db_settings}
-    else:
-        settings = defaults
-    return settings
+    async def stop(self) -> None:
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        self.refresh_mode = "none"
+    
+    async def _watch(self) -> None:
+        """Refresh on every settings change; fall back to polling on standalone MongoDB"""
+        from pymongo.errors import OperationFailure
+        while True:
+            try:
+                async with db.settings.watch() as stream:
+                    self.refresh_mode = "change_stream"
+                    logger.info("✓ Settings cache watching MongoDB change stream")
+                    async for _change in stream:
+                        await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Change streams need a replica set - poll for the lifetime of the process
+                logger.info(f"Settings change stream unavailable ({str(e)[:80]}), polling every {self._poll_interval}s")
+                self.refresh_mode = "polling"
+                while True:
+                    await asyncio.sleep(self._poll_interval)
+                    await self.refresh()
+            except Exception as e:
+                logger.warning(f"Settings change stream interrupted: {str(e)[:100]}, resuming")
+                self.refresh_mode = "polling"
+                await asyncio.sleep(self._poll_interval)
+                await self.refresh()
+    
+    def stats(self) -> Dict:
+        """Get settings cache statistics"""
+        total = self.memory_reads + self.db_reads
+        memory_rate = (self.memory_reads / total * 100) if total > 0 else 0
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "refresh_mode": self.refresh_mode,
+            "memory_reads": self.memory_reads,
+            "db_reads": self.db_reads,
+            "memory_read_rate": f"{memory_rate:.1f}%"
+        }
+
+settings_cache = SettingsCache()
+
+async def get_settings() -> Dict:
+    """Get current settings (in-memory snapshot merged with defaults)"""
+    return await settings_cache.get()
+
+async def refresh_settings_cache() -> None:
+    """Reload the settings snapshot immediately after this process wrote app settings"""
+    await settings_cache.refresh()
 
 async def get_active_stripe_key() -> str:
     """Get the active Stripe API key (secret key) based on the current mode (live or test)"""
@@ -1209,11 +2623,8 @@ class EmailService:
             
             msg.attach(MIMEText(full_html, "html"))
             
-            # Send email
-            with smtplib.SMTP(smtp_settings["host"], smtp_settings["port"]) as server:
-                server.starttls()
-                server.login(smtp_settings["username"], smtp_settings["password"])
-                server.send_message(msg)
+            # Send email (pooled session, off the event loop)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Generic email sent successfully to {to_email}")
             return {"success": True, "message": f"Email sent to {to_email}"}
@@ -1477,14 +2888,7 @@ Contact: {smtp_settings['company_support_email']}
             msg.attach(MIMEText(html_content, 'html'))
             
             # Send email in a separate thread to avoid blocking
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Booking confirmation email sent to {guest_email}")
             
@@ -1540,14 +2944,7 @@ Contact: {smtp_settings['company_support_email']}
             
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Test email sent to {to_email}")
             return {"success": True, "message": f"Test email sent to {to_email}"}
@@ -1624,14 +3021,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Verification email sent to {email}")
             return {"success": True}
@@ -1705,14 +3095,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Password reset email sent to {email}")
             return {"success": True}
@@ -1807,14 +3190,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Price drop email sent to {email} for {hotel_name}")
             return {"success": True}
@@ -1890,14 +3266,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Referral welcome email sent to {email}")
             return {"success": True}
@@ -1973,14 +3342,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = referrer_email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Referrer notification email sent to {referrer_email}")
             return {"success": True}
@@ -2078,14 +3440,7 @@ Contact: {smtp_settings['company_support_email']}
             msg['To'] = referrer_email
             msg.attach(MIMEText(html_content, 'html'))
             
-            def send_email():
-                with smtplib.SMTP(smtp_settings['host'], smtp_settings['port']) as server:
-                    server.starttls()
-                    server.login(smtp_settings['username'], smtp_settings['password'])
-                    server.send_message(msg)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Referral milestone email sent to {referrer_email} - Annual pass: {annual_pass_code}")
             return {"success": True}
@@ -2106,11 +3461,19 @@ def is_package_board(board_type: str) -> bool:
     package_types = ['half board', 'full board', 'all inclusive', 'halfboard', 'fullboard', 'allinclusive']
     return any(pkg in board_lower for pkg in package_types)
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
+
+async def upgrade_password_hash(user: Dict, password: str):
+    """Re-hash a just-verified password when BCRYPT_ROUNDS changed since it was stored"""
+    new_hash = await password_hasher.rehash_if_needed(password, user.get("password", ""))
+    if new_hash:
+        await db.users.update_one({"user_id": user["user_id"], "password": user["password"]},
+                                  {"$set": {"password": new_hash}})
+        await invalidate_user_principal(user["user_id"], reason="password rehash")
 
 def create_jwt_token(user_id: str, email: str) -> str:
     payload = {
@@ -2134,6 +3497,10 @@ async def get_current_user(request: Request) -> Optional[Dict]:
     # Check cookie first
     session_token = request.cookies.get("session_token")
     if session_token:
+        cached = principal_cache.get("session", session_token)
+        if cached is not MISSING:
+            return dict(cached)
+        generation = principal_cache.generation
         session = await db.user_sessions.find_one({"session_token": session_token}, {"_id": 0})
         if session:
             expires_at = session.get("expires_at")
@@ -2143,18 +3510,31 @@ async def get_current_user(request: Request) -> Optional[Dict]:
                 expires_at = expires_at.replace(tzinfo=timezone.utc)
             if expires_at > datetime.now(timezone.utc):
                 user = await db.users.find_one({"user_id": session["user_id"]}, {"_id": 0})
+                if user:
+                    principal_cache.set("session", session_token, dict(user), user_subjects(user), generation, expires_at)
                 return user
     
     # Check Authorization header as fallback
     auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header[7:]
+        cached = principal_cache.get("jwt", token)
+        if cached is not MISSING:
+            return dict(cached)
+        generation = principal_cache.generation
         payload = decode_jwt_token(token)
         if payload:
             user = await db.users.find_one({"user_id": payload["user_id"]}, {"_id": 0})
+            if user:
+                principal_cache.set("jwt", token, dict(user), user_subjects(user), generation,
+                                    datetime.fromtimestamp(payload["exp"], timezone.utc) if payload.get("exp") else None)
             return user
     return None
 
+async def invalidate_user_principal(user_id: Optional[str] = None, email: Optional[str] = None, reason: str = ""):
+    """Drop cached logins of a user after a change to their account (role, suspension, password, pass...)"""
+    await principal_cache.invalidate(f"user:{user_id}", f"email:{email.lower() if email else None}", reason=reason)
+
 def generate_pass_code(pass_type: str = "free") -> str:
     """Generate a unique FreeStays pass code"""
     prefix = "FREE" if pass_type == "free" else "PASS" if pass_type == "one_time" else "B2B" if pass_type == "b2b" else "GOLD"
@@ -2367,22 +3747,14 @@ def calculate_pricing(nett_price: float, has_valid_pass: bool, pass_purchase_typ
             """
             
             # Send email
-            def send_email():
-                with smtplib.SMTP(smtp_settings.get('host'), smtp_settings.get('port')) as server:
-                    server.starttls()
-                    server.login(smtp_settings.get('username'), smtp_settings.get('password'))
-                    
-                    msg = MIMEMultipart('alternative')
-                    msg['Subject'] = f"Your Travel Voucher for {hotel_name} - FreeStays"
-                    msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('username')}>"
-                    msg['To'] = guest_email
-                    msg.attach(MIMEText(html_content, 'html'))
-                    
-                    server.sendmail(smtp_settings.get('username'), guest_email, msg.as_string())
-                    logger.info(f"Voucher email sent to {guest_email}")
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = f"Your Travel Voucher for {hotel_name} - FreeStays"
+            msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('username')}>"
+            msg['To'] = guest_email
+            msg.attach(MIMEText(html_content, 'html'))
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg, from_addr=smtp_settings.get('username'), to_addrs=[guest_email])
+            logger.info(f"Voucher email sent to {guest_email}")
             return True
             
         except Exception as e:
@@ -2681,33 +4053,25 @@ class PriceComparisonService:
             </html>
             """
             
-            # Send email using SMTP
-            def send_emails():
-                with smtplib.SMTP(smtp_settings.get('host'), smtp_settings.get('port')) as server:
-                    server.starttls()
-                    server.login(smtp_settings.get('username'), smtp_settings.get('password'))
-                    
-                    # Send to campaign email
-                    msg = MIMEMultipart('alternative')
-                    msg['Subject'] = f"Price Check: {comparison_data.get('destination', 'Search')} - {comparison_data.get('hotels_with_savings', 0)} hotels with savings"
-                    msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('from_email', 'booking@freestays.eu')}>"
-                    msg['To'] = campaign_email
-                    msg.attach(MIMEText(html_content, 'html'))
-                    server.send_message(msg)
-                    logger.info(f"Price comparison email sent to campaign: {campaign_email}")
-                    
-                    # Also send to visitor if email provided
-                    if visitor_email:
-                        visitor_msg = MIMEMultipart('alternative')
-                        visitor_msg['Subject'] = f"Your FreeStays Price Check: {comparison_data.get('destination', 'Search')} - Save up to €{comparison_data.get('total_savings', 0):.2f}!"
-                        visitor_msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('from_email', 'booking@freestays.eu')}>"
-                        visitor_msg['To'] = visitor_email
-                        visitor_msg.attach(MIMEText(html_content, 'html'))
-                        server.send_message(visitor_msg)
-                        logger.info(f"Price comparison email sent to visitor: {visitor_email}")
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_emails)
+            # Send email using the pooled SMTP transport
+            # Send to campaign email
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = f"Price Check: {comparison_data.get('destination', 'Search')} - {comparison_data.get('hotels_with_savings', 0)} hotels with savings"
+            msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('from_email', 'booking@freestays.eu')}>"
+            msg['To'] = campaign_email
+            msg.attach(MIMEText(html_content, 'html'))
+            await mail_transport.send(smtp_settings, msg)
+            logger.info(f"Price comparison email sent to campaign: {campaign_email}")
+            
+            # Also send to visitor if email provided
+            if visitor_email:
+                visitor_msg = MIMEMultipart('alternative')
+                visitor_msg['Subject'] = f"Your FreeStays Price Check: {comparison_data.get('destination', 'Search')} - Save up to €{comparison_data.get('total_savings', 0):.2f}!"
+                visitor_msg['From'] = f"{smtp_settings.get('from_name', 'FreeStays')} <{smtp_settings.get('from_email', 'booking@freestays.eu')}>"
+                visitor_msg['To'] = visitor_email
+                visitor_msg.attach(MIMEText(html_content, 'html'))
+                await mail_transport.send(smtp_settings, visitor_msg)
+                logger.info(f"Price comparison email sent to visitor: {visitor_email}")
             
             logger.info(f"Price comparison email sent successfully")
             
@@ -2933,22 +4297,14 @@ class PriceComparisonService:
             """
             
             # Send email
-            def send_email():
-                with smtplib.SMTP(smtp_settings.get('host'), smtp_settings.get('port')) as server:
-                    server.starttls()
-                    server.login(smtp_settings.get('username'), smtp_settings.get('password'))
-                    
-                    msg = MIMEMultipart('alternative')
-                    msg['Subject'] = f"Still Thinking About {destination}? Your Hotels Are Waiting! 🏨"
-                    msg['From'] = smtp_settings.get('username')
-                    msg['To'] = visitor_email
-                    msg.attach(MIMEText(html_content, 'html'))
-                    
-                    server.sendmail(smtp_settings.get('username'), visitor_email, msg.as_string())
-                    logger.info(f"Follow-up email sent to {visitor_email}")
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = f"Still Thinking About {destination}? Your Hotels Are Waiting! 🏨"
+            msg['From'] = smtp_settings.get('username')
+            msg['To'] = visitor_email
+            msg.attach(MIMEText(html_content, 'html'))
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email)
+            await mail_transport.send(smtp_settings, msg, from_addr=smtp_settings.get('username'), to_addrs=[visitor_email])
+            logger.info(f"Follow-up email sent to {visitor_email}")
             
             # Mark as sent
             await db.price_comparisons.update_one(
@@ -2998,6 +4354,818 @@ class PriceComparisonService:
             logger.error(f"Follow-up email processing error: {str(e)}")
             return 0
 
+# ==================== SUNHOTELS SEARCHV3 STREAMING PARSER ====================
+
+SUNHOTELS_NS = '{http://xml.sunhotels.net/15/}'
+
+# Meal ID mapping
+SUNHOTELS_MEAL_TYPES = {
+    "1": "Room Only",
+    "2": "Bed & Breakfast",
+    "3": "Breakfast Included",
+    "4": "Half Board",
+    "5": "Full Board",
+    "6": "All Inclusive"
+}
+
+# Precompiled (Clark notation) tag names so lookups are plain string compares
+_SH_HOTEL = SUNHOTELS_NS + 'hotel'
+_SH_ROOMTYPE = SUNHOTELS_NS + 'roomtype'
+_SH_ROOM = SUNHOTELS_NS + 'room'
+_SH_MEAL = SUNHOTELS_NS + 'meal'
+_SH_PRICE = SUNHOTELS_NS + 'price'
+_SH_IMAGE = SUNHOTELS_NS + 'image'
+_SH_FEATURE = SUNHOTELS_NS + 'feature'
+_SH_FEE = SUNHOTELS_NS + 'fee'
+_SH_AMOUNT = SUNHOTELS_NS + 'amount'
+_SH_CANCELLATION = SUNHOTELS_NS + 'cancellation_policy'
+_SH_NAME = SUNHOTELS_NS + 'name'
+_SH_ID = SUNHOTELS_NS + 'id'
+_SH_NOTES = SUNHOTELS_NS + 'notes'
+_SH_REVIEW = SUNHOTELS_NS + 'review'
+_SH_ERROR_TAGS = {'Error', SUNHOTELS_NS + 'Error'}
+_SH_MESSAGE_TAGS = {'Message', SUNHOTELS_NS + 'Message'}
+_SH_HOTEL_FIELDS = {
+    name: SUNHOTELS_NS + name for name in (
+        'hotel.id', 'hotel.name', 'hotelName', 'hotel.stars', 'stars',
+        'city', 'hotel.city', 'country', 'hotel.country', 'address', 'hotel.address',
+        'latitude', 'hotel.latitude', 'longitude', 'hotel.longitude',
+        'destination_id', 'resort_id', 'rating', 'count',
+        'roomtype.ID', 'roomtype.Name', 'beds', 'isSuperDeal',
+        'deadline', 'percentage', 'includedInPrice'
+    )
+}
+
+SUNHOTELS_IMAGE_URL = "https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={}"
+DEFAULT_SEARCH_HOTEL_IMAGE = "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800"
+DEFAULT_SEARCH_HOTEL_AMENITIES = ["WiFi", "Air Conditioning", "Restaurant", "Bar", "24h Reception"]
+DEFAULT_SEARCH_ROOM_AMENITIES = ["Air Conditioning", "Private Bathroom", "TV", "Safe"]
+
+def _child_map(elem) -> Dict[str, Any]:
+    """Direct children by tag (first occurrence wins, like Element.find)"""
+    children = {}
+    for child in elem:
+        children.setdefault(child.tag, child)
+    return children
+
+def _child_text(children: Dict[str, Any], field: str, default: str = '') -> str:
+    """Element.findtext equivalent on a child map"""
+    child = children.get(_SH_HOTEL_FIELDS.get(field) or SUNHOTELS_NS + field)
+    if child is None:
+        return default
+    return child.text or ''
+
+def _first_descendant(elem, tag: str):
+    for found in elem.iter(tag):
+        if found is not elem:
+            return found
+    return None
+
+def _parse_search_room_fees(room_elem) -> List[Dict]:
+    room_fees = []
+    for fee_elem in room_elem.iter(_SH_FEE):
+        fee_children = _child_map(fee_elem)
+        fee_name = _child_text(fee_children, 'name')
+        fee_amount_elem = _first_descendant(fee_elem, _SH_AMOUNT)
+        fee_amount = 0
+        fee_currency = "EUR"
+        if fee_amount_elem is not None and fee_amount_elem.text:
+            try:
+                fee_amount = float(fee_amount_elem.text)
+                fee_currency = fee_amount_elem.get('currency', 'EUR')
+            except:
+                pass
+        included = _child_text(fee_children, 'includedInPrice', 'false').lower() == 'true'
+        if fee_name:
+            room_fees.append({
+                "name": fee_name,
+                "amount": fee_amount,
+                "currency": fee_currency,
+                "included_in_price": included
+            })
+    return room_fees
+
+def parse_search_hotel_element(hotel_elem, is_last_minute: bool = False) -> Optional[Dict]:
+    """Build the hotel dict for one SearchV3 <hotel> element (None if it has no id)"""
+    hotel_children = _child_map(hotel_elem)
+    hotel_id = _child_text(hotel_children, 'hotel.id')
+    if not hotel_id:
+        return None
+    
+    # Get hotel name - try multiple possible paths
+    hotel_name = (
+        _child_text(hotel_children, 'hotel.name') or
+        _child_text(hotel_children, 'name') or
+        _child_text(hotel_children, 'hotelName') or
+        hotel_elem.get('name', '') or
+        f"Hotel {hotel_id}"
+    )
+    
+    # Get star rating
+    star_rating_text = _child_text(hotel_children, 'hotel.stars') or _child_text(hotel_children, 'stars', '0')
+    try:
+        star_rating = int(float(star_rating_text)) if star_rating_text else 0
+    except:
+        star_rating = 0
+    
+    # Get location info
+    city = _child_text(hotel_children, 'city') or _child_text(hotel_children, 'hotel.city') or ''
+    country = _child_text(hotel_children, 'country') or _child_text(hotel_children, 'hotel.country') or ''
+    address = _child_text(hotel_children, 'address') or _child_text(hotel_children, 'hotel.address') or ''
+    
+    # Get coordinates
+    latitude = 0.0
+    longitude = 0.0
+    try:
+        lat_text = _child_text(hotel_children, 'latitude') or _child_text(hotel_children, 'hotel.latitude', '0')
+        lon_text = _child_text(hotel_children, 'longitude') or _child_text(hotel_children, 'hotel.longitude', '0')
+        latitude = float(lat_text) if lat_text else 0.0
+        longitude = float(lon_text) if lon_text else 0.0
+    except:
+        pass
+    
+    # Get hotel image
+    image_url = DEFAULT_SEARCH_HOTEL_IMAGE
+    image_elem = _first_descendant(hotel_elem, _SH_IMAGE)
+    if image_elem is not None:
+        img_id = image_elem.get('id', '') or image_elem.text
+        if img_id:
+            image_url = SUNHOTELS_IMAGE_URL.format(img_id)
+    
+    # Get review data if available
+    review_elem = hotel_children.get(_SH_REVIEW)
+    review_score = 0.0
+    review_count = 0
+    if review_elem is not None:
+        review_children = _child_map(review_elem)
+        try:
+            review_score = float(_child_text(review_children, 'rating', '0') or 0)
+            review_count = int(_child_text(review_children, 'count', '0') or 0)
+        except:
+            pass
+    
+    # Parse room types
+    rooms = []
+    min_price = float('inf')
+    
+    for roomtype_elem in hotel_elem.iter(_SH_ROOMTYPE):
+        roomtype_children = _child_map(roomtype_elem)
+        roomtype_id = _child_text(roomtype_children, 'roomtype.ID')
+        roomtype_name = _child_text(roomtype_children, 'roomtype.Name', 'Standard Room')
+        
+        # Parse room type images
+        room_images = []
+        for img in roomtype_elem.iter(_SH_IMAGE):
+            img_id = img.get('id', '')
+            if img_id:
+                room_images.append(SUNHOTELS_IMAGE_URL.format(img_id))
+        room_image_url = room_images[0] if room_images else ""
+        
+        # Parse room type amenities/features
+        room_amenities = []
+        for feature in roomtype_elem.iter(_SH_FEATURE):
+            feature_name = _child_text(_child_map(feature), 'name')
+            if feature_name:
+                room_amenities.append(feature_name)
+        
+        # Add common room amenities if none found
+        if not room_amenities:
+            room_amenities = DEFAULT_SEARCH_ROOM_AMENITIES
+        
+        for room_elem in roomtype_elem.iter(_SH_ROOM):
+            room_children = _child_map(room_elem)
+            room_id = _child_text(room_children, 'id')
+            beds = int(_child_text(room_children, 'beds', '2') or 2)
+            is_superdeal = _child_text(room_children, 'isSuperDeal', 'false').lower() == 'true'
+            
+            # Cancellation policy with +22 days FreeStays rule (same for every meal of the room)
+            cancel_policy = "Non-refundable"
+            cancel_deadline_hours = None
+            cancel_deadline_display = None
+            is_refundable = False
+            
+            cancel_elem = _first_descendant(room_elem, _SH_CANCELLATION)
+            if cancel_elem is not None:
+                cancel_children = _child_map(cancel_elem)
+                deadline_text = _child_text(cancel_children, 'deadline')
+                percentage = _child_text(cancel_children, 'percentage')
+                
+                if deadline_text and deadline_text.strip():
+                    # API returns hours before check-in
+                    api_deadline_hours = int(deadline_text)
+                    # Add 22 days (528 hours) to give FreeStays buffer
+                    freestays_deadline_hours = api_deadline_hours + (22 * 24)
+                    cancel_deadline_hours = freestays_deadline_hours
+                    
+                    # Convert to days for display
+                    days_before = freestays_deadline_hours // 24
+                    cancel_deadline_display = f"{days_before} days before check-in"
+                    cancel_policy = f"Free cancellation until {days_before} days before check-in"
+                    is_refundable = True
+                elif percentage == "100":
+                    cancel_policy = "Non-refundable. If cancelled, no refund will be given."
+                    is_refundable = False
+            
+            # Get room notes
+            room_notes_elem = room_children.get(_SH_NOTES)
+            room_notes = ""
+            if room_notes_elem is not None and room_notes_elem.text:
+                room_notes = room_notes_elem.text.strip()
+            
+            # Get fees (City Tax, etc.)
+            room_fees = _parse_search_room_fees(room_elem)
+            
+            # Parse meals (can have multiple)
+            for meal_elem in room_elem.iter(_SH_MEAL):
+                meal_id = _child_text(_child_map(meal_elem), 'id', '1')
+                board_type = SUNHOTELS_MEAL_TYPES.get(meal_id, "Room Only")
+                
+                # Get price
+                price_elem = _first_descendant(meal_elem, _SH_PRICE)
+                price = 0.0
+                currency = "EUR"
+                if price_elem is not None:
+                    try:
+                        price = float(price_elem.text or 0)
+                        currency = price_elem.get('currency', 'EUR')
+                    except:
+                        pass
+                
+                if price > 0 and price < min_price:
+                    min_price = price
+                
+                rooms.append({
+                    "room_id": room_id,
+                    "room_type": roomtype_name,
+                    "board_type": board_type,
+                    "price": price,
+                    "currency": currency,
+                    "cancellation_policy": cancel_policy,
+                    "cancellation_deadline_hours": cancel_deadline_hours,
+                    "cancellation_deadline_display": cancel_deadline_display,
+                    "is_refundable": is_refundable,
+                    "room_notes": room_notes,
+                    "fees": [dict(fee) for fee in room_fees],
+                    "max_occupancy": beds,
+                    "sunhotels_room_type_id": roomtype_id,
+                    "sunhotels_block_id": room_id,
+                    "is_superdeal": is_superdeal,
+                    "image_url": room_image_url,
+                    "images": room_images[:5],  # Limit to 5 room images
+                    "amenities": room_amenities[:10]  # Limit to 10 amenities
+                })
+    
+    # Get hotel-level notes
+    hotel_notes_elem = hotel_children.get(_SH_NOTES)
+    hotel_notes = ""
+    if hotel_notes_elem is not None and hotel_notes_elem.text:
+        hotel_notes = hotel_notes_elem.text.strip()
+    
+    if min_price == float('inf'):
+        min_price = 0
+    
+    return {
+        "hotel_id": hotel_id,
+        "name": hotel_name,  # Use parsed name from XML
+        "star_rating": star_rating,
+        "address": address,
+        "city": city,
+        "country": country,
+        "destination_id": _child_text(hotel_children, 'destination_id'),
+        "resort_id": _child_text(hotel_children, 'resort_id'),
+        "latitude": latitude,
+        "longitude": longitude,
+        "description": "",
+        "hotel_notes": hotel_notes,
+        "image_url": image_url,
+        "review_score": review_score,
+        "review_count": review_count,
+        "rooms": rooms,
+        "amenities": list(DEFAULT_SEARCH_HOTEL_AMENITIES),
+        "min_price": min_price,
+        "currency": "EUR",
+        "is_last_minute": is_last_minute
+    }
+
+class SearchV3StreamParser:
+    """
+    Incremental SearchV3 parser: feed() response chunks as they arrive and get back the
+    hotels completed so far. Each <hotel> subtree is cleared once parsed so memory stays
+    flat regardless of response size. Raises ET.ParseError on malformed XML.
+    """
+    def __init__(self, is_last_minute: bool = False, hotel_ids: Optional[set] = None):
+        self._parser = ET.XMLPullParser(events=("end",))
+        self.is_last_minute = is_last_minute
+        self.hotel_ids = {str(h) for h in hotel_ids} if hotel_ids else None  # only build these hotels
+        self.error_message: Optional[str] = None
+        self.hotels_seen = 0
+    
+    def feed(self, data) -> List[Dict]:
+        self._parser.feed(data)
+        return self._drain()
+    
+    def close(self) -> List[Dict]:
+        self._parser.close()
+        return self._drain()
+    
+    def _drain(self) -> List[Dict]:
+        hotels = []
+        for _, elem in self._parser.read_events():
+            tag = elem.tag
+            if tag == _SH_HOTEL:
+                self.hotels_seen += 1
+                if self.hotel_ids is None or _child_text(_child_map(elem), 'hotel.id') in self.hotel_ids:
+                    hotel = parse_search_hotel_element(elem, self.is_last_minute)
+                    if hotel:
+                        hotels.append(hotel)
+                # Drop the parsed subtree; only an empty <hotel> shell stays attached to the tree
+                elem.clear()
+            elif tag in _SH_ERROR_TAGS:
+                message = next((c.text for c in elem if c.tag in _SH_MESSAGE_TAGS), None)
+                self.error_message = message or "Unknown error"
+        return hotels
+
+# ==================== STATIC HOTEL CATALOGUE ====================
+
+# Local copy of GetStaticHotelsAndRooms content so searches and hotel pages don't refetch it
+STATIC_CATALOG_MAX_AGE_HOURS = int(os.environ.get('STATIC_CATALOG_MAX_AGE_HOURS', '72'))  # served without live refresh
+STATIC_CATALOG_SYNC_LIMIT = int(os.environ.get('STATIC_CATALOG_SYNC_LIMIT', '5000'))  # hotels per background sync run
+STATIC_CATALOG_SEED_LIMIT = int(os.environ.get('STATIC_CATALOG_SEED_LIMIT', '5000'))  # new hotels added per sync run
+STATIC_CATALOG_SEED_PAGE = 1000  # static DB hotel IDs checked against the catalogue per query
+
+class StaticHotelCatalog:
+    """
+    Static hotel content in db.static_hotel_catalog, keyed by hotel_id, with a content hash
+    and last_synced timestamp. Entries older than STATIC_CATALOG_MAX_AGE_HOURS are still
+    returned but reported as stale so callers can refresh them live. The background sync
+    also seeds hotels from the static DB that are not in the catalogue yet.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.last_sync: Optional[Dict] = None
+        self._seed_after: Any = 0  # static DB hotel_id the next seeding pass continues after
+        self._pending_stores: set = set()
+    
+    @property
+    def collection(self):
+        return db.static_hotel_catalog
+    
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("hotel_id", unique=True)
+        await self.collection.create_index("last_synced")
+    
+    @staticmethod
+    def content_hash(data: Dict) -> str:
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    
+    @staticmethod
+    def _is_stale(last_synced: Optional[datetime], cutoff: datetime) -> bool:
+        if last_synced is None:
+            return True
+        if last_synced.tzinfo is None:
+            last_synced = last_synced.replace(tzinfo=timezone.utc)
+        return last_synced < cutoff
+    
+    async def lookup(self, hotel_ids: List[str]) -> tuple:
+        """
+        Returns (entries, refresh_ids): cached static data by hotel_id (including stale entries)
+        and the IDs that are missing or stale and should be fetched live.
+        """
+        if not hotel_ids:
+            return {}, []
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=STATIC_CATALOG_MAX_AGE_HOURS)
+        entries = {}
+        refresh_ids = []
+        try:
+            docs = await self.collection.find(
+                {"hotel_id": {"$in": hotel_ids}},
+                {"_id": 0, "hotel_id": 1, "data": 1, "last_synced": 1}
+            ).to_list(len(hotel_ids))
+        except Exception as e:
+            logger.warning(f"Static catalogue lookup failed: {str(e)[:100]}")
+            docs = []
+        
+        for doc in docs:
+            entries[doc["hotel_id"]] = doc["data"]
+            if self._is_stale(doc.get("last_synced"), cutoff):
+                refresh_ids.append(doc["hotel_id"])
+        
+        stale = len(refresh_ids)
+        refresh_ids.extend(hid for hid in hotel_ids if hid not in entries)
+        self.hits += len(entries) - stale
+        self.stale_hits += stale
+        self.misses += len(refresh_ids) - stale
+        return entries, refresh_ids
+    
+    async def get(self, hotel_id: str) -> tuple:
+        """Single hotel variant of lookup(): (data or None, needs_refresh)"""
+        entries, refresh_ids = await self.lookup([hotel_id])
+        return entries.get(hotel_id), bool(refresh_ids)
+    
+    async def store(self, hotels_data: Dict[str, Dict]) -> int:
+        """Upsert fetched static data; only rewrites content whose hash changed. Returns changed count."""
+        if not hotels_data:
+            return 0
+        from pymongo import UpdateOne
+        now = datetime.now(timezone.utc)
+        hotel_ids = list(hotels_data.keys())
+        existing = {
+            doc["hotel_id"]: doc.get("content_hash")
+            async for doc in self.collection.find(
+                {"hotel_id": {"$in": hotel_ids}},
+                {"_id": 0, "hotel_id": 1, "content_hash": 1}
+            )
+        }
+        
+        operations = []
+        changed = 0
+        for hotel_id, data in hotels_data.items():
+            digest = self.content_hash(data)
+            if existing.get(hotel_id) == digest:
+                operations.append(UpdateOne({"hotel_id": hotel_id}, {"$set": {"last_synced": now}}))
+            else:
+                changed += 1
+                operations.append(UpdateOne(
+                    {"hotel_id": hotel_id},
+                    {"$set": {
+                        "hotel_id": hotel_id,
+                        "data": data,
+                        "content_hash": digest,
+                        "last_synced": now,
+                        "content_changed_at": now
+                    }},
+                    upsert=True
+                ))
+        await self.collection.bulk_write(operations, ordered=False)
+        return changed
+    
+    def store_later(self, hotels_data: Dict[str, Dict]) -> None:
+        """store() in a background task so the catalogue write stays off the request path"""
+        if not hotels_data:
+            return
+        # Callers go on to modify the returned hotel dicts (rooms, enrichment)
+        task = asyncio.create_task(self.store(copy.deepcopy(hotels_data)))
+        self._pending_stores.add(task)
+        task.add_done_callback(self._store_done)
+    
+    def _store_done(self, task: asyncio.Task) -> None:
+        self._pending_stores.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Static catalogue update failed: {str(task.exception())[:100]}")
+    
+    async def missing_hotel_ids(self, limit: int) -> List[str]:
+        """
+        Static DB hotels (ghwk_autocomplete_lookup) that have no catalogue entry yet, continuing
+        where the previous call stopped and starting over once the whole table was checked.
+        """
+        missing: List[str] = []
+        try:
+            async with mysql_connection(timeout=10) as conn, conn.cursor() as cursor:
+                while len(missing) < limit:
+                    await cursor.execute("""
+                        SELECT DISTINCT hotel_id FROM ghwk_autocomplete_lookup
+                        WHERE type = 'hotel' AND hotel_id IS NOT NULL AND hotel_id > %s
+                        ORDER BY hotel_id
+                        LIMIT %s
+                    """, (self._seed_after, STATIC_CATALOG_SEED_PAGE))
+                    rows = await cursor.fetchall()
+                    if not rows:
+                        self._seed_after = 0
+                        break
+                    page = [(row[0], str(row[0])) for row in rows]
+                    known = {
+                        doc["hotel_id"] async for doc in self.collection.find(
+                            {"hotel_id": {"$in": [hotel_id for _, hotel_id in page]}}, {"_id": 0, "hotel_id": 1}
+                        )
+                    }
+                    for raw_id, hotel_id in page:
+                        if len(missing) >= limit:
+                            break
+                        self._seed_after = raw_id
+                        if hotel_id not in known:
+                            missing.append(hotel_id)
+        except StaticDBUnavailable as e:
+            logger.warning(f"Static catalogue seeding skipped - {e}")
+        return missing
+    
+    async def sync_candidates(self, limit: int, seed_limit: int = 0) -> List[str]:
+        """
+        Hotel IDs due for a background refresh (past half their max age), oldest first,
+        followed by up to seed_limit static DB hotels the catalogue does not have yet
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=STATIC_CATALOG_MAX_AGE_HOURS / 2)
+        docs = await self.collection.find(
+            {"last_synced": {"$lt": cutoff}},
+            {"_id": 0, "hotel_id": 1}
+        ).sort("last_synced", 1).limit(limit).to_list(limit)
+        hotel_ids = [doc["hotel_id"] for doc in docs]
+        if seed_limit > 0:
+            hotel_ids.extend(await self.missing_hotel_ids(seed_limit))
+        return hotel_ids
+    
+    async def stats(self) -> Dict:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=STATIC_CATALOG_MAX_AGE_HOURS)
+        total = await self.collection.count_documents({})
+        stale = await self.collection.count_documents({"last_synced": {"$lt": cutoff}})
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hotels": total,
+            "stale": stale,
+            "max_age_hours": STATIC_CATALOG_MAX_AGE_HOURS,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+            "last_sync": self.last_sync
+        }
+
+static_hotel_catalog = StaticHotelCatalog()
+
+# In-memory spatial index over catalogue coordinates for nearby hotels and alternatives
+GEO_INDEX_ENABLED = os.environ.get('GEO_INDEX_ENABLED', 'true').lower() == 'true'
+GEO_INDEX_REFRESH_MINUTES = int(os.environ.get('GEO_INDEX_REFRESH_MINUTES', '30'))
+GEO_INDEX_STATIC_DB_REFRESH_HOURS = int(os.environ.get('GEO_INDEX_STATIC_DB_REFRESH_HOURS', '24'))  # full static DB reload
+GEO_INDEX_CELL_DEGREES = 0.02  # ~2 km grid cells
+GEO_MAX_RADIUS_KM = 50.0
+KM_PER_DEGREE = 111.195
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(a)))
+
+class HotelGeoIndex:
+    """
+    Hotel coordinates from the static DB (ghwk_bravo_hotels, the full hotel set) overlaid with
+    the static catalogue (fresher content), bucketed into a fixed lat/lon grid.
+    Radius queries only scan the cells overlapping the bounding box; k-nearest scans rings of
+    cells outwards and stops once the next ring cannot hold anything closer. Candidates are
+    compared with an equirectangular distance (exact at these ranges), results report haversine.
+    Rebuilt in the background when the catalogue changes; the static DB is re-read every
+    GEO_INDEX_STATIC_DB_REFRESH_HOURS.
+    """
+    def __init__(self):
+        self.hotel_ids: List[str] = []
+        self.lats = array('d')
+        self.lons = array('d')
+        self.info: List[Dict] = []
+        self.positions: Dict[str, int] = {}
+        self.cells: Dict[tuple, array] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.load_seconds = 0.0
+        self._signature: Optional[tuple] = None
+        self._static_docs: List[Dict] = []
+        self._static_loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_event: Optional[asyncio.Event] = None
+        self.queries = 0
+        self.query_time = 0.0
+    
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+    
+    @staticmethod
+    def _cell(lat: float, lon: float) -> tuple:
+        return (math.floor(lat / GEO_INDEX_CELL_DEGREES), math.floor(lon / GEO_INDEX_CELL_DEGREES))
+    
+    @staticmethod
+    def build(docs: List[Dict]) -> tuple:
+        """
+        (hotel_ids, lats, lons, info, positions, cells) from catalogue-shaped documents - run in
+        a thread. A later document with valid coordinates replaces an earlier one for the same hotel.
+        """
+        hotels: Dict[str, Dict] = {}
+        for doc in docs:
+            data = doc.get("data") or {}
+            try:
+                lat = float(data.get("latitude") or 0)
+                lon = float(data.get("longitude") or 0)
+            except (TypeError, ValueError):
+                continue
+            if (lat == 0 and lon == 0) or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                continue
+            hotel_id = str(doc["hotel_id"])
+            hotels[hotel_id] = {
+                "hotel_id": hotel_id,
+                "name": data.get("name") or "",
+                "star_rating": data.get("star_rating") or 0,
+                "image_url": data.get("image_url") or "",
+                "city": data.get("city") or "",
+                "country": data.get("country") or "",
+                "latitude": lat,
+                "longitude": lon
+            }
+        
+        hotel_ids, info = [], []
+        lats, lons = array('d'), array('d')
+        positions: Dict[str, int] = {}
+        buckets: Dict[tuple, List[int]] = {}
+        for hotel_id, hotel in hotels.items():
+            idx = len(hotel_ids)
+            hotel_ids.append(hotel_id)
+            lats.append(hotel["latitude"])
+            lons.append(hotel["longitude"])
+            info.append(hotel)
+            positions[hotel_id] = idx
+            buckets.setdefault(HotelGeoIndex._cell(hotel["latitude"], hotel["longitude"]), []).append(idx)
+        cells = {cell: array('I', ids) for cell, ids in buckets.items()}
+        return hotel_ids, lats, lons, info, positions, cells
+    
+    def location(self, hotel_id: str) -> Optional[tuple]:
+        idx = self.positions.get(str(hotel_id))
+        return (self.lats[idx], self.lons[idx]) if idx is not None else None
+    
+    def _result(self, lat: float, lon: float, found: List[tuple]) -> List[Dict]:
+        return [
+            {**self.info[idx], "distance_km": round(haversine_km(lat, lon, self.lats[idx], self.lons[idx]), 2)}
+            for _, idx in found
+        ]
+    
+    def _scan(self, cells: List[tuple], lat: float, lon: float, cos_lat: float, max_km: float,
+              exclude: set, found: List[tuple], k: Optional[int] = None) -> None:
+        """Add hotels of the given cells within max_km to found (a max-heap of k entries when k is set)"""
+        lats, lons, hotel_ids = self.lats, self.lons, self.hotel_ids
+        max_sq = (max_km / KM_PER_DEGREE) ** 2
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                continue
+            for idx in bucket:
+                dy = lats[idx] - lat
+                dx = (lons[idx] - lon) * cos_lat
+                dist_sq = dx * dx + dy * dy
+                if dist_sq > max_sq or (exclude and hotel_ids[idx] in exclude):
+                    continue
+                if k is None:
+                    found.append((dist_sq, idx))
+                elif len(found) < k:
+                    heapq.heappush(found, (-dist_sq, idx))
+                elif -found[0][0] > dist_sq:
+                    heapq.heapreplace(found, (-dist_sq, idx))
+    
+    def within(self, lat: float, lon: float, radius_km: float, limit: int = 50, exclude: Optional[set] = None) -> List[Dict]:
+        """Hotels within radius_km, closest first"""
+        start = time.perf_counter()
+        radius_km = min(radius_km, GEO_MAX_RADIUS_KM)
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = lat_span / cos_lat
+        min_y, min_x = self._cell(lat - lat_span, lon - lon_span)
+        max_y, max_x = self._cell(lat + lat_span, lon + lon_span)
+        cells = [(y, x) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)]
+        found: List[tuple] = []
+        self._scan(cells, lat, lon, cos_lat, radius_km, exclude, found)
+        found = heapq.nsmallest(limit, found)
+        self.queries += 1
+        self.query_time += time.perf_counter() - start
+        return self._result(lat, lon, found)
+    
+    def nearest(self, lat: float, lon: float, k: int = 10, max_km: float = GEO_MAX_RADIUS_KM, exclude: Optional[set] = None) -> List[Dict]:
+        """k nearest hotels (up to max_km away), closest first"""
+        start = time.perf_counter()
+        max_km = min(max_km, GEO_MAX_RADIUS_KM)
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        cy, cx = self._cell(lat, lon)
+        # Smallest cell side in degrees of latitude, used to bound the distance to the next ring
+        cell_deg = GEO_INDEX_CELL_DEGREES * min(1.0, cos_lat)
+        max_ring = int(max_km / KM_PER_DEGREE / cell_deg) + 1
+        found: List[tuple] = []  # max-heap of (-dist_sq, idx)
+        for ring in range(max_ring + 1):
+            if len(found) >= k and ((ring - 1) * cell_deg) ** 2 > -found[0][0]:
+                break
+            if ring == 0:
+                cells = [(cy, cx)]
+            else:
+                cells = [(cy - ring, x) for x in range(cx - ring, cx + ring + 1)]
+                cells += [(cy + ring, x) for x in range(cx - ring, cx + ring + 1)]
+                cells += [(y, cx - ring) for y in range(cy - ring + 1, cy + ring)]
+                cells += [(y, cx + ring) for y in range(cy - ring + 1, cy + ring)]
+            self._scan(cells, lat, lon, cos_lat, max_km, exclude, found, k)
+        found = sorted((-neg, idx) for neg, idx in found)
+        self.queries += 1
+        self.query_time += time.perf_counter() - start
+        return self._result(lat, lon, found)
+    
+    async def _catalog_signature(self) -> tuple:
+        latest = await db.static_hotel_catalog.find_one(
+            {}, {"_id": 0, "content_changed_at": 1}, sort=[("content_changed_at", -1)]
+        )
+        count = await db.static_hotel_catalog.estimated_document_count()
+        return count, (latest or {}).get("content_changed_at")
+    
+    async def _load_static_db(self) -> Optional[List[Dict]]:
+        """Every static DB hotel with coordinates as catalogue-shaped documents (None when unavailable)"""
+        docs = []
+        try:
+            async with mysql_connection(timeout=10) as conn, conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute("""
+                    SELECT hotel_id, hotelname, title, star_rate, main_image, city, country_name, latitude, longitude
+                    FROM ghwk_bravo_hotels
+                    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                """)
+                while True:
+                    rows = await cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    docs.extend({
+                        "hotel_id": row["hotel_id"],
+                        "data": {
+                            "latitude": row["latitude"],
+                            "longitude": row["longitude"],
+                            "name": row.get("hotelname") or row.get("title"),
+                            "star_rating": row.get("star_rate"),
+                            "image_url": row.get("main_image"),
+                            "city": row.get("city"),
+                            "country": row.get("country_name")
+                        }
+                    } for row in rows)
+        except StaticDBUnavailable as e:
+            logger.warning(f"Geo index static DB load skipped - {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Geo index static DB load failed: {str(e)[:150]}")
+            return None
+        return docs
+    
+    async def load(self, force: bool = False) -> bool:
+        """
+        (Re)build from the static DB hotels plus db.static_hotel_catalog when the catalogue changed
+        or the static DB is due for a reload; returns True when a new index was swapped in
+        """
+        start = time.perf_counter()
+        static_due = (self._static_loaded_at is None
+                      or time.monotonic() - self._static_loaded_at > GEO_INDEX_STATIC_DB_REFRESH_HOURS * 3600)
+        if static_due:
+            static_docs = await self._load_static_db()
+            if static_docs is not None:
+                self._static_docs = static_docs
+                self._static_loaded_at = time.monotonic()
+                force = True
+        signature = await self._catalog_signature()
+        if not force and signature == self._signature:
+            return False
+        docs = await db.static_hotel_catalog.find({}, {
+            "_id": 0, "hotel_id": 1, "data.latitude": 1, "data.longitude": 1, "data.name": 1,
+            "data.star_rating": 1, "data.image_url": 1, "data.city": 1, "data.country": 1
+        }).to_list(None)
+        # Catalogue entries come last so their (fresher) content wins
+        built = await asyncio.to_thread(self.build, self._static_docs + docs)
+        self.hotel_ids, self.lats, self.lons, self.info, self.positions, self.cells = built
+        self._signature = signature
+        self.loaded_at = datetime.now(timezone.utc)
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"🗺️ Geo index loaded: {len(self.hotel_ids)} hotels in {len(self.cells)} cells in {self.load_seconds:.1f}s")
+        return True
+    
+    def request_refresh(self) -> None:
+        if self._refresh_event is not None:
+            self._refresh_event.set()
+    
+    async def start(self) -> None:
+        if not GEO_INDEX_ENABLED or self._refresh_task:
+            return
+        self._refresh_event = asyncio.Event()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            self._refresh_event.clear()
+            try:
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Geo index refresh failed: {str(e)[:150]}")
+            try:
+                await asyncio.wait_for(self._refresh_event.wait(), timeout=GEO_INDEX_REFRESH_MINUTES * 60)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+    
+    def stats(self) -> Dict:
+        return {
+            "enabled": GEO_INDEX_ENABLED,
+            "ready": self.ready,
+            "hotels": len(self.hotel_ids),
+            "static_db_hotels": len(self._static_docs),
+            "cells": len(self.cells),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "load_seconds": round(self.load_seconds, 2),
+            "queries": self.queries,
+            "avg_query_us": round(self.query_time / self.queries * 1e6, 1) if self.queries else 0
+        }
+
+hotel_geo_index = HotelGeoIndex()
+
 # ==================== SUNHOTELS API CLIENT ====================
 
 class SunhotelsClient:
@@ -3021,7 +5189,23 @@ class SunhotelsClient:
             password = settings.get("sunhotels_password", SUNHOTELS_PASSWORD)
         
         return username, password
-    
+
+    async def _get(self, operation: str, params: Dict) -> httpx.Response:
+        """GET a Sunhotels operation through the shared pooled HTTP client"""
+        http_client = get_sunhotels_http_client()
+        start_time = time.perf_counter()
+        try:
+            response = await http_client.get(
+                f"{self.api_url}/{operation}",
+                params=params,
+                timeout=sunhotels_operation_timeout(operation)
+            )
+        except Exception:
+            record_sunhotels_request(operation, time.perf_counter() - start_time, error=True)
+            raise
+        record_sunhotels_request(operation, time.perf_counter() - start_time, error=response.status_code != 200)
+        return response
+
     async def search_destinations(self, query: str) -> List[Dict]:
         """Search destinations - first try fast lookup table, then fall back to Sunhotels API"""
         
@@ -3031,7 +5215,30 @@ class SunhotelsClient:
             logger.info(f"⚡ Using fast lookup results for '{query}'")
             return lookup_results
         
-        # Fall back to Sunhotels API
+        # PostgreSQL destinations cache (pooled, trigram indexed) when configured
+        if PG_HOST:
+            pg_results = await autocomplete_cache.get_or_load(
+                f"pg:{query.lower().strip()}",
+                lambda: search_destinations_postgres_or_none(query)
+            )
+            if pg_results:
+                logger.info(f"⚡ Using PostgreSQL destination results for '{query}'")
+                return pg_results
+        
+        # Fall back to Sunhotels API (cached, one upstream call per concurrent identical query)
+        api_results = await autocomplete_cache.get_or_load(
+            f"api:{query.lower().strip()}",
+            lambda: self._search_destinations_api(query)
+        )
+        if api_results:
+            return api_results
+        
+        # Fallback to static list
+        logger.info("Using static fallback")
+        return self._get_static_destinations(query)
+    
+    async def _search_destinations_api(self, query: str) -> Optional[List[Dict]]:
+        """Search destinations via Sunhotels GetDestinations/GetResorts; None when nothing was found"""
         username, password = await self.get_credentials()
         
         # Try multiple search codes to find the destination
@@ -3120,64 +5327,58 @@ class SunhotelsClient:
         # Remove duplicates while preserving order
         search_codes = list(dict.fromkeys(search_codes))
         
-        dest_url = f"{self.api_url}/GetDestinations"
-        
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                destinations = []
+            destinations = []
+            
+            # Try each search code until we find results
+            for search_code in search_codes:
+                if destinations:
+                    break
+                    
+                dest_params = {
+                    "userName": username,
+                    "password": password,
+                    "language": "en",
+                    "destinationCode": search_code,
+                    "sortBy": "Destination",
+                    "sortOrder": "Ascending",
+                    "exactDestinationMatch": "false"
+                }
+                
+                dest_response = await self._get("GetDestinations", dest_params)
                 
-                # Try each search code until we find results
-                for search_code in search_codes:
+                if dest_response.status_code == 200:
+                    destinations = self._parse_destinations_response(dest_response.text, query)
                     if destinations:
-                        break
-                        
-                    dest_params = {
+                        logger.info(f"Found destinations with search code '{search_code}'")
+            
+            if destinations:
+                # Step 2: Get resort_id for each destination (limit to first 5)
+                for dest in destinations[:5]:
+                    resort_params = {
                         "userName": username,
                         "password": password,
                         "language": "en",
-                        "destinationCode": search_code,
+                        "destinationCode": "",
+                        "destinationID": dest["id"],
                         "sortBy": "Destination",
                         "sortOrder": "Ascending",
                         "exactDestinationMatch": "false"
                     }
-                    
-                    dest_response = await client.get(dest_url, params=dest_params)
-                    
-                    if dest_response.status_code == 200:
-                        destinations = self._parse_destinations_response(dest_response.text, query)
-                        if destinations:
-                            logger.info(f"Found destinations with search code '{search_code}'")
+                    resort_response = await self._get("GetResorts", resort_params)
+                    if resort_response.status_code == 200:
+                        resort_id = self._parse_resort_id_from_response(resort_response.text, dest["name"])
+                        if resort_id:
+                            dest["resort_id"] = resort_id
                 
-                if destinations:
-                    # Step 2: Get resort_id for each destination (limit to first 5)
-                    resort_url = f"{self.api_url}/GetResorts"
-                    for dest in destinations[:5]:
-                        resort_params = {
-                            "userName": username,
-                            "password": password,
-                            "language": "en",
-                            "destinationCode": "",
-                            "destinationID": dest["id"],
-                            "sortBy": "Destination",
-                            "sortOrder": "Ascending",
-                            "exactDestinationMatch": "false"
-                        }
-                        resort_response = await client.get(resort_url, params=resort_params)
-                        if resort_response.status_code == 200:
-                            resort_id = self._parse_resort_id_from_response(resort_response.text, dest["name"])
-                            if resort_id:
-                                dest["resort_id"] = resort_id
-                    
-                    logger.info(f"✅ Sunhotels API: Found {len(destinations)} destinations for '{query}'")
-                    return destinations
-                else:
-                    logger.info(f"No results from GetDestinations for '{query}' with codes {search_codes}, trying static fallback")
+                logger.info(f"✅ Sunhotels API: Found {len(destinations)} destinations for '{query}'")
+                return destinations
+            else:
+                logger.info(f"No results from GetDestinations for '{query}' with codes {search_codes}, trying static fallback")
         except Exception as e:
             logger.error(f"GetDestinations error: {str(e)}")
         
-        # Fallback to static list
-        logger.info("Using static fallback")
-        return self._get_static_destinations(query)
+        return None
     
     def _parse_destinations_response(self, xml_text: str, query: str) -> List[Dict]:
         """Parse GetDestinations XML response"""
@@ -3327,13 +5528,12 @@ class SunhotelsClient:
             d["display"] = f"{d['name']}, {d['country']}"
         return filtered
     
-    async def search_hotels(self, params: HotelSearchParams) -> List[Dict]:
+    async def search_hotels(self, params: HotelSearchParams, timings: Optional[Dict] = None) -> List[Dict]:
         """
         Search hotels via Sunhotels NonStatic API (live API call)
         Uses destinationID (city) as primary search parameter
         Note: API only allows ONE of: destination, destinationID, hotelIDs, or resortIDs
         """
-        url = f"{self.api_url}/SearchV3"
         username, password = await self.get_credentials()
         
         # Build base query params
@@ -3403,77 +5603,87 @@ class SunhotelsClient:
         logger.info(f"Sunhotels SearchV3: {log_msg}, dates={params.check_in} to {params.check_out}")
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(url, params=base_params)
+            stage_start = time.perf_counter()
+            status_code, hotels, error_msg = await self._stream_search_v3(base_params, params.b2c == 1)
+            record_stage_timing(timings, "search_v3", stage_start)
+            
+            if status_code == 200:
+                if error_msg:
+                    logger.error(f"Sunhotels API error: {error_msg}")
+                    return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
                 
-                if response.status_code == 200:
-                    if "<Error>" in response.text:
-                        start = response.text.find("<Message>") + 9
-                        end = response.text.find("</Message>")
-                        error_msg = response.text[start:end] if start > 8 and end > start else "Unknown error"
-                        logger.error(f"Sunhotels API error: {error_msg}")
-                        return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
-                    
-                    hotels = self._parse_search_response(response.text, params.b2c == 1)
-                    
-                    if len(hotels) == 0:
-                        logger.warning(f"No hotels found. Params: dest_id={params.destination_id}, resort_id={params.resort_id}")
-                        return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
-                    
-                    # Enrich hotels with static data (names, addresses, images)
-                    hotels = await self._enrich_hotels_with_static_data(hotels, client)
-                    
-                    logger.info(f"✅ Returning {len(hotels)} enriched hotels from Sunhotels API")
-                    return hotels
-                else:
-                    logger.error(f"Sunhotels API HTTP error: {response.status_code}")
+                if len(hotels) == 0:
+                    logger.warning(f"No hotels found. Params: dest_id={params.destination_id}, resort_id={params.resort_id}")
                     return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
                 
+                # Keep the room lists so hotel pages for this search skip another SearchV3
+                if params.destination_id:
+                    scope = f"destination:{params.destination_id}"
+                elif params.resort_id:
+                    scope = f"resort:{params.resort_id}"
+                else:
+                    scope = f"text:{(params.destination or '').strip().lower()}"
+                hotel_availability_store.store(scope, HotelAvailabilityStore.occupancy_key(
+                    params.check_in, params.check_out, params.adults, params.children, params.children_ages,
+                    params.b2c, params.rooms, params.currency
+                ), hotels)
+                
+                # Enrich hotels with static data (names, addresses, images)
+                hotels = await self._enrich_hotels_with_static_data(hotels, timings)
+                
+                logger.info(f"✅ Returning {len(hotels)} enriched hotels from Sunhotels API")
+                return hotels
+            else:
+                logger.error(f"Sunhotels API HTTP error: {status_code}")
+                return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
+            
         except Exception as e:
             logger.error(f"Error searching hotels: {str(e)}")
             return self._get_sample_hotels(params.b2c == 1, params.destination, params.destination_id)
     
-    async def _enrich_hotels_with_static_data(self, hotels: List[Dict], client: httpx.AsyncClient) -> List[Dict]:
-        """Enrich hotel search results with static data (names, addresses, images, star ratings)"""
+    async def _enrich_hotels_with_static_data(self, hotels: List[Dict], timings: Optional[Dict] = None) -> List[Dict]:
+        """
+        Enrich hotel search results with static data (names, addresses, images, star ratings).
+        Static content comes from the local catalogue; only missing/stale hotels are fetched from
+        GetStaticHotelsAndRooms, concurrently with the MySQL lookup. Results are merged in the same
+        order as before.
+        """
         if not hotels:
             return hotels
         
+        enrich_start = time.perf_counter()
+        
         # Get hotel IDs to fetch static data
         hotel_ids = [h["hotel_id"] for h in hotels]
         
-        # Batch hotel IDs - API may have limits, fetch in batches of 50
-        batch_size = 50
-        static_data_map = {}
-        
-        username, password = await self.get_credentials()
+        batch_timings = []
         
-        for i in range(0, len(hotel_ids), batch_size):
-            batch_ids = hotel_ids[i:i + batch_size]
-            ids_str = ",".join(batch_ids)
-            
-            url = f"{self.api_url}/GetStaticHotelsAndRooms"
-            params = {
-                "userName": username,
-                "password": password,
-                "language": "en",
-                "destination": "",
-                "hotelIDs": ids_str,
-                "resortIDs": "",
-                "accommodationTypes": "",
-                "sortBy": "",
-                "sortOrder": "",
-                "exactDestinationMatch": ""
-            }
+        async def fetch_static() -> Dict[str, Dict]:
+            # Local catalogue first; only missing/stale hotels go to Sunhotels
+            stage_start = time.perf_counter()
+            static_data_map, refresh_ids = await static_hotel_catalog.lookup(hotel_ids)
+            record_stage_timing(timings, "static_catalog", stage_start)
+            if timings is not None:
+                timings["static_catalog_hits"] = len(hotel_ids) - len(refresh_ids)
             
-            try:
-                response = await client.get(url, params=params)
-                if response.status_code == 200:
-                    batch_data = self._parse_static_hotel_data(response.text)
-                    static_data_map.update(batch_data)
-            except Exception as e:
-                logger.error(f"Error fetching static hotel data: {str(e)}")
+            if refresh_ids:
+                stage_start = time.perf_counter()
+                live_data = await self.fetch_static_hotels(refresh_ids, batch_timings)
+                record_stage_timing(timings, "static_api", stage_start)
+                static_data_map.update(live_data)
+                static_hotel_catalog.store_later(live_data)
+            return static_data_map
+        
+        async def fetch_db() -> Optional[Dict[str, Dict]]:
+            stage_start = time.perf_counter()
+            result = await self._fetch_hotels_db_data(hotel_ids)
+            record_stage_timing(timings, "static_db", stage_start)
+            return result
+        
+        static_data_map, bravo_map = await asyncio.gather(fetch_static(), fetch_db())
         
         # Merge static data into hotels
+        merge_start = time.perf_counter()
         for hotel in hotels:
             hotel_id = hotel["hotel_id"]
             if hotel_id in static_data_map:
@@ -3497,175 +5707,190 @@ class SunhotelsClient:
                 if static.get("amenities"):
                     hotel["amenities"] = static["amenities"]
         
-        # Enrich with static database data (themes, distances)
-        await self._enrich_hotels_with_db_data(hotels)
+        # Apply static database data (themes, distances) on top of the API data
+        if bravo_map is not None:
+            self._apply_hotels_db_data(hotels, bravo_map)
+        record_stage_timing(timings, "merge", merge_start)
+        
+        if timings is not None:
+            timings["static_batches_ms"] = batch_timings
+            timings["static_concurrency"] = STATIC_ENRICHMENT_CONCURRENCY
+        record_stage_timing(timings, "enrichment", enrich_start)
         
         return hotels
     
-    async def _enrich_hotels_with_db_data(self, hotels: List[Dict]):
-        """Enrich hotels with data from static database (themes, distances, features) - OPTIMIZED with connection pooling"""
-        # Use connection pool for better performance
-        pool = await get_mysql_pool()
-        if not pool:
-            # Fallback to direct connection
-            db_config = await self.get_static_db_connection()
-            if not db_config["host"] or not db_config["database"]:
-                return  # Static DB not configured
-            try:
-                conn = await asyncio.wait_for(
-                    aiomysql.connect(
-                        host=db_config["host"],
-                        port=db_config["port"],
-                        user=db_config["user"],
-                        password=db_config["password"],
-                        db=db_config["database"],
-                        charset='utf8mb4',
-                        connect_timeout=2
-                    ),
-                    timeout=3
-                )
-                use_pool = False
-            except:
-                logger.warning("DB enrichment skipped - connection timeout")
-                return
-        else:
-            try:
-                conn = await asyncio.wait_for(pool.acquire(), timeout=2)
-                use_pool = True
-            except:
-                logger.warning("DB enrichment skipped - pool timeout")
-                return
+    async def fetch_static_hotels(self, hotel_ids: List[str], batch_timings: Optional[List] = None) -> Dict[str, Dict]:
+        """
+        Fetch GetStaticHotelsAndRooms live for the given hotels. Batches of STATIC_ENRICHMENT_BATCH_SIZE
+        run concurrently, bounded by STATIC_ENRICHMENT_CONCURRENCY.
+        """
+        if not hotel_ids:
+            return {}
+        username, password = await self.get_credentials()
+        semaphore = asyncio.Semaphore(STATIC_ENRICHMENT_CONCURRENCY)
+        
+        async def fetch_batch(batch_ids: List[str]) -> Dict[str, Dict]:
+            async with semaphore:
+                batch_start = time.perf_counter()
+                params = {
+                    "userName": username,
+                    "password": password,
+                    "language": "en",
+                    "destination": "",
+                    "hotelIDs": ",".join(batch_ids),
+                    "resortIDs": "",
+                    "accommodationTypes": "",
+                    "sortBy": "",
+                    "sortOrder": "",
+                    "exactDestinationMatch": ""
+                }
+                try:
+                    response = await self._get("GetStaticHotelsAndRooms", params)
+                    if response.status_code == 200:
+                        return self._parse_static_hotel_data(response.text)
+                except Exception as e:
+                    logger.error(f"Error fetching static hotel data: {str(e)}")
+                finally:
+                    if batch_timings is not None:
+                        batch_timings.append(round((time.perf_counter() - batch_start) * 1000, 1))
+                return {}
         
+        # Batch hotel IDs - API may have limits, fetch in batches of 50
+        results = await asyncio.gather(*[
+            fetch_batch(hotel_ids[i:i + STATIC_ENRICHMENT_BATCH_SIZE])
+            for i in range(0, len(hotel_ids), STATIC_ENRICHMENT_BATCH_SIZE)
+        ])
+        static_data_map = {}
+        for batch_data in results:
+            static_data_map.update(batch_data)
+        return static_data_map
+    
+    async def _fetch_hotels_db_data(self, hotel_ids: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Load themes, distances, features and images for hotels from the static database.
+        Returns None when the static DB is unavailable, an empty map when the query failed.
+        """
         start_time = asyncio.get_event_loop().time()
+        bravo_map = {}
         
         try:
-            hotel_ids = [h["hotel_id"] for h in hotels]
-            placeholders = ",".join(["%s"] * len(hotel_ids))
-            
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                # Direct query with LIMIT to speed up - skip lookup step
-                await cursor.execute(f"""
-                    SELECT hotel_id, features_json, themes_json, distance_types_json, images_json
-                    FROM ghwk_bravo_hotels
-                    WHERE hotel_id IN ({placeholders})
-                    LIMIT 100
-                """, hotel_ids[:100])  # Limit to first 100 hotels
-                bravo_data = await cursor.fetchall()
+            async with mysql_connection(timeout=2) as conn:
+                placeholders = ",".join(["%s"] * len(hotel_ids[:100]))
                 
-                # Build lookup map
-                bravo_map = {}
-                for row in bravo_data or []:
-                    hid = str(row["hotel_id"])
-                    bravo_map[hid] = row
-            
-            # Release connection
-            if use_pool:
-                pool.release(conn)
-            else:
-                conn.close()
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    # Direct query with LIMIT to speed up - skip lookup step
+                    await cursor.execute(f"""
+                        SELECT hotel_id, features_json, themes_json, distance_types_json, images_json
+                        FROM ghwk_bravo_hotels
+                        WHERE hotel_id IN ({placeholders})
+                        LIMIT 100
+                    """, hotel_ids[:100])  # Limit to first 100 hotels
+                    bravo_data = await cursor.fetchall()
+                    
+                    # Build lookup map
+                    for row in bravo_data or []:
+                        hid = str(row["hotel_id"])
+                        bravo_map[hid] = row
             
             total_time = asyncio.get_event_loop().time() - start_time
             logger.info(f"⚡ DB enrichment: {len(bravo_map)} hotels in {total_time:.3f}s")
-            
-            # Apply to hotels
-            for hotel in hotels:
-                hid = hotel["hotel_id"]
-                if hid in bravo_map:
-                    row = bravo_map[hid]
-                    
-                    # Parse features/amenities - deduplicate
-                    if row.get("features_json"):
-                        try:
-                            features = json.loads(row["features_json"])
-                            amenities_raw = [f.get("name") for f in features if f.get("name")]
-                            # Deduplicate while preserving order (case-insensitive)
-                            seen = set()
-                            unique_amenities = []
-                            for a in amenities_raw:
-                                a_lower = a.lower().strip()
-                                if a_lower not in seen:
-                                    seen.add(a_lower)
-                                    unique_amenities.append(a)
-                            hotel["amenities"] = unique_amenities[:10]
-                        except:
-                            pass
-                    
-                    # Parse themes
-                    if row.get("themes_json"):
-                        try:
-                            themes = json.loads(row["themes_json"])
-                            if isinstance(themes, list):
-                                hotel["themes"] = [t.get("name") if isinstance(t, dict) else t for t in themes][:5]
-                        except:
-                            pass
-                    
-                    # If no themes, infer from hotel characteristics
-                    if not hotel.get("themes"):
-                        hotel["themes"] = self._infer_hotel_themes(hotel)
-                    
-                    # Parse distances
-                    if row.get("distance_types_json"):
-                        try:
-                            distances = json.loads(row["distance_types_json"])
-                            hotel["distances"] = []
-                            for d in distances[:3]:
-                                desc = d.get("description", "")
-                                dist_list = d.get("distances", [])
-                                if dist_list:
-                                    meters = dist_list[0].get("distanceInMeters", 0)
-                                    if meters < 1000:
-                                        hotel["distances"].append({"name": desc, "value": f"{meters}m"})
-                                    else:
-                                        hotel["distances"].append({"name": desc, "value": f"{meters/1000:.1f}km"})
-                        except:
-                            pass
-                    
-                    # Parse images from images_json if hotel doesn't have images already
-                    if row.get("images_json") and not hotel.get("images"):
-                        try:
-                            images_data = json.loads(row["images_json"]) if isinstance(row["images_json"], str) else row["images_json"]
-                            if images_data and isinstance(images_data, list):
-                                parsed_images = []
-                                for img in images_data[:10]:  # Limit to 10 images
-                                    if isinstance(img, dict):
-                                        img_id = img.get("id") or img.get("url") or img.get("image_url")
-                                        if img_id:
-                                            if str(img_id).startswith("http"):
-                                                parsed_images.append(str(img_id))
-                                            else:
-                                                parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}")
-                                    elif isinstance(img, str):
-                                        if img.startswith("http"):
-                                            parsed_images.append(img)
-                                        else:
-                                            parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img}")
-                                    elif isinstance(img, int):
-                                        parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img}")
-                                
-                                if parsed_images:
-                                    hotel["images"] = parsed_images
-                                    if not hotel.get("image_url"):
-                                        hotel["image_url"] = parsed_images[0]
-                        except Exception as img_err:
-                            logger.debug(f"Error parsing images_json for hotel {hid}: {img_err}")
-            
-            # Also infer themes for hotels without DB data
-            for hotel in hotels:
-                if not hotel.get("themes"):
-                    hotel["themes"] = self._infer_hotel_themes(hotel)
-                    
+        except StaticDBUnavailable as e:
+            logger.warning(f"DB enrichment skipped - {e}")
+            return None
         except asyncio.TimeoutError:
             logger.warning("Static DB connection timed out - continuing without static data")
-            # Still try to infer themes
-            for hotel in hotels:
-                if not hotel.get("themes"):
-                    hotel["themes"] = self._infer_hotel_themes(hotel)
         except Exception as e:
             logger.warning(f"Static DB enrichment skipped: {str(e)}")
-            # Still try to infer themes
-            for hotel in hotels:
+        
+        return bravo_map
+    
+    def _apply_hotels_db_data(self, hotels: List[Dict], bravo_map: Dict[str, Dict]):
+        """Apply static database rows (features, themes, distances, images) to hotels"""
+        for hotel in hotels:
+            hid = hotel["hotel_id"]
+            if hid in bravo_map:
+                row = bravo_map[hid]
+                
+                # Parse features/amenities - deduplicate
+                if row.get("features_json"):
+                    try:
+                        features = json.loads(row["features_json"])
+                        amenities_raw = [f.get("name") for f in features if f.get("name")]
+                        # Deduplicate while preserving order (case-insensitive)
+                        seen = set()
+                        unique_amenities = []
+                        for a in amenities_raw:
+                            a_lower = a.lower().strip()
+                            if a_lower not in seen:
+                                seen.add(a_lower)
+                                unique_amenities.append(a)
+                        hotel["amenities"] = unique_amenities[:10]
+                    except:
+                        pass
+                
+                # Parse themes
+                if row.get("themes_json"):
+                    try:
+                        themes = json.loads(row["themes_json"])
+                        if isinstance(themes, list):
+                            hotel["themes"] = [t.get("name") if isinstance(t, dict) else t for t in themes][:5]
+                    except:
+                        pass
+                
+                # If no themes, infer from hotel characteristics
                 if not hotel.get("themes"):
                     hotel["themes"] = self._infer_hotel_themes(hotel)
+                
+                # Parse distances
+                if row.get("distance_types_json"):
+                    try:
+                        distances = json.loads(row["distance_types_json"])
+                        hotel["distances"] = []
+                        for d in distances[:3]:
+                            desc = d.get("description", "")
+                            dist_list = d.get("distances", [])
+                            if dist_list:
+                                meters = dist_list[0].get("distanceInMeters", 0)
+                                if meters < 1000:
+                                    hotel["distances"].append({"name": desc, "value": f"{meters}m"})
+                                else:
+                                    hotel["distances"].append({"name": desc, "value": f"{meters/1000:.1f}km"})
+                    except:
+                        pass
+                
+                # Parse images from images_json if hotel doesn't have images already
+                if row.get("images_json") and not hotel.get("images"):
+                    try:
+                        images_data = json.loads(row["images_json"]) if isinstance(row["images_json"], str) else row["images_json"]
+                        if images_data and isinstance(images_data, list):
+                            parsed_images = []
+                            for img in images_data[:10]:  # Limit to 10 images
+                                if isinstance(img, dict):
+                                    img_id = img.get("id") or img.get("url") or img.get("image_url")
+                                    if img_id:
+                                        if str(img_id).startswith("http"):
+                                            parsed_images.append(str(img_id))
+                                        else:
+                                            parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}")
+                                elif isinstance(img, str):
+                                    if img.startswith("http"):
+                                        parsed_images.append(img)
+                                    else:
+                                        parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img}")
+                                elif isinstance(img, int):
+                                    parsed_images.append(f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img}")
+                            
+                            if parsed_images:
+                                hotel["images"] = parsed_images
+                                if not hotel.get("image_url"):
+                                    hotel["image_url"] = parsed_images[0]
+                    except Exception as img_err:
+                        logger.debug(f"Error parsing images_json for hotel {hid}: {img_err}")
+        
+        # Also infer themes for hotels without DB data
+        for hotel in hotels:
+            if not hotel.get("themes"):
+                hotel["themes"] = self._infer_hotel_themes(hotel)
     
     def _infer_hotel_themes(self, hotel: Dict) -> List[str]:
         """Infer hotel themes based on name, amenities, and star rating"""
@@ -3805,46 +6030,28 @@ class SunhotelsClient:
         FAST destination search using ghwk_autocomplete_lookup table (indexed).
         Returns cities, countries, regions matching the search query.
         Falls back to Sunhotels API if no results or DB not configured.
-        Uses in-memory cache and connection pooling for speed.
+        Served from the in-memory autocomplete index; queries MySQL (cached) until it is loaded.
         """
+        # In-memory index (no MySQL round trip) once it has been loaded
+        if autocomplete_index.ready:
+            return autocomplete_index.search(query)
+        
         # Normalize query for cache key
         cache_key = query.lower().strip()
         
-        # Check cache first
-        cached_result = autocomplete_cache.get(cache_key)
-        if cached_result is not None:
-            logger.info(f"⚡ CACHE HIT: '{query}' ({len(cached_result)} results)")
-            return cached_result
-        
-        # Use connection pool for better performance
-        pool = await get_mysql_pool()
-        if not pool:
-            # Fallback to direct connection if pool fails
-            db_config = await self.get_static_db_connection()
-            if not db_config["host"] or not db_config["database"]:
-                return []
-            try:
-                conn = await asyncio.wait_for(
-                    aiomysql.connect(
-                        host=db_config["host"],
-                        port=db_config["port"],
-                        user=db_config["user"],
-                        password=db_config["password"],
-                        db=db_config["database"],
-                        charset='utf8mb4',
-                        connect_timeout=2
-                    ),
-                    timeout=3
-                )
-            except:
-                return []
-        else:
-            conn = await pool.acquire()
-        
+        # Cached results, or one shared lookup for all concurrent identical queries
+        destinations = await autocomplete_cache.get_or_load(
+            cache_key,
+            lambda: self._query_autocomplete_lookup(query)
+        )
+        return destinations if destinations is not None else []
+    
+    async def _query_autocomplete_lookup(self, query: str) -> Optional[List[Dict]]:
+        """Query ghwk_autocomplete_lookup; returns None when the lookup failed (result is not cached)"""
         start_time = asyncio.get_event_loop().time()
         
         try:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
+            async with mysql_connection(timeout=2) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 # Search using indexed search_term_lower column
                 # Include destinations (city, country, region) AND hotels
                 # Use UNION to get destinations first (higher priority), then hotels
@@ -3885,118 +6092,31 @@ class SunhotelsClient:
                 
                 results = await cursor.fetchall()
             
-            # Release connection back to pool or close direct connection
-            pool = await get_mysql_pool()
-            if pool:
-                pool.release(conn)
-            else:
-                conn.close()
-            
             lookup_time = asyncio.get_event_loop().time() - start_time
             logger.info(f"⚡ Autocomplete lookup: {len(results)} results (destinations + hotels) for '{query}' in {lookup_time:.3f}s")
             
             # Convert to destination format
-            destinations = []
-            for row in results:
-                item = {
-                    "id": str(row["destination_id"]) if row["destination_id"] else "",
-                    "name": row["display_name"] or row["search_term"],
-                    "country": row["country_name"] or "",
-                    "type": row["type"],
-                    "hotel_count": row["hotel_count"] or 0,
-                    "display": f"{row['display_name']}, {row['country_name']}" if row["country_name"] else row["display_name"],
-                    "resort_id": ""  # Will be filled if needed
-                }
-                # Add hotel_id and thumbnail for hotel type results
-                if row["type"] == "hotel" and row.get("hotel_id"):
-                    item["hotel_id"] = str(row["hotel_id"])
-                    item["display"] = f"🏨 {row['display_name']}" + (f", {row['country_name']}" if row["country_name"] else "")
-                    
-                    # Extract first image as thumbnail
-                    if row.get("images_json"):
-                        try:
-                            images = json.loads(row["images_json"]) if isinstance(row["images_json"], str) else row["images_json"]
-                            if images and len(images) > 0:
-                                first_img = images[0]
-                                thumbnail_url = None
-                                
-                                if isinstance(first_img, dict):
-                                    # Get image ID or URL from dict
-                                    img_val = first_img.get("id") or first_img.get("url") or first_img.get("image_url")
-                                    if img_val:
-                                        if str(img_val).startswith("http"):
-                                            # Already a full URL - just use it (add resize params if possible)
-                                            base_url = str(img_val).split("&w=")[0].split("&h=")[0]
-                                            if "?" in base_url:
-                                                thumbnail_url = f"{base_url}&w=100&h=75"
-                                            else:
-                                                thumbnail_url = base_url
-                                        else:
-                                            thumbnail_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_val}&w=100&h=75"
-                                elif isinstance(first_img, str):
-                                    if first_img.startswith("http"):
-                                        base_url = first_img.split("&w=")[0].split("&h=")[0]
-                                        if "?" in base_url:
-                                            thumbnail_url = f"{base_url}&w=100&h=75"
-                                        else:
-                                            thumbnail_url = first_img
-                                    else:
-                                        thumbnail_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={first_img}&w=100&h=75"
-                                elif isinstance(first_img, int):
-                                    thumbnail_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={first_img}&w=100&h=75"
-                                
-                                if thumbnail_url:
-                                    item["thumbnail"] = thumbnail_url
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-                
-                destinations.append(item)
-            
-            # Cache the results before returning
-            autocomplete_cache.set(cache_key, destinations)
+            destinations = [autocomplete_item(row) for row in results]
             
             return destinations
             
+        except StaticDBUnavailable as e:
+            logger.warning(f"Autocomplete lookup skipped - {e}")
+            return None
         except asyncio.TimeoutError:
             logger.warning("Autocomplete lookup timed out")
-            return []
+            return None
         except Exception as e:
             logger.warning(f"Autocomplete lookup error: {str(e)}")
-            return []
+            return None
     
     async def get_hotel_details_from_static_db(self, hotel_id: str) -> Optional[Dict]:
         """
         Get hotel details from Static database (amenities, features, themes)
-        Uses connection pooling for better performance.
+        Uses the shared static DB connection pool.
         """
-        # Use connection pool
-        pool = await get_mysql_pool()
-        if not pool:
-            db_config = await self.get_static_db_connection()
-            if not db_config["host"] or not db_config["database"]:
-                return None
-            try:
-                conn = await asyncio.wait_for(
-                    aiomysql.connect(
-                        host=db_config["host"],
-                        port=db_config["port"],
-                        user=db_config["user"],
-                        password=db_config["password"],
-                        db=db_config["database"],
-                        charset='utf8mb4',
-                        connect_timeout=3
-                    ),
-                    timeout=5
-                )
-                use_pool = False
-            except:
-                return None
-        else:
-            conn = await pool.acquire()
-            use_pool = True
-        
         try:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
+            async with mysql_connection(timeout=5) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 hotel_data = {"hotel_id": hotel_id}
                 
                 # Get distance info from ghwk_bravo_hotels
@@ -4097,60 +6217,30 @@ class SunhotelsClient:
                     logger.debug(f"Room facilities query skipped for hotel {hotel_id}: {str(e)}")
                 hotel_data["room_facilities"] = room_facilities_map
             
-            # Release connection back to pool
-            if use_pool:
-                pool.release(conn)
-            else:
-                conn.close()
             logger.info(f"Static DB data retrieved for hotel {hotel_id}")
             return hotel_data
             
+        except StaticDBUnavailable as e:
+            logger.warning(f"Static DB skipped for hotel {hotel_id} - {e}")
+            return None
         except asyncio.TimeoutError:
-            if use_pool:
-                pool.release(conn)
-            else:
-                conn.close()
             logger.warning(f"Static DB timeout for hotel {hotel_id}")
             return None
         except Exception as e:
-            try:
-                if use_pool:
-                    pool.release(conn)
-                else:
-                    conn.close()
-            except:
-                pass
             logger.warning(f"Static DB query skipped for hotel {hotel_id}: {str(e)}")
             return None
     
     async def get_all_themes(self) -> List[Dict]:
         """Get all hotel themes for filtering"""
-        db_config = await self.get_static_db_connection()
-        
-        if not db_config["host"] or not db_config["database"]:
-            return []
-        
         try:
-            conn = await asyncio.wait_for(
-                aiomysql.connect(
-                    host=db_config["host"],
-                    port=db_config["port"],
-                    user=db_config["user"],
-                    password=db_config["password"],
-                    db=db_config["database"],
-                    charset='utf8mb4',
-                    connect_timeout=3
-                ),
-                timeout=5
-            )
-            
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
+            async with mysql_connection(timeout=5) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute("SELECT id, name FROM ghwk_themes ORDER BY name")
                 themes = await cursor.fetchall()
             
-            conn.close()
             return [{"id": t["id"], "name": t["name"]} for t in themes] if themes else []
             
+        except StaticDBUnavailable:
+            return []
         except asyncio.TimeoutError:
             logger.warning("Static DB timeout fetching themes")
             return []
@@ -4172,6 +6262,10 @@ class SunhotelsClient:
         if not static_data:
             return rooms
         
+        return self.apply_room_static_data(rooms, static_data)
+    
+    def apply_room_static_data(self, rooms: List[Dict], static_data: Dict) -> List[Dict]:
+        """Merge get_hotel_details_from_static_db() room images, notes and facilities into rooms (in place)"""
         room_images = static_data.get("room_images", {})
         room_notes = static_data.get("room_notes", {})
         room_facilities = static_data.get("room_facilities", {})
@@ -4204,254 +6298,51 @@ class SunhotelsClient:
                     room["amenities"] = list(existing)[:15]  # Limit to 15
         
         return rooms
-    
-    def _parse_search_response(self, xml_text: str, is_last_minute: bool = False) -> List[Dict]:
-        """Parse XML response from Sunhotels SearchV3"""
-        hotels = []
-        
-        # Meal ID mapping
-        meal_types = {
-            "1": "Room Only",
-            "2": "Bed & Breakfast", 
-            "3": "Breakfast Included",
-            "4": "Half Board",
-            "5": "Full Board",
-            "6": "All Inclusive"
-        }
-        
+    
+    def _parse_search_response(self, xml_text: str, is_last_minute: bool = False) -> List[Dict]:
+        """Parse XML response from Sunhotels SearchV3"""
+        parser = SearchV3StreamParser(is_last_minute)
         try:
-            root = ET.fromstring(xml_text)
-            ns = {'ns': 'http://xml.sunhotels.net/15/'}
-            
-            for hotel_elem in root.findall('.//ns:hotel', ns):
-                hotel_id = hotel_elem.findtext('ns:hotel.id', '', ns)
-                if not hotel_id:
-                    continue
-                
-                # Get hotel name - try multiple possible paths
-                hotel_name = (
-                    hotel_elem.findtext('ns:hotel.name', '', ns) or
-                    hotel_elem.findtext('ns:name', '', ns) or
-                    hotel_elem.findtext('ns:hotelName', '', ns) or
-                    hotel_elem.get('name', '') or
-                    f"Hotel {hotel_id}"
-                )
-                
-                # Get star rating
-                star_rating_text = hotel_elem.findtext('ns:hotel.stars', '', ns) or hotel_elem.findtext('ns:stars', '0', ns)
-                try:
-                    star_rating = int(float(star_rating_text)) if star_rating_text else 0
-                except:
-                    star_rating = 0
-                
-                # Get location info
-                city = hotel_elem.findtext('ns:city', '', ns) or hotel_elem.findtext('ns:hotel.city', '', ns) or ''
-                country = hotel_elem.findtext('ns:country', '', ns) or hotel_elem.findtext('ns:hotel.country', '', ns) or ''
-                address = hotel_elem.findtext('ns:address', '', ns) or hotel_elem.findtext('ns:hotel.address', '', ns) or ''
-                
-                # Get coordinates
-                latitude = 0.0
-                longitude = 0.0
-                try:
-                    lat_text = hotel_elem.findtext('ns:latitude', '', ns) or hotel_elem.findtext('ns:hotel.latitude', '0', ns)
-                    lon_text = hotel_elem.findtext('ns:longitude', '', ns) or hotel_elem.findtext('ns:hotel.longitude', '0', ns)
-                    latitude = float(lat_text) if lat_text else 0.0
-                    longitude = float(lon_text) if lon_text else 0.0
-                except:
-                    pass
-                
-                # Get hotel image
-                image_url = "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800"
-                image_elem = hotel_elem.find('.//ns:image', ns)
-                if image_elem is not None:
-                    img_id = image_elem.get('id', '') or image_elem.text
-                    if img_id:
-                        image_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}"
-                
-                dest_id = hotel_elem.findtext('ns:destination_id', '', ns)
-                resort_id = hotel_elem.findtext('ns:resort_id', '', ns)
-                
-                # Get review data if available
-                review_elem = hotel_elem.find('ns:review', ns)
-                review_score = 0.0
-                review_count = 0
-                if review_elem is not None:
-                    try:
-                        review_score = float(review_elem.findtext('ns:rating', '0', ns) or 0)
-                        review_count = int(review_elem.findtext('ns:count', '0', ns) or 0)
-                    except:
-                        pass
-                
-                # Parse room types
-                rooms = []
-                min_price = float('inf')
-                
-                for roomtype_elem in hotel_elem.findall('.//ns:roomtype', ns):
-                    roomtype_id = roomtype_elem.findtext('ns:roomtype.ID', '', ns)
-                    roomtype_name = roomtype_elem.findtext('ns:roomtype.Name', 'Standard Room', ns)
-                    
-                    # Parse room type images
-                    room_images = []
-                    room_image_url = ""
-                    for img in roomtype_elem.findall('.//ns:image', ns):
-                        img_id = img.get('id', '')
-                        if img_id:
-                            img_url = f"https://hotelimages.sunhotels.net/HotelInfo/hotelImage.aspx?id={img_id}"
-                            room_images.append(img_url)
-                            if not room_image_url:
-                                room_image_url = img_url
-                    
-                    # Parse room type amenities/features
-                    room_amenities = []
-                    for feature in roomtype_elem.findall('.//ns:feature', ns):
-                        feature_name = feature.findtext('ns:name', '', ns)
-                        if feature_name:
-                            room_amenities.append(feature_name)
-                    
-                    # Add common room amenities if none found
-                    if not room_amenities:
-                        room_amenities = ["Air Conditioning", "Private Bathroom", "TV", "Safe"]
-                    
-                    for room_elem in roomtype_elem.findall('.//ns:room', ns):
-                        room_id = room_elem.findtext('ns:id', '', ns)
-                        beds = int(room_elem.findtext('ns:beds', '2', ns) or 2)
-                        is_superdeal = room_elem.findtext('ns:isSuperDeal', 'false', ns).lower() == 'true'
-                        
-                        # Parse meals (can have multiple)
-                        for meal_elem in room_elem.findall('.//ns:meal', ns):
-                            meal_id = meal_elem.findtext('ns:id', '1', ns)
-                            board_type = meal_types.get(meal_id, "Room Only")
-                            
-                            # Get price
-                            price_elem = meal_elem.find('.//ns:price', ns)
-                            price = 0.0
-                            currency = "EUR"
-                            if price_elem is not None:
-                                try:
-                                    price = float(price_elem.text or 0)
-                                    currency = price_elem.get('currency', 'EUR')
-                                except:
-                                    pass
-                            
-                            if price > 0 and price < min_price:
-                                min_price = price
-                            
-                            # Get cancellation policy with +22 days FreeStays rule
-                            cancel_policy = "Non-refundable"
-                            cancel_deadline_hours = None
-                            cancel_deadline_display = None
-                            is_refundable = False
-                            
-                            cancel_elem = room_elem.find('.//ns:cancellation_policy', ns)
-                            if cancel_elem is not None:
-                                deadline_text = cancel_elem.findtext('ns:deadline', '', ns)
-                                percentage = cancel_elem.findtext('ns:percentage', '', ns)
-                                
-                                if deadline_text and deadline_text.strip():
-                                    # API returns hours before check-in
-                                    api_deadline_hours = int(deadline_text)
-                                    # Add 22 days (528 hours) to give FreeStays buffer
-                                    freestays_deadline_hours = api_deadline_hours + (22 * 24)
-                                    cancel_deadline_hours = freestays_deadline_hours
-                                    
-                                    # Convert to days for display
-                                    days_before = freestays_deadline_hours // 24
-                                    cancel_deadline_display = f"{days_before} days before check-in"
-                                    cancel_policy = f"Free cancellation until {days_before} days before check-in"
-                                    is_refundable = True
-                                elif percentage == "100":
-                                    cancel_policy = "Non-refundable. If cancelled, no refund will be given."
-                                    is_refundable = False
-                            
-                            # Get room notes
-                            room_notes_elem = room_elem.find('ns:notes', ns)
-                            room_notes = ""
-                            if room_notes_elem is not None and room_notes_elem.text:
-                                room_notes = room_notes_elem.text.strip()
-                            
-                            # Get fees (City Tax, etc.)
-                            room_fees = []
-                            for fee_elem in room_elem.findall('.//ns:fee', ns):
-                                fee_name = fee_elem.findtext('ns:name', '', ns)
-                                fee_amount_elem = fee_elem.find('.//ns:amount', ns)
-                                fee_amount = 0
-                                fee_currency = "EUR"
-                                if fee_amount_elem is not None and fee_amount_elem.text:
-                                    try:
-                                        fee_amount = float(fee_amount_elem.text)
-                                        fee_currency = fee_amount_elem.get('currency', 'EUR')
-                                    except:
-                                        pass
-                                included = fee_elem.findtext('ns:includedInPrice', 'false', ns).lower() == 'true'
-                                if fee_name:
-                                    room_fees.append({
-                                        "name": fee_name,
-                                        "amount": fee_amount,
-                                        "currency": fee_currency,
-                                        "included_in_price": included
-                                    })
-                            
-                            room_data = {
-                                "room_id": room_id,
-                                "room_type": roomtype_name,
-                                "board_type": board_type,
-                                "price": price,
-                                "currency": currency,
-                                "cancellation_policy": cancel_policy,
-                                "cancellation_deadline_hours": cancel_deadline_hours,
-                                "cancellation_deadline_display": cancel_deadline_display,
-                                "is_refundable": is_refundable,
-                                "room_notes": room_notes,
-                                "fees": room_fees,
-                                "max_occupancy": beds,
-                                "sunhotels_room_type_id": roomtype_id,
-                                "sunhotels_block_id": room_id,
-                                "is_superdeal": is_superdeal,
-                                "image_url": room_image_url,
-                                "images": room_images[:5],  # Limit to 5 room images
-                                "amenities": room_amenities[:10]  # Limit to 10 amenities
-                            }
-                            rooms.append(room_data)
-                
-                # Get hotel-level notes
-                hotel_notes_elem = hotel_elem.find('ns:notes', ns)
-                hotel_notes = ""
-                if hotel_notes_elem is not None and hotel_notes_elem.text:
-                    hotel_notes = hotel_notes_elem.text.strip()
-                
-                if min_price == float('inf'):
-                    min_price = 0
-                
-                hotel_data = {
-                    "hotel_id": hotel_id,
-                    "name": hotel_name,  # Use parsed name from XML
-                    "star_rating": star_rating,
-                    "address": address,
-                    "city": city,
-                    "country": country,
-                    "destination_id": dest_id,
-                    "resort_id": resort_id,
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "description": "",
-                    "hotel_notes": hotel_notes,
-                    "image_url": image_url,
-                    "review_score": review_score,
-                    "review_count": review_count,
-                    "rooms": rooms,
-                    "amenities": ["WiFi", "Air Conditioning", "Restaurant", "Bar", "24h Reception"],
-                    "min_price": min_price,
-                    "currency": "EUR",
-                    "is_last_minute": is_last_minute
-                }
-                hotels.append(hotel_data)
-                
+            hotels = parser.feed(xml_text)
+            hotels.extend(parser.close())
         except ET.ParseError as e:
             logger.error(f"XML Parse error: {str(e)}")
             return []  # Return empty list on parse error, let caller handle fallback
         
         return hotels  # Return actual results (may be empty), let caller handle fallback
     
+    async def _stream_search_v3(self, params: Dict, is_last_minute: bool = False,
+                                hotel_ids: Optional[set] = None) -> tuple:
+        """
+        Run SearchV3 and parse hotels while the response body is still arriving.
+        Returns (status_code, hotels, error_message).
+        """
+        http_client = get_sunhotels_http_client()
+        parser = SearchV3StreamParser(is_last_minute, hotel_ids)
+        hotels: List[Dict] = []
+        start_time = time.perf_counter()
+        try:
+            async with http_client.stream(
+                "GET",
+                f"{self.api_url}/SearchV3",
+                params=params,
+                timeout=sunhotels_operation_timeout("SearchV3")
+            ) as response:
+                status_code = response.status_code
+                if status_code == 200:
+                    try:
+                        async for chunk in response.aiter_bytes():
+                            hotels.extend(parser.feed(chunk))
+                        hotels.extend(parser.close())
+                    except ET.ParseError as e:
+                        logger.error(f"XML Parse error: {str(e)}")
+                        hotels = []
+        except Exception:
+            record_sunhotels_request("SearchV3", time.perf_counter() - start_time, error=True)
+            raise
+        record_sunhotels_request("SearchV3", time.perf_counter() - start_time, error=status_code != 200)
+        return status_code, hotels, parser.error_message
+    
     def _extract_amenities(self, hotel_elem) -> List[str]:
         """Extract amenities from hotel element"""
         amenities = []
@@ -4721,7 +6612,6 @@ class SunhotelsClient:
         Get booking information from Sunhotels using GetBookingInformationV3 API.
         This retrieves full booking details including voucher URL.
         """
-        url = f"{self.api_url}/GetBookingInformationV3"
         username, password = await self.get_credentials()
         
         params = {
@@ -4738,61 +6628,64 @@ class SunhotelsClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params)
+            response = await self._get("GetBookingInformationV3", params)
+            
+            if response.status_code == 200:
+                # Parse XML response
+                root = ET.fromstring(response.text)
+                ns = {'ns': 'http://xml.sunhotels.net/15/'}
                 
-                if response.status_code == 200:
-                    # Parse XML response
-                    root = ET.fromstring(response.text)
-                    ns = {'ns': 'http://xml.sunhotels.net/15/'}
+                # Find booking
+                booking = root.find('.//ns:booking', ns)
+                if booking is not None:
+                    voucher = booking.findtext('ns:voucher', '', ns)
+                    booking_number = booking.findtext('ns:bookingnumber', '', ns)
+                    hotel_name = booking.findtext('ns:hotel.name', '', ns)
+                    hotel_address = booking.findtext('ns:hotel.address', '', ns)
+                    hotel_phone = booking.findtext('ns:hotel.phone', '', ns)
+                    room_type = booking.findtext('ns:room.type', '', ns)
+                    meal = booking.findtext('ns:meal', '', ns)
+                    check_in = booking.findtext('ns:checkindate', '', ns)
+                    check_out = booking.findtext('ns:checkoutdate', '', ns)
+                    status_elem = booking.findtext('ns:bookingStatus', '', ns)
+                    your_ref = booking.findtext('ns:yourref', '', ns)
                     
-                    # Find booking
-                    booking = root.find('.//ns:booking', ns)
-                    if booking is not None:
-                        voucher = booking.findtext('ns:voucher', '', ns)
-                        booking_number = booking.findtext('ns:bookingnumber', '', ns)
-                        hotel_name = booking.findtext('ns:hotel.name', '', ns)
-                        hotel_address = booking.findtext('ns:hotel.address', '', ns)
-                        hotel_phone = booking.findtext('ns:hotel.phone', '', ns)
-                        room_type = booking.findtext('ns:room.type', '', ns)
-                        meal = booking.findtext('ns:meal', '', ns)
-                        check_in = booking.findtext('ns:checkindate', '', ns)
-                        check_out = booking.findtext('ns:checkoutdate', '', ns)
-                        status_elem = booking.findtext('ns:bookingStatus', '', ns)
-                        your_ref = booking.findtext('ns:yourref', '', ns)
-                        
-                        return {
-                            "success": True,
-                            "booking_number": booking_number,
-                            "voucher_url": voucher,
-                            "hotel_name": hotel_name,
-                            "hotel_address": hotel_address,
-                            "hotel_phone": hotel_phone,
-                            "room_type": room_type,
-                            "meal": meal,
-                            "check_in": check_in,
-                            "check_out": check_out,
-                            "status": status_elem,
-                            "your_ref": your_ref
-                        }
-                    else:
-                        # Check for error
-                        error = root.find('.//ns:Error', ns)
-                        if error is not None:
-                            error_msg = error.findtext('ns:Message', 'Unknown error', ns)
-                            return {"success": False, "error": error_msg}
-                        return {"success": False, "error": "Booking not found"}
+                    return {
+                        "success": True,
+                        "booking_number": booking_number,
+                        "voucher_url": voucher,
+                        "hotel_name": hotel_name,
+                        "hotel_address": hotel_address,
+                        "hotel_phone": hotel_phone,
+                        "room_type": room_type,
+                        "meal": meal,
+                        "check_in": check_in,
+                        "check_out": check_out,
+                        "status": status_elem,
+                        "your_ref": your_ref
+                    }
                 else:
-                    return {"success": False, "error": f"API returned status {response.status_code}"}
+                    # Check for error
+                    error = root.find('.//ns:Error', ns)
+                    if error is not None:
+                        error_msg = error.findtext('ns:Message', 'Unknown error', ns)
+                        return {"success": False, "error": error_msg}
+                    return {"success": False, "error": "Booking not found"}
+            else:
+                return {"success": False, "error": f"API returned status {response.status_code}"}
         except Exception as e:
             logger.error(f"Error getting booking info: {str(e)}")
             return {"success": False, "error": str(e)}
     
     async def get_hotel_details(self, hotel_id: str) -> Optional[Dict]:
         """
-        Get detailed hotel information from Sunhotels Static API
+        Get detailed hotel information - local static catalogue first, Sunhotels Static API when
+        the entry is missing or stale (a stale entry is still served if the live call fails)
         """
-        url = f"{self.api_url}/GetStaticHotelsAndRooms"
+        cached, needs_refresh = await static_hotel_catalog.get(hotel_id)
+        if cached and not needs_refresh:
+            return cached
+        
         username, password = await self.get_credentials()
         
         params = {
@@ -4809,24 +6702,19 @@ class SunhotelsClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params)
-                if response.status_code == 200:
-                    hotel_data = self._parse_static_hotel_data(response.text)
-                    if hotel_id in hotel_data:
-                        return hotel_data[hotel_id]
+            response = await self._get("GetStaticHotelsAndRooms", params)
+            if response.status_code == 200:
+                hotel_data = self._parse_static_hotel_data(response.text)
+                if hotel_id in hotel_data:
+                    static_hotel_catalog.store_later({hotel_id: hotel_data[hotel_id]})
+                    return hotel_data[hotel_id]
         except Exception as e:
             logger.error(f"Error fetching hotel details: {str(e)}")
         
-        return None
+        return cached
     
-    async def get_hotel_rooms(self, hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, children_ages: List[int] = None, b2c: int = 0, destination_id: str = None, resort_id: str = None) -> List[Dict]:
-        """
-        Get available rooms for a specific hotel using SearchV3
-        Uses destinationID + hotelIDs for better results when destination context is available
-        b2c=0 for normal availability, b2c=1 for last minute deals
-        """
-        url = f"{self.api_url}/SearchV3"
+    async def _hotel_rooms_query_params(self, hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, children_ages: List[int] = None, b2c: int = 0, rooms: int = 1, currency: str = "EUR") -> Dict:
+        """SearchV3 parameters for a single hotel (hotelIDs search)"""
         username, password = await self.get_credentials()
         
         # Format children ages
@@ -4834,14 +6722,14 @@ class SunhotelsClient:
         if children_ages and len(children_ages) > 0:
             children_ages_str = ",".join(str(age) for age in children_ages)
         
-        query_params = {
+        return {
             "userName": username,
             "password": password,
             "language": "en",
-            "currencies": "EUR",
+            "currencies": currency,
             "checkInDate": check_in,
             "checkOutDate": check_out,
-            "numberOfRooms": 1,
+            "numberOfRooms": rooms,
             "numberOfAdults": adults,
             "numberOfChildren": children,
             "childrenAges": children_ages_str,
@@ -4872,64 +6760,105 @@ class SunhotelsClient:
             "showRoomTypeName": "1",
             "accommodationTypes": "",
             "hotelIDs": hotel_id,  # Search specific hotel
+            "destination": "",
+            "destinationID": "",
+            "resortIDs": "",
         }
-        
-        # API only allows ONE of: destination, destinationID, hotelIDs, or resortIDs
-        # When destination_id is available, use it and filter results by hotel_id
-        # This gives better results than using hotelIDs alone
+    
+    async def get_hotel_rooms(self, hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, children_ages: List[int] = None, b2c: int = 0, destination_id: str = None, resort_id: str = None, enrich: bool = True, rooms: int = 1, currency: str = "EUR") -> List[Dict]:
+        """
+        Get available rooms for a specific hotel.
+        Served from the availability store when /hotels/search fetched the same destination and
+        dates recently; otherwise a narrow hotelIDs SearchV3, falling back to a destination-wide
+        search (which refills the store) when hotelIDs returns nothing.
+        A live search that finds the hotel sold out is reused for HOTEL_AVAILABILITY_SOLD_OUT_TTL.
+        b2c=0 for normal availability, b2c=1 for last minute deals
+        enrich=False skips the static DB room enrichment (for callers that fetch it concurrently)
+        """
+        room_count = rooms
+        occupancy = HotelAvailabilityStore.occupancy_key(check_in, check_out, adults, children, children_ages, b2c,
+                                                         room_count, currency)
+        scopes = []
         if destination_id:
-            query_params["destinationID"] = destination_id
-            query_params["hotelIDs"] = ""  # Clear hotelIDs when using destinationID
-            query_params["resortIDs"] = ""
-            query_params["destination"] = ""
-            logger.info(f"Hotel rooms search: using destinationID={destination_id}, will filter for hotel_id={hotel_id}, dates={check_in} to {check_out}")
-        elif resort_id:
-            query_params["destinationID"] = ""
-            query_params["hotelIDs"] = ""  # Clear hotelIDs when using resortIDs
-            query_params["resortIDs"] = resort_id
-            query_params["destination"] = ""
-            logger.info(f"Hotel rooms search: using resortID={resort_id}, will filter for hotel_id={hotel_id}, dates={check_in} to {check_out}")
-        else:
-            # No destination context - try with hotelIDs alone (may return empty for some hotels)
-            query_params["destinationID"] = ""
-            query_params["resortIDs"] = ""
-            query_params["destination"] = ""
-            # hotelIDs is already set above
-            logger.info(f"Hotel rooms search: using hotelIDs={hotel_id} (no destination context), dates={check_in} to {check_out}")
+            scopes.append(f"destination:{destination_id}")
+        if resort_id:
+            scopes.append(f"resort:{resort_id}")
+        
+        rooms = hotel_availability_store.lookup(hotel_id, occupancy, scopes)
+        if rooms is not None:
+            logger.info(f"Hotel rooms for {hotel_id} served from availability store: {len(rooms)} rooms, dates={check_in} to {check_out}")
+            # Copy so static enrichment does not modify the stored search results
+            rooms = [dict(r) for r in rooms]
+            return await self.enrich_rooms_with_static_data(rooms, hotel_id) if rooms and enrich else rooms
+        
+        query_params = await self._hotel_rooms_query_params(hotel_id, check_in, check_out, adults, children, children_ages, b2c,
+                                                            room_count, currency)
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(url, params=query_params)
-                if response.status_code == 200:
-                    hotels = self._parse_search_response(response.text, False)
-                    
-                    # If using destinationID, filter for the specific hotel
-                    if destination_id or resort_id:
-                        for h in hotels:
-                            if str(h.get("hotel_id")) == str(hotel_id):
-                                rooms = h.get("rooms", [])
-                                if rooms:
-                                    rooms = await self.enrich_rooms_with_static_data(rooms, hotel_id)
-                                    return rooms
-                        logger.warning(f"Hotel {hotel_id} not found in destination {destination_id or resort_id} search results")
-                        return []
-                    else:
-                        # Using hotelIDs - return rooms from the first (and only) hotel
-                        if hotels and hotels[0].get("rooms"):
-                            rooms = hotels[0]["rooms"]
-                            rooms = await self.enrich_rooms_with_static_data(rooms, hotel_id)
-                            return rooms
+            # Narrow search for this hotel only
+            logger.info(f"Hotel rooms search: using hotelIDs={hotel_id}, dates={check_in} to {check_out}")
+            status_code, hotels, error_message = await self._stream_search_v3(query_params, False, hotel_ids={hotel_id})
+            if status_code == 200 and hotels and hotels[0].get("rooms"):
+                rooms = hotels[0]["rooms"]
+                return await self.enrich_rooms_with_static_data(rooms, hotel_id) if enrich else rooms
+            
+            if not (destination_id or resort_id):
+                if status_code == 200 and not error_message:
+                    hotel_availability_store.mark_sold_out(hotel_id, occupancy)
+                return []
+            
+            # hotelIDs alone returns nothing for some hotels - search the destination and filter.
+            # API only allows ONE of: destination, destinationID, hotelIDs, or resortIDs
+            query_params["hotelIDs"] = ""
+            if destination_id:
+                query_params["destinationID"] = destination_id
+                scope = f"destination:{destination_id}"
+            else:
+                query_params["resortIDs"] = resort_id
+                scope = f"resort:{resort_id}"
+            logger.info(f"Hotel rooms search: using {scope}, will filter for hotel_id={hotel_id}, dates={check_in} to {check_out}")
+            
+            status_code, hotels, error_message = await self._stream_search_v3(query_params, False)
+            if status_code == 200:
+                if not error_message:
+                    hotel_availability_store.store(scope, occupancy, hotels)
+                for h in hotels:
+                    if str(h.get("hotel_id")) == str(hotel_id):
+                        rooms = h.get("rooms", [])
+                        if rooms:
+                            rooms = [dict(r) for r in rooms]
+                            return await self.enrich_rooms_with_static_data(rooms, hotel_id) if enrich else rooms
+                logger.warning(f"Hotel {hotel_id} not found in {scope} search results")
+                if not error_message:
+                    hotel_availability_store.mark_sold_out(hotel_id, occupancy)
         except Exception as e:
             logger.error(f"Error fetching hotel rooms: {str(e)}")
         
         return []
     
+    async def probe_hotel_rooms(self, hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, b2c: int = 0) -> Optional[List[Dict]]:
+        """
+        Availability check for one hotel/date without static enrichment.
+        Returns the rooms (empty list when sold out) or None when the search itself failed.
+        """
+        query_params = await self._hotel_rooms_query_params(hotel_id, check_in, check_out, adults, children, None, b2c)
+        try:
+            status_code, hotels, error_message = await self._stream_search_v3(query_params, b2c == 1, hotel_ids={hotel_id})
+        except Exception as e:
+            logger.warning(f"Availability probe failed for hotel {hotel_id} on {check_in}: {str(e)[:100]}")
+            return None
+        if status_code != 200 or error_message:
+            return None
+        for h in hotels:
+            if str(h.get("hotel_id")) == str(hotel_id):
+                return h.get("rooms", [])
+        return []
+    
     async def prebook(self, params: dict) -> dict:
         """
         Call Sunhotels PreBookV3 API to verify price and availability before booking
         Returns prebook_code needed for final booking
         """
-        url = f"{self.api_url}/PreBookV3"
         username, password = await self.get_credentials()
         
         # Convert search_price to integer (API expects cents/integer format)
@@ -4967,14 +6896,13 @@ class SunhotelsClient:
         logger.info(f"Sunhotels PreBookV3: hotel={params.get('hotel_id')}, room={params.get('room_id')}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=query_params)
-                
-                if response.status_code == 200:
-                    return self._parse_prebook_response(response.text)
-                else:
-                    logger.error(f"PreBook API error: {response.status_code}")
-                    return {"success": False, "error": f"API error: {response.status_code}"}
+            response = await self._get("PreBookV3", query_params)
+            
+            if response.status_code == 200:
+                return self._parse_prebook_response(response.text)
+            else:
+                logger.error(f"PreBook API error: {response.status_code}")
+                return {"success": False, "error": f"API error: {response.status_code}"}
         except Exception as e:
             logger.error(f"PreBook error: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -5065,7 +6993,6 @@ class SunhotelsClient:
         Call Sunhotels BookV3 API to confirm the booking
         Should only be called AFTER payment is confirmed!
         """
-        url = f"{self.api_url}/BookV3"
         username, password = await self.get_credentials()
         
         query_params = {
@@ -5147,14 +7074,13 @@ class SunhotelsClient:
         logger.info(f"Sunhotels BookV3: room={params.get('room_id')}, guest={params.get('guest_first_name')} {params.get('guest_last_name')}")
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.get(url, params=query_params)
-                
-                if response.status_code == 200:
-                    return self._parse_book_response(response.text)
-                else:
-                    logger.error(f"Book API error: {response.status_code}")
-                    return {"success": False, "error": f"API error: {response.status_code}"}
+            response = await self._get("BookV3", query_params)
+            
+            if response.status_code == 200:
+                return self._parse_book_response(response.text)
+            else:
+                logger.error(f"Book API error: {response.status_code}")
+                return {"success": False, "error": f"API error: {response.status_code}"}
         except Exception as e:
             logger.error(f"Book error: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -5220,9 +7146,6 @@ class SunhotelsClient:
         """
         username, password = await self.get_credentials()
         
-        # Sunhotels NonStatic API for transfers
-        url = f"{self.api_url}/SearchTransfers"
-        
         # Build request parameters based on Sunhotels API spec
         request_params = {
             "userName": username,
@@ -5252,14 +7175,13 @@ class SunhotelsClient:
         logger.info(f"SearchTransfers: hotel={params.get('hotel_id')}, arrival={params.get('arrival_date')} {params.get('arrival_time')}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=request_params)
-                
-                if response.status_code == 200:
-                    return await self._parse_transfer_search_response(response.text)
-                else:
-                    logger.error(f"SearchTransfers API error: {response.status_code}")
-                    return {"success": False, "transfers": [], "error": f"API error: {response.status_code}"}
+            response = await self._get("SearchTransfers", request_params)
+            
+            if response.status_code == 200:
+                return await self._parse_transfer_search_response(response.text)
+            else:
+                logger.error(f"SearchTransfers API error: {response.status_code}")
+                return {"success": False, "transfers": [], "error": f"API error: {response.status_code}"}
         except Exception as e:
             logger.error(f"SearchTransfers error: {str(e)}")
             return {"success": False, "transfers": [], "error": str(e)}
@@ -5329,8 +7251,6 @@ class SunhotelsClient:
         """
         username, password = await self.get_credentials()
         
-        url = f"{self.api_url}/AddTransfer"
-        
         # Build request parameters
         request_params = {
             "userName": username,
@@ -5361,14 +7281,13 @@ class SunhotelsClient:
         logger.info(f"AddTransfer: transfer={params.get('transfer_id')}, guest={params.get('guest_first_name')} {params.get('guest_last_name')}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=request_params)
-                
-                if response.status_code == 200:
-                    return await self._parse_add_transfer_response(response.text)
-                else:
-                    logger.error(f"AddTransfer API error: {response.status_code}")
-                    return {"success": False, "error": f"API error: {response.status_code}"}
+            response = await self._get("AddTransfer", request_params)
+            
+            if response.status_code == 200:
+                return await self._parse_add_transfer_response(response.text)
+            else:
+                logger.error(f"AddTransfer API error: {response.status_code}")
+                return {"success": False, "error": f"API error: {response.status_code}"}
         except Exception as e:
             logger.error(f"AddTransfer error: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -5411,15 +7330,36 @@ sunhotels_client = SunhotelsClient()
 
 # ==================== AUTH ROUTES ====================
 
+def preferred_language(request: Optional[Request], explicit: Optional[str] = None) -> Optional[str]:
+    """Supported language code from an explicit choice, else the Accept-Language header (highest q first)"""
+    candidates = [explicit] if explicit else []
+    if request is not None:
+        ranked = []
+        for position, part in enumerate(request.headers.get("accept-language", "").split(",")):
+            tag, _, params = part.strip().partition(";")
+            params = params.strip()
+            try:
+                quality = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                quality = 0.0
+            if tag and quality > 0:
+                ranked.append((-quality, position, tag))
+        candidates += [tag for _, _, tag in sorted(ranked)]
+    for tag in candidates:
+        code = tag.strip().lower().split("-")[0]
+        if code in SUPPORTED_LANGUAGES:
+            return code
+    return None
+
 @api_router.post("/auth/register")
-async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
+async def register(user_data: UserCreate, request: Request):
     # Check if user exists
     existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await hash_password(user_data.password)
     pass_code = generate_pass_code("free")
     
     # Generate email verification token
@@ -5455,10 +7395,12 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
         "referred_by": referrer["user_id"] if referrer else None,
         "referral_discount": referral_discount,
         "referral_count": 0,
+        "language": preferred_language(request, user_data.language),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.users.insert_one(user_doc)
+    await dashboard_stats.record("users", user_doc)
     
     # Track referral if applicable
     if referrer:
@@ -5468,6 +7410,7 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
             {"$inc": {"referral_count": 1}},
             return_document=True
         )
+        await invalidate_user_principal(referrer["user_id"], reason="referral count")
         new_referral_count = result.get("referral_count", 1) if result else 1
         
         await db.referrals.insert_one({
@@ -5482,16 +7425,16 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
         })
         
         # Send referral welcome email to new user
-        background_tasks.add_task(
-            EmailService.send_referral_welcome_email,
+        await enqueue_email(
+            "send_referral_welcome_email",
             user_data.email,
             user_data.name,
             referrer["name"],
             referral_discount
         )
         # Send notification email to referrer
-        background_tasks.add_task(
-            EmailService.send_referrer_notification_email,
+        await enqueue_email(
+            "send_referrer_notification_email",
             referrer["email"],
             referrer["name"],
             user_data.name
@@ -5514,10 +7457,12 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
                     "referral_milestone_date": datetime.now(timezone.utc).isoformat()
                 }}
             )
+            await invalidate_user_principal(referrer["user_id"], reason="referral milestone")
+            await dashboard_stats.mark_stale("users")
             
             # Send milestone reward email
-            background_tasks.add_task(
-                EmailService.send_referral_milestone_email,
+            await enqueue_email(
+                "send_referral_milestone_email",
                 referrer["email"],
                 referrer["name"],
                 annual_pass_code,
@@ -5526,8 +7471,8 @@ async def register(user_data: UserCreate, background_tasks: BackgroundTasks):
             logger.info(f"Referral milestone reached! User {referrer['email']} awarded annual pass: {annual_pass_code}")
     
     # Send verification email in background
-    background_tasks.add_task(
-        EmailService.send_verification_email,
+    await enqueue_email(
+        "send_verification_email",
         user_data.email,
         user_data.name,
         verification_token
@@ -5576,11 +7521,12 @@ async def verify_email(data: VerifyEmailRequest):
             "$unset": {"verification_token": "", "verification_token_expires": ""}
         }
     )
+    await invalidate_user_principal(user["user_id"], reason="email verified")
     
     return {"success": True, "message": "Email verified successfully! You can now log in."}
 
 @api_router.post("/auth/resend-verification")
-async def resend_verification(request: ForgotPasswordRequest, background_tasks: BackgroundTasks):
+async def resend_verification(request: ForgotPasswordRequest):
     """Resend verification email"""
     user = await db.users.find_one({"email": request.email}, {"_id": 0})
     
@@ -5603,10 +7549,11 @@ async def resend_verification(request: ForgotPasswordRequest, background_tasks:
             }
         }
     )
+    await invalidate_user_principal(user["user_id"], reason="verification resent")
     
     # Send verification email
-    background_tasks.add_task(
-        EmailService.send_verification_email,
+    await enqueue_email(
+        "send_verification_email",
         user["email"],
         user["name"],
         verification_token
@@ -5615,7 +7562,7 @@ async def resend_verification(request: ForgotPasswordRequest, background_tasks:
     return {"success": True, "message": "Verification email sent. Please check your inbox."}
 
 @api_router.post("/auth/forgot-password")
-async def forgot_password(request: ForgotPasswordRequest, background_tasks: BackgroundTasks):
+async def forgot_password(request: ForgotPasswordRequest):
     """Send password reset email"""
     user = await db.users.find_one({"email": request.email}, {"_id": 0})
     
@@ -5637,8 +7584,8 @@ async def forgot_password(request: ForgotPasswordRequest, background_tasks: Back
     })
     
     # Send reset email
-    background_tasks.add_task(
-        EmailService.send_password_reset_email,
+    await enqueue_email(
+        "send_password_reset_email",
         user["email"],
         user["name"],
         reset_token
@@ -5670,7 +7617,7 @@ async def reset_password(request: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
     
     # Update password
-    hashed_pw = hash_password(request.new_password)
+    hashed_pw = await hash_password(request.new_password)
     await db.users.update_one(
         {"user_id": reset_doc["user_id"]},
         {"$set": {"password": hashed_pw}}
@@ -5681,14 +7628,16 @@ async def reset_password(request: ResetPasswordRequest):
     
     # Invalidate all sessions
     await db.user_sessions.delete_many({"user_id": reset_doc["user_id"]})
+    await invalidate_user_principal(reset_doc["user_id"], reason="password reset")
     
     return {"success": True, "message": "Password has been reset successfully. Please log in with your new password."}
 
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin, response: Response):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await verify_password(credentials.password, user.get("password", "")):
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    await upgrade_password_hash(user, credentials.password)
     
     # Check if email is verified (skip for legacy users without the field or OAuth users)
     # Users created before email verification was implemented are considered verified
@@ -5706,6 +7655,7 @@ async def login(credentials: UserLogin, response: Response):
             {"user_id": user["user_id"]},
             {"$set": {"referral_code": user_referral_code, "referral_count": 0}}
         )
+        await invalidate_user_principal(user["user_id"], reason="referral code")
         user["referral_code"] = user_referral_code
         user["referral_count"] = 0
     
@@ -5788,9 +7738,11 @@ async def get_session(request: Request):
             "pass_expires_at": None,
             "referral_code": user_referral_code,
             "referral_count": 0,
+            "language": preferred_language(request),
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.users.insert_one(user_doc)
+        await dashboard_stats.record("users", user_doc)
         user = user_doc
     else:
         user_id = user["user_id"]
@@ -5801,6 +7753,7 @@ async def get_session(request: Request):
                 {"user_id": user_id},
                 {"$set": {"referral_code": user_referral_code, "referral_count": 0}}
             )
+            await invalidate_user_principal(user_id, reason="referral code")
             user["referral_code"] = user_referral_code
             user["referral_count"] = 0
         if oauth_data.get("picture") and oauth_data["picture"] != user.get("picture"):
@@ -5808,6 +7761,7 @@ async def get_session(request: Request):
                 {"user_id": user_id},
                 {"$set": {"picture": oauth_data["picture"]}}
             )
+            await invalidate_user_principal(user_id, reason="profile picture")
             user["picture"] = oauth_data["picture"]
     
     session_token = oauth_data.get("session_token", f"sess_{uuid.uuid4().hex}")
@@ -5818,6 +7772,7 @@ async def get_session(request: Request):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.user_sessions.delete_many({"user_id": user["user_id"]})
+    await invalidate_user_principal(user["user_id"], reason="sessions replaced")
     await db.user_sessions.insert_one(session_doc)
     
     return {
@@ -5847,6 +7802,7 @@ async def get_me(request: Request):
             {"user_id": user["user_id"]},
             {"$set": {"referral_code": user_referral_code, "referral_count": 0}}
         )
+        await invalidate_user_principal(user["user_id"], reason="referral code")
         user["referral_code"] = user_referral_code
         user["referral_count"] = 0
     
@@ -5881,6 +7837,10 @@ async def logout(request: Request, response: Response):
     session_token = request.cookies.get("session_token")
     if session_token:
         await db.user_sessions.delete_one({"session_token": session_token})
+        await principal_cache.invalidate_credential(session_token, reason="logout")
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        await principal_cache.invalidate_credential(auth_header[7:], reason="logout")
     
     response.delete_cookie(key="session_token", path="/")
     return {"message": "Logged out successfully"}
@@ -5927,6 +7887,7 @@ async def update_user_profile(request: Request, profile: UserProfile):
             {"user_id": user["user_id"]},
             {"$set": update_data}
         )
+        await invalidate_user_principal(user["user_id"], reason="profile update")
     
     return {"success": True, "message": "Profile updated successfully"}
 
@@ -5992,7 +7953,7 @@ async def precache_hotel_searches(country_code: str, country_info: Dict):
         cache_key = f"{city['id']}_{check_in}_{check_out}_2_0_1"
         
         # Skip if already cached
-        if hotel_search_cache.get(cache_key) is not None:
+        if await hotel_search_cache.acontains(cache_key):
             logger.info(f"⚡ PRE-CACHE SKIP: {city['name']} already cached")
             continue
         
@@ -6022,7 +7983,7 @@ async def precache_hotel_searches(country_code: str, country_info: Dict):
             }
             
             # Store in hotel search cache
-            hotel_search_cache.set(cache_key, result)
+            await hotel_search_cache.aset(cache_key, result)
             cached_count += 1
             logger.info(f"🔥 PRE-CACHED: {city['name']} ({len(hotels)} hotels) for {country_code}")
             
@@ -6048,6 +8009,41 @@ TOP_GLOBAL_DESTINATIONS = [
     {"name": "Madrid", "id": "14907"},
 ]
 
+async def scheduled_static_catalog_sync(hotel_ids: Optional[List[str]] = None):
+    """
+    Scheduled job to build and keep the local static hotel catalogue fresh.
+    Refreshes the oldest entries and adds static DB hotels that are not catalogued yet
+    (or fetches the given hotel IDs) from GetStaticHotelsAndRooms; unchanged content only
+    gets its last_synced timestamp bumped.
+    """
+    logger.info("🏨 STATIC CATALOGUE SYNC: Starting...")
+    started_at = datetime.now(timezone.utc)
+    
+    try:
+        if hotel_ids is None:
+            hotel_ids = await static_hotel_catalog.sync_candidates(STATIC_CATALOG_SYNC_LIMIT, STATIC_CATALOG_SEED_LIMIT)
+        
+        fetched = 0
+        changed = 0
+        chunk_size = STATIC_ENRICHMENT_BATCH_SIZE * STATIC_ENRICHMENT_CONCURRENCY
+        for i in range(0, len(hotel_ids), chunk_size):
+            hotels_data = await sunhotels_client.fetch_static_hotels(hotel_ids[i:i + chunk_size])
+            fetched += len(hotels_data)
+            changed += await static_hotel_catalog.store(hotels_data)
+        if changed:
+            hotel_geo_index.request_refresh()
+        
+        static_hotel_catalog.last_sync = {
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "requested": len(hotel_ids),
+            "fetched": fetched,
+            "changed": changed
+        }
+        logger.info(f"🏨 STATIC CATALOGUE SYNC: {fetched}/{len(hotel_ids)} hotels refreshed, {changed} changed")
+    except Exception as e:
+        logger.error(f"Static catalogue sync error: {str(e)}")
+
 async def scheduled_cache_warming():
     """
     Scheduled job to keep popular hotel searches pre-cached.
@@ -6080,7 +8076,7 @@ async def scheduled_cache_warming():
                 cache_key = f"{city['id']}_{check_in}_{check_out}_2_0_1"
                 
                 # Skip if already cached and not expired
-                if hotel_search_cache.get(cache_key) is not None:
+                if await hotel_search_cache.acontains(cache_key):
                     continue
                 
                 try:
@@ -6106,7 +8102,7 @@ async def scheduled_cache_warming():
                         "warmed_at": datetime.now().isoformat()
                     }
                     
-                    hotel_search_cache.set(cache_key, result)
+                    await hotel_search_cache.aset(cache_key, result)
                     cached_count += 1
                     
                     # Rate limiting - small delay between API calls
@@ -6122,7 +8118,7 @@ async def scheduled_cache_warming():
         logger.error(f"Scheduled cache warming error: {e}")
 
 @api_router.get("/warmup/geo")
-async def geo_warmup(request: Request, background_tasks: BackgroundTasks):
+async def geo_warmup(request: Request):
     """
     Pre-cache destinations and search results based on visitor's country.
     Called on page load to warm up cache while showing welcome popup.
@@ -6141,8 +8137,8 @@ async def geo_warmup(request: Request, background_tasks: BackgroundTasks):
     # Get country destination info
     country_info = COUNTRY_DESTINATIONS.get(country_code, COUNTRY_DESTINATIONS["NL"])
     
-    # Always trigger hotel search pre-caching in background (fast, non-blocking)
-    background_tasks.add_task(precache_hotel_searches, country_code, country_info)
+    # Always trigger hotel search pre-caching in background (one queued job per country)
+    await job_queue.enqueue("warmup.precache", {"country_code": country_code}, dedupe_key=f"precache:{country_code}")
     
     # Check if destination search already cached
     cache_key = f"presearch_{country_code}"
@@ -6439,20 +8435,180 @@ async def get_hotel_themes():
 # ==================== HOTEL ROUTES ====================
 
 @api_router.post("/hotels/search")
-async def search_hotels(params: HotelSearchParams, background_tasks: BackgroundTasks):
+async def search_hotels(params: HotelSearchParams, request: Request):
     """Search for hotels using destination ID - with caching for repeated searches"""
     
     # Create cache key from search params
     cache_key = f"{params.destination_id}_{params.check_in}_{params.check_out}_{params.adults}_{params.children}_{params.rooms}"
     
-    # Check cache first
-    cached_result = hotel_search_cache.get(cache_key)
-    if cached_result is not None:
-        logger.info(f"⚡ HOTEL CACHE HIT: {cache_key}")
-        return cached_result
+    # Admins only: anyone else could use it to bypass the cache and spend supplier quota
+    if params.debug and await verify_admin(request):
+        # Fresh search with a per-stage latency breakdown (not cached)
+        timings: Dict = {}
+        result = await _run_hotel_search(params, cache_key, timings)
+        return FastJSONResponse({**apply_search_view(result, params), "timings": timings})
+    
+    # Cached result, or one shared upstream search for all concurrent identical requests
+    result = await hotel_search_cache.get_or_load(
+        cache_key,
+        lambda: _run_hotel_search(params, cache_key)
+    )
+    return FastJSONResponse(apply_search_view(result, params))
+
+# Slim hotel payload for result list pages (fields=["card"])
+SEARCH_CARD_FIELDS = (
+    "hotel_id", "name", "star_rating", "city", "country", "latitude", "longitude", "image_url",
+    "review_score", "review_count", "min_price", "currency", "themes", "is_last_minute", "price_comparison"
+)
+SEARCH_CARD_AMENITIES = 5
+
+SEARCH_SORTS = {
+    "price_asc": (lambda h: h.get("min_price") or float("inf"), False),
+    "price_desc": (lambda h: h.get("min_price") or 0, True),
+    "stars_desc": (lambda h: h.get("star_rating") or 0, True),
+    "stars_asc": (lambda h: h.get("star_rating") or 0, False),
+    "rating_desc": (lambda h: h.get("review_score") or 0, True),
+    "savings_desc": (lambda h: (h.get("price_comparison") or {}).get("savings_percent", 0), True),
+}
+
+def hotel_board_types(hotel: Dict) -> set:
+    return {room.get("board_type") for room in hotel.get("rooms") or [] if room.get("board_type")}
+
+def search_result_facets(hotels: List[Dict]) -> Dict:
+    """Counts per star rating, board type, theme and amenity plus price range buckets"""
+    stars: Dict[str, int] = {}
+    board_types: Dict[str, int] = {}
+    themes: Dict[str, int] = {}
+    amenities: Dict[str, int] = {}
+    prices = []
+    for hotel in hotels:
+        star_key = str(int(round(float(hotel.get("star_rating") or 0))))
+        stars[star_key] = stars.get(star_key, 0) + 1
+        for board_type in hotel_board_types(hotel):
+            board_types[board_type] = board_types.get(board_type, 0) + 1
+        for theme in set(hotel.get("themes") or []):
+            if theme:
+                themes[theme] = themes.get(theme, 0) + 1
+        for amenity in set(hotel.get("amenities") or []):
+            if amenity:
+                amenities[amenity] = amenities.get(amenity, 0) + 1
+        if hotel.get("min_price"):
+            prices.append(hotel["min_price"])
+    
+    price = {"min": None, "max": None, "buckets": []}
+    if prices:
+        low, high = min(prices), max(prices)
+        price["min"], price["max"] = round(low, 2), round(high, 2)
+        step = max(10, math.ceil((high - low) / 6 / 10) * 10)
+        start = math.floor(low / 10) * 10
+        counts: Dict[int, int] = {}
+        for value in prices:
+            bucket = int((value - start) // step)
+            counts[bucket] = counts.get(bucket, 0) + 1
+        price["buckets"] = [
+            {"from": start + bucket * step, "to": start + (bucket + 1) * step, "count": counts[bucket]}
+            for bucket in sorted(counts)
+        ]
+    
+    top_amenities = sorted(amenities.items(), key=lambda item: -item[1])[:30]
+    return {
+        "stars": dict(sorted(stars.items(), reverse=True)),
+        "board_types": dict(sorted(board_types.items(), key=lambda item: -item[1])),
+        "themes": dict(sorted(themes.items(), key=lambda item: -item[1])),
+        "amenities": dict(top_amenities),
+        "price": price
+    }
+
+def search_view_requested(params: HotelSearchParams) -> bool:
+    return any(value is not None for value in (
+        params.stars, params.min_price, params.max_price, params.board_types, params.themes, params.amenities,
+        params.max_distance_km, params.sort_by, params.page, params.fields
+    ))
+
+def project_search_hotel(hotel: Dict, fields: List[str], distance: Optional[float]) -> Dict:
+    if fields == ["card"]:
+        projected = {field: hotel.get(field) for field in SEARCH_CARD_FIELDS}
+        projected["amenities"] = (hotel.get("amenities") or [])[:SEARCH_CARD_AMENITIES]
+        projected["board_types"] = sorted(hotel_board_types(hotel))
+        projected["rooms_available"] = len(hotel.get("rooms") or [])
+    elif fields:
+        projected = {field: hotel.get(field) for field in fields}
+    else:
+        projected = dict(hotel)
+    if distance is not None:
+        projected["distance_km"] = round(distance, 2)
+    return projected
+
+def apply_search_view(result: Dict, params: HotelSearchParams) -> Dict:
+    """
+    Filter, sort, paginate and project a (cached) /hotels/search result. Without any view
+    parameters the result is returned unchanged apart from the precomputed facets.
+    """
+    if "facets" not in result:
+        # Results cached before facets were added
+        result = {**result, "facets": search_result_facets(result.get("hotels") or [])}
+    if not search_view_requested(params):
+        return result
+    
+    stars = set(params.stars or [])
+    board_types = {b.lower() for b in params.board_types or []}
+    themes = {t.lower() for t in params.themes or []}
+    amenities = {a.lower() for a in params.amenities or []}
+    has_reference = params.near_latitude is not None and params.near_longitude is not None
     
+    matches = []  # (hotel, distance_km)
+    for hotel in result.get("hotels") or []:
+        price = hotel.get("min_price") or 0
+        if params.min_price is not None and price < params.min_price:
+            continue
+        if params.max_price is not None and price > params.max_price:
+            continue
+        if stars and int(round(float(hotel.get("star_rating") or 0))) not in stars:
+            continue
+        if board_types and not board_types & {b.lower() for b in hotel_board_types(hotel)}:
+            continue
+        if themes and not themes & {t.lower() for t in hotel.get("themes") or [] if t}:
+            continue
+        if amenities and not amenities <= {a.lower() for a in hotel.get("amenities") or [] if a}:
+            continue
+        distance = None
+        if has_reference and (hotel.get("latitude") or hotel.get("longitude")):
+            distance = haversine_km(params.near_latitude, params.near_longitude,
+                                    float(hotel["latitude"]), float(hotel["longitude"]))
+        if params.max_distance_km is not None and (distance is None or distance > params.max_distance_km):
+            continue
+        matches.append((hotel, distance))
+    
+    if params.sort_by == "distance":
+        matches.sort(key=lambda match: match[1] if match[1] is not None else float("inf"))
+    elif params.sort_by in SEARCH_SORTS:
+        key, reverse = SEARCH_SORTS[params.sort_by]
+        matches.sort(key=lambda match: key(match[0]), reverse=reverse)
+    
+    total = len(matches)
+    page_size = max(1, min(params.page_size, 200))
+    page = None
+    if params.page is not None:
+        page = max(1, params.page)
+        matches = matches[(page - 1) * page_size:page * page_size]
+    
+    view = {key: value for key, value in result.items() if key != "hotels"}
+    view["hotels"] = [project_search_hotel(hotel, params.fields, distance) for hotel, distance in matches]
+    view["total"] = total
+    view["total_unfiltered"] = len(result.get("hotels") or [])
+    if page is not None:
+        view["page"] = page
+        view["page_size"] = page_size
+        view["pages"] = math.ceil(total / page_size) if total else 0
+    return view
+
+async def _run_hotel_search(params: HotelSearchParams, cache_key: str,
+                            timings: Optional[Dict] = None) -> Dict:
+    """Run the upstream hotel search and build the /hotels/search response"""
+    search_start = time.perf_counter()
     # Perform search
-    hotels = await sunhotels_client.search_hotels(params)
+    hotels = await sunhotels_client.search_hotels(params, timings)
+    comparison_start = time.perf_counter()
     
     # Get comparison settings
     comparison_settings = await PriceComparisonService.get_comparison_settings()
@@ -6539,11 +8695,16 @@ async def search_hotels(params: HotelSearchParams, background_tasks: BackgroundT
     
     # Send comparison email in background if enabled
     if comparison_enabled and comparison_settings.get("email_frequency") == "search" and hotels_with_savings > 0:
-        background_tasks.add_task(PriceComparisonService.send_comparison_email, comparison_data)
+        await job_queue.enqueue("price_comparison.email", {"comparison": comparison_data})
+    
+    facets_start = time.perf_counter()
+    facets = search_result_facets(hotels)
+    record_stage_timing(timings, "facets", facets_start)
     
     result = {
         "hotels": hotels, 
         "total": len(hotels), 
+        "facets": facets,
         "is_last_minute": params.b2c == 1,
         "comparison_settings": {
             "enabled": comparison_enabled,
@@ -6553,13 +8714,14 @@ async def search_hotels(params: HotelSearchParams, background_tasks: BackgroundT
         "comparison_data": comparison_data if hotels_with_savings > 0 else None
     }
     
-    # Cache the result for subsequent identical searches
-    hotel_search_cache.set(cache_key, result)
+    record_stage_timing(timings, "price_comparison", comparison_start)
+    record_stage_timing(timings, "total", search_start)
+    
     logger.info(f"💾 HOTEL CACHE SET: {cache_key} ({len(hotels)} hotels)")
     
     return result
 
-@api_router.get("/hotels/last-minute")
+@api_router.get("/hotels/last-minute", response_class=FastJSONResponse)
 async def get_last_minute_deals():
     """Get stored last minute hotel deals from database (admin-curated b2c=1 results)"""
     # Get stored last minute offers from database
@@ -6587,201 +8749,445 @@ async def get_last_minute_deals():
 
 # ==================== ADMIN LAST MINUTE (B2C=1) ISOLATED API ====================
 
+# WORLDWIDE destinations harvested for b2c=1 offers - not limited to Europe
+# Includes major cities across all continents
+LASTMINUTE_DESTINATIONS = [
+    # Europe
+    {"id": "10188", "name": "Amsterdam"},
+    {"id": "10049", "name": "Barcelona"},
+    {"id": "10025", "name": "Vienna"},
+    {"id": "10264", "name": "Paris"},
+    {"id": "10168", "name": "London"},
+    {"id": "10289", "name": "Rome"},
+    {"id": "10016", "name": "Berlin"},
+    {"id": "10207", "name": "Madrid"},
+    {"id": "10195", "name": "Prague"},
+    {"id": "10201", "name": "Lisbon"},
+    {"id": "10041", "name": "Brussels"},
+    {"id": "10063", "name": "Dublin"},
+    {"id": "10232", "name": "Milan"},
+    {"id": "10055", "name": "Copenhagen"},
+    {"id": "10313", "name": "Zurich"},
+    {"id": "10239", "name": "Munich"},
+    {"id": "10178", "name": "Stockholm"},
+    {"id": "10020", "name": "Athens"},
+    {"id": "10042", "name": "Budapest"},
+    {"id": "10308", "name": "Warsaw"},
+    {"id": "10003", "name": "Algarve"},
+    {"id": "10211", "name": "Mallorca"},
+    {"id": "10052", "name": "Costa Brava"},
+    {"id": "10179", "name": "Tenerife"},
+    {"id": "10002", "name": "Gran Canaria"},
+    {"id": "10128", "name": "Istanbul"},
+    {"id": "10067", "name": "Edinburgh"},
+    {"id": "10247", "name": "Nice"},
+    {"id": "10083", "name": "Florence"},
+    {"id": "10242", "name": "Naples"},
+    {"id": "10022", "name": "Venice"},
+    {"id": "10101", "name": "Hamburg"},
+    {"id": "10096", "name": "Geneva"},
+    {"id": "10255", "name": "Oslo"},
+    {"id": "10105", "name": "Helsinki"},
+    # Asia
+    {"id": "10065", "name": "Dubai"},
+    {"id": "10099", "name": "Bangkok"},
+    {"id": "10166", "name": "Singapore"},
+    {"id": "10112", "name": "Hong Kong"},
+    {"id": "10183", "name": "Tokyo"},
+    {"id": "10156", "name": "Seoul"},
+    {"id": "10143", "name": "Kuala Lumpur"},
+    {"id": "10013", "name": "Bali"},
+    {"id": "10267", "name": "Phuket"},
+    {"id": "10165", "name": "Shanghai"},
+    {"id": "10031", "name": "Beijing"},
+    {"id": "10244", "name": "New Delhi"},
+    {"id": "10241", "name": "Mumbai"},
+    {"id": "10089", "name": "Goa"},
+    # Americas
+    {"id": "10245", "name": "New York"},
+    {"id": "10162", "name": "Miami"},
+    {"id": "10148", "name": "Las Vegas"},
+    {"id": "10152", "name": "Los Angeles"},
+    {"id": "10150", "name": "San Francisco"},
+    {"id": "10050", "name": "Cancun"},
+    {"id": "10160", "name": "Mexico City"},
+    {"id": "10044", "name": "Buenos Aires"},
+    {"id": "10285", "name": "Rio de Janeiro"},
+    {"id": "10291", "name": "Sao Paulo"},
+    # Africa & Middle East
+    {"id": "10047", "name": "Cape Town"},
+    {"id": "10132", "name": "Johannesburg"},
+    {"id": "10046", "name": "Cairo"},
+    {"id": "10155", "name": "Marrakech"},
+    {"id": "10182", "name": "Tel Aviv"},
+    # Oceania
+    {"id": "10180", "name": "Sydney"},
+    {"id": "10159", "name": "Melbourne"},
+    {"id": "10009", "name": "Auckland"},
+]
+
+# Destinations fetched at once, SearchV2 requests started per second and retries per destination
+LASTMINUTE_HARVEST_CONCURRENCY = int(os.environ.get('LASTMINUTE_HARVEST_CONCURRENCY', '4'))
+LASTMINUTE_HARVEST_RATE = float(os.environ.get('LASTMINUTE_HARVEST_RATE', '2'))
+LASTMINUTE_HARVEST_RETRIES = int(os.environ.get('LASTMINUTE_HARVEST_RETRIES', '2'))
+
+# Job queue dedupe key: one harvest queued or running at a time across all workers
+LASTMINUTE_HARVEST_DEDUPE_KEY = "lastminute.harvest"
+
+
+def lastminute_search_params(username: str, password: str, destination_id: str, check_in: str, check_out: str) -> Dict:
+    """SearchV2 parameters for a b2c=1 (last minute only) destination search"""
+    return {
+        "userName": username,
+        "password": password,
+        "language": "en",
+        "currencies": "EUR",
+        "checkInDate": check_in,
+        "checkOutDate": check_out,
+        "numberOfRooms": 1,
+        "destination": "",
+        "destinationID": destination_id,
+        "resortIDs": "",
+        "accommodationTypes": "",
+        "numberOfAdults": 2,
+        "numberOfChildren": 0,
+        "childrenAges": "",
+        "infant": 0,
+        "sortBy": "Price",
+        "sortOrder": "Ascending",
+        "exactDestinationMatch": "false",
+        "blockSuperdeal": "false",
+        "showCoordinates": "true",
+        "showReviews": "false",
+        "referencePointLatitude": "",
+        "referencePointLongitude": "",
+        "maxDistanceFromReferencePoint": "",
+        "minStarRating": "",
+        "maxStarRating": "",
+        "featureIds": "",
+        "minPrice": "",
+        "maxPrice": "",
+        "themeIds": "",
+        "excludeSharedRooms": "false",
+        "excludeSharedFacilities": "false",
+        "prioritizedHotelIds": "",
+        "totalRoomsInBatch": "",
+        "paymentMethodId": "",
+        "customerCountry": "NL",
+        "b2c": "1",  # CRITICAL: Last minute only - uses SearchV2 for better results
+        "showRoomTypeName": "true"
+    }
+
+
+def lastminute_offer_document(hotel: Dict, dest: Dict, check_in: str, check_out: str, job_id: str, now: str) -> Dict:
+    """Fields stored in db.last_minute_offers for a harvested hotel"""
+    return {
+        "hotel_id": str(hotel.get("hotel_id")),
+        "name": hotel.get("name"),
+        "city": hotel.get("city"),
+        "country": hotel.get("country"),
+        "image_url": hotel.get("image_url"),
+        "min_price": hotel.get("min_price"),
+        "star_rating": hotel.get("star_rating"),
+        "destination_id": hotel.get("destination_id"),
+        "resort_id": hotel.get("resort_id"),
+        "fetched_destination": dest["name"],
+        "fetched_destination_id": dest["id"],
+        "last_minute_check_in": check_in,
+        "last_minute_check_out": check_out,
+        "fetched_at": now,
+        "saved_by": "harvest",
+        "harvest_job_id": job_id
+    }
+
+
+async def fetch_lastminute_destination(dest: Dict, check_in: str, check_out: str, limiter: RateLimiter) -> List[Dict]:
+    """Fetch and enrich the b2c=1 offers of one destination (retried with backoff)"""
+    attempt = 0
+    while True:
+        await limiter.wait()
+        try:
+            username, password = await sunhotels_client.get_credentials()
+            response = await sunhotels_client._get(
+                "SearchV2", lastminute_search_params(username, password, dest["id"], check_in, check_out)
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"SearchV2 returned HTTP {response.status_code}")
+            hotels = sunhotels_client._parse_search_response(response.text, is_last_minute=True)
+            break
+        except Exception:
+            if attempt >= LASTMINUTE_HARVEST_RETRIES:
+                raise
+            attempt += 1
+            await asyncio.sleep(2 ** attempt)
+
+    # Enrich with static data to get hotel names
+    if hotels:
+        hotels = await sunhotels_client._enrich_hotels_with_static_data(hotels)
+    # Filter to only real hotels
+    return [h for h in hotels if not str(h.get("hotel_id", "")).startswith("demo_")]
+
+
+async def store_lastminute_offers(hotels: List[Dict], dest: Dict, check_in: str, check_out: str, job_id: str) -> int:
+    """Upsert one destination's offers; visibility toggled by the admin is kept"""
+    from pymongo import UpdateOne
+    if not hotels:
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    operations = [
+        UpdateOne(
+            {"hotel_id": str(hotel.get("hotel_id"))},
+            {"$set": lastminute_offer_document(hotel, dest, check_in, check_out, job_id, now),
+             "$setOnInsert": {"is_active": True}},
+            upsert=True
+        )
+        for hotel in hotels
+    ]
+    await db.last_minute_offers.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+async def harvest_lastminute_destination(job_id: str, dest: Dict, check_in: str, check_out: str,
+                                         semaphore: asyncio.Semaphore, limiter: RateLimiter):
+    """Fetch, persist and record the outcome of one destination of a harvest job"""
+    async with semaphore:
+        field = f"destinations.{dest['id']}"
+        try:
+            hotels = await fetch_lastminute_destination(dest, check_in, check_out, limiter)
+            saved = await store_lastminute_offers(hotels, dest, check_in, check_out, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to fetch b2c=1 from {dest['name']}: {e}")
+            await db.last_minute_harvest_jobs.update_one({"job_id": job_id}, {"$set": {
+                f"{field}.status": "failed",
+                f"{field}.error": str(e)[:500],
+                f"{field}.finished_at": datetime.now(timezone.utc).isoformat()
+            }})
+            return
+        cities = {}
+        for hotel in hotels:
+            city = hotel.get("city") or "Unknown"
+            cities[city] = cities.get(city, 0) + 1
+        await db.last_minute_harvest_jobs.update_one({"job_id": job_id}, {"$set": {
+            f"{field}.status": "done",
+            f"{field}.hotels": saved,
+            f"{field}.cities": cities,
+            f"{field}.error": None,
+            f"{field}.finished_at": datetime.now(timezone.utc).isoformat()
+        }})
+        logger.info(f"🔥 Last minute harvest {job_id[:8]}: {dest['name']} -> {saved} offers")
+
+
+def summarize_lastminute_job(job: Dict) -> Dict:
+    """Progress counters, offer totals and cities of a harvest job document"""
+    destinations = job.get("destinations", {})
+    counts = {"pending": 0, "done": 0, "failed": 0}
+    cities = {}
+    hotels = 0
+    for entry in destinations.values():
+        counts[entry.get("status", "pending")] = counts.get(entry.get("status", "pending"), 0) + 1
+        hotels += entry.get("hotels", 0) or 0
+        for city, count in (entry.get("cities") or {}).items():
+            cities[city] = cities.get(city, 0) + count
+    total = len(destinations)
+    return {
+        "job_id": job["job_id"],
+        "status": job.get("status"),
+        "check_in": job.get("check_in"),
+        "check_out": job.get("check_out"),
+        "total_destinations": total,
+        "completed_destinations": counts["done"],
+        "failed_destinations": counts["failed"],
+        "pending_destinations": counts["pending"],
+        "progress": round(100 * (counts["done"] + counts["failed"]) / total, 1) if total else 100.0,
+        "offers_saved": hotels,
+        "cities": cities,
+        "failed": [
+            {"id": dest_id, "name": entry.get("name"), "error": entry.get("error")}
+            for dest_id, entry in destinations.items() if entry.get("status") == "failed"
+        ],
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "runs": job.get("runs", 0),
+        "running": job.get("status") in ("queued", "running")
+    }
+
+
+async def run_lastminute_harvest(job_id: str):
+    """
+    Harvest every destination of a job that is not done yet (pending, failed or
+    interrupted), so the same job can be resumed after a failure or a restart.
+    """
+    try:
+        job = await db.last_minute_harvest_jobs.find_one({"job_id": job_id}, {"_id": 0})
+        if not job:
+            return
+        todo = [
+            {"id": dest_id, "name": entry.get("name", dest_id)}
+            for dest_id, entry in job.get("destinations", {}).items()
+            if entry.get("status") != "done"
+        ]
+        await db.last_minute_harvest_jobs.update_one({"job_id": job_id}, {
+            "$set": {"status": "running", "started_at": datetime.now(timezone.utc).isoformat(), "finished_at": None},
+            "$inc": {"runs": 1}
+        })
+        logger.info(f"🔥 Last minute harvest {job_id[:8]}: {len(todo)} destinations "
+                    f"({job['check_in']} to {job['check_out']})")
+
+        semaphore = asyncio.Semaphore(LASTMINUTE_HARVEST_CONCURRENCY)
+        limiter = RateLimiter(LASTMINUTE_HARVEST_RATE)
+        await asyncio.gather(*[
+            harvest_lastminute_destination(job_id, dest, job["check_in"], job["check_out"], semaphore, limiter)
+            for dest in todo
+        ])
+
+        job = await db.last_minute_harvest_jobs.find_one({"job_id": job_id}, {"_id": 0})
+        summary = summarize_lastminute_job(job)
+        status = "completed" if summary["failed_destinations"] == 0 else "partial"
+        if status == "completed":
+            # Full harvest: offers from earlier harvests are replaced (admin-curated saves are kept)
+            removed = await db.last_minute_offers.delete_many({"harvest_job_id": {"$exists": True, "$ne": job_id}})
+            if removed.deleted_count:
+                logger.info(f"🗑️ Removed {removed.deleted_count} stale last minute offers")
+        await db.last_minute_harvest_jobs.update_one({"job_id": job_id}, {"$set": {
+            "status": status, "finished_at": datetime.now(timezone.utc).isoformat()
+        }})
+        logger.info(f"✅ Last minute harvest {job_id[:8]} {status}: {summary['offers_saved']} offers, "
+                    f"{summary['failed_destinations']} destinations failed")
+    except asyncio.CancelledError:
+        # Left "running"; the job queue hands it to the next worker, which resumes it
+        raise
+    except Exception as e:
+        logger.error(f"Last minute harvest {job_id[:8]} failed: {e}")
+        await db.last_minute_harvest_jobs.update_one({"job_id": job_id}, {"$set": {
+            "status": "failed", "error": str(e)[:500], "finished_at": datetime.now(timezone.utc).isoformat()
+        }})
+
+
+async def run_lastminute_harvest_job(payload: Dict):
+    await run_lastminute_harvest(payload["job_id"])
+
+
+async def enqueue_lastminute_harvest(job_id: str) -> Optional[str]:
+    """
+    Queue a harvest job on the durable job queue. Only one harvest is queued or
+    running at a time across all workers: returns the job_id of the harvest that
+    holds that slot, which is job_id itself unless another one is in progress.
+    """
+    queue_job_id = await job_queue.enqueue("lastminute.harvest", {"job_id": job_id},
+                                           dedupe_key=LASTMINUTE_HARVEST_DEDUPE_KEY)
+    if not queue_job_id:
+        return None
+    queued = await job_queue.collection.find_one({"job_id": queue_job_id}, {"payload": 1})
+    return queued["payload"].get("job_id") if queued else None
+
+
+async def resume_interrupted_lastminute_harvests():
+    """
+    Re-queue harvest jobs that were queued or running when a previous process
+    stopped. Safe to run in every worker: the dedupe key lets only one enqueue win.
+    """
+    async for job in db.last_minute_harvest_jobs.find(
+        {"status": {"$in": ["queued", "running"]}}, {"_id": 0, "job_id": 1}
+    ).sort("created_at", 1):
+        holder = await enqueue_lastminute_harvest(job["job_id"])
+        if holder == job["job_id"]:
+            logger.info(f"🔁 Resuming interrupted last minute harvest {job['job_id'][:8]}")
+        # Anything else waits until the harvest holding the slot has finished
+        break
+
+
 @api_router.post("/admin/lastminute/fetch")
 async def admin_fetch_lastminute_offers(request: Request, fetch_data: LastMinuteFetchRequest):
     """
-    Admin endpoint to fetch ALL b2c=1 offers from Sunhotels API.
+    Admin endpoint to harvest ALL b2c=1 offers from Sunhotels API.
     Uses admin-specified dates (from date picker) to fetch offers.
     This is COMPLETELY ISOLATED from b2c=0 searches.
+
+    Starts a background harvest job and returns its job_id immediately; offers are
+    saved to db.last_minute_offers as each destination completes. Poll
+    /admin/lastminute/jobs/{job_id} for progress.
     """
     if not await verify_admin(request):
-        raise HTTPException(status_code=401, detail="Admin access required")
-    
-    # Use dates from the admin's date picker
-    check_in = fetch_data.check_in
-    check_out = fetch_data.check_out
-    
-    logger.info(f"🔍 Admin fetching b2c=1 offers for dates: {check_in} to {check_out}")
-    
-    all_hotels = []
-    
-    # WORLDWIDE destinations - not limited to Europe
-    # Includes major cities across all continents
-    destinations = [
-        # Europe
-        {"id": "10188", "name": "Amsterdam"},
-        {"id": "10049", "name": "Barcelona"},
-        {"id": "10025", "name": "Vienna"},
-        {"id": "10264", "name": "Paris"},
-        {"id": "10168", "name": "London"},
-        {"id": "10289", "name": "Rome"},
-        {"id": "10016", "name": "Berlin"},
-        {"id": "10207", "name": "Madrid"},
-        {"id": "10195", "name": "Prague"},
-        {"id": "10201", "name": "Lisbon"},
-        {"id": "10041", "name": "Brussels"},
-        {"id": "10063", "name": "Dublin"},
-        {"id": "10232", "name": "Milan"},
-        {"id": "10055", "name": "Copenhagen"},
-        {"id": "10313", "name": "Zurich"},
-        {"id": "10239", "name": "Munich"},
-        {"id": "10178", "name": "Stockholm"},
-        {"id": "10020", "name": "Athens"},
-        {"id": "10042", "name": "Budapest"},
-        {"id": "10308", "name": "Warsaw"},
-        {"id": "10003", "name": "Algarve"},
-        {"id": "10211", "name": "Mallorca"},
-        {"id": "10052", "name": "Costa Brava"},
-        {"id": "10179", "name": "Tenerife"},
-        {"id": "10002", "name": "Gran Canaria"},
-        {"id": "10128", "name": "Istanbul"},
-        {"id": "10067", "name": "Edinburgh"},
-        {"id": "10247", "name": "Nice"},
-        {"id": "10083", "name": "Florence"},
-        {"id": "10242", "name": "Naples"},
-        {"id": "10022", "name": "Venice"},
-        {"id": "10101", "name": "Hamburg"},
-        {"id": "10096", "name": "Geneva"},
-        {"id": "10255", "name": "Oslo"},
-        {"id": "10105", "name": "Helsinki"},
-        # Asia
-        {"id": "10065", "name": "Dubai"},
-        {"id": "10099", "name": "Bangkok"},
-        {"id": "10166", "name": "Singapore"},
-        {"id": "10112", "name": "Hong Kong"},
-        {"id": "10183", "name": "Tokyo"},
-        {"id": "10156", "name": "Seoul"},
-        {"id": "10143", "name": "Kuala Lumpur"},
-        {"id": "10013", "name": "Bali"},
-        {"id": "10267", "name": "Phuket"},
-        {"id": "10165", "name": "Shanghai"},
-        {"id": "10031", "name": "Beijing"},
-        {"id": "10244", "name": "New Delhi"},
-        {"id": "10241", "name": "Mumbai"},
-        {"id": "10089", "name": "Goa"},
-        # Americas
-        {"id": "10245", "name": "New York"},
-        {"id": "10162", "name": "Miami"},
-        {"id": "10148", "name": "Las Vegas"},
-        {"id": "10152", "name": "Los Angeles"},
-        {"id": "10150", "name": "San Francisco"},
-        {"id": "10050", "name": "Cancun"},
-        {"id": "10160", "name": "Mexico City"},
-        {"id": "10044", "name": "Buenos Aires"},
-        {"id": "10285", "name": "Rio de Janeiro"},
-        {"id": "10291", "name": "Sao Paulo"},
-        # Africa & Middle East
-        {"id": "10047", "name": "Cape Town"},
-        {"id": "10132", "name": "Johannesburg"},
-        {"id": "10046", "name": "Cairo"},
-        {"id": "10155", "name": "Marrakech"},
-        {"id": "10182", "name": "Tel Aviv"},
-        # Oceania
-        {"id": "10180", "name": "Sydney"},
-        {"id": "10159", "name": "Melbourne"},
-        {"id": "10009", "name": "Auckland"},
-    ]
-    
-    logger.info(f"🔍 Admin fetching ALL b2c=1 offers from {len(destinations)} destinations")
-    
-    for dest in destinations:
-        try:
-            # Build the raw XML request for b2c=1 - isolated API call
-            username, password = await sunhotels_client.get_credentials()
-            
-            url = f"{sunhotels_client.api_url}/SearchV2"
-            params_dict = {
-                "userName": username,
-                "password": password,
-                "language": "en",
-                "currencies": "EUR",
-                "checkInDate": check_in,
-                "checkOutDate": check_out,
-                "numberOfRooms": 1,
-                "destination": "",
-                "destinationID": dest["id"],
-                "resortIDs": "",
-                "accommodationTypes": "",
-                "numberOfAdults": 2,
-                "numberOfChildren": 0,
-                "childrenAges": "",
-                "infant": 0,
-                "sortBy": "Price",
-                "sortOrder": "Ascending",
-                "exactDestinationMatch": "false",
-                "blockSuperdeal": "false",
-                "showCoordinates": "true",
-                "showReviews": "false",
-                "referencePointLatitude": "",
-                "referencePointLongitude": "",
-                "maxDistanceFromReferencePoint": "",
-                "minStarRating": "",
-                "maxStarRating": "",
-                "featureIds": "",
-                "minPrice": "",
-                "maxPrice": "",
-                "themeIds": "",
-                "excludeSharedRooms": "false",
-                "excludeSharedFacilities": "false",
-                "prioritizedHotelIds": "",
-                "totalRoomsInBatch": "",
-                "paymentMethodId": "",
-                "customerCountry": "NL",
-                "b2c": "1",  # CRITICAL: Last minute only - uses SearchV2 for better results
-                "showRoomTypeName": "true"
-            }
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params_dict)
-                
-                if response.status_code == 200:
-                    # Parse the XML response
-                    hotels = sunhotels_client._parse_search_response(response.text, is_last_minute=True)
-                    
-                    # Enrich with static data to get hotel names
-                    if hotels:
-                        hotels = await sunhotels_client._enrich_hotels_with_static_data(hotels, client)
-                    
-                    # Filter to only real hotels and add destination info
-                    for hotel in hotels:
-                        if not str(hotel.get("hotel_id", "")).startswith("demo_"):
-                            hotel["fetched_destination"] = dest["name"]
-                            hotel["fetched_destination_id"] = dest["id"]
-                            all_hotels.append(hotel)
-                            
-        except Exception as e:
-            logger.warning(f"Failed to fetch b2c=1 from {dest['name']}: {e}")
-            continue
-    
-    # Remove duplicates by hotel_id
-    seen_ids = set()
-    unique_hotels = []
-    for hotel in all_hotels:
-        hid = str(hotel.get("hotel_id"))
-        if hid not in seen_ids:
-            seen_ids.add(hid)
-            unique_hotels.append(hotel)
-    
-    # Sort by price
-    unique_hotels.sort(key=lambda x: x.get("min_price", 999999))
-    
-    logger.info(f"✅ Fetched {len(unique_hotels)} unique b2c=1 offers from Sunhotels")
-    
-    # Get unique cities from results
-    cities = {}
-    for hotel in unique_hotels:
-        city = hotel.get("city", "Unknown")
-        if city not in cities:
-            cities[city] = 0
-        cities[city] += 1
-    
+        raise HTTPException(status_code=401, detail="Admin access required")
+
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "status": "queued",
+        "check_in": fetch_data.check_in,
+        "check_out": fetch_data.check_out,
+        "destinations": {
+            dest["id"]: {"name": dest["name"], "status": "pending"} for dest in LASTMINUTE_DESTINATIONS
+        },
+        "runs": 0,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None
+    }
+    await db.last_minute_harvest_jobs.insert_one(job)
+    holder = await enqueue_lastminute_harvest(job["job_id"])
+    if holder != job["job_id"]:
+        await db.last_minute_harvest_jobs.delete_one({"job_id": job["job_id"]})
+        raise HTTPException(status_code=409, detail=f"Harvest job {holder or 'in progress'} is already running")
+
+    logger.info(f"🔍 Admin started b2c=1 harvest {job['job_id'][:8]} for {fetch_data.check_in} to "
+                f"{fetch_data.check_out} ({len(LASTMINUTE_DESTINATIONS)} destinations)")
+
     return {
         "success": True,
-        "hotels": unique_hotels,
-        "total": len(unique_hotels),
-        "cities": cities,
-        "destinations_checked": len(destinations),
-        "message": f"Found {len(unique_hotels)} last minute offers across {len(cities)} cities"
+        "job_id": job["job_id"],
+        "status": "queued",
+        "total_destinations": len(LASTMINUTE_DESTINATIONS),
+        "message": f"Harvesting last minute offers from {len(LASTMINUTE_DESTINATIONS)} destinations"
+    }
+
+@api_router.get("/admin/lastminute/jobs")
+async def admin_list_lastminute_jobs(request: Request, limit: int = 10):
+    """Recent last minute harvest jobs with their progress"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+
+    jobs = await db.last_minute_harvest_jobs.find({}, {"_id": 0}).sort("created_at", -1).to_list(min(limit, 50))
+    return {"jobs": [summarize_lastminute_job(job) for job in jobs]}
+
+@api_router.get("/admin/lastminute/jobs/{job_id}")
+async def admin_get_lastminute_job(request: Request, job_id: str):
+    """Progress of a last minute harvest job"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+
+    job = await db.last_minute_harvest_jobs.find_one({"job_id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Harvest job not found")
+    return summarize_lastminute_job(job)
+
+@api_router.post("/admin/lastminute/jobs/{job_id}/resume")
+async def admin_resume_lastminute_job(request: Request, job_id: str):
+    """Re-run the failed and unfinished destinations of a harvest job"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+
+    job = await db.last_minute_harvest_jobs.find_one({"job_id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Harvest job not found")
+    if job.get("status") == "completed":
+        return {"success": True, "job_id": job_id, "status": "completed", "message": "Nothing to resume"}
+
+    holder = await enqueue_lastminute_harvest(job_id)
+    if holder != job_id:
+        raise HTTPException(status_code=409, detail=f"Harvest job {holder or 'in progress'} is already running")
+    summary = summarize_lastminute_job(job)
+    remaining = summary["pending_destinations"] + summary["failed_destinations"]
+    logger.info(f"🔁 Admin resumed last minute harvest {job_id[:8]} ({remaining} destinations)")
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "running",
+        "remaining_destinations": remaining,
+        "message": f"Resuming {remaining} destinations"
     }
 
 @api_router.post("/admin/lastminute/save")
@@ -6974,11 +9380,21 @@ async def admin_test_lastminute_search(request: Request, destination_id: str = "
         logger.error(f"Test SearchV2 failed: {e}")
         return {"success": False, "error": str(e)}
 
+def parse_children_ages(children_ages: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma-separated children_ages query parameter"""
+    if not children_ages:
+        return None
+    try:
+        return [int(age) for age in children_ages.split(",") if age.strip()]
+    except:
+        return None
+
 @api_router.get("/hotels/{hotel_id}")
-async def get_hotel(hotel_id: str, check_in: str = None, check_out: str = None, adults: int = 2, children: int = 0, children_ages: str = None, b2c: int = 0, destination_id: str = None, resort_id: str = None):
+async def get_hotel(hotel_id: str, check_in: str = None, check_out: str = None, adults: int = 2, children: int = 0, children_ages: str = None, b2c: int = 0, destination_id: str = None, resort_id: str = None, rooms: int = 1, currency: str = "EUR"):
     """Get hotel details from Sunhotels Static API
     b2c=0 for normal availability, b2c=1 for last minute deals
     destination_id and resort_id provide city/area context for room search
+    rooms and currency should match the search the page was opened from
     """
     # Handle demo hotels (from sample/fallback data)
     if hotel_id.startswith("demo_"):
@@ -6998,64 +9414,197 @@ async def get_hotel(hotel_id: str, check_in: str = None, check_out: str = None,
         raise HTTPException(status_code=404, detail="Hotel not found")
     
     # Parse children_ages from comma-separated string to list of ints
-    children_ages_list = None
-    if children_ages:
-        try:
-            children_ages_list = [int(age) for age in children_ages.split(",") if age.strip()]
-        except:
-            children_ages_list = None
+    children_ages_list = parse_children_ages(children_ages)
     
     # If search dates provided, also get room availability
     if check_in and check_out:
         # We need to search for rooms in this hotel
         # Pass destination_id and resort_id for better room search results
-        rooms = await sunhotels_client.get_hotel_rooms(
+        hotel_data["rooms"] = await sunhotels_client.get_hotel_rooms(
             hotel_id, check_in, check_out, adults, children, children_ages_list, b2c,
-            destination_id=destination_id, resort_id=resort_id
+            destination_id=destination_id, resort_id=resort_id, rooms=rooms, currency=currency
         )
-        hotel_data["rooms"] = rooms
         hotel_data["check_in"] = check_in
         hotel_data["check_out"] = check_out
         hotel_data["is_last_minute"] = b2c == 1
     
     return hotel_data
 
+# Per-part time budget (seconds) for the composite hotel page
+HOTEL_PAGE_TIMEOUTS = {
+    "static": float(os.environ.get('HOTEL_PAGE_STATIC_TIMEOUT', '10')),
+    "rooms": float(os.environ.get('HOTEL_PAGE_ROOMS_TIMEOUT', '25')),
+    "room_static": float(os.environ.get('HOTEL_PAGE_ROOM_STATIC_TIMEOUT', '5')),
+    "reviews": float(os.environ.get('HOTEL_PAGE_REVIEWS_TIMEOUT', '3')),
+    "favorite": float(os.environ.get('HOTEL_PAGE_FAVORITE_TIMEOUT', '3')),
+}
+
+async def run_hotel_page_part(name: str, coro, parts: Dict[str, Dict]) -> Any:
+    """Await one part of the hotel page within its time budget; failures yield None and are recorded in parts"""
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout=HOTEL_PAGE_TIMEOUTS[name])
+        parts[name] = {"status": "ok"}
+    except asyncio.TimeoutError:
+        logger.warning(f"Hotel page part '{name}' timed out after {HOTEL_PAGE_TIMEOUTS[name]}s")
+        parts[name] = {"status": "timeout"}
+        result = None
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"Hotel page part '{name}' failed: {str(e)[:100]}")
+        parts[name] = {"status": "error"}
+        result = None
+    parts[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+@api_router.get("/hotels/{hotel_id}/page")
+async def get_hotel_page(hotel_id: str, request: Request, check_in: str = None, check_out: str = None, adults: int = 2, children: int = 0, children_ages: str = None, b2c: int = 0, destination_id: str = None, resort_id: str = None, reviews_limit: int = 10, rooms: int = 1, currency: str = "EUR"):
+    """
+    Everything the hotel page needs in one call: static content, room availability, room static
+    data (images, notes, facilities), reviews and the user's favorite state.
+    The parts run concurrently with their own timeouts; a part that fails or times out is left
+    empty and reported in "parts" so the page renders with what is available.
+    """
+    if hotel_id.startswith("demo_"):
+        hotel = await get_hotel(hotel_id, check_in, check_out, adults, children, children_ages, b2c, destination_id, resort_id, rooms, currency)
+        return {**hotel, "reviews": [], "reviews_count": 0, "is_favorite": False, "parts": {}, "partial": False}
+    
+    parts: Dict[str, Dict] = {}
+    tasks = {
+        "static": run_hotel_page_part("static", sunhotels_client.get_hotel_details(hotel_id), parts),
+        "reviews": run_hotel_page_part("reviews", get_hotel_public_reviews(hotel_id, reviews_limit), parts),
+        "favorite": run_hotel_page_part("favorite", check_favorite(hotel_id, request), parts),
+    }
+    if check_in and check_out:
+        tasks["rooms"] = run_hotel_page_part("rooms", sunhotels_client.get_hotel_rooms(
+            hotel_id, check_in, check_out, adults, children, parse_children_ages(children_ages), b2c,
+            destination_id=destination_id, resort_id=resort_id, enrich=False, rooms=rooms, currency=currency
+        ), parts)
+        tasks["room_static"] = run_hotel_page_part("room_static", sunhotels_client.get_hotel_details_from_static_db(hotel_id), parts)
+    
+    results = dict(zip(tasks.keys(), await asyncio.gather(*tasks.values())))
+    
+    hotel_data = results["static"]
+    if hotel_data is None and parts["static"]["status"] == "ok":
+        raise HTTPException(status_code=404, detail="Hotel not found")
+    if hotel_data is None:
+        hotel_data = {"hotel_id": hotel_id}
+    
+    if check_in and check_out:
+        hotel_rooms = results["rooms"] or []
+        if hotel_rooms and results["room_static"]:
+            sunhotels_client.apply_room_static_data(hotel_rooms, results["room_static"])
+        hotel_data["rooms"] = hotel_rooms
+        hotel_data["check_in"] = check_in
+        hotel_data["check_out"] = check_out
+        hotel_data["is_last_minute"] = b2c == 1
+    
+    reviews = results["reviews"] or {}
+    hotel_data["reviews"] = reviews.get("reviews", [])
+    hotel_data["reviews_count"] = reviews.get("count", 0)
+    hotel_data["is_favorite"] = bool((results["favorite"] or {}).get("is_favorite"))
+    hotel_data["parts"] = parts
+    hotel_data["partial"] = any(part["status"] != "ok" for part in parts.values())
+    return hotel_data
+
+GEO_ALTERNATIVES_RADIUS_KM = float(os.environ.get('GEO_ALTERNATIVES_RADIUS_KM', '25'))
+GEO_ALTERNATIVES_CANDIDATES = 60
+
+async def hotel_coordinates(hotel_id: str) -> Optional[tuple]:
+    """(lat, lon) from the geo index, falling back to the hotel's static data"""
+    location = hotel_geo_index.location(hotel_id)
+    if location is None:
+        hotel_data = await sunhotels_client.get_hotel_details(hotel_id)
+        if hotel_data and (hotel_data.get("latitude") or hotel_data.get("longitude")):
+            location = (float(hotel_data["latitude"]), float(hotel_data["longitude"]))
+    return location
+
+def rank_cached_alternatives(hotel_id: str, origin: tuple, occupancy: tuple, limit: int) -> List[Dict]:
+    """
+    Nearby hotels with availability in the availability store for the same dates and occupancy,
+    ranked by distance and cheapest price (equal weight, each normalised to the candidate set).
+    """
+    candidates = hotel_geo_index.nearest(origin[0], origin[1], GEO_ALTERNATIVES_CANDIDATES,
+                                         max_km=GEO_ALTERNATIVES_RADIUS_KM, exclude={str(hotel_id)})
+    available = []
+    for candidate in candidates:
+        rooms = hotel_availability_store.peek(candidate["hotel_id"], occupancy)
+        if not rooms:
+            continue
+        prices = [r.get("price") or r.get("nett_price") for r in rooms if r.get("price") or r.get("nett_price")]
+        if not prices:
+            continue
+        available.append({**candidate, "min_price": min(prices), "rooms_available": len(rooms)})
+    if not available:
+        return []
+    
+    max_distance = max(h["distance_km"] for h in available) or 1
+    max_price = max(h["min_price"] for h in available) or 1
+    available.sort(key=lambda h: 0.5 * h["distance_km"] / max_distance + 0.5 * h["min_price"] / max_price)
+    return available[:limit]
+
+@api_router.get("/hotels/{hotel_id}/nearby")
+async def get_nearby_hotels(hotel_id: str, limit: Optional[int] = None, radius_km: Optional[float] = None):
+    """
+    Hotels closest to this one from the geo index (no upstream call).
+    limit defaults to the nearby_hotels_count setting; radius_km limits the search area.
+    """
+    if limit is None:
+        limit = (await get_settings()).get("nearby_hotels_count", 4)
+    limit = max(1, min(limit, 50))
+    
+    origin = await hotel_coordinates(hotel_id)
+    if origin is None:
+        return {"hotel_id": hotel_id, "hotels": [], "count": 0}
+    
+    if radius_km:
+        hotels = hotel_geo_index.within(origin[0], origin[1], radius_km, limit, exclude={str(hotel_id)})
+    else:
+        hotels = hotel_geo_index.nearest(origin[0], origin[1], limit, exclude={str(hotel_id)})
+    return {"hotel_id": hotel_id, "latitude": origin[0], "longitude": origin[1], "hotels": hotels, "count": len(hotels)}
+
 @api_router.get("/hotels/{hotel_id}/alternatives")
-async def get_hotel_alternatives(hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, destination_id: str = None):
+async def get_hotel_alternatives(hotel_id: str, check_in: str, check_out: str, adults: int = 2, children: int = 0, destination_id: str = None, mode: str = "nearby", rooms: int = 1, currency: str = "EUR"):
     """
     Get alternative hotels nearby when the requested hotel has no availability.
-    Returns hotels in the same destination with rooms available.
+    mode=nearby ranks hotels near this one by distance and price using availability cached from
+    recent searches; when none is cached (or mode=search) hotels in the same destination are
+    searched instead.
     """
+    origin = await hotel_coordinates(hotel_id) if hotel_geo_index.ready else None
+    
+    if mode == "nearby" and origin is not None:
+        occupancy = HotelAvailabilityStore.occupancy_key(check_in, check_out, adults, children, None, 0, rooms, currency)
+        alternatives = rank_cached_alternatives(hotel_id, origin, occupancy, 6)
+        if alternatives:
+            return {
+                "hotel_id": hotel_id,
+                "destination_id": destination_id,
+                "check_in": check_in,
+                "check_out": check_out,
+                "alternatives": alternatives,
+                "total_found": len(alternatives),
+                "mode": "nearby",
+                "message": f"Found {len(alternatives)} alternative hotels nearby"
+            }
+    
     if not destination_id:
         # Try to find destination_id from the hotel's static data
         hotel_data = await sunhotels_client.get_hotel_details(hotel_id)
         if hotel_data:
             # We don't have destination_id in static data, so we'll search the lookup table
-            db_config = await sunhotels_client.get_static_db_connection()
-            if db_config["host"]:
-                try:
-                    conn = await asyncio.wait_for(
-                        aiomysql.connect(
-                            host=db_config["host"],
-                            port=db_config["port"],
-                            user=db_config["user"],
-                            password=db_config["password"],
-                            db=db_config["database"],
-                            charset='utf8mb4'
-                        ),
-                        timeout=10
+            try:
+                async with mysql_connection() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(
+                        "SELECT id FROM ghwk_autocomplete_lookup WHERE hotel_id = %s AND type = 'hotel' LIMIT 1",
+                        (hotel_id,)
                     )
-                    async with conn.cursor(aiomysql.DictCursor) as cursor:
-                        await cursor.execute(
-                            "SELECT id FROM ghwk_autocomplete_lookup WHERE hotel_id = %s AND type = 'hotel' LIMIT 1",
-                            (hotel_id,)
-                        )
-                        result = await cursor.fetchone()
-                        if result:
-                            destination_id = str(result['id'])
-                    conn.close()
-                except:
-                    pass
+                    result = await cursor.fetchone()
+                    if result:
+                        destination_id = str(result['id'])
+            except:
+                pass
     
     if not destination_id:
         return {
@@ -7072,16 +9621,22 @@ async def get_hotel_alternatives(hotel_id: str, check_in: str, check_out: str, a
         check_out=check_out,
         adults=adults,
         children=children,
-        rooms=1,
-        currency="EUR",
+        rooms=rooms,
+        currency=currency,
         b2c=0
     )
     
     try:
         hotels = await sunhotels_client.search_hotels(search_params)
         
-        # Filter out the original hotel and limit to 6 alternatives
-        alternatives = [h for h in hotels if str(h.get('hotel_id')) != str(hotel_id)][:6]
+        # Filter out the original hotel and limit to 6 alternatives, closest first when coordinates are known
+        alternatives = [h for h in hotels if str(h.get('hotel_id')) != str(hotel_id)]
+        if origin is not None:
+            for h in alternatives:
+                if h.get("latitude") or h.get("longitude"):
+                    h["distance_km"] = round(haversine_km(origin[0], origin[1], float(h["latitude"]), float(h["longitude"])), 2)
+            alternatives.sort(key=lambda h: h.get("distance_km", float("inf")))
+        alternatives = alternatives[:6]
         
         return {
             "hotel_id": hotel_id,
@@ -7090,6 +9645,7 @@ async def get_hotel_alternatives(hotel_id: str, check_in: str, check_out: str, a
             "check_out": check_out,
             "alternatives": alternatives,
             "total_found": len(alternatives),
+            "mode": "search",
             "message": f"Found {len(alternatives)} alternative hotels in the same area"
         }
     except Exception as e:
@@ -7100,65 +9656,134 @@ async def get_hotel_alternatives(hotel_id: str, check_in: str, check_out: str, a
             "message": "Error searching for alternatives"
         }
 
+def summarize_probe_rooms(rooms: List[Dict]) -> Dict:
+    """Compact availability result cached per probe (cheapest room only)"""
+    if not rooms:
+        return {"available": False, "rooms_available": 0, "cheapest_price": None, "cheapest_room": None}
+    cheapest_room = min(rooms, key=lambda r: r.get("price") or r.get("nett_price") or float('inf'))
+    cheapest_price = cheapest_room.get("price") or cheapest_room.get("nett_price")
+    return {
+        "available": True,
+        "rooms_available": len(rooms),
+        "cheapest_price": cheapest_price,
+        "cheapest_room": {
+            "room_type": cheapest_room.get('room_type'),
+            "board_type": cheapest_room.get('board_type'),
+            "price": cheapest_price
+        }
+    }
+
+async def probe_hotel_availability(hotel_id: str, check_in: str, check_out: str, adults: int, children: int, b2c: int, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    """
+    Cached availability for one hotel/date/occupancy. Concurrent callers share one SearchV3 call;
+    failed searches return None and are not cached.
+    """
+    key = f"{hotel_id}:{check_in}:{check_out}:{adults}:{children}:{b2c}"
+    
+    async def load():
+        rooms = await sunhotels_client.probe_hotel_rooms(hotel_id, check_in, check_out, adults, children, b2c)
+        return summarize_probe_rooms(rooms) if rooms is not None else None
+    
+    if availability_probe_cache.contains(key):
+        return await availability_probe_cache.get_or_load(key, load)
+    # Waiting here (not inside the shared load) lets a short-circuit cancel probes that have not started
+    async with semaphore:
+        return await availability_probe_cache.get_or_load(key, load)
+
 @api_router.get("/hotels/{hotel_id}/next-availability")
-async def find_next_availability(hotel_id: str, adults: int = 2, children: int = 0, b2c: int = 0, max_days: int = 30):
+async def find_next_availability(hotel_id: str, adults: int = 2, children: int = 0, b2c: int = 0, max_days: int = 30, nights: int = 2, calendar: bool = False):
     """
     Find the next available dates for a specific hotel.
-    Searches forward from tomorrow up to max_days to find availability.
-    Returns the first available check-in/check-out dates with room info.
+    Probes check-in dates from tomorrow up to max_days concurrently and returns the first
+    available check-in/check-out dates with room info. Remaining probes are cancelled once the
+    earliest available date is known, unless calendar=true which returns the cheapest price for
+    every day in the window.
     """
     from datetime import timedelta
     
     start_date = datetime.now(timezone.utc).date() + timedelta(days=1)  # Start from tomorrow
-    nights = 2  # Default search for 2 nights stay
+    max_days = max(1, min(max_days, 90))
+    nights = max(1, min(nights, 30))
     
     logger.info(f"Finding next availability for hotel {hotel_id}, starting from {start_date}")
     
-    for day_offset in range(max_days):
-        check_in = (start_date + timedelta(days=day_offset)).strftime("%Y-%m-%d")
-        check_out = (start_date + timedelta(days=day_offset + nights)).strftime("%Y-%m-%d")
-        
-        try:
-            rooms = await sunhotels_client.get_hotel_rooms(
-                hotel_id=hotel_id,
-                check_in=check_in,
-                check_out=check_out,
-                adults=adults,
-                children=children,
-                b2c=b2c
-            )
+    semaphore = asyncio.Semaphore(AVAILABILITY_PROBE_CONCURRENCY)
+    dates = [
+        ((start_date + timedelta(days=offset)).strftime("%Y-%m-%d"),
+         (start_date + timedelta(days=offset + nights)).strftime("%Y-%m-%d"))
+        for offset in range(max_days)
+    ]
+    tasks = {
+        asyncio.ensure_future(probe_hotel_availability(hotel_id, check_in, check_out, adults, children, b2c, semaphore)): day
+        for day, (check_in, check_out) in enumerate(dates)
+    }
+    results: Dict[int, Optional[Dict]] = {}
+    earliest = None
+    pending = set(tasks)
+    
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                day = tasks[task]
+                try:
+                    results[day] = task.result()
+                except Exception as e:
+                    logger.warning(f"Error checking {dates[day][0]}: {str(e)}")
+                    results[day] = None
             
-            if rooms and len(rooms) > 0:
-                # Found availability!
-                # Get cheapest room
-                cheapest_room = min(rooms, key=lambda r: r.get('nett_price', float('inf')))
-                
-                logger.info(f"Found availability for hotel {hotel_id} on {check_in}: {len(rooms)} rooms")
-                
-                return {
-                    "hotel_id": hotel_id,
-                    "found": True,
-                    "check_in": check_in,
-                    "check_out": check_out,
-                    "nights": nights,
-                    "rooms_available": len(rooms),
-                    "cheapest_price": cheapest_room.get('nett_price'),
-                    "cheapest_room": {
-                        "room_type": cheapest_room.get('room_type'),
-                        "board_type": cheapest_room.get('board_type'),
-                        "price": cheapest_room.get('nett_price')
-                    },
-                    "message": f"Found availability starting {check_in}"
-                }
-        except Exception as e:
-            logger.warning(f"Error checking {check_in}: {str(e)}")
+            # The earliest hit is final once every earlier day has been resolved
+            for day in range(max_days):
+                if day not in results:
+                    break
+                if results[day] and results[day]["available"]:
+                    earliest = day
+                    break
+            if earliest is not None and not calendar:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+    
+    window = []
+    for day, (check_in, check_out) in enumerate(dates):
+        if day not in results:
             continue
+        result = results[day]
+        window.append({
+            "check_in": check_in,
+            "check_out": check_out,
+            "available": result["available"] if result else None,  # None = search failed
+            "rooms_available": result["rooms_available"] if result else 0,
+            "cheapest_price": result["cheapest_price"] if result else None
+        })
+    
+    if earliest is not None:
+        check_in, check_out = dates[earliest]
+        result = results[earliest]
+        logger.info(f"Found availability for hotel {hotel_id} on {check_in}: {result['rooms_available']} rooms")
+        return {
+            "hotel_id": hotel_id,
+            "found": True,
+            "check_in": check_in,
+            "check_out": check_out,
+            "nights": nights,
+            "rooms_available": result["rooms_available"],
+            "cheapest_price": result["cheapest_price"],
+            "cheapest_room": result["cheapest_room"],
+            "days_checked": len(window),
+            "calendar": window,
+            "message": f"Found availability starting {check_in}"
+        }
     
     return {
         "hotel_id": hotel_id,
         "found": False,
         "check_in": None,
         "check_out": None,
+        "nights": nights,
+        "days_checked": len(window),
+        "calendar": window,
         "message": f"No availability found in the next {max_days} days"
     }
 
@@ -7414,6 +10039,7 @@ async def admin_update_transfer_settings(settings_update: TransferSettingsUpdate
         {"$set": update_data},
         upsert=True
     )
+    await refresh_settings_cache()
     
     logger.info(f"Transfer settings updated: enabled={settings_update.enabled}, markup={settings_update.markup_percentage}%")
     
@@ -7533,6 +10159,7 @@ async def admin_update_partner_settings(request: Request):
             {"$set": update_data},
             upsert=True
         )
+        await refresh_settings_cache()
     
     logger.info(f"Partner settings updated: {list(update_data.keys())}")
     
@@ -7778,6 +10405,7 @@ async def create_booking(booking_data: BookingCreate, request: Request):
         booking_doc["total_transfer_price"] = total_transfer_cost
     
     await db.bookings.insert_one(booking_doc)
+    await dashboard_stats.record("bookings", booking_doc)
     
     return {
         "booking_id": booking_id,
@@ -7842,6 +10470,7 @@ async def cancel_booking(booking_id: str, request: Request):
             "cancellation_reason": "User requested cancellation"
         }}
     )
+    await dashboard_stats.record_change("bookings", booking, {**booking, "status": "cancelled"})
     
     return {"success": True, "message": "Booking cancelled successfully"}
 
@@ -8180,6 +10809,7 @@ async def get_my_referral_code(request: Request):
             {"user_id": user["user_id"]},
             {"$set": {"referral_code": referral_code, "referral_count": 0}}
         )
+        await invalidate_user_principal(user["user_id"], reason="referral code")
         user["referral_code"] = referral_code
         user["referral_count"] = 0
     
@@ -8307,6 +10937,7 @@ async def award_travel_credits(referrer_email: str, referee_email: str, pass_typ
                 "$push": {"credits_history": credit_entry}
             }
         )
+        await invalidate_user_principal(email=referrer_email, reason="travel credits")
         
         logger.info(f"Awarded €{credit_amount} travel credits to {referrer_email} for referral (Tier: {tier['name']})")
         
@@ -8463,6 +11094,7 @@ async def use_travel_credits(request: Request):
                 "$push": {"credits_history": usage_entry}
             }
         )
+        await invalidate_user_principal(user["user_id"], user["email"], reason="travel credits")
         
         return {
             "success": True,
@@ -8607,6 +11239,7 @@ async def apply_referral_discount(data: ReferralApply, request: Request):
             }
         }
     )
+    await invalidate_user_principal(user["user_id"], reason="referral discount")
     
     # Track referral
     await db.referrals.insert_one({
@@ -8623,6 +11256,7 @@ async def apply_referral_discount(data: ReferralApply, request: Request):
         {"user_id": referrer["user_id"]},
         {"$inc": {"referral_count": 1}}
     )
+    await invalidate_user_principal(referrer["user_id"], reason="referral count")
     
     return {
         "success": True,
@@ -8828,6 +11462,8 @@ async def verify_pass_purchase(session_id: str, request: Request):
                         "pass_purchased_at": datetime.now(timezone.utc).isoformat()
                     }}
                 )
+                await invalidate_user_principal(user.get("user_id"), user["email"], reason="pass purchase")
+                await dashboard_stats.mark_stale("users")
                 
                 # Update pass_codes with who activated it
                 await db.pass_codes.update_one(
@@ -9029,6 +11665,7 @@ async def get_payment_status(session_id: str):
                         {"booking_id": transaction["booking_id"]},
                         {"$set": update_data}
                     )
+                    await dashboard_stats.record_change("bookings", booking, {**booking, **update_data})
                     
                     # If pass was purchased, update user's pass
                     if booking.get("new_pass_code") and booking.get("user_id"):
@@ -9045,6 +11682,8 @@ async def get_payment_status(session_id: str):
                                 "pass_expires_at": expires_at
                             }}
                         )
+                        await invalidate_user_principal(booking["user_id"], reason="pass purchase")
+                        await dashboard_stats.mark_stale("users")
                     
                     # Send confirmation email to guest
                     updated_booking = {**booking, **update_data}
@@ -9139,6 +11778,7 @@ async def stripe_webhook(request: Request):
                         {"booking_id": booking_id},
                         {"$set": update_data}
                     )
+                    await dashboard_stats.record_change("bookings", booking, {**booking, **update_data})
                     
                     # Send confirmation email to guest
                     updated_booking = {**booking, **update_data}
@@ -9174,6 +11814,8 @@ async def stripe_webhook(request: Request):
                                 "pass_expires_at": expires_at
                             }}
                         )
+                        await invalidate_user_principal(booking["user_id"], reason="pass purchase")
+                        await dashboard_stats.mark_stale("users")
                     
                     # Mark admin-generated pass code as used (if applied)
                     existing_pass_code = booking.get("existing_pass_code")
@@ -9194,6 +11836,7 @@ async def stripe_webhook(request: Request):
                             {"user_id": booking["user_id"]},
                             {"$set": {"referral_discount": 0}}
                         )
+                        await invalidate_user_principal(booking["user_id"], reason="referral discount used")
                         logger.info(f"Referral discount reset for user: {booking['user_id']}")
                 
                 await db.payment_transactions.update_one(
@@ -9220,6 +11863,7 @@ async def stripe_webhook(request: Request):
                             "updated_at": datetime.now(timezone.utc).isoformat()
                         }}
                     )
+                    await dashboard_stats.record_change("bookings", booking, {**booking, "status": "confirmed"})
         
         # Handle checkout.session.async_payment_failed - Delayed payment failed
         elif event_type == "checkout.session.async_payment_failed":
@@ -9261,17 +11905,19 @@ async def handle_failed_payment(session: dict, failure_type: str, settings: dict
     
     # Update booking status if exists
     if booking_id:
-        await db.bookings.update_one(
-            {"booking_id": booking_id},
-            {"$set": {
-                "status": "payment_failed" if failure_type == "async_payment_failed" else "expired",
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }}
-        )
-        
-        # Get booking details for the failed record
         booking = await db.bookings.find_one({"booking_id": booking_id}, {"_id": 0})
         if booking:
+            update_data = {
+                "status": "payment_failed" if failure_type == "async_payment_failed" else "expired",
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            await db.bookings.update_one(
+                {"booking_id": booking_id},
+                {"$set": update_data}
+            )
+            await dashboard_stats.record_change("bookings", booking, {**booking, **update_data})
+            
+            # Booking details for the failed record
             failed_record["hotel_name"] = booking.get("hotel_name")
             failed_record["check_in"] = booking.get("check_in")
             failed_record["check_out"] = booking.get("check_out")
@@ -9430,6 +12076,7 @@ async def update_aftersale_templates(request: Request, lang: str = "en"):
             {"$set": update_data},
             upsert=True
         )
+        await refresh_settings_cache()
     
     return {"success": True, "message": f"Templates updated for {lang}"}
 
@@ -9975,9 +12622,10 @@ async def admin_login(credentials: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password using bcrypt (same as user login)
-    if not verify_password(credentials.password, user.get("password", "")):
+    if not await verify_password(credentials.password, user.get("password", "")):
         logger.warning(f"Admin login failed - wrong password: {credentials.email}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await upgrade_password_hash(user, credentials.password)
     
     # Check if user has admin access
     if not user.get("is_admin", False):
@@ -10010,14 +12658,20 @@ async def verify_admin(request: Request) -> bool:
     
     try:
         token = auth_header[7:]
+        cached = principal_cache.get("admin_check", token)
+        if cached is not MISSING:
+            return cached
+        generation = principal_cache.generation
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc) if payload.get("exp") else None
         
         # Check if this is a CMS admin token
         if payload.get("type") == "cms_admin":
             admin_id = payload.get("admin_id")
             if admin_id:
-                admin = await db.admin_users.find_one({"admin_id": admin_id, "is_active": True})
+                admin = await db.admin_users.find_one({"admin_id": admin_id, "is_active": True}, {"_id": 1})
                 if admin:
+                    principal_cache.set("admin_check", token, True, [f"admin:{admin_id}"], generation, expires_at)
                     return True
         
         # Check if role is explicitly set (for backwards compatibility)
@@ -10028,8 +12682,10 @@ async def verify_admin(request: Request) -> bool:
         user_id = payload.get("user_id")
         if user_id:
             user = await db.users.find_one({"user_id": user_id}, {"is_admin": 1})
-            if user and user.get("is_admin") == True:
-                return True
+            is_admin = bool(user and user.get("is_admin") == True)
+            if user:
+                principal_cache.set("admin_check", token, is_admin, [f"user:{user_id}"], generation, expires_at)
+            return is_admin
         return False
     except:
         return False
@@ -10124,7 +12780,7 @@ class SendMarketingEmailRequest(BaseModel):
     recipient_emails: List[str]
 
 @api_router.post("/admin/price-comparisons/send-marketing")
-async def send_marketing_email(data: SendMarketingEmailRequest, request: Request, background_tasks: BackgroundTasks):
+async def send_marketing_email(data: SendMarketingEmailRequest, request: Request):
     """Send price comparison marketing email to selected customers"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
@@ -10137,17 +12793,14 @@ async def send_marketing_email(data: SendMarketingEmailRequest, request: Request
     if not comparison:
         raise HTTPException(status_code=404, detail="Comparison not found")
     
-    # Send emails to all recipients
-    async def send_emails():
-        for email in data.recipient_emails:
-            await PriceComparisonService.send_comparison_email(comparison, visitor_email=email)
-    
-    background_tasks.add_task(send_emails)
+    # One job per recipient, so a failed address is retried on its own
+    for email in data.recipient_emails:
+        await job_queue.enqueue("price_comparison.email", {"comparison": comparison, "visitor_email": email})
     
     return {"success": True, "message": f"Marketing emails queued for {len(data.recipient_emails)} recipients"}
 
 @api_router.post("/admin/price-comparisons/test-email")
-async def send_test_comparison_email(request: Request, background_tasks: BackgroundTasks):
+async def send_test_comparison_email(request: Request):
     """Send test price comparison email with sample data"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
@@ -10179,7 +12832,7 @@ async def send_test_comparison_email(request: Request, background_tasks: Backgro
     settings = await PriceComparisonService.get_comparison_settings()
     campaign_email = settings.get("email_address", "info@freestays.eu")
     
-    background_tasks.add_task(PriceComparisonService.send_comparison_email, sample_data, campaign_email)
+    await job_queue.enqueue("price_comparison.email", {"comparison": sample_data, "visitor_email": campaign_email})
     
     return {"success": True, "message": f"Test comparison email sent to {campaign_email}"}
 
@@ -10218,17 +12871,17 @@ async def get_follow_up_email_stats(request: Request):
     }
 
 @api_router.post("/admin/follow-up-emails/trigger")
-async def trigger_follow_up_emails(request: Request, background_tasks: BackgroundTasks):
+async def trigger_follow_up_emails(request: Request):
     """Manually trigger follow-up email processing"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    background_tasks.add_task(PriceComparisonService.process_follow_up_emails)
+    await job_queue.enqueue("price_comparison.follow_ups", dedupe_key="price_comparison.follow_ups")
     
     return {"success": True, "message": "Follow-up email processing started in background"}
 
 @api_router.post("/admin/follow-up-emails/test")
-async def send_test_follow_up_email(request: Request, background_tasks: BackgroundTasks):
+async def send_test_follow_up_email(request: Request):
     """Send test follow-up email to campaign email"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
@@ -10259,10 +12912,7 @@ async def send_test_follow_up_email(request: Request, background_tasks: Backgrou
         ]
     }
     
-    async def send_test():
-        await PriceComparisonService.send_follow_up_email(test_comparison)
-    
-    background_tasks.add_task(send_test)
+    await job_queue.enqueue("price_comparison.follow_up", {"comparison": test_comparison})
     
     return {"success": True, "message": f"Test follow-up email sent to {campaign_email}"}
 
@@ -10304,7 +12954,7 @@ class SaveComparisonRequest(BaseModel):
     visitor_email: Optional[str] = None
 
 @api_router.post("/price-comparison/save")
-async def save_price_comparison(data: SaveComparisonRequest, request: Request, background_tasks: BackgroundTasks):
+async def save_price_comparison(data: SaveComparisonRequest, request: Request):
     """Save price comparison and optionally send email to visitor"""
     user = await get_current_user(request)
     user_id = user["user_id"] if user else None
@@ -10318,10 +12968,9 @@ async def save_price_comparison(data: SaveComparisonRequest, request: Request, b
     
     # Send email if visitor provided email
     if data.visitor_email:
-        background_tasks.add_task(
-            PriceComparisonService.send_comparison_email,
-            data.comparison_data,
-            data.visitor_email
+        await job_queue.enqueue(
+            "price_comparison.email",
+            {"comparison": data.comparison_data, "visitor_email": data.visitor_email}
         )
     
     return {"success": True, "comparison_id": comparison_id}
@@ -10617,6 +13266,7 @@ async def update_admin_settings(settings_update: AdminSettings, request: Request
         {"$set": {**update_dict, "type": "app_settings"}},
         upsert=True
     )
+    await refresh_settings_cache()
     
     return {"success": True, "message": "Settings updated"}
 
@@ -10628,7 +13278,65 @@ async def get_cache_stats(request: Request):
     
     return {
         "autocomplete_cache": autocomplete_cache.stats(),
-        "hotel_search_cache": hotel_search_cache.stats()
+        "hotel_search_cache": hotel_search_cache.stats(),
+        "availability_probe_cache": availability_probe_cache.stats(),
+        "hotel_availability_store": hotel_availability_store.stats(),
+        "settings_cache": settings_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "autocomplete_index": autocomplete_index.stats(),
+        "geo_index": hotel_geo_index.stats()
+    }
+
+@api_router.get("/admin/sunhotels/pool-stats")
+async def get_sunhotels_pool_stats(request: Request):
+    """Get Sunhotels HTTP connection pool and per-operation latency statistics"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return get_sunhotels_http_stats()
+
+@api_router.get("/admin/mysql/pool-stats")
+async def get_mysql_pool_stats(request: Request):
+    """Get static DB (MySQL) connection pool saturation and acquire latency"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    await get_mysql_pool()
+    return mysql_pool_manager.stats()
+
+@api_router.get("/admin/static-catalog/stats")
+async def get_static_catalog_stats(request: Request):
+    """Get local static hotel catalogue size, freshness and hit rate"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return await static_hotel_catalog.stats()
+
+@api_router.post("/admin/static-catalog/sync")
+async def trigger_static_catalog_sync(request: Request):
+    """
+    Manually trigger a static catalogue sync.
+    Optional body: {"hotel_ids": [...]} to load specific hotels, otherwise the oldest entries are refreshed.
+    """
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    hotel_ids = [str(h) for h in (body or {}).get("hotel_ids", [])] or None
+    
+    await job_queue.enqueue(
+        "static_catalog.sync", {"hotel_ids": hotel_ids},
+        dedupe_key=None if hotel_ids else "static_catalog.sync"
+    )
+    
+    logger.info("Static catalogue sync triggered manually by admin")
+    return {
+        "success": True,
+        "message": "Static catalogue sync started in background",
+        "hotel_ids": len(hotel_ids) if hotel_ids else None
     }
 
 @api_router.post("/admin/cache/clear")
@@ -10637,19 +13345,21 @@ async def clear_cache(request: Request):
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    autocomplete_cache.clear()
-    hotel_search_cache.clear()
-    logger.info("Search caches cleared by admin")
+    await autocomplete_cache.aclear()
+    await hotel_search_cache.aclear()
+    await availability_probe_cache.aclear()
+    hotel_availability_store.clear()
+    logger.info("Search caches cleared by admin (all workers)")
     return {"success": True, "message": "All caches cleared"}
 
 @api_router.post("/admin/cache/warm")
-async def trigger_cache_warming(request: Request, background_tasks: BackgroundTasks):
+async def trigger_cache_warming(request: Request):
     """Manually trigger cache warming for top destinations"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
     # Run cache warming in background
-    background_tasks.add_task(scheduled_cache_warming)
+    await job_queue.enqueue("cache.warm", dedupe_key="cache.warm")
     
     logger.info("Cache warming triggered manually by admin")
     return {
@@ -10685,7 +13395,7 @@ async def export_settings(request: Request):
     }
     
     logger.info("Admin settings exported for backup")
-    return export_data
+    return FastJSONResponse(export_data)
 
 @api_router.post("/admin/settings/import")
 async def import_settings(request: Request):
@@ -10712,6 +13422,7 @@ async def import_settings(request: Request):
                 {"$set": app_settings},
                 upsert=True
             )
+            await refresh_settings_cache()
             imported_count += 1
             logger.info("App settings imported successfully")
         
@@ -10959,6 +13670,7 @@ async def run_seed_defaults(request: Request):
     
     try:
         result = await seed_all_defaults(db)
+        await refresh_settings_cache()
         logger.info(f"Seed defaults executed: {result}")
         return {
             "success": True,
@@ -11813,6 +14525,8 @@ VAPID_PUBLIC_KEY = os.environ.get("VAPID_PUBLIC_KEY", "")
 VAPID_PRIVATE_KEY = os.environ.get("VAPID_PRIVATE_KEY", "")
 VAPID_CLAIMS_EMAIL = os.environ.get("VAPID_CLAIMS_EMAIL", "booking@freestays.eu")
 
+push_dispatcher = PushDispatcher(VAPID_PRIVATE_KEY if VAPID_PUBLIC_KEY else "", VAPID_CLAIMS_EMAIL)
+
 @api_router.get("/push/vapid-public-key")
 async def get_vapid_public_key():
     """Get the VAPID public key for client-side subscription"""
@@ -11888,42 +14602,14 @@ async def unsubscribe_push(request: Request):
         logger.error(f"Failed to unsubscribe push: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def send_push_notification(subscription_info: dict, title: str, body: str, url: str = "/", icon: str = "/icons/icon-192x192.png"):
-    """Send a push notification to a single subscriber"""
-    try:
-        from pywebpush import webpush, WebPushException
-        
-        if not VAPID_PRIVATE_KEY or not VAPID_PUBLIC_KEY:
-            logger.warning("VAPID keys not configured, skipping push notification")
-            return False
-        
-        payload = json.dumps({
-            "title": title,
-            "body": body,
-            "icon": icon,
-            "url": url,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        
-        webpush(
-            subscription_info=subscription_info,
-            data=payload,
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims={"sub": f"mailto:{VAPID_CLAIMS_EMAIL}"}
-        )
-        return True
-    except WebPushException as e:
-        logger.error(f"Push notification failed: {e}")
-        # If subscription is invalid, mark as inactive
-        if e.response and e.response.status_code in [404, 410]:
-            await db.push_subscriptions.update_one(
-                {"endpoint": subscription_info.get("endpoint")},
-                {"$set": {"is_active": False, "error": str(e)}}
-            )
-        return False
-    except Exception as e:
-        logger.error(f"Push notification error: {e}")
-        return False
+def push_notification_payload(title: str, body: str, url: str = "/", icon: str = "/icons/icon-192x192.png") -> Dict:
+    return {
+        "title": title,
+        "body": body,
+        "icon": icon,
+        "url": url,
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
 async def broadcast_push_notification(title: str, body: str, url: str = "/", user_ids: list = None):
     """Send push notification to all active subscribers or specific users"""
@@ -11932,24 +14618,13 @@ async def broadcast_push_notification(title: str, body: str, url: str = "/", use
         if user_ids:
             query["user_id"] = {"$in": user_ids}
         
-        subscriptions = await db.push_subscriptions.find(query).to_list(1000)
-        
-        sent = 0
-        failed = 0
-        for sub in subscriptions:
-            success = await send_push_notification(
-                subscription_info=sub["subscription"],
-                title=title,
-                body=body,
-                url=url
-            )
-            if success:
-                sent += 1
-            else:
-                failed += 1
-        
-        logger.info(f"🔔 Push broadcast: {sent} sent, {failed} failed")
-        return {"sent": sent, "failed": failed}
+        return await push_dispatcher.broadcast(
+            db.push_subscriptions,
+            query,
+            push_notification_payload(title, body, url),
+            gone_update={"$set": {"is_active": False, "error": "Subscription expired (push service 404/410)",
+                                  "unsubscribed_at": datetime.utcnow().isoformat()}}
+        )
     except Exception as e:
         logger.error(f"Push broadcast failed: {e}")
         return {"sent": 0, "failed": 0, "error": str(e)}
@@ -11991,7 +14666,8 @@ async def get_push_stats(request: Request):
             "total_subscriptions": total,
             "active_subscriptions": active,
             "inactive_subscriptions": total - active,
-            "vapid_configured": bool(VAPID_PUBLIC_KEY and VAPID_PRIVATE_KEY)
+            "vapid_configured": bool(VAPID_PUBLIC_KEY and VAPID_PRIVATE_KEY),
+            "dispatcher": push_dispatcher.stats()
         }
     except Exception as e:
         logger.error(f"Failed to get push stats: {e}")
@@ -12179,6 +14855,7 @@ async def upload_logo(request: Request, file: UploadFile = File(...)):
         }},
         upsert=True
     )
+    await refresh_settings_cache()
     
     return {
         "success": True,
@@ -12243,35 +14920,37 @@ async def delete_logo(request: Request):
         {"$set": {"company_logo_url": ""}},
         upsert=True
     )
+    await refresh_settings_cache()
     
     return {"success": True, "message": "Logo deleted"}
 
 # ==================== DATABASE SYNC ENDPOINTS ====================
 
+async def store_bravo_hotel_images(hotel_id: str, images_json: str):
+    """Insert or update images_json for a hotel in ghwk_bravo_hotels (pooled connection per write)"""
+    async with mysql_connection(timeout=10) as conn, conn.cursor() as cursor:
+        await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
+        exists = await cursor.fetchone()
+        
+        if exists:
+            await cursor.execute(
+                "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
+                (images_json, hotel_id)
+            )
+        else:
+            await cursor.execute(
+                "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
+                (hotel_id, images_json)
+            )
+
 @api_router.get("/admin/db-sync/status")
 async def get_db_sync_status(request: Request):
     """Get status of hotels missing images in database"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    db_config = await sunhotels_client.get_static_db_connection()
-    if not db_config["host"]:
-        return {"error": "Static database not configured"}
-    
     try:
-        conn = await asyncio.wait_for(
-            aiomysql.connect(
-                host=db_config["host"],
-                port=db_config["port"],
-                user=db_config["user"],
-                password=db_config["password"],
-                db=db_config["database"],
-                charset='utf8mb4'
-            ),
-            timeout=5
-        )
-        
-        async with conn.cursor(aiomysql.DictCursor) as cursor:
+        async with mysql_connection() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
             # Simple fast queries - no JOINs
             # Count hotels in lookup table
             await cursor.execute("SELECT COUNT(*) as total FROM ghwk_autocomplete_lookup WHERE type = 'hotel'")
@@ -12295,8 +14974,6 @@ async def get_db_sync_status(request: Request):
             """)
             sample_hotels = await cursor.fetchall()
         
-        conn.close()
-        
         # Estimate missing images
         missing_estimate = max(0, total_hotels - with_images)
         coverage = round((with_images / total_hotels * 100), 1) if total_hotels > 0 else 0
@@ -12310,6 +14987,8 @@ async def get_db_sync_status(request: Request):
             "sample_missing": [{"hotel_id": h["hotel_id"], "name": h["display_name"], "country": h["country_name"]} for h in sample_hotels]
         }
         
+    except StaticDBUnavailable as e:
+        return {"error": str(e)}
     except asyncio.TimeoutError:
         logger.warning("DB sync status query timed out")
         return {"error": "Database query timed out - try again"}
@@ -12323,8 +15002,7 @@ async def sync_single_hotel_images(hotel_id: str, request: Request):
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    db_config = await sunhotels_client.get_static_db_connection()
-    if not db_config["host"]:
+    if not await get_mysql_pool():
         raise HTTPException(status_code=400, detail="Static database not configured")
     
     try:
@@ -12365,42 +15043,11 @@ async def sync_single_hotel_images(hotel_id: str, request: Request):
             images_json = json.dumps([{"id": img} if not img.startswith("http") else {"id": img} for img in images])
             
             # Update or insert into ghwk_bravo_hotels
-            conn = await asyncio.wait_for(
-                aiomysql.connect(
-                    host=db_config["host"],
-                    port=db_config["port"],
-                    user=db_config["user"],
-                    password=db_config["password"],
-                    db=db_config["database"],
-                    charset='utf8mb4'
-                ),
-                timeout=10
-            )
-            
-            async with conn.cursor() as cursor:
-                # Check if hotel exists in bravo_hotels
-                await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
-                exists = await cursor.fetchone()
-                
-                if exists:
-                    # Update existing record
-                    await cursor.execute(
-                        "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
-                        (images_json, hotel_id)
-                    )
-                else:
-                    # Insert new record
-                    await cursor.execute(
-                        "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
-                        (hotel_id, images_json)
-                    )
-                
-                await conn.commit()
-            
-            conn.close()
+            await store_bravo_hotel_images(hotel_id, images_json)
             
             # Clear autocomplete cache to reflect new images
-            autocomplete_cache.clear()
+            await autocomplete_cache.aclear()
+            autocomplete_index.set_hotel_images(hotel_id, images)
             
             logger.info(f"✅ Synced {len(images)} images for hotel {hotel_id}")
             
@@ -12423,25 +15070,12 @@ async def batch_sync_hotel_images(request: Request, limit: int = 10):
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    db_config = await sunhotels_client.get_static_db_connection()
-    if not db_config["host"]:
+    if not await get_mysql_pool():
         raise HTTPException(status_code=400, detail="Static database not configured")
     
     try:
-        conn = await asyncio.wait_for(
-            aiomysql.connect(
-                host=db_config["host"],
-                port=db_config["port"],
-                user=db_config["user"],
-                password=db_config["password"],
-                db=db_config["database"],
-                charset='utf8mb4'
-            ),
-            timeout=10
-        )
-        
         # Get hotels missing images
-        async with conn.cursor(aiomysql.DictCursor) as cursor:
+        async with mysql_connection(timeout=10) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
             await cursor.execute("""
                 SELECT a.hotel_id, a.display_name
                 FROM ghwk_autocomplete_lookup a
@@ -12453,7 +15087,6 @@ async def batch_sync_hotel_images(request: Request, limit: int = 10):
             hotels_to_sync = await cursor.fetchall()
         
         if not hotels_to_sync:
-            conn.close()
             return {"success": True, "message": "No hotels need syncing", "synced": 0}
         
         # Get credentials once
@@ -12492,39 +15125,13 @@ async def batch_sync_hotel_images(request: Request, limit: int = 10):
                         if images:
                             images_json = json.dumps([{"id": img} if not str(img).startswith("http") else {"id": img} for img in images])
                             
-                            async with conn.cursor() as cursor:
-                                await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
-                                exists = await cursor.fetchone()
-                                
-                                if exists:
-                                    await cursor.execute(
-                                        "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
-                                        (images_json, hotel_id)
-                                    )
-                                else:
-                                    await cursor.execute(
-                                        "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
-                                        (hotel_id, images_json)
-                                    )
+                            await store_bravo_hotel_images(hotel_id, images_json)
                             
                             synced += 1
                             results.append({"hotel_id": hotel_id, "name": hotel["display_name"], "images": len(images), "status": "synced"})
                         else:
                             # Mark hotel as checked (no images in API) - prevents re-checking
-                            async with conn.cursor() as cursor:
-                                await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
-                                exists = await cursor.fetchone()
-                                
-                                if exists:
-                                    await cursor.execute(
-                                        "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
-                                        ('[]', hotel_id)
-                                    )
-                                else:
-                                    await cursor.execute(
-                                        "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
-                                        (hotel_id, '[]')
-                                    )
+                            await store_bravo_hotel_images(hotel_id, '[]')
                             
                             no_images += 1
                             results.append({"hotel_id": hotel_id, "name": hotel["display_name"], "status": "no_images_in_api"})
@@ -12539,11 +15146,9 @@ async def batch_sync_hotel_images(request: Request, limit: int = 10):
                 # Small delay to not overwhelm the API
                 await asyncio.sleep(0.5)
         
-        await conn.commit()
-        conn.close()
-        
-        # Clear autocomplete cache
-        autocomplete_cache.clear()
+        # Clear autocomplete cache and reload thumbnails into the index
+        await autocomplete_cache.aclear()
+        autocomplete_index.request_refresh()
         
         checked_count = synced + no_images
         logger.info(f"✅ Batch sync complete: {synced} synced with images, {no_images} no images in API, {failed} errors")
@@ -12640,19 +15245,7 @@ async def test_mysql_connection(request: Request):
         }
     
     try:
-        conn = await asyncio.wait_for(
-            aiomysql.connect(
-                host=db_config["host"],
-                port=db_config["port"],
-                user=db_config["user"],
-                password=db_config["password"],
-                db=db_config["database"],
-                charset='utf8mb4'
-            ),
-            timeout=10
-        )
-        
-        async with conn.cursor(aiomysql.DictCursor) as cursor:
+        async with mysql_connection(timeout=10) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
             # Test query - get table counts
             await cursor.execute("SELECT COUNT(*) as count FROM ghwk_autocomplete_lookup WHERE type = 'hotel'")
             hotel_count = (await cursor.fetchone())["count"]
@@ -12660,8 +15253,6 @@ async def test_mysql_connection(request: Request):
             await cursor.execute("SELECT COUNT(*) as count FROM ghwk_bravo_hotels WHERE images_json IS NOT NULL AND images_json != '' AND images_json != '[]'")
             images_count = (await cursor.fetchone())["count"]
         
-        conn.close()
-        
         return {
             "success": True,
             "message": "✓ Connected to MySQL database successfully",
@@ -12669,10 +15260,13 @@ async def test_mysql_connection(request: Request):
                 "host": db_config["host"],
                 "database": db_config["database"],
                 "hotels_in_lookup": hotel_count,
-                "hotels_with_images": images_count
+                "hotels_with_images": images_count,
+                "pool": mysql_pool_manager.stats()
             }
         }
         
+    except StaticDBUnavailable as e:
+        return {"success": False, "message": f"Connection error: {str(e)[:100]}"}
     except asyncio.TimeoutError:
         return {"success": False, "message": "Connection timeout - database not responding"}
     except Exception as e:
@@ -12717,17 +15311,18 @@ async def update_auto_sync_settings(request: Request):
             {"$set": update_data},
             upsert=True
         )
+        await refresh_settings_cache()
     
     return {"success": True, "message": "Auto-sync settings updated"}
 
 @api_router.post("/admin/db-sync/trigger-auto-sync")
-async def trigger_auto_sync(request: Request, background_tasks: BackgroundTasks):
+async def trigger_auto_sync(request: Request):
     """Manually trigger the auto-sync job"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
     # Run in background to not block the request
-    background_tasks.add_task(scheduled_hotel_image_sync)
+    await job_queue.enqueue("db_sync.auto_sync", dedupe_key="db_sync.auto_sync")
     
     return {"success": True, "message": "Auto-sync job triggered. Check back in a few minutes for results."}
 
@@ -12757,7 +15352,7 @@ async def get_contact_settings():
     }
 
 @api_router.post("/contact")
-async def submit_contact_form(data: ContactFormData, background_tasks: BackgroundTasks):
+async def submit_contact_form(data: ContactFormData):
     """Submit contact form and send emails to admin and sender"""
     try:
         # Store the contact submission in database
@@ -12897,45 +15492,20 @@ async def submit_contact_form(data: ContactFormData, background_tasks: Backgroun
         </html>
         """
         
-        # Send emails in background
-        def send_contact_emails():
-            try:
-                smtp_host = smtp_settings.get("host")
-                smtp_port = smtp_settings.get("port", 587)
-                smtp_username = smtp_settings.get("username")
-                smtp_password = smtp_settings.get("password")
-                
-                logger.info(f"Connecting to SMTP: {smtp_host}:{smtp_port} with user {smtp_username}")
-                
-                with smtplib.SMTP(smtp_host, smtp_port) as server:
-                    server.starttls()
-                    server.login(smtp_username, smtp_password)
-                    
-                    # 1. Send notification to admin
-                    admin_msg = MIMEMultipart('alternative')
-                    admin_msg['Subject'] = f"[{company_name}] Contact Form: {data.subject}"
-                    admin_msg['From'] = smtp_from
-                    admin_msg['To'] = admin_email
-                    admin_msg['Reply-To'] = data.email
-                    admin_msg.attach(MIMEText(admin_html_content, 'html'))
-                    server.sendmail(smtp_from, admin_email, admin_msg.as_string())
-                    logger.info(f"Contact form admin notification sent to {admin_email}")
-                    
-                    # 2. Send confirmation to sender
-                    sender_msg = MIMEMultipart('alternative')
-                    sender_msg['Subject'] = f"We received your message - {company_name}"
-                    sender_msg['From'] = smtp_from
-                    sender_msg['To'] = data.email
-                    sender_msg.attach(MIMEText(sender_html_content, 'html'))
-                    server.sendmail(smtp_from, data.email, sender_msg.as_string())
-                    logger.info(f"Contact form confirmation sent to {data.email}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to send contact form emails: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-        
-        background_tasks.add_task(send_contact_emails)
+        # Send emails in background (one job per message)
+        await job_queue.enqueue("email.message", {
+            "to_email": admin_email,
+            "subject": f"[{company_name}] Contact Form: {data.subject}",
+            "html_content": admin_html_content,
+            "reply_to": data.email,
+            "from_addr": smtp_from
+        })
+        await job_queue.enqueue("email.message", {
+            "to_email": data.email,
+            "subject": f"We received your message - {company_name}",
+            "html_content": sender_html_content,
+            "from_addr": smtp_from
+        })
         
         return {"success": True, "message": "Message sent successfully! We'll get back to you soon."}
         
@@ -13093,12 +15663,12 @@ async def export_pass_codes(request: Request, status: str = None, pass_type: str
     
     csv_content = "\n".join(csv_lines)
     
-    return {
+    return FastJSONResponse({
         "success": True,
         "csv": csv_content,
         "count": len(codes),
         "message": f"Exported {len(codes)} codes"
-    }
+    })
 
 @api_router.get("/admin/pass-codes")
 async def get_pass_codes(request: Request, status: str = None, pass_type: str = None, group: str = None, expired: str = None, search: str = None, limit: int = 50, skip: int = 0):
@@ -13348,10 +15918,10 @@ async def get_all_bookings(request: Request, limit: int = 50, skip: int = 0):
     bookings = await db.bookings.find({}, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
     total = await db.bookings.count_documents({})
     
-    return {"bookings": bookings, "total": total}
+    return FastJSONResponse({"bookings": bookings, "total": total})
 
 @api_router.post("/admin/bookings/{booking_id}/send-voucher")
-async def send_voucher_email(booking_id: str, request: Request, background_tasks: BackgroundTasks):
+async def send_voucher_email(booking_id: str, request: Request):
     """Send travel voucher to customer"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
@@ -13367,10 +15937,7 @@ async def send_voucher_email(booking_id: str, request: Request, background_tasks
     if not voucher_url:
         raise HTTPException(status_code=400, detail="No voucher available for this booking")
     
-    async def send_voucher():
-        await EmailService.send_voucher_email(booking, voucher_url)
-    
-    background_tasks.add_task(send_voucher)
+    await job_queue.enqueue("booking.voucher_email", {"booking_id": booking_id, "voucher_url": voucher_url})
     
     # Update booking to track voucher sent
     await db.bookings.update_one(
@@ -13424,6 +15991,7 @@ async def update_booking_status(booking_id: str, request: Request):
             }]
         }}
     )
+    await dashboard_stats.record_change("bookings", booking, {**booking, "status": new_status})
     
     logger.info(f"Booking {booking_id} status changed from {old_status} to {new_status}")
     return {"success": True, "message": f"Status updated to {new_status}"}
@@ -13444,12 +16012,13 @@ async def delete_booking(booking_id: str, request: Request):
     
     # Delete from main collection
     await db.bookings.delete_one({"booking_id": booking_id})
+    await dashboard_stats.record_change("bookings", booking, None)
     
     logger.info(f"Booking {booking_id} deleted by admin (archived to deleted_bookings)")
     return {"success": True, "message": "Booking deleted and archived"}
 
 @api_router.post("/admin/bookings/{booking_id}/send-payment-reminder")
-async def send_payment_reminder(booking_id: str, request: Request, background_tasks: BackgroundTasks):
+async def send_payment_reminder(booking_id: str, request: Request):
     """Send payment reminder email to customer (admin only)"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
@@ -13495,34 +16064,23 @@ async def send_payment_reminder(booking_id: str, request: Request, background_ta
         </tr>
         """
     
-    async def send_reminder():
-        result = await EmailService.send_generic_email(
-            to_email=guest_email,
-            subject=f"Payment Reminder - Booking {booking_id}",
-            html_content=email_template
-        )
-        if result.get("success"):
-            await db.bookings.update_one(
-                {"booking_id": booking_id},
-                {"$set": {"payment_reminder_sent": True, "payment_reminder_sent_at": datetime.now(timezone.utc).isoformat()}}
-            )
-    
-    background_tasks.add_task(send_reminder)
+    await job_queue.enqueue("booking.payment_reminder", {
+        "booking_id": booking_id,
+        "to_email": guest_email,
+        "subject": f"Payment Reminder - Booking {booking_id}",
+        "html_content": email_template
+    })
     return {"success": True, "message": f"Payment reminder email queued for {guest_email}"}
 
 # ==================== SUNHOTELS EMAIL FORWARDING ADMIN ENDPOINTS ====================
 
 @api_router.post("/admin/email-forwarding/trigger")
-async def trigger_email_forwarding(request: Request, background_tasks: BackgroundTasks):
+async def trigger_email_forwarding(request: Request):
     """Manually trigger Sunhotels email forwarding check (admin only)"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    async def run_forwarding():
-        result = await SunhotelsEmailForwarder.check_and_forward_emails()
-        logger.info(f"Manual email forwarding result: {result}")
-    
-    background_tasks.add_task(run_forwarding)
+    await job_queue.enqueue("email_forwarding.check", dedupe_key="email_forwarding.check")
     return {"success": True, "message": "Email forwarding check started in background"}
 
 @api_router.post("/admin/email-forwarding/test")
@@ -13694,22 +16252,20 @@ async def get_email_forwarding_status(request: Request):
         "forwarded_today": forwarded_today,
         "last_forwarded": last_forwarded,
         "scheduler_running": scheduler.running,
-        "next_check": "Every 5 minutes"
+        "watcher_running": voucher_mailbox_watcher is not None and not voucher_mailbox_watcher.done(),
+        "mailbox": voucher_mailbox.stats() if voucher_mailbox is not None else None,
+        "next_check": "On arrival (IMAP IDLE)" if voucher_mailbox is not None and voucher_mailbox.supports_idle else "Every 5 minutes"
     }
 
 # ==================== CHECK-IN REMINDERS ADMIN ENDPOINTS ====================
 
 @api_router.post("/admin/checkin-reminders/trigger")
-async def trigger_checkin_reminders(request: Request, background_tasks: BackgroundTasks):
+async def trigger_checkin_reminders(request: Request):
     """Manually trigger check-in reminder check (admin only)"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    async def run_reminders():
-        result = await CheckInReminderService.check_and_send_reminders()
-        logger.info(f"Manual check-in reminder result: {result}")
-    
-    background_tasks.add_task(run_reminders)
+    await job_queue.enqueue("checkin_reminders.check", dedupe_key="checkin_reminders.check")
     return {"success": True, "message": "Check-in reminder check started in background"}
 
 @api_router.get("/admin/checkin-reminders/status")
@@ -14187,6 +16743,7 @@ async def save_referral_tiers(request: Request, data: ReferralTiersRequest):
         {"$set": {"referral_tiers_v2": data.tiers}},
         upsert=True
     )
+    await refresh_settings_cache()
     
     logger.info(f"Referral tiers updated: {len(data.tiers)} tiers saved")
     return {"success": True, "message": "Referral tiers saved successfully"}
@@ -14200,7 +16757,7 @@ async def get_all_users(request: Request, limit: int = 50, skip: int = 0):
     users = await db.users.find({}, {"_id": 0, "password": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
     total = await db.users.count_documents({})
     
-    return {"users": users, "total": total}
+    return FastJSONResponse({"users": users, "total": total})
 
 @api_router.post("/admin/users")
 async def create_user_admin(request: Request):
@@ -14226,7 +16783,7 @@ async def create_user_admin(request: Request):
     # Generate user_id and password
     user_id = f"user_{uuid.uuid4().hex[:16]}"
     password = body.get("password", uuid.uuid4().hex[:12])  # Generate random password if not provided
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password(password)
     
     # Generate referral code
     referral_code = f"REF{uuid.uuid4().hex[:8].upper()}"
@@ -14247,6 +16804,7 @@ async def create_user_admin(request: Request):
         "referral_count": 0,
         "referral_discount": body.get("referral_discount", 0),
         "newsletter_subscribed": body.get("newsletter_subscribed", False),
+        "language": preferred_language(None, body.get("language")),
         "created_at": datetime.now(timezone.utc).isoformat(),
         "is_admin": body.get("is_admin", False),
         "group": body.get("group", "users")
@@ -14266,6 +16824,7 @@ async def create_user_admin(request: Request):
             user_doc["pass_expires_at"] = (datetime.now(timezone.utc) + timedelta(days=365)).isoformat()
     
     await db.users.insert_one(user_doc)
+    await dashboard_stats.record("users", user_doc)
     
     # Remove password and _id from response
     response_doc = {k: v for k, v in user_doc.items() if k not in ["password", "_id"]}
@@ -14333,6 +16892,8 @@ async def update_user(user_id: str, request: Request):
     if update_data:
         update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
         await db.users.update_one({"user_id": user_id}, {"$set": update_data})
+        await invalidate_user_principal(user_id, reason="admin user update")
+        await dashboard_stats.mark_stale("users")
     
     return {"success": True, "message": "User updated successfully"}
 
@@ -14398,6 +16959,8 @@ async def delete_user(user_id: str, request: Request):
     
     # Delete user
     await db.users.delete_one({"user_id": user_id})
+    await invalidate_user_principal(user_id, user.get("email"), reason="user deleted")
+    await dashboard_stats.record_change("users", user, None)
     
     # Optionally delete related data (bookings, favorites, etc.)
     await db.favorites.delete_many({"user_id": user_id})
@@ -14421,6 +16984,7 @@ async def verify_user_email(user_id: str, request: Request):
         {"user_id": user_id},
         {"$set": {"email_verified": True, "verification_token": None}}
     )
+    await invalidate_user_principal(user_id, reason="email verified")
     
     return {"success": True, "message": "Email verified successfully"}
 
@@ -14443,7 +17007,7 @@ async def admin_reset_user_password(user_id: str, data: AdminResetPasswordReques
         raise HTTPException(status_code=404, detail="User not found")
     
     # Hash and update password
-    hashed_pw = hash_password(data.new_password)
+    hashed_pw = await hash_password(data.new_password)
     await db.users.update_one(
         {"user_id": user_id},
         {"$set": {"password": hashed_pw}}
@@ -14451,6 +17015,7 @@ async def admin_reset_user_password(user_id: str, data: AdminResetPasswordReques
     
     # Invalidate all user sessions
     await db.user_sessions.delete_many({"user_id": user_id})
+    await invalidate_user_principal(user_id, reason="admin password reset")
     
     # Also delete any password reset tokens
     await db.password_resets.delete_many({"user_id": user_id})
@@ -14458,6 +17023,14 @@ async def admin_reset_user_password(user_id: str, data: AdminResetPasswordReques
     logger.info(f"Admin reset password for user {user_id} ({user.get('email')})")
     return {"success": True, "message": "Password reset successfully"}
 
+@api_router.get("/admin/auth/password-hashing")
+async def get_password_hashing_stats(request: Request):
+    """bcrypt pool counters (hashes, verifications, rehashes, queue depth, latency)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return password_hasher.stats()
+
 @api_router.post("/admin/promo-codes")
 async def create_promo_code(promo: PromoCodeCreate, request: Request):
     """Create a new promo code"""
@@ -14519,6 +17092,14 @@ async def send_test_email_endpoint(request: Request, data: TestEmailRequest):
     
     return result
 
+@api_router.get("/admin/email/transport-stats")
+async def get_mail_transport_stats(request: Request):
+    """Pooled SMTP transport counters (sent, retries, sessions opened vs reused)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return mail_transport.stats()
+
 @api_router.post("/admin/email/test-all")
 async def send_all_test_emails(request: Request, data: TestEmailRequest):
     """Send all email types to test the templates"""
@@ -14701,14 +17282,7 @@ async def send_all_test_emails(request: Request, data: TestEmailRequest):
         msg['To'] = test_email
         msg.attach(MIMEText(html_content, 'html'))
         
-        def send_email():
-            with smtplib.SMTP(smtp_settings.get('host'), smtp_settings.get('port')) as server:
-                server.starttls()
-                server.login(smtp_settings.get('username'), smtp_settings.get('password'))
-                server.send_message(msg)
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, send_email)
+        await mail_transport.send(smtp_settings, msg)
         results["price_comparison_campaign_email"] = {"success": True}
     except Exception as e:
         results["price_comparison_campaign_email"] = {"success": False, "error": str(e)}
@@ -14799,14 +17373,7 @@ async def send_test_pass_expiration_email(request: Request, data: TestPassExpira
             msg['To'] = email
             msg.attach(MIMEText(email_body, 'html'))
             
-            def send_email_sync(msg_to_send, settings):
-                with smtplib.SMTP(settings['host'], settings['port']) as server:
-                    server.starttls()
-                    server.login(settings['username'], settings['password'])
-                    server.send_message(msg_to_send)
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, send_email_sync, msg, smtp_settings)
+            await mail_transport.send(smtp_settings, msg)
             
             logger.info(f"Test pass expiration email sent to {email}")
             results.append({"email": email, "success": True})
@@ -14913,38 +17480,50 @@ async def get_admin_stats(request: Request):
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    total_users = await db.users.count_documents({})
-    total_bookings = await db.bookings.count_documents({})
-    confirmed_bookings = await db.bookings.count_documents({"status": "confirmed"})
-    pending_bookings = await db.bookings.count_documents({"status": "pending_payment"})
-    
-    # Calculate revenue
-    pipeline = [
-        {"$match": {"status": "confirmed"}},
-        {"$group": {"_id": None, "total": {"$sum": "$final_price"}}}
-    ]
-    revenue_result = await db.bookings.aggregate(pipeline).to_list(1)
-    total_revenue = revenue_result[0]["total"] if revenue_result else 0
-    
-    # Pass sales
-    pass_holders = await db.users.count_documents({"pass_type": {"$in": ["one_time", "annual"]}})
-    annual_pass_holders = await db.users.count_documents({"pass_type": "annual"})
+    # Materialized counters (see dashboard_stats.py); revenue here is confirmed bookings' final_price
+    stats = await dashboard_stats.read()
     
     return {
-        "total_users": total_users,
-        "total_bookings": total_bookings,
-        "confirmed_bookings": confirmed_bookings,
-        "pending_bookings": pending_bookings,
-        "total_revenue": total_revenue,
-        "pass_holders": pass_holders,
-        "annual_pass_holders": annual_pass_holders
+        "total_users": stats["total_users"],
+        "total_bookings": stats["total_bookings"],
+        "confirmed_bookings": stats["confirmed_bookings"],
+        "pending_bookings": stats["pending_bookings"],
+        "total_revenue": stats["confirmed_revenue"],
+        "pass_holders": stats["pass_holders"],
+        "annual_pass_holders": stats["annual_pass_holders"]
     }
 
+@api_router.get("/admin/stats/status")
+async def get_admin_stats_status(request: Request):
+    """Materialized dashboard counters: per-section freshness and increment/recompute counts"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return await dashboard_stats.status()
+
+@api_router.post("/admin/stats/reconcile")
+async def reconcile_admin_stats(request: Request):
+    """Recompute the materialized dashboard counters from the collections now"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return {"success": True, "stats": await dashboard_stats.reconcile()}
+
 # ==================== NEWSLETTER MANAGEMENT ====================
 
+NEWSLETTER_SEND_CONCURRENCY = int(os.environ.get('NEWSLETTER_SEND_CONCURRENCY', '8'))  # messages in flight (sessions are capped by SMTP_POOL_SIZE)
+NEWSLETTER_SEND_RATE = float(os.environ.get('NEWSLETTER_SEND_RATE', '20'))  # messages per second, 0 = unlimited
+NEWSLETTER_BATCH_SIZE = int(os.environ.get('NEWSLETTER_BATCH_SIZE', '200'))  # recipients per checkpoint
+NEWSLETTER_DEFAULT_LANGUAGE = "en"
+
 class NewsletterSubscribeRequest(BaseModel):
     email: str
     name: Optional[str] = None
+    language: Optional[str] = None  # newsletter language; Accept-Language is used when missing
+
+class NewsletterVariant(BaseModel):
+    subject: str
+    content: str
 
 class NewsletterSendRequest(BaseModel):
     subject: str
@@ -14953,15 +17532,20 @@ class NewsletterSendRequest(BaseModel):
     include_last_minute: bool = True
     send_to_all: bool = False
     user_ids: Optional[List[str]] = None
+    translations: Optional[Dict[str, NewsletterVariant]] = None  # language -> subject/content for that language's recipients
 
 @api_router.post("/newsletter/subscribe")
-async def subscribe_newsletter(data: NewsletterSubscribeRequest):
+async def subscribe_newsletter(data: NewsletterSubscribeRequest, request: Request):
     """Public endpoint for newsletter subscription"""
     email = data.email.lower().strip()
+    language = preferred_language(request, data.language)
     
     # Check if already subscribed
     existing = await db.newsletter_subscribers.find_one({"email": email})
     if existing:
+        if data.language and language and language != existing.get("language"):
+            # An explicit choice updates the language newsletters are sent in
+            await db.newsletter_subscribers.update_one({"email": email}, {"$set": {"language": language}})
         return {"success": True, "message": "Already subscribed"}
     
     # Also check if user exists and update their subscription
@@ -14971,11 +17555,13 @@ async def subscribe_newsletter(data: NewsletterSubscribeRequest):
             {"email": email},
             {"$set": {"newsletter_subscribed": True, "newsletter_subscribed_at": datetime.now(timezone.utc).isoformat()}}
         )
+        await invalidate_user_principal(email=email, reason="newsletter")
     
     # Add to subscribers collection
     subscriber = {
         "email": email,
         "name": data.name,
+        "language": language,
         "subscribed_at": datetime.now(timezone.utc).isoformat(),
         "source": "website",
         "is_active": True
@@ -15001,6 +17587,7 @@ async def unsubscribe_newsletter(email: str):
         {"email": email},
         {"$set": {"newsletter_subscribed": False}}
     )
+    await invalidate_user_principal(email=email, reason="newsletter")
     
     return {"success": True, "message": "Successfully unsubscribed"}
 
@@ -15054,6 +17641,7 @@ async def toggle_user_newsletter(request: Request, user_id: str, subscribed: boo
         {"user_id": user_id},
         {"$set": update_data}
     )
+    await invalidate_user_principal(user_id, reason="newsletter")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -15182,41 +17770,229 @@ async def send_test_newsletter(request: Request, data: NewsletterSendRequest):
         logger.error(f"Failed to send test newsletter: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to send: {str(e)}")
 
+def newsletter_recipients_query(send_to_all: bool, user_ids: Optional[List[str]], after_email: Optional[str] = None):
+    """
+    Collection and aggregation pipeline yielding each recipient once as
+    {"_id": email, "language": ...}, sorted by email so a send can resume after
+    its last checkpointed address. Subscribers and subscribed users are merged
+    and deduplicated by lowercased email inside MongoDB.
+    """
+    recipient = {"$project": {
+        "_id": 0,
+        "email": {"$toLower": {"$trim": {"input": "$email"}}},
+        "language": {"$ifNull": ["$language", None]}
+    }}
+    if send_to_all:
+        collection = "newsletter_subscribers"
+        pipeline = [
+            {"$match": {"is_active": True, "email": {"$type": "string"}}},
+            recipient,
+            {"$unionWith": {"coll": "users", "pipeline": [
+                {"$match": {"newsletter_subscribed": True, "email": {"$type": "string"}}},
+                recipient
+            ]}}
+        ]
+    else:
+        collection = "users"
+        pipeline = [{"$match": {"user_id": {"$in": user_ids or []}, "email": {"$type": "string"}}}, recipient]
+
+    email_filter = {"$gt": after_email} if after_email else {"$ne": ""}
+    pipeline += [
+        {"$match": {"email": email_filter}},
+        # $max prefers a stored language over null when both sources have the address
+        {"$group": {"_id": "$email", "language": {"$max": "$language"}}},
+        {"$sort": {"_id": 1}}
+    ]
+    return collection, pipeline
+
+
+async def count_newsletter_recipients(send_to_all: bool, user_ids: Optional[List[str]]) -> int:
+    collection, pipeline = newsletter_recipients_query(send_to_all, user_ids)
+    pipeline = pipeline[:-1] + [{"$count": "total"}]
+    result = await db[collection].aggregate(pipeline, allowDiskUse=True).to_list(1)
+    return result[0]["total"] if result else 0
+
+
+def render_newsletter_variants(data: NewsletterSendRequest, last_minute_html: str) -> Dict[str, Dict]:
+    """Subject and HTML per language, rendered once for the whole send"""
+    variants = {NEWSLETTER_DEFAULT_LANGUAGE: {"subject": data.subject, "content": data.content}}
+    for language, variant in (data.translations or {}).items():
+        variants[language.lower()] = {"subject": variant.subject, "content": variant.content}
+    return {
+        language: {
+            "subject": variant["subject"],
+            "html": _build_newsletter_html(
+                subject=variant["subject"],
+                content=variant["content"],
+                image_url=data.image_url,
+                last_minute_html=last_minute_html
+            )
+        }
+        for language, variant in variants.items()
+    }
+
+
+def build_newsletter_message(smtp_settings: Dict, to_email: str, subject: str, body: MIMEText) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["From"] = f"{smtp_settings['from_name']} <{smtp_settings['from_email']}>"
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg["Reply-To"] = smtp_settings.get("company_support_email", smtp_settings["from_email"])
+    msg["List-Unsubscribe"] = f"<https://freestays.eu/unsubscribe?email={quote(to_email, safe='')}>"
+    # The encoded HTML part is shared by every message of the same language
+    msg.attach(body)
+    return msg
+
+
+async def run_newsletter_send(newsletter_id: str):
+    """
+    Deliver a queued newsletter: stream recipients in email order, send each batch
+    through the pooled SMTP transport (bounded concurrency, rate limited), and
+    checkpoint counts, throughput and the last address after every batch.
+    A rerun continues after the checkpoint; at most one batch is resent.
+    """
+    from pymongo import ReturnDocument
+
+    log = await db.newsletter_logs.find_one({"newsletter_id": newsletter_id}, {"_id": 0})
+    if not log:
+        raise PermanentJobError(f"Newsletter {newsletter_id} not found")
+    if log["status"] in ("completed", "cancelled"):
+        return
+    if log["status"] == "cancelling":
+        await db.newsletter_logs.update_one(
+            {"newsletter_id": newsletter_id},
+            {"$set": {"status": "cancelled", "finished_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        return
+
+    smtp_settings = await EmailService.get_smtp_settings()
+    if not smtp_settings.get("enabled"):
+        await db.newsletter_logs.update_one(
+            {"newsletter_id": newsletter_id},
+            {"$set": {"status": "failed", "last_error": "SMTP is disabled"}}
+        )
+        raise PermanentJobError("SMTP is disabled")
+
+    bodies = {language: MIMEText(variant["html"], "html", "utf-8") for language, variant in log["variants"].items()}
+    default_language = NEWSLETTER_DEFAULT_LANGUAGE
+    limiter = RateLimiter(log.get("send_rate", NEWSLETTER_SEND_RATE))
+    in_flight = asyncio.Semaphore(log.get("concurrency", NEWSLETTER_SEND_CONCURRENCY))
+    resumed_from = log.get("checkpoint")
+
+    await db.newsletter_logs.update_one(
+        {"newsletter_id": newsletter_id},
+        {
+            "$set": {"status": "running", "last_error": None, "updated_at": datetime.now(timezone.utc).isoformat()},
+            "$inc": {"runs": 1}
+        }
+    )
+    logger.info(f"📧 Newsletter {newsletter_id[:8]} delivering to {log['total_recipients']} recipients"
+                + (f" (resuming after {resumed_from})" if resumed_from else ""))
+
+    async def deliver(recipient: Dict) -> Optional[Dict]:
+        email = recipient["_id"]
+        language = (recipient.get("language") or "").lower()
+        if language not in bodies:
+            language = default_language
+        msg = build_newsletter_message(smtp_settings, email, log["variants"][language]["subject"], bodies[language])
+        async with in_flight:
+            await limiter.wait()
+            try:
+                await mail_transport.send(smtp_settings, msg)
+                return None
+            except Exception as e:
+                return {"email": email, "error": str(e)[:200]}
+
+    async def deliver_batch(batch: List[Dict], number: int) -> str:
+        start = time.perf_counter()
+        failures = [f for f in await asyncio.gather(*[deliver(r) for r in batch]) if f]
+        seconds = time.perf_counter() - start
+        sent = len(batch) - len(failures)
+        update = {
+            "$set": {"checkpoint": batch[-1]["_id"], "updated_at": datetime.now(timezone.utc).isoformat()},
+            "$inc": {"sent_count": sent, "failed_count": len(failures), "processed_count": len(batch)},
+            "$push": {"batches": {"$each": [{
+                "batch": number,
+                "recipients": len(batch),
+                "sent": sent,
+                "failed": len(failures),
+                "seconds": round(seconds, 2),
+                "per_second": round(len(batch) / seconds, 1) if seconds else None
+            }], "$slice": -200}}
+        }
+        if failures:
+            update["$push"]["failures"] = {"$each": failures, "$slice": -500}
+        result = await db.newsletter_logs.find_one_and_update(
+            {"newsletter_id": newsletter_id}, update, projection={"status": 1}, return_document=ReturnDocument.AFTER
+        )
+        return result["status"]
+
+    collection, pipeline = newsletter_recipients_query(log["send_to_all"], log.get("user_ids"), resumed_from)
+    number = len(log.get("batches", []))
+    batch: List[Dict] = []
+    try:
+        async for recipient in db[collection].aggregate(pipeline, allowDiskUse=True, batchSize=NEWSLETTER_BATCH_SIZE):
+            batch.append(recipient)
+            if len(batch) < NEWSLETTER_BATCH_SIZE:
+                continue
+            number += 1
+            status = await deliver_batch(batch, number)
+            batch = []
+            if status == "cancelling":
+                await db.newsletter_logs.update_one(
+                    {"newsletter_id": newsletter_id},
+                    {"$set": {"status": "cancelled", "finished_at": datetime.now(timezone.utc).isoformat()}}
+                )
+                logger.info(f"📧 Newsletter {newsletter_id[:8]} cancelled")
+                return
+        if batch:
+            number += 1
+            await deliver_batch(batch, number)
+    except asyncio.CancelledError:
+        # Shutdown: the job queue requeues the job, which resumes from the checkpoint
+        await asyncio.shield(db.newsletter_logs.update_one(
+            {"newsletter_id": newsletter_id}, {"$set": {"status": "queued"}}
+        ))
+        raise
+    except Exception as e:
+        await db.newsletter_logs.update_one(
+            {"newsletter_id": newsletter_id},
+            {"$set": {"status": "interrupted", "last_error": str(e)[:500]}}
+        )
+        raise
+
+    finished = datetime.now(timezone.utc)
+    log = await db.newsletter_logs.find_one_and_update(
+        {"newsletter_id": newsletter_id},
+        {"$set": {"status": "completed", "finished_at": finished.isoformat(), "checkpoint": None}},
+        projection={"_id": 0, "sent_count": 1, "failed_count": 1, "queued_at": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    seconds = (finished - datetime.fromisoformat(log["queued_at"])).total_seconds()
+    logger.info(f"📧 Newsletter {newsletter_id[:8]} sent: {log['sent_count']} delivered, "
+                f"{log['failed_count']} failed in {seconds:.0f}s")
+
+
+async def run_newsletter_send_job(payload: Dict):
+    await run_newsletter_send(payload["newsletter_id"])
+
+
+async def enqueue_newsletter_send(newsletter_id: str) -> Optional[str]:
+    return await job_queue.enqueue("newsletter.send", {"newsletter_id": newsletter_id},
+                                   dedupe_key=f"newsletter.send:{newsletter_id}")
+
+
 @api_router.post("/admin/newsletter/send")
 async def send_newsletter(request: Request, data: NewsletterSendRequest):
-    """Send newsletter to subscribers (admin only)"""
+    """Queue a newsletter for delivery to subscribers (admin only); progress is in newsletter_logs"""
     if not await verify_admin(request):
         raise HTTPException(status_code=401, detail="Admin access required")
     
-    # Collect recipient emails
-    recipients = []
-    
-    if data.send_to_all:
-        # Get all active newsletter subscribers
-        subscribers = await db.newsletter_subscribers.find(
-            {"is_active": True},
-            {"email": 1}
-        ).to_list(10000)
-        recipients.extend([s["email"] for s in subscribers])
-        
-        # Get all users with newsletter_subscribed = True
-        users = await db.users.find(
-            {"newsletter_subscribed": True},
-            {"email": 1}
-        ).to_list(10000)
-        recipients.extend([u["email"] for u in users])
-    elif data.user_ids:
-        # Get specific users
-        users = await db.users.find(
-            {"user_id": {"$in": data.user_ids}},
-            {"email": 1}
-        ).to_list(len(data.user_ids))
-        recipients.extend([u["email"] for u in users])
-    
-    # Remove duplicates
-    recipients = list(set(recipients))
-    
-    if not recipients:
+    if not data.send_to_all and not data.user_ids:
+        raise HTTPException(status_code=400, detail="No recipients found")
+    
+    total_recipients = await count_newsletter_recipients(data.send_to_all, data.user_ids)
+    if not total_recipients:
         raise HTTPException(status_code=400, detail="No recipients found")
     
     # Get last minute deals for newsletter
@@ -15230,48 +18006,85 @@ async def send_newsletter(request: Request, data: NewsletterSendRequest):
         except Exception as e:
             logger.warning(f"Failed to get last minute deals for newsletter: {e}")
     
-    # Build email HTML
-    email_html = _build_newsletter_html(
-        subject=data.subject,
-        content=data.content,
-        image_url=data.image_url,
-        last_minute_html=last_minute_html
-    )
-    
-    # Send to all recipients
-    sent_count = 0
-    failed_count = 0
-    
-    for email in recipients:
-        try:
-            await send_email_via_smtp(
-                to_email=email,
-                subject=data.subject,
-                html_content=email_html
-            )
-            sent_count += 1
-        except Exception as e:
-            logger.warning(f"Failed to send newsletter to {email}: {e}")
-            failed_count += 1
-    
-    # Log the newsletter send
+    newsletter_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
     await db.newsletter_logs.insert_one({
+        "newsletter_id": newsletter_id,
         "subject": data.subject,
-        "sent_at": datetime.now(timezone.utc).isoformat(),
-        "total_recipients": len(recipients),
-        "sent_count": sent_count,
-        "failed_count": failed_count,
-        "include_last_minute": data.include_last_minute
+        "sent_at": now,
+        "queued_at": now,
+        "status": "queued",
+        "send_to_all": data.send_to_all,
+        "user_ids": None if data.send_to_all else data.user_ids,
+        "include_last_minute": data.include_last_minute,
+        "variants": render_newsletter_variants(data, last_minute_html),
+        "concurrency": NEWSLETTER_SEND_CONCURRENCY,
+        "send_rate": NEWSLETTER_SEND_RATE,
+        "total_recipients": total_recipients,
+        "processed_count": 0,
+        "sent_count": 0,
+        "failed_count": 0,
+        "checkpoint": None,
+        "runs": 0,
+        "batches": [],
+        "failures": []
     })
+    await enqueue_newsletter_send(newsletter_id)
     
-    logger.info(f"📧 Newsletter sent: {sent_count} delivered, {failed_count} failed")
+    logger.info(f"📧 Newsletter {newsletter_id[:8]} queued for {total_recipients} recipients")
     return {
         "success": True,
-        "sent_count": sent_count,
-        "failed_count": failed_count,
-        "total_recipients": len(recipients)
+        "newsletter_id": newsletter_id,
+        "status": "queued",
+        "total_recipients": total_recipients
     }
 
+@api_router.get("/admin/newsletter/sends/{newsletter_id}")
+async def get_newsletter_send(request: Request, newsletter_id: str):
+    """Live delivery progress and per-batch throughput of a newsletter send (admin only)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    log = await db.newsletter_logs.find_one({"newsletter_id": newsletter_id}, {"_id": 0, "variants": 0})
+    if not log:
+        raise HTTPException(status_code=404, detail="Newsletter send not found")
+    
+    total = log.get("total_recipients") or 0
+    log["progress_percent"] = round(log.get("processed_count", 0) / total * 100, 1) if total else 100.0
+    recent = log.get("batches", [])[-5:]
+    rates = [b["per_second"] for b in recent if b.get("per_second")]
+    log["current_per_second"] = round(sum(rates) / len(rates), 1) if rates else None
+    return log
+
+@api_router.post("/admin/newsletter/sends/{newsletter_id}/resume")
+async def resume_newsletter_send(request: Request, newsletter_id: str):
+    """Continue an interrupted, failed or cancelled newsletter send from its checkpoint (admin only)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    log = await db.newsletter_logs.find_one_and_update(
+        {"newsletter_id": newsletter_id, "status": {"$in": ["interrupted", "failed", "cancelled"]}},
+        {"$set": {"status": "queued", "last_error": None}}
+    )
+    if not log:
+        raise HTTPException(status_code=409, detail="Newsletter send is not resumable")
+    await enqueue_newsletter_send(newsletter_id)
+    return {"success": True, "newsletter_id": newsletter_id, "resumed_after": log.get("checkpoint")}
+
+@api_router.post("/admin/newsletter/sends/{newsletter_id}/cancel")
+async def cancel_newsletter_send(request: Request, newsletter_id: str):
+    """Stop a newsletter send after its current batch (admin only)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    result = await db.newsletter_logs.update_one(
+        {"newsletter_id": newsletter_id, "status": {"$in": ["queued", "running"]}},
+        {"$set": {"status": "cancelling"}}
+    )
+    if not result.modified_count:
+        raise HTTPException(status_code=409, detail="Newsletter send is not running")
+    return {"success": True, "newsletter_id": newsletter_id}
+
 @api_router.get("/admin/newsletter/logs")
 async def get_newsletter_logs(request: Request, limit: int = 20):
     """Get newsletter send history (admin only)"""
@@ -15280,7 +18093,7 @@ async def get_newsletter_logs(request: Request, limit: int = 20):
     
     logs = await db.newsletter_logs.find(
         {},
-        {"_id": 0}
+        {"_id": 0, "variants": 0, "batches": 0, "failures": 0}
     ).sort("sent_at", -1).limit(limit).to_list(limit)
     
     return {"logs": logs}
@@ -15551,13 +18364,11 @@ async def push_update_to_all(request: Request):
     message = body.get("message", "A new version of FreeStays is available! Please refresh the app.")
     title = body.get("title", "FreeStays Update Available")
     
-    # Get all installs with push subscriptions
-    installs = await db.pwa_installs.find(
-        {"push_subscription": {"$ne": None}},
-        {"_id": 0, "install_id": 1, "push_subscription": 1, "user_email": 1}
-    ).to_list(1000)
+    # Count installs with push subscriptions (they are streamed by the dispatcher)
+    push_query = {"push_subscription": {"$ne": None}}
+    push_installs = await db.pwa_installs.count_documents(push_query)
     
-    if not installs:
+    if not push_installs:
         # Still record the update for all installs
         all_installs = await db.pwa_installs.count_documents({})
         update_record = {
@@ -15578,22 +18389,30 @@ async def push_update_to_all(request: Request):
                 "pwa_update_message": message
             }}
         )
+        await refresh_settings_cache()
         
         return {"success": True, "sent": all_installs, "message": f"Update notification queued for {all_installs} devices", "update_id": update_record["update_id"]}
     
-    # Note: Push notifications require VAPID keys and pywebpush library
-    # For now, we'll record the update request and instruct clients to check for updates
+    delivery = await push_dispatcher.broadcast(
+        db.pwa_installs,
+        push_query,
+        push_notification_payload(title, message, "/"),
+        subscription_field="push_subscription",
+        gone_update={"$set": {"push_subscription": None}}
+    )
+    
     update_record = {
         "update_id": str(uuid.uuid4()),
         "title": title,
         "message": message,
         "created_at": datetime.now(timezone.utc).isoformat(),
-        "target_installs": len(installs),
+        "target_installs": push_installs,
+        "delivery": delivery,
         "sent_by": "admin"
     }
     await db.pwa_updates.insert_one(update_record)
     
-    # Increment the app version in settings to trigger service worker update
+    # Flag the update in settings so clients without push pick it up on their next check
     await db.settings.update_one(
         {"type": "app_settings"},
         {"$set": {
@@ -15601,11 +18420,14 @@ async def push_update_to_all(request: Request):
             "pwa_update_message": message
         }}
     )
+    await refresh_settings_cache()
     
     return {
         "success": True,
-        "sent": len(installs),
-        "message": f"Update notification queued for {len(installs)} devices",
+        "sent": delivery["sent"],
+        "failed": delivery["failed"],
+        "deactivated": delivery["deactivated"],
+        "message": f"Update notification sent to {delivery['sent']} of {push_installs} devices",
         "update_id": update_record["update_id"]
     }
 
@@ -16791,6 +19613,159 @@ async def admin_delete_blog_post(request: Request, post_id: str):
     
     return {"success": True}
 
+# ==================== BACKGROUND JOBS ====================
+
+# EmailService senders that can be queued by name
+QUEUED_EMAIL_METHODS = {
+    "send_verification_email",
+    "send_password_reset_email",
+    "send_referral_welcome_email",
+    "send_referrer_notification_email",
+    "send_referral_milestone_email",
+}
+
+# Email results that mean SMTP is not set up; retrying cannot help
+EMAIL_SKIP_ERRORS = ("disabled", "not configured")
+
+async def enqueue_email(method: str, *args, **kwargs) -> Optional[str]:
+    """Queue an EmailService send_* call"""
+    return await job_queue.enqueue("email", {"method": method, "args": list(args), "kwargs": kwargs})
+
+def raise_for_email_result(result):
+    """Turn a failed EmailService result into an exception so the job is retried"""
+    if isinstance(result, dict) and not result.get("success", True):
+        error = str(result.get("error") or result.get("message") or "Email not sent")
+        if any(skip in error.lower() for skip in EMAIL_SKIP_ERRORS):
+            logger.warning(f"Queued email skipped: {error}")
+            return
+        raise RuntimeError(error)
+
+async def run_email_job(payload: Dict):
+    method = payload["method"]
+    if method not in QUEUED_EMAIL_METHODS:
+        raise PermanentJobError(f"Unknown email method: {method}")
+    result = await getattr(EmailService, method)(*payload.get("args", []), **payload.get("kwargs", {}))
+    raise_for_email_result(result)
+
+async def run_email_message_job(payload: Dict):
+    """Send one prepared HTML message (optional Reply-To / From) with the configured SMTP account"""
+    smtp_settings = await EmailService.get_smtp_settings()
+    if not smtp_settings.get("enabled"):
+        logger.warning(f"SMTP not enabled, queued email to {payload['to_email']} not sent")
+        return
+    smtp_from = (payload.get("from_addr") or smtp_settings.get("from_email")
+                 or smtp_settings.get("company_support_email") or "info@freestays.eu")
+
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = payload["subject"]
+    msg['From'] = smtp_from
+    msg['To'] = payload["to_email"]
+    if payload.get("reply_to"):
+        msg['Reply-To'] = payload["reply_to"]
+    msg.attach(MIMEText(payload["html_content"], 'html'))
+
+    await mail_transport.send(smtp_settings, msg, from_addr=smtp_from, to_addrs=[payload["to_email"]])
+    logger.info(f"Queued email sent to {payload['to_email']}: {payload['subject']}")
+
+async def run_comparison_email_job(payload: Dict):
+    await PriceComparisonService.send_comparison_email(payload["comparison"], payload.get("visitor_email"))
+
+async def run_follow_up_email_job(payload: Dict):
+    await PriceComparisonService.send_follow_up_email(payload["comparison"])
+
+async def run_follow_up_emails_job(payload: Dict):
+    await PriceComparisonService.process_follow_up_emails()
+
+async def run_precache_job(payload: Dict):
+    country_code = payload["country_code"]
+    await precache_hotel_searches(country_code, COUNTRY_DESTINATIONS.get(country_code, COUNTRY_DESTINATIONS["NL"]))
+
+async def run_static_catalog_sync_job(payload: Dict):
+    await scheduled_static_catalog_sync(payload.get("hotel_ids"))
+
+async def run_cache_warming_job(payload: Dict):
+    await scheduled_cache_warming()
+
+async def run_auto_sync_job(payload: Dict):
+    await scheduled_hotel_image_sync()
+
+async def run_voucher_email_job(payload: Dict):
+    booking = await db.bookings.find_one({"booking_id": payload["booking_id"]}, {"_id": 0})
+    if not booking:
+        raise PermanentJobError(f"Booking {payload['booking_id']} not found")
+    if not await EmailService.send_voucher_email(booking, payload["voucher_url"]):
+        if (await EmailService.get_smtp_settings()).get("enabled"):
+            raise RuntimeError(f"Voucher email for {payload['booking_id']} not sent")
+
+async def run_payment_reminder_job(payload: Dict):
+    result = await EmailService.send_generic_email(
+        to_email=payload["to_email"],
+        subject=payload["subject"],
+        html_content=payload["html_content"]
+    )
+    raise_for_email_result(result)
+    if result.get("success"):
+        await db.bookings.update_one(
+            {"booking_id": payload["booking_id"]},
+            {"$set": {"payment_reminder_sent": True, "payment_reminder_sent_at": datetime.now(timezone.utc).isoformat()}}
+        )
+
+async def run_email_forwarding_job(payload: Dict):
+    result = await SunhotelsEmailForwarder.check_and_forward_emails()
+    logger.info(f"Manual email forwarding result: {result}")
+
+async def run_checkin_reminders_job(payload: Dict):
+    result = await CheckInReminderService.check_and_send_reminders()
+    logger.info(f"Manual check-in reminder result: {result}")
+
+def register_background_jobs():
+    """Job types handled by this process and their worker pool sizes"""
+    job_queue.register("email", run_email_job, concurrency=4)
+    job_queue.register("email.message", run_email_message_job, concurrency=4)
+    job_queue.register("price_comparison.email", run_comparison_email_job, concurrency=2)
+    job_queue.register("price_comparison.follow_up", run_follow_up_email_job, concurrency=2)
+    job_queue.register("price_comparison.follow_ups", run_follow_up_emails_job, max_attempts=2)
+    job_queue.register("warmup.precache", run_precache_job, concurrency=2, max_attempts=1, timeout=300)
+    job_queue.register("static_catalog.sync", run_static_catalog_sync_job, max_attempts=2)
+    job_queue.register("cache.warm", run_cache_warming_job, max_attempts=1)
+    job_queue.register("db_sync.auto_sync", run_auto_sync_job, max_attempts=1)
+    job_queue.register("booking.voucher_email", run_voucher_email_job, concurrency=2)
+    job_queue.register("booking.payment_reminder", run_payment_reminder_job, concurrency=2)
+    job_queue.register("email_forwarding.check", run_email_forwarding_job, max_attempts=2)
+    job_queue.register("checkin_reminders.check", run_checkin_reminders_job, max_attempts=2)
+    job_queue.register("lastminute.harvest", run_lastminute_harvest_job, concurrency=1, max_attempts=3, backoff_base=60)
+    job_queue.register("newsletter.send", run_newsletter_send_job, concurrency=1, max_attempts=3, backoff_base=60)
+
+@api_router.get("/admin/jobs/stats")
+async def get_job_queue_stats(request: Request):
+    """Queue depth, last-hour throughput and latency per background job type"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    return await job_queue.stats()
+
+@api_router.get("/admin/jobs/dead")
+async def get_dead_jobs(request: Request, job_type: Optional[str] = None, limit: int = 50):
+    """Dead-lettered background jobs (failed on every attempt)"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    query = {"status": "dead"}
+    if job_type:
+        query["type"] = job_type
+    jobs = await db.background_jobs.find(query, {"_id": 0, "payload": 0}).sort("finished_at", -1).to_list(min(limit, 200))
+    return FastJSONResponse({"jobs": jobs, "total": await db.background_jobs.count_documents(query)})
+
+@api_router.post("/admin/jobs/{job_id}/retry")
+async def retry_dead_job(request: Request, job_id: str):
+    """Requeue a dead-lettered background job"""
+    if not await verify_admin(request):
+        raise HTTPException(status_code=401, detail="Admin access required")
+    
+    if not await job_queue.retry(job_id):
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    return {"success": True, "job_id": job_id}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -16829,6 +19804,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 # ==================== SCHEDULED JOBS ====================
 
 async def scheduled_price_drop_check():
@@ -16899,27 +19876,9 @@ async def scheduled_hotel_image_sync():
         
         logger.info(f"🔄 Starting scheduled hotel image sync (batch size: {batch_size})...")
         
-        # Get database config
-        db_config = await sunhotels_client.get_static_db_connection()
-        if not db_config["host"]:
-            logger.warning("Auto-sync: Static database not configured")
-            return
-        
         try:
-            conn = await asyncio.wait_for(
-                aiomysql.connect(
-                    host=db_config["host"],
-                    port=db_config["port"],
-                    user=db_config["user"],
-                    password=db_config["password"],
-                    db=db_config["database"],
-                    charset='utf8mb4'
-                ),
-                timeout=10
-            )
-            
             # Get hotels missing images
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
+            async with mysql_connection(timeout=10) as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute("""
                     SELECT a.hotel_id, a.display_name
                     FROM ghwk_autocomplete_lookup a
@@ -16931,7 +19890,6 @@ async def scheduled_hotel_image_sync():
                 hotels_to_sync = await cursor.fetchall()
             
             if not hotels_to_sync:
-                conn.close()
                 logger.info("Auto-sync: No hotels need syncing")
                 # Update last sync timestamp
                 await db.settings.update_one(
@@ -16941,6 +19899,7 @@ async def scheduled_hotel_image_sync():
                         "auto_sync_last_result": {"synced": 0, "failed": 0, "message": "No hotels need syncing"}
                     }}
                 )
+                await refresh_settings_cache()
                 return
             
             # Get credentials
@@ -16978,40 +19937,14 @@ async def scheduled_hotel_image_sync():
                             if images:
                                 images_json = json.dumps([{"id": img} if not str(img).startswith("http") else {"id": img} for img in images])
                                 
-                                async with conn.cursor() as cursor:
-                                    await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
-                                    exists = await cursor.fetchone()
-                                    
-                                    if exists:
-                                        await cursor.execute(
-                                            "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
-                                            (images_json, hotel_id)
-                                        )
-                                    else:
-                                        await cursor.execute(
-                                            "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
-                                            (hotel_id, images_json)
-                                        )
+                                await store_bravo_hotel_images(hotel_id, images_json)
                                 
                                 synced += 1
                                 logger.info(f"Auto-sync: ✓ Hotel {hotel_id} synced with {len(images)} images")
                             else:
                                 # Hotel exists in API but has no images - mark as checked with empty array
                                 # This prevents re-checking the same hotel repeatedly
-                                async with conn.cursor() as cursor:
-                                    await cursor.execute("SELECT hotel_id FROM ghwk_bravo_hotels WHERE hotel_id = %s", (hotel_id,))
-                                    exists = await cursor.fetchone()
-                                    
-                                    if exists:
-                                        await cursor.execute(
-                                            "UPDATE ghwk_bravo_hotels SET images_json = %s WHERE hotel_id = %s",
-                                            ('[]', hotel_id)  # Empty array to mark as checked
-                                        )
-                                    else:
-                                        await cursor.execute(
-                                            "INSERT INTO ghwk_bravo_hotels (hotel_id, images_json) VALUES (%s, %s)",
-                                            (hotel_id, '[]')
-                                        )
+                                await store_bravo_hotel_images(hotel_id, '[]')  # Empty array to mark as checked
                                 
                                 no_images += 1
                                 logger.debug(f"Auto-sync: Hotel {hotel_id} has no images in Sunhotels API")
@@ -17026,11 +19959,9 @@ async def scheduled_hotel_image_sync():
                     # Rate limiting - 0.5s delay between API calls
                     await asyncio.sleep(0.5)
             
-            await conn.commit()
-            conn.close()
-            
-            # Clear autocomplete cache
-            autocomplete_cache.clear()
+            # Clear autocomplete cache and reload thumbnails into the index
+            await autocomplete_cache.aclear()
+            autocomplete_index.request_refresh()
             
             # Update sync results in settings - include no_images count
             checked_count = synced + no_images  # Hotels we successfully checked (with or without images)
@@ -17048,9 +19979,12 @@ async def scheduled_hotel_image_sync():
                     }
                 }}
             )
+            await refresh_settings_cache()
             
             logger.info(f"✅ Auto-sync complete: {synced} synced with images, {no_images} no images in API, {failed} errors (total: {len(hotels_to_sync)})")
             
+        except StaticDBUnavailable as e:
+            logger.warning(f"Auto-sync: {e}")
         except asyncio.TimeoutError:
             logger.error("Auto-sync: Database connection timeout")
         except Exception as e:
@@ -17061,6 +19995,15 @@ async def scheduled_hotel_image_sync():
 
 # ==================== SUNHOTELS EMAIL FORWARDING SERVICE ====================
 
+def forwarder_smtp_account(smtp_settings: Dict) -> Dict:
+    """mail_transport account for the smtp_* settings used by the forwarding and reminder services"""
+    return {
+        "host": smtp_settings["smtp_host"],
+        "port": int(smtp_settings["smtp_port"]),
+        "username": smtp_settings["smtp_user"],
+        "password": smtp_settings["smtp_password"]
+    }
+
 class SunhotelsEmailForwarder:
     """Service to check Sunhotels voucher emails and forward them with FreeStays branding"""
     
@@ -17344,16 +20287,10 @@ class SunhotelsEmailForwarder:
             
             msg.attach(MIMEText(html_content, 'html'))
             
-            # Connect and send
-            if smtp_settings["smtp_port"] == 465:
-                server = smtplib.SMTP_SSL(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-            else:
-                server = smtplib.SMTP(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-                server.starttls()
-            
-            server.login(smtp_settings["smtp_user"], smtp_settings["smtp_password"])
-            server.sendmail(smtp_settings["smtp_from"], customer_email, msg.as_string())
-            server.quit()
+            # Send through the pooled SMTP transport
+            await mail_transport.send(
+                forwarder_smtp_account(smtp_settings), msg, from_addr=smtp_settings["smtp_from"], to_addrs=[customer_email]
+            )
             
             logger.info(f"✅ Forwarded voucher email to {customer_email} for booking {voucher_info.get('sunhotels_ref')}")
             return True
@@ -17362,113 +20299,195 @@ class SunhotelsEmailForwarder:
             logger.error(f"Error sending branded voucher email: {str(e)}")
             return False
     
+    @staticmethod
+    def parse_voucher_email(raw_email: bytes) -> tuple:
+        """Subject and extracted voucher info of a raw message (CPU-bound, run in a thread)"""
+        email_message = email.message_from_bytes(raw_email)
+        
+        # Decode subject
+        subject = SunhotelsEmailForwarder.decode_email_header(email_message['Subject'])
+        
+        # Get email body
+        body = ""
+        if email_message.is_multipart():
+            for part in email_message.walk():
+                content_type = part.get_content_type()
+                if content_type == "text/plain":
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        body = payload.decode('utf-8', errors='ignore')
+                        break
+                elif content_type == "text/html" and not body:
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        # Strip HTML tags for basic parsing
+                        html_body = payload.decode('utf-8', errors='ignore')
+                        body = re.sub('<[^<]+?>', ' ', html_body)
+        else:
+            payload = email_message.get_payload(decode=True)
+            if payload:
+                body = payload.decode('utf-8', errors='ignore')
+        
+        return subject, SunhotelsEmailForwarder.extract_voucher_info(subject, body)
+    
+    @staticmethod
+    async def forward_voucher(uid: int, raw_email: bytes) -> Optional[Dict]:
+        """Parse one fetched voucher email and send the branded copy; returns the forwarded_vouchers record"""
+        subject, voucher_info = await asyncio.to_thread(SunhotelsEmailForwarder.parse_voucher_email, raw_email)
+        if not voucher_info.get("sunhotels_ref"):
+            return None
+        if not await SunhotelsEmailForwarder.send_branded_voucher_email(voucher_info):
+            raise RuntimeError(f"Voucher {voucher_info['sunhotels_ref']} (UID {uid}) not forwarded")
+        return {
+            "sunhotels_ref": voucher_info["sunhotels_ref"],
+            "voucher_info": voucher_info,
+            "forwarded_at": datetime.now(timezone.utc).isoformat(),
+            "original_subject": subject,
+            "imap_uid": uid
+        }
+    
     @staticmethod
     async def check_and_forward_emails():
-        """Check inbox for Sunhotels voucher emails and forward them"""
+        """
+        Forward Sunhotels voucher emails that arrived since the last check. Only UIDs
+        above the stored last_uid are searched; subjects are read from headers, refs
+        already in forwarded_vouchers are skipped with one query, and only the
+        remaining messages' bodies are fetched (in batches) and parsed off the loop.
+        """
         if not IMAP_PASSWORD:
             logger.warning("IMAP password not configured - skipping email forwarding check")
             return {"processed": 0, "error": "IMAP not configured"}
         
-        processed = 0
-        errors = 0
-        
+        mailbox = get_voucher_mailbox()
+        # hold() ends the watcher's IDLE and keeps it from starting a new one until this check is done
+        async with mailbox.hold(), voucher_mailbox_lock:
+            processed = 0
+            errors = 0
+            try:
+                await mailbox.connect()
+                state = await db.email_forwarding_state.find_one({"mailbox": IMAP_EMAIL}) or {}
+                last_uid = state.get("last_uid", 0) if state.get("uidvalidity") == mailbox.uidvalidity else 0
+                
+                # Unread Sunhotels voucher emails, subject pattern: "Voucher SH*"
+                uids = await mailbox.search(last_uid, '(UNSEEN SUBJECT "Voucher SH")')
+                if uids:
+                    logger.info(f"Found {len(uids)} new Sunhotels voucher emails")
+                
+                refs = {}
+                for uid, header in (await mailbox.fetch_headers(uids, "SUBJECT")).items():
+                    subject = SunhotelsEmailForwarder.decode_email_header(
+                        email.message_from_bytes(header)["Subject"]
+                    )
+                    ref_match = re.search(r'Voucher\s+SH(\d+)', subject, re.IGNORECASE)
+                    if ref_match:
+                        refs[uid] = f"SH{ref_match.group(1)}"
+                
+                # Check which vouchers were already forwarded (one query for the whole batch)
+                forwarded = set()
+                if refs:
+                    forwarded = set(await db.forwarded_vouchers.distinct(
+                        "sunhotels_ref", {"sunhotels_ref": {"$in": list(set(refs.values()))}}
+                    ))
+                to_forward = {}
+                for uid, ref in sorted(refs.items()):
+                    if ref in forwarded:
+                        logger.info(f"Voucher {ref} already forwarded, skipping")
+                    elif ref not in to_forward.values():
+                        to_forward[uid] = ref
+                
+                failed = set()
+                for i in range(0, len(to_forward), IMAP_FETCH_BATCH):
+                    batch = list(to_forward)[i:i + IMAP_FETCH_BATCH]
+                    messages = await mailbox.fetch_messages(batch)
+                    failed.update(uid for uid in batch if uid not in messages)
+                    fetched = [uid for uid in batch if uid in messages]
+                    results = await asyncio.gather(
+                        *[SunhotelsEmailForwarder.forward_voucher(uid, messages[uid]) for uid in fetched],
+                        return_exceptions=True
+                    )
+                    records = []
+                    for uid, result in zip(fetched, results):
+                        if isinstance(result, Exception):
+                            logger.error(f"Error processing voucher email: {result}")
+                            failed.add(uid)
+                        elif result:
+                            records.append(result)
+                    if records:
+                        # Mark as processed in database
+                        await db.forwarded_vouchers.insert_many(records)
+                        processed += len(records)
+                errors = len(failed)
+                
+                # Mark emails as read and remember where the next check starts; failed vouchers
+                # stay unread and last_uid stops just below the first one, so they are retried
+                await mailbox.mark_seen([uid for uid in uids if uid not in failed])
+                if uids:
+                    next_uid = min(failed) - 1 if failed else uids[-1]
+                    await db.email_forwarding_state.update_one(
+                        {"mailbox": IMAP_EMAIL},
+                        {"$set": {"uidvalidity": mailbox.uidvalidity, "last_uid": next_uid,
+                                  "checked_at": datetime.now(timezone.utc).isoformat()}},
+                        upsert=True
+                    )
+                
+                if uids:
+                    logger.info(f"Email forwarding complete: {processed} processed, {errors} errors")
+                return {"processed": processed, "errors": errors, "scanned": len(uids)}
+                
+            except Exception as e:
+                logger.error(f"IMAP connection error: {str(e)}")
+                return {"processed": processed, "error": str(e)}
+
+voucher_mailbox: Optional[IMAPMailbox] = None
+voucher_mailbox_lock = asyncio.Lock()
+voucher_mailbox_watcher: Optional[asyncio.Task] = None
+
+def get_voucher_mailbox() -> IMAPMailbox:
+    """Persistent session on the Sunhotels voucher inbox"""
+    global voucher_mailbox
+    if voucher_mailbox is None:
+        voucher_mailbox = IMAPMailbox(IMAP_SERVER, IMAP_PORT, IMAP_EMAIL, IMAP_PASSWORD, use_ssl=IMAP_USE_SSL)
+    return voucher_mailbox
+
+async def watch_voucher_mailbox():
+    """Forward vouchers as they arrive: check, then IDLE until the server announces new mail"""
+    mailbox = get_voucher_mailbox()
+    failures = 0
+    while True:
         try:
-            # Connect to IMAP server
-            logger.info(f"Connecting to IMAP server {IMAP_SERVER}...")
-            mail = imaplib.IMAP4_SSL(IMAP_SERVER, IMAP_PORT)
-            mail.login(IMAP_EMAIL, IMAP_PASSWORD)
-            mail.select('INBOX')
-            
-            # Search for unread Sunhotels voucher emails
-            # Subject pattern: "Voucher SH*"
-            status, messages = mail.search(None, '(UNSEEN SUBJECT "Voucher SH")')
-            
-            if status != 'OK':
-                logger.error("Failed to search emails")
-                mail.logout()
-                return {"processed": 0, "error": "Search failed"}
-            
-            email_ids = messages[0].split()
-            logger.info(f"Found {len(email_ids)} unread Sunhotels voucher emails")
-            
-            for email_id in email_ids:
-                try:
-                    # Fetch the email
-                    status, msg_data = mail.fetch(email_id, '(RFC822)')
-                    if status != 'OK':
-                        continue
-                    
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
-                    
-                    # Decode subject
-                    subject = SunhotelsEmailForwarder.decode_email_header(email_message['Subject'])
-                    
-                    # Get email body
-                    body = ""
-                    if email_message.is_multipart():
-                        for part in email_message.walk():
-                            content_type = part.get_content_type()
-                            if content_type == "text/plain":
-                                payload = part.get_payload(decode=True)
-                                if payload:
-                                    body = payload.decode('utf-8', errors='ignore')
-                                    break
-                            elif content_type == "text/html" and not body:
-                                payload = part.get_payload(decode=True)
-                                if payload:
-                                    # Strip HTML tags for basic parsing
-                                    html_body = payload.decode('utf-8', errors='ignore')
-                                    body = re.sub('<[^<]+?>', ' ', html_body)
-                    else:
-                        payload = email_message.get_payload(decode=True)
-                        if payload:
-                            body = payload.decode('utf-8', errors='ignore')
-                    
-                    # Extract voucher info
-                    voucher_info = SunhotelsEmailForwarder.extract_voucher_info(subject, body)
-                    
-                    if voucher_info.get("sunhotels_ref"):
-                        # Check if we already processed this voucher
-                        existing = await db.forwarded_vouchers.find_one({
-                            "sunhotels_ref": voucher_info["sunhotels_ref"]
-                        })
-                        
-                        if not existing:
-                            # Send branded email
-                            success = await SunhotelsEmailForwarder.send_branded_voucher_email(voucher_info)
-                            
-                            if success:
-                                # Mark as processed in database
-                                await db.forwarded_vouchers.insert_one({
-                                    "sunhotels_ref": voucher_info["sunhotels_ref"],
-                                    "voucher_info": voucher_info,
-                                    "forwarded_at": datetime.now(timezone.utc).isoformat(),
-                                    "original_subject": subject
-                                })
-                                processed += 1
-                            else:
-                                errors += 1
-                        else:
-                            logger.info(f"Voucher {voucher_info['sunhotels_ref']} already forwarded, skipping")
-                    
-                    # Mark email as read
-                    mail.store(email_id, '+FLAGS', '\\Seen')
-                    
-                except Exception as e:
-                    logger.error(f"Error processing email {email_id}: {str(e)}")
-                    errors += 1
-            
-            mail.logout()
-            logger.info(f"Email forwarding complete: {processed} processed, {errors} errors")
-            return {"processed": processed, "errors": errors}
-            
+            result = await SunhotelsEmailForwarder.check_and_forward_emails()
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            failures = 0
+            await mailbox.idle()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"IMAP connection error: {str(e)}")
-            return {"processed": 0, "error": str(e)}
+            failures += 1
+            delay = min(300, 15 * 2 ** (failures - 1))
+            logger.warning(f"📬 Voucher mailbox watcher error ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+def start_voucher_mailbox_watcher():
+    global voucher_mailbox_watcher
+    if IMAP_PASSWORD and IMAP_WATCH_ENABLED and voucher_mailbox_watcher is None:
+        voucher_mailbox_watcher = asyncio.create_task(watch_voucher_mailbox())
+        logger.info(f"📬 Watching {IMAP_EMAIL} for Sunhotels vouchers")
+
+async def stop_voucher_mailbox_watcher():
+    global voucher_mailbox_watcher, voucher_mailbox
+    if voucher_mailbox_watcher is not None:
+        voucher_mailbox_watcher.cancel()
+        await asyncio.gather(voucher_mailbox_watcher, return_exceptions=True)
+        voucher_mailbox_watcher = None
+    if voucher_mailbox is not None:
+        await voucher_mailbox.close()
+        voucher_mailbox = None
 
 async def scheduled_email_forwarding():
-    """Scheduled job to check and forward Sunhotels voucher emails"""
+    """Scheduled job to check and forward Sunhotels voucher emails (fallback when the watcher is not running)"""
+    if voucher_mailbox_watcher is not None and not voucher_mailbox_watcher.done():
+        return
     try:
         logger.info("Running scheduled Sunhotels email forwarding check...")
         result = await SunhotelsEmailForwarder.check_and_forward_emails()
@@ -17666,16 +20685,10 @@ class CheckInReminderService:
             
             msg.attach(MIMEText(html_content, 'html'))
             
-            # Connect and send
-            if smtp_settings["smtp_port"] == 465:
-                server = smtplib.SMTP_SSL(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-            else:
-                server = smtplib.SMTP(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-                server.starttls()
-            
-            server.login(smtp_settings["smtp_user"], smtp_settings["smtp_password"])
-            server.sendmail(smtp_settings["smtp_from"], guest_email, msg.as_string())
-            server.quit()
+            # Send through the pooled SMTP transport
+            await mail_transport.send(
+                forwarder_smtp_account(smtp_settings), msg, from_addr=smtp_settings["smtp_from"], to_addrs=[guest_email]
+            )
             
             logger.info(f"✅ Sent check-in reminder to {guest_email} for {hotel_name}")
             return True
@@ -17871,15 +20884,9 @@ class PostStayFeedbackService:
             msg['To'] = guest_email
             msg.attach(MIMEText(html_content, 'html'))
             
-            if smtp_settings["smtp_port"] == 465:
-                server = smtplib.SMTP_SSL(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-            else:
-                server = smtplib.SMTP(smtp_settings["smtp_host"], smtp_settings["smtp_port"])
-                server.starttls()
-            
-            server.login(smtp_settings["smtp_user"], smtp_settings["smtp_password"])
-            server.sendmail(smtp_settings["smtp_from"], guest_email, msg.as_string())
-            server.quit()
+            await mail_transport.send(
+                forwarder_smtp_account(smtp_settings), msg, from_addr=smtp_settings["smtp_from"], to_addrs=[guest_email]
+            )
             
             logger.info(f"✅ Sent feedback request to {guest_email} for {hotel_name}")
             return True
@@ -18022,20 +21029,14 @@ async def scheduled_pass_expiration_reminders():
                 msg['To'] = user.get("email")
                 msg.attach(MIMEText(email_body, 'html'))
                 
-                def send_email_sync(msg_to_send, settings):
-                    with smtplib.SMTP(settings['host'], settings['port']) as server:
-                        server.starttls()
-                        server.login(settings['username'], settings['password'])
-                        server.send_message(msg_to_send)
-                
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, send_email_sync, msg, smtp_settings)
+                await mail_transport.send(smtp_settings, msg)
                 
                 # Mark reminder as sent
                 await db.users.update_one(
                     {"user_id": user.get("user_id")},
                     {"$set": {"expiration_reminder_sent": True}}
                 )
+                await invalidate_user_principal(user.get("user_id"), reason="expiration reminder")
                 
                 sent_count += 1
                 
@@ -18130,8 +21131,26 @@ def setup_scheduler():
         name="Hotel Search Cache Warming"
     )
     
+    # Static hotel catalogue delta sync - every 6 hours
+    scheduler.add_job(
+        scheduled_static_catalog_sync,
+        IntervalTrigger(hours=6),
+        id="static_catalog_sync",
+        replace_existing=True,
+        name="Static Hotel Catalogue Sync"
+    )
+    
+    # Materialized dashboard counters reconciliation
+    scheduler.add_job(
+        scheduled_dashboard_stats_reconcile,
+        IntervalTrigger(minutes=DASHBOARD_STATS_RECONCILE_MINUTES),
+        id="dashboard_stats_reconcile",
+        replace_existing=True,
+        name="Dashboard Stats Reconciliation"
+    )
+    
     scheduler.start()
-    logger.info("Background scheduler started - Price drop: 6 AM, CMS Daily: 7 AM, Follow-up: 8 AM/PM, Image sync: 3 AM, Email forwarding: 5 min, Check-in: 9 AM, Feedback: 10 AM, Pass Expiry: 11 AM, Cache warming: 30 min")
+    logger.info(f"Background scheduler started - Price drop: 6 AM, CMS Daily: 7 AM, Follow-up: 8 AM/PM, Image sync: 3 AM, Email forwarding: 5 min, Check-in: 9 AM, Feedback: 10 AM, Pass Expiry: 11 AM, Cache warming: 30 min, Static catalogue: 6 h, Dashboard stats: {DASHBOARD_STATS_RECONCILE_MINUTES} min")
 
 async def scheduled_follow_up_emails():
     """Scheduled job to send follow-up emails to visitors who haven't booked"""
@@ -18143,6 +21162,14 @@ async def scheduled_follow_up_emails():
         logger.error(f"Scheduled follow-up error: {str(e)}")
 
 
+async def scheduled_dashboard_stats_reconcile():
+    """Scheduled job to recompute the materialized dashboard counters (repairs increment drift)"""
+    try:
+        await dashboard_stats.reconcile()
+    except Exception as e:
+        logger.error(f"Dashboard stats reconciliation error: {str(e)}")
+
+
 async def scheduled_cms_daily_summary():
     """Scheduled job to send daily CMS summary report to administration@freestays.eu"""
     try:
@@ -18167,8 +21194,7 @@ async def setup_initial_admin():
     """Create initial super admin if not exists"""
     existing = await db.admin_users.find_one({"email": "rob.ozinga@freestays.eu"})
     if not existing:
-        import bcrypt
-        password_hash = bcrypt.hashpw("Barneveld2026!@".encode(), bcrypt.gensalt()).decode()
+        password_hash = await password_hasher.hash("Barneveld2026!@")
         admin_doc = {
             "admin_id": str(uuid.uuid4()),
             "email": "rob.ozinga@freestays.eu",
@@ -18195,6 +21221,10 @@ async def setup_initial_admin():
     await db.audit_logs.create_index("admin_id")
     await db.audit_logs.create_index("created_at")
     await db.audit_logs.create_index("entity_type")
+    
+    # Voucher forwarder: already-forwarded lookups and per-mailbox UID checkpoint
+    await db.forwarded_vouchers.create_index("sunhotels_ref")
+    await db.email_forwarding_state.create_index("mailbox", unique=True)
 
 
 @app.on_event("startup")
@@ -18203,9 +21233,49 @@ async def startup_event():
     setup_scheduler()
     
     # Initialize CMS
-    init_cms(db, JWT_SECRET, STRIPE_API_KEY)
+    init_cms(db, JWT_SECRET, STRIPE_API_KEY, job_queue)
     await setup_initial_admin()
     
+    # Durable background job workers
+    register_background_jobs()
+    await job_queue.start()
+    
+    # Shared Sunhotels HTTP client (connection reuse across all API calls)
+    get_sunhotels_http_client()
+    
+    # In-memory settings snapshot, refreshed via change stream / polling
+    await settings_cache.start()
+    
+    # Authenticated principals by credential, invalidations shared between workers
+    await principal_cache.start(db.principal_invalidations)
+    dashboard_stats.start(db)
+    
+    # Shared L2 search cache (Redis / MongoDB) for all workers
+    await setup_search_cache_backend()
+    
+    # In-memory autocomplete index (loads in the background)
+    await autocomplete_index.start()
+    await hotel_geo_index.start()
+    
+    # Last minute harvest jobs interrupted by a restart
+    try:
+        await resume_interrupted_lastminute_harvests()
+    except Exception as e:
+        logger.warning(f"Last minute harvest resume failed: {e}")
+    
+    # Persistent IMAP session forwarding Sunhotels vouchers as they arrive
+    start_voucher_mailbox_watcher()
+    
+    # PostgreSQL destinations source (pool + trigram indexes)
+    if PG_HOST and await get_pg_pool():
+        await migrate_destination_search()
+    
+    # Local static hotel catalogue
+    try:
+        await static_hotel_catalog.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Static catalogue index creation failed: {e}")
+    
     # Pre-warm MySQL connection pool
     try:
         pool = await get_mysql_pool()
@@ -18219,6 +21289,18 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     scheduler.shutdown(wait=False)
+    await job_queue.stop()
+    await settings_cache.stop()
+    await principal_cache.stop()
+    await close_search_cache_backend()
+    await autocomplete_index.stop()
+    await hotel_geo_index.stop()
+    await stop_voucher_mailbox_watcher()
+    await close_pg_pool()
+    await close_sunhotels_http_client()
+    await mail_transport.close()
+    await push_dispatcher.close()
+    await password_hasher.close()
     await close_mysql_pool()
     client.close()
 